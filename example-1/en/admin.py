@@ -0,0 +1,43 @@
+# admin.py
+import hmac
+import os
+from typing import Any, Mapping, Optional
+
+# Configuration write routes are only served when this is set, to requests that send it as a bearer token
+ADMIN_TOKEN = os.environ.get("MCP_ADMIN_TOKEN", "")
+
+# Longest string a configuration value may be set to, and the range of an integer one
+MAX_STRING_LENGTH = 256
+MAX_INTEGER = 2 ** 31
+
+
+def authorized(headers: Mapping[str, str]) -> bool:
+    """Whether the request headers carry the admin token (compared in constant time)"""
+    if not ADMIN_TOKEN:
+        return False
+    given = headers.get("authorization", "").encode()
+    return hmac.compare_digest(given, f"Bearer {ADMIN_TOKEN}".encode())
+
+
+def invalid_changes(changes: Any, current: Mapping[str, Any]) -> Optional[str]:
+    """Why changes cannot be applied to current, or None when they can
+
+    Only existing keys holding a bool, int or string can change, each to a
+    value of the same type within the size limits, so a request can neither
+    grow the configuration nor swap a value for a large one.
+    """
+    if not isinstance(changes, dict):
+        return "Request body must be a JSON object of changed values"
+    for key, value in changes.items():
+        if key not in current:
+            return f"Unknown key: {key!r}"
+        old = current[key]
+        if type(old) not in (bool, int, str):
+            return f"{key!r} cannot be changed"
+        if type(value) is not type(old):
+            return f"{key!r} must be {type(old).__name__}"
+        if type(value) is str and len(value) > MAX_STRING_LENGTH:
+            return f"{key!r} is longer than {MAX_STRING_LENGTH} characters"
+        if type(value) is int and not -MAX_INTEGER < value < MAX_INTEGER:
+            return f"{key!r} is out of range"
+    return None
@@ -0,0 +1,142 @@
+# admission.py
+import asyncio
+import contextlib
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class Overloaded(Exception):
+    """Raised when a call is shed instead of admitted; retry_after is in whole seconds"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded FIFO wait queue and a wait deadline
+
+    Up to `limit` calls run at once and up to `queue_size` more wait for a
+    slot, each for at most `max_wait` seconds. A call is rejected right away
+    when the queue is full or when the wait predicted from the recent service
+    time is already over the deadline, so a burst costs a fast 503 instead of
+    slowing every other request down.
+    """
+
+    def __init__(self, limit: int = 64, queue_size: int = 128, max_wait: float = 1.0):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of how long an admitted call holds its slot
+        self._service_time = 0.0
+
+        # Metrics
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_deadline = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+        self.max_queue_depth = 0
+
+    def predicted_wait(self) -> float:
+        """Expected wait in seconds for a call arriving now"""
+        return (len(self._waiters) + 1) * self._service_time / self.limit
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.predicted_wait()))
+
+    def check(self):
+        """Raise Overloaded if a call arriving now would be shed"""
+        if self.active < self.limit and not self._waiters:
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected_full += 1
+            raise Overloaded("queue full", self._retry_after())
+        if self.predicted_wait() > self.max_wait:
+            self.rejected_deadline += 1
+            raise Overloaded("wait over deadline", self._retry_after())
+
+    async def acquire(self):
+        """Take a slot, waiting in the queue if needed; raises Overloaded when shed"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        self.check()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        wait_start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended: give it back
+                self.release()
+            else:
+                waiter.cancel()
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_deadline += 1
+            raise Overloaded("wait over deadline", self._retry_after()) from None
+        finally:
+            waited = time.monotonic() - wait_start
+            self.total_wait += waited
+            self.max_observed_wait = max(self.max_observed_wait, waited)
+        self.admitted += 1
+
+    def release(self):
+        """Hand the slot to the oldest waiter, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @contextlib.asynccontextmanager
+    async def admit(self):
+        """async with controller.admit(): run the body in an admitted slot"""
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_time += (time.monotonic() - started - self._service_time) * 0.1
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, wait time and reject counts"""
+        rejected = self.rejected_full + self.rejected_deadline
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "queue_size": self.queue_size,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_deadline": self.rejected_deadline,
+            "reject_rate": rejected / (self.admitted + rejected) if self.admitted + rejected else 0.0,
+            "avg_wait_ms": self.total_wait / self.admitted * 1000 if self.admitted else 0.0,
+            "max_wait_ms": self.max_observed_wait * 1000,
+            "avg_service_ms": self._service_time * 1000,
+            "max_wait_s": self.max_wait
+        }
+
+
+# Controller shared by the tool-call and prompt endpoints, configured from the environment
+controller = AdmissionController(
+    limit=int(os.environ.get("MCP_ADMISSION_LIMIT", "64")),
+    queue_size=int(os.environ.get("MCP_ADMISSION_QUEUE", "128")),
+    max_wait=float(os.environ.get("MCP_ADMISSION_MAX_WAIT", "1.0"))
+)
@@ -0,0 +1,1270 @@
+# benchmark.py
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import signal
+import statistics
+import socket
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import aiohttp
+import httpx
+import psutil
+import pydantic_core
+import uvicorn
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+from mcp.client.websocket import websocket_client
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+import broadcast_hub
+import calculator
+import compression
+import fast_json
+import file_resources
+import http2
+import prompt_engine
+import resource_cache
+import resource_index
+import resources
+import runtime
+import sse_server
+import subscriptions
+
+
+# Expressions typical of what agents send repeatedly
+EXPRESSIONS = [
+    "2 + 3 * 4",
+    "sqrt(16)",
+    "10 + 5",
+    "20 * 3",
+    "sin(pi / 4) ** 2 + cos(pi / 4) ** 2",
+    "log(1024, 2)",
+    "factorial(10) / factorial(8)",
+    "abs(-42) + round(3.14159, 2)",
+]
+
+
+def legacy_evaluate(expression: str) -> Any:
+    """Previous calculator path: namespace rebuilt and expression compiled per call"""
+    allowed_names = {
+        k: v for k, v in math.__dict__.items() if not k.startswith("__")
+    }
+    allowed_names.update({"abs": abs, "round": round})
+    return eval(expression, {"__builtins__": {}}, allowed_names)
+
+
+def measure_per_call(func: Callable[[str], Any], expressions: List[str], rounds: int) -> float:
+    """Return mean latency per call in microseconds"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for expression in expressions:
+            func(expression)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(expressions)) * 1_000_000
+
+
+def measure_latencies(func: Callable[[str], Any], expressions: List[str], rounds: int) -> List[int]:
+    """Return the latency of every single call in nanoseconds"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for expression in expressions:
+            start = clock()
+            func(expression)
+            latencies.append(clock() - start)
+    return latencies
+
+
+def summarize(latencies: List[int]) -> Dict[str, float]:
+    """Return throughput and latency percentiles for a list of latencies"""
+    ordered = sorted(latencies)
+    total_seconds = sum(ordered) / 1_000_000_000
+    return {
+        "throughput": len(ordered) / total_seconds if total_seconds else 0.0,
+        "p50_us": ordered[len(ordered) // 2] / 1000,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1000,
+    }
+
+
+def print_summary(label: str, summary: Dict[str, float]):
+    """Print one benchmark result row"""
+    print(f"  {label:<34} {summary['throughput']:>12,.0f} calls/s"
+          f"   p50 {summary['p50_us']:8.2f} µs   p99 {summary['p99_us']:8.2f} µs")
+
+
+def benchmark_calculator(rounds: int = 5000):
+    """Compare per-call calculator latency before and after the compiled cache"""
+    print("\n" + "="*60)
+    print("🧮 Calculator Benchmark")
+    print("="*60)
+    print(f"{len(EXPRESSIONS)} expressions x {rounds} rounds")
+
+    before = measure_per_call(legacy_evaluate, EXPRESSIONS, rounds)
+
+    calculator.expression_cache.clear()
+    after = measure_per_call(lambda e: calculator.evaluate(e, "eval"), EXPRESSIONS, rounds)
+
+    print(f"  before (namespace + compile per call): {before:8.2f} µs/call")
+    print(f"  after  (shared namespace + LRU cache): {after:8.2f} µs/call")
+    print(f"  speedup: {before / after:.1f}x")
+    print(f"  cache stats: {calculator.expression_cache.stats()}")
+
+
+def benchmark_engine(rounds: int = 2000, unique: int = 5000):
+    """Compare the eval path with the AST expression engine on throughput and p99"""
+    print("\n" + "="*60)
+    print("🧠 Expression Engine Benchmark")
+    print("="*60)
+
+    # Warm: the same expressions repeated, served from each mode's cache
+    print(f"Repeated expressions ({len(EXPRESSIONS)} x {rounds} rounds)")
+    print_summary("eval, uncached (previous path)", summarize(
+        measure_latencies(legacy_evaluate, EXPRESSIONS, rounds)))
+    calculator.expression_cache.clear()
+    print_summary("eval, cached", summarize(
+        measure_latencies(lambda e: calculator.evaluate(e, "eval"), EXPRESSIONS, rounds)))
+    calculator.ast_cache.clear()
+    print_summary("ast engine, cached", summarize(
+        measure_latencies(lambda e: calculator.evaluate(e, "ast"), EXPRESSIONS, rounds)))
+
+    # Cold: every expression is new, so parse/compile cost is paid on every call
+    fresh = [f"{i} * sqrt({i}) + {i} % 7 - log({i} + 1)" for i in range(unique)]
+    print(f"Unique expressions ({unique}, compile on every call)")
+    print_summary("eval, compile + run", summarize(measure_latencies(
+        lambda e: eval(calculator.compile_eval(e), calculator.SAFE_GLOBALS, calculator.SAFE_LOCALS),
+        fresh, 1)))
+    print_summary("ast engine, compile + run", summarize(measure_latencies(
+        lambda e: calculator.compile_ast(e)(), fresh, 1)))
+
+
+def serialization_payloads() -> Dict[str, Any]:
+    """Response payloads as the SSE server's REST endpoints return them"""
+    tool = types.Tool(
+        name="calculator",
+        description="Performs simple mathematical calculations",
+        inputSchema={
+            "type": "object",
+            "properties": {"expression": {"type": "string", "description": "Mathematical expression to calculate (e.g., 2+2)"}},
+            "required": ["expression"]
+        }
+    )
+    code = "def fibonacci(n):\n    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)\n" * 20
+    return {
+        "tools listing (20)": {"tools": [tool.model_copy(update={"name": f"tool_{i}"}) for i in range(20)]},
+        "tool result": {"result": [types.TextContent(type="text", text="Calculation result: 4")]},
+        "batch result (50)": {"results": [
+            {"result": [types.TextContent(type="text", text=f"Calculation result: {i}")]} for i in range(50)
+        ]},
+        "prompt result": {"result": types.GetPromptResult(
+            description="Code review prompt",
+            messages=[types.PromptMessage(
+                role="user",
+                content=types.TextContent(type="text", text=f"Please review the following code:\n\n```\n{code}\n```")
+            )]
+        )},
+        "metrics": {"evaluation_pool": {"workers": 4, "busy": 1, "queued": 0, "completed": 12345,
+                                        "timeouts": 2, "memory_kills": 1, "restarts": 3}},
+    }
+
+
+def legacy_render(content: Any) -> bytes:
+    """Previous response path: model_dump() to dicts, then JSONResponse's json.dumps"""
+    plain = pydantic_core.to_jsonable_python(content, by_alias=True, exclude_none=True)
+    return json.dumps(plain, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def benchmark_serialization(rounds: int = 2000):
+    """Compare JSONResponse rendering with the fast_json encoders on response payloads"""
+    print("\n" + "="*60)
+    print("📦 JSON Response Serialization Benchmark")
+    print("="*60)
+    encoder = "orjson" if fast_json.orjson is not None else "json (orjson not installed)"
+    print(f"Plain data encoder: {encoder}, MCP types: pydantic-core")
+
+    for name, payload in serialization_payloads().items():
+        assert json.loads(legacy_render(payload)) == json.loads(fast_json.dumps(payload))
+        print(f"{name} ({len(fast_json.dumps(payload))} bytes)")
+        print_summary("json.dumps (previous path)", summarize(
+            measure_latencies(legacy_render, [payload], rounds)))
+        print_summary("fast_json", summarize(
+            measure_latencies(fast_json.dumps, [payload], rounds)))
+
+
+def weather_alerts(count: int = 40) -> str:
+    """Alert text shaped like example-3's get_alerts output (NWS alerts run to tens of KB)"""
+    alerts = []
+    for i in range(count):
+        alerts.append(f"""
+Event: {("Flood Warning", "Heat Advisory", "Winter Storm Watch")[i % 3]}
+Area: County {i}; County {i + 1}; Coastal Zone {i % 7}
+Severity: {("Moderate", "Severe", "Minor")[i % 3]}
+Description: * WHAT...Flooding caused by excessive rainfall is expected. * WHERE...Portions of the
+area including County {i}. * WHEN...Until {i % 12 + 1}:00 PM this afternoon. * IMPACTS...Flooding of
+rivers, creeks, streams, and other low-lying and flood-prone locations is imminent or occurring.
+Instructions: Turn around, don't drown when encountering flooded roads. Most flood deaths occur in vehicles.
+""")
+    return "\n---\n".join(alerts)
+
+
+async def compression_payloads() -> Dict[str, bytes]:
+    """Response bodies as the servers send them, before compression"""
+    prompt = await sse_server.get_prompt("code_review", {"code": open(sse_server.__file__).read()})
+    await sse_server.build_listings()
+    return {
+        "code_review prompt (sse_server.py)": fast_json.dumps(prompt),
+        "weather alerts tool result": fast_json.dumps(
+            {"result": [types.TextContent(type="text", text=weather_alerts())]}),
+        "tools listing": sse_server.listings["/tools"][0],
+        "config resource": fast_json.dumps({"content": await sse_server.read_resource("file://config.json")}),
+    }
+
+
+async def benchmark_compression(rounds: int = 200):
+    """Bytes saved and CPU cost of each available content coding on large and small responses"""
+    print("\n" + "="*60)
+    print("🗜️ Response Compression Benchmark")
+    print("="*60)
+    minimum_size = sse_server.COMPRESSION_MIN_SIZE
+    print(f"Available codings: {', '.join(compression.ENCODERS)} (minimum size {minimum_size} bytes)")
+
+    for name, body in (await compression_payloads()).items():
+        print(f"{name} ({len(body):,} bytes)")
+        if len(body) < minimum_size:
+            print("  below the minimum size: sent uncompressed")
+            continue
+        for encoding, (factory, level) in compression.ENCODERS.items():
+            data = factory(level).compress(body, final=True)
+            started = time.perf_counter()
+            for _ in range(rounds):
+                factory(level).compress(body, final=True)
+            seconds = (time.perf_counter() - started) / rounds
+            print(f"  {encoding:<5} level {level}: {len(data):>8,} bytes  saved {1 - len(data) / len(body):6.1%}"
+                  f"  {seconds * 1e6:8.1f} µs  {len(body) / seconds / 1e6:7.1f} MB/s")
+
+
+async def legacy_sse_endpoint(request):
+    """Previous /sse endpoint: a heartbeat loop and an idle message task per connection"""
+
+    async def event_generator():
+        yield f"data: {json.dumps({'type': 'connected', 'message': 'MCP Server connected'})}\n\n"
+
+        async def process_messages():
+            while True:
+                await asyncio.sleep(1)
+
+        task = asyncio.create_task(process_messages())
+        try:
+            while True:
+                yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': asyncio.get_event_loop().time()})}\n\n"
+                await asyncio.sleep(5)
+        finally:
+            task.cancel()
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
+class SseConnections:
+    """Many in-process SSE requests driven straight through an ASGI app"""
+
+    def __init__(self, app):
+        self.app = app
+        self.tasks: List[asyncio.Task] = []
+        self.disconnect = None
+        self.connected = 0
+        self.marker = b""
+        self.sent_at = 0
+        self.latencies: List[int] = []
+        self._all_connected = None
+        self._all_delivered = None
+
+    async def open(self, count: int):
+        """Open count connections and wait until each has received its first frame"""
+        loop = asyncio.get_running_loop()
+        self.disconnect = loop.create_future()
+        self._all_connected = loop.create_future()
+        for i in range(count):
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+                "method": "GET", "scheme": "http", "path": "/sse", "raw_path": b"/sse",
+                "query_string": b"", "root_path": "", "headers": [(b"host", b"localhost")],
+                "client": ("127.0.0.1", 10000 + i), "server": ("localhost", 8000)
+            }
+            self.tasks.append(loop.create_task(self.app(scope, self._receive, self._send)))
+        await self._all_connected
+        self.count = count
+
+    async def _receive(self):
+        await self.disconnect
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] != "http.response.body" or not message.get("body"):
+            return
+        if self.marker and self.marker in message["body"]:
+            self.latencies.append(time.perf_counter_ns() - self.sent_at)
+            if len(self.latencies) == self.count:
+                self._all_delivered.set_result(None)
+        elif not self._all_connected.done():
+            self.connected += 1
+            if self.connected == len(self.tasks):
+                self._all_connected.set_result(None)
+
+    async def fan_out(self, round_number: int) -> int:
+        """Publish one event to every connection; returns the publish call time in nanoseconds"""
+        self.latencies = []
+        self._all_delivered = asyncio.get_running_loop().create_future()
+        self.marker = f'"round":{round_number}'.encode()
+        self.sent_at = time.perf_counter_ns()
+        broadcast_hub.hub.publish({"type": "benchmark", "round": round_number})
+        publish_ns = time.perf_counter_ns() - self.sent_at
+        await self._all_delivered
+        return publish_ns
+
+    async def close(self):
+        """Disconnect every client and wait for the server side to finish"""
+        self.disconnect.set_result(None)
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+async def measure_connections(app, count: int, idle: float = 3.0):
+    """Open count SSE connections; returns them with memory, tasks and idle CPU share"""
+    tasks_before = len(asyncio.all_tasks())
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    connections = SseConnections(app)
+    await connections.open(count)
+    memory = (tracemalloc.get_traced_memory()[0] - before) / count
+    tracemalloc.stop()
+    tasks = (len(asyncio.all_tasks()) - tasks_before) / count
+
+    # CPU spent while every connection is just waiting for the next event
+    cpu_start = time.process_time()
+    await asyncio.sleep(idle)
+    cpu = (time.process_time() - cpu_start) / idle
+    return connections, memory, tasks, cpu
+
+
+async def benchmark_broadcast(connections: int = 10000, rounds: int = 5):
+    """Open many concurrent SSE connections and measure memory per connection and fan-out latency"""
+    print("\n" + "="*60)
+    print("📡 SSE Broadcast Benchmark")
+    print("="*60)
+    print(f"{connections} concurrent in-process SSE connections (ASGI, sockets excluded)")
+
+    legacy, memory, tasks, cpu = await measure_connections(
+        Starlette(routes=[Route("/sse", legacy_sse_endpoint)]), connections)
+    print(f"  per-connection timers (previous path): {memory / 1024:7.2f} KiB/conn"
+          f"   {tasks:.0f} tasks/conn   idle CPU {cpu:6.1%}")
+    await legacy.close()
+
+    current, memory, tasks, cpu = await measure_connections(
+        Starlette(routes=[Route("/sse", sse_server.events_endpoint)]), connections)
+    print(f"  shared broadcast hub:                  {memory / 1024:7.2f} KiB/conn"
+          f"   {tasks:.0f} tasks/conn   idle CPU {cpu:6.1%}")
+
+    print(f"Fan-out of one event to {connections} connections ({rounds} rounds)")
+    latencies: List[int] = []
+    for round_number in range(rounds):
+        publish_ns = await current.fan_out(round_number)
+        latencies.extend(current.latencies)
+    summary = summarize(latencies)
+    print(f"  publish call: {publish_ns / 1000:8.0f} µs   delivery p50 {summary['p50_us'] / 1000:7.2f} ms"
+          f"   p99 {summary['p99_us'] / 1000:7.2f} ms   max {max(latencies) / 1_000_000:7.2f} ms")
+    print(f"  hub stats: {broadcast_hub.hub.stats()}")
+    await current.close()
+    broadcast_hub.hub.stop()
+
+
+async def measure_calls(call: Callable[[int], Any], calls: int, concurrency: int) -> Dict[str, float]:
+    """Run calls with at most concurrency in flight; returns wall-clock throughput and latencies"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[int] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter_ns()
+            await call(i)
+            latencies.append(time.perf_counter_ns() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    summary = summarize(latencies)
+    summary["throughput"] = calls / (time.perf_counter() - start)
+    return summary
+
+
+async def benchmark_transport(calls: int = 500, concurrency: int = 16):
+    """Compare tool calls over the REST routes with JSON-RPC requests over one MCP session (SSE or WebSocket)"""
+    print("\n" + "="*60)
+    print("🔗 REST vs MCP Session Benchmark")
+    print("="*60)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(sse_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    print(f"echo tool x {calls} calls over loopback (client and server share one process)")
+
+    async def rest_call(http: aiohttp.ClientSession, i: int):
+        async with http.post(f"{base_url}/tools/call",
+                             json={"name": "echo", "arguments": {"message": str(i)}}) as response:
+            await response.read()
+
+    try:
+        # Previous path: a new HTTP connection for every call
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True)) as http:
+            print_summary("REST, new connection per call", await measure_calls(
+                lambda i: rest_call(http, i), calls, 1))
+        async with aiohttp.ClientSession() as http:
+            print_summary("REST, keep-alive", await measure_calls(
+                lambda i: rest_call(http, i), calls, 1))
+            print_summary(f"REST, keep-alive x{concurrency}", await measure_calls(
+                lambda i: rest_call(http, i), calls, concurrency))
+        # The MCP client below posts with httpx, so this is the like-for-like REST row
+        async with httpx.AsyncClient() as http:
+            print_summary("REST, keep-alive (httpx)", await measure_calls(
+                lambda i: http.post(f"{base_url}/tools/call",
+                                    json={"name": "echo", "arguments": {"message": str(i)}}), calls, 1))
+
+        async with sse_client(f"{base_url}/sse") as streams:
+            async with ClientSession(*streams) as session:
+                await session.initialize()
+                call = lambda i: session.call_tool("echo", {"message": str(i)})
+                print_summary("MCP session (SSE + POST)", await measure_calls(call, calls, 1))
+                print_summary(f"MCP session (SSE + POST) x{concurrency}", await measure_calls(call, calls, concurrency))
+
+        async with websocket_client(f"ws://127.0.0.1:{port}/ws") as streams:
+            async with ClientSession(*streams) as session:
+                await session.initialize()
+                call = lambda i: session.call_tool("echo", {"message": str(i)})
+                print_summary("MCP session (WebSocket)", await measure_calls(call, calls, 1))
+                print_summary(f"MCP session (WebSocket) x{concurrency}", await measure_calls(call, calls, concurrency))
+        print(f"  session stats: {sse_server.sessions.stats()}")
+    finally:
+        server.should_exit = True
+        await serving
+
+
+def load_worker(url: str, seconds: float, concurrency: int) -> List[int]:
+    """Client process body: keep `concurrency` keep-alive echo calls in flight for `seconds`"""
+    async def run() -> List[int]:
+        latencies: List[int] = []
+        deadline = time.perf_counter() + seconds
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as http:
+            async def caller(i: int):
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter_ns()
+                    async with http.post(url, json={"name": "echo", "arguments": {"message": str(i)}}) as response:
+                        await response.read()
+                    latencies.append(time.perf_counter_ns() - start)
+
+            await asyncio.gather(*(caller(i) for i in range(concurrency)))
+        return latencies
+
+    return asyncio.run(run())
+
+
+async def check_sessions(base_url: str, sessions: int) -> int:
+    """Open MCP sessions one after another and return how many completed their calls"""
+    completed = 0
+    for i in range(sessions):
+        try:
+            async with sse_client(f"{base_url}/sse") as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    for j in range(3):
+                        await session.call_tool("echo", {"message": f"{i}.{j}"})
+            completed += 1
+        except Exception:
+            pass
+    return completed
+
+
+async def wait_until_ready(base_url: str):
+    """Poll /metrics until a freshly started server answers"""
+    async with httpx.AsyncClient() as http:
+        for _ in range(300):
+            try:
+                if (await http.get(f"{base_url}/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+
+async def benchmark_scaling(seconds: float = 5.0, concurrency: int = 64):
+    """Tool call throughput against launcher.py with 1..N worker processes"""
+    print("\n" + "="*60)
+    print("🧵 Multi-process Scaling Benchmark")
+    print("="*60)
+    cores = os.cpu_count() or 1
+    clients = max(1, cores // 2)
+    print(f"{cores} CPU cores; echo tool over keep-alive REST from {clients} client process(es)"
+          f" x {concurrency // clients} connections, {seconds:g}s per row (clients share the machine)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    loop = asyncio.get_running_loop()
+    baseline = None
+    with ProcessPoolExecutor(clients, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for workers in sorted({1, 2, 4, cores}):
+            process = subprocess.Popen(
+                [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port),
+                 "--workers", str(workers), "--log-level", "warning"],
+                cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+            try:
+                await wait_until_ready(base_url)
+                # Let the remaining workers finish starting up
+                await asyncio.sleep(1.0)
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(executor, load_worker, f"{base_url}/tools/call", seconds, concurrency // clients)
+                    for _ in range(clients)))
+                latencies = [latency for result in results for latency in result]
+                summary = summarize(latencies)
+                summary["throughput"] = len(latencies) / seconds
+                baseline = baseline or summary["throughput"]
+                print_summary(f"{workers} worker(s), x{summary['throughput'] / baseline:.2f}", summary)
+                # Stateful sessions must keep working however connections are spread
+                sessions = await check_sessions(base_url, 8)
+                print(f"  {'':<34} MCP sessions across workers: {sessions}/8 completed")
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait()
+
+
+async def benchmark_runtime(seconds: float = 5.0, concurrency: int = 64):
+    """Tool call throughput and p99 on each event loop / HTTP parser combination"""
+    print("\n" + "="*60)
+    print("🚀 Event Loop / HTTP Parser Benchmark")
+    print("="*60)
+    cores = os.cpu_count() or 1
+    clients = max(1, cores // 2)
+    print(f"POST /tools/call (echo) on one server process, keep-alive REST from {clients} client process(es)"
+          f" x {concurrency // clients} connections, {seconds:g}s per row")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(clients, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for event_loop in runtime.LOOPS:
+            for http in runtime.HTTP_PARSERS:
+                label = f"{event_loop} + {http}"
+                missing = [name for name in (event_loop, http) if not runtime.available(name)]
+                if missing:
+                    print(f"  {label:<34} skipped ({', '.join(missing)} not installed)")
+                    continue
+                process = subprocess.Popen(
+                    [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+                     "--loop", event_loop, "--http", http, "--log-level", "warning"],
+                    cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+                try:
+                    await wait_until_ready(base_url)
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(executor, load_worker, f"{base_url}/tools/call", seconds,
+                                             concurrency // clients)
+                        for _ in range(clients)))
+                    latencies = [latency for result in results for latency in result]
+                    summary = summarize(latencies)
+                    summary["throughput"] = len(latencies) / seconds
+                    print_summary(label, summary)
+                finally:
+                    process.send_signal(signal.SIGTERM)
+                    process.wait()
+
+
+def server_connections(port: int) -> int:
+    """Established TCP connections accepted on `port` by this process"""
+    return sum(1 for conn in psutil.Process().net_connections("tcp")
+               if conn.laddr.port == port and conn.status == psutil.CONN_ESTABLISHED)
+
+
+async def measure_sessions(base_url: str, port: int, sessions: int, calls: int, **client) -> Dict[str, Any]:
+    """Hold `sessions` MCP sessions open at once, then make `calls` tool calls in each
+
+    Returns the connections the server holds while all sessions are open, and
+    session-open and tool-call latencies in nanoseconds.
+    """
+    open_latencies: List[int] = []
+    call_latencies: List[int] = []
+    all_open = asyncio.Event()
+    finished = asyncio.Event()
+    failed = 0
+
+    async def one(i: int):
+        nonlocal failed
+        start = time.perf_counter_ns()
+        try:
+            async with sse_client(f"{base_url}/sse", timeout=60, **client) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    open_latencies.append(time.perf_counter_ns() - start)
+                    if len(open_latencies) + failed == sessions:
+                        all_open.set()
+                    await all_open.wait()
+                    for j in range(calls):
+                        start = time.perf_counter_ns()
+                        await session.call_tool("echo", {"message": f"{i}.{j}"})
+                        call_latencies.append(time.perf_counter_ns() - start)
+                    # Stay open until the connections have been counted
+                    await finished.wait()
+        except Exception:
+            failed += 1
+            if len(open_latencies) + failed == sessions:
+                all_open.set()
+
+    tasks = [asyncio.create_task(one(i)) for i in range(sessions)]
+    await all_open.wait()
+    connections = server_connections(port)
+    while len(call_latencies) + failed * calls < sessions * calls and not all(task.done() for task in tasks):
+        await asyncio.sleep(0.1)
+    connections = max(connections, server_connections(port))
+    finished.set()
+    await asyncio.gather(*tasks)
+    return {"connections": connections, "failed": failed, "open": summarize(open_latencies),
+            "call": summarize(call_latencies)}
+
+
+async def benchmark_http2(sessions: int = 1000, calls: int = 3):
+    """Connections and latency of many concurrent MCP sessions over HTTP/1.1 and over h2c"""
+    print("\n" + "="*60)
+    print("🔀 HTTP/1.1 vs HTTP/2 (h2c) Benchmark")
+    print("="*60)
+    print(f"{sessions} MCP sessions on /sse open at once, then {calls} echo calls each"
+          f" (client and server share one process)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    def report(label: str, result: Dict[str, Any]):
+        print(f"  {label:<34} {result['connections']:>6} connections"
+              f"   open p50 {result['open']['p50_us'] / 1000:8.2f} ms  p99 {result['open']['p99_us'] / 1000:8.2f} ms"
+              f"   call p50 {result['call']['p50_us'] / 1000:8.2f} ms  p99 {result['call']['p99_us'] / 1000:8.2f} ms"
+              + (f"   ({result['failed']} failed)" if result["failed"] else ""))
+
+    server = uvicorn.Server(uvicorn.Config(sse_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        # Previous setup: every session opens its own SSE connection plus a POST connection
+        report("HTTP/1.1, uvicorn", await measure_sessions(base_url, port, sessions, calls))
+    finally:
+        server.should_exit = True
+        await serving
+
+    if http2.hypercorn_serve is None or http2.h2 is None:
+        print("  HTTP/2 rows skipped (pip install hypercorn h2)")
+        return
+    stop = asyncio.Event()
+    serving = asyncio.create_task(http2.serve(sse_server.app, [f"127.0.0.1:{port}"], log_level="warning",
+                                              shutdown_trigger=stop.wait))
+    await wait_until_ready(base_url)
+    try:
+        report("HTTP/1.1, Hypercorn", await measure_sessions(base_url, port, sessions, calls))
+        async with http2.Http2Pool() as pool:
+            report("HTTP/2 (h2c), shared pool", await measure_sessions(
+                base_url, port, sessions, calls, httpx_client_factory=pool.client_factory))
+    finally:
+        stop.set()
+        await serving
+
+
+async def benchmark_uds(calls: int = 1000, concurrency: int = 16):
+    """Tool call latency for a client on the same host, over loopback TCP and over a Unix domain socket"""
+    print("\n" + "="*60)
+    print("🔌 Loopback TCP vs Unix Domain Socket Benchmark")
+    print("="*60)
+    print(f"echo tool x {calls} calls against launcher.py --workers 1 listening on both (separate process)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    socket_dir = tempfile.mkdtemp(prefix="mcp-uds-")
+    path = os.path.join(socket_dir, "mcp.sock")
+    process = subprocess.Popen(
+        [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+         "--uds", path, "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+
+    async def rest_call(http: aiohttp.ClientSession, i: int):
+        async with http.post(f"{base_url}/tools/call",
+                             json={"name": "echo", "arguments": {"message": str(i)}}) as response:
+            await response.read()
+
+    def uds_client(headers=None, timeout=None, auth=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=path), headers=headers,
+                                 timeout=timeout or httpx.Timeout(30.0), auth=auth)
+
+    transports = {
+        "TCP": (lambda **kw: aiohttp.TCPConnector(**kw), {}),
+        "UDS": (lambda **kw: aiohttp.UnixConnector(path=path, **kw), {"httpx_client_factory": uds_client}),
+    }
+    try:
+        await wait_until_ready(base_url)
+        for name, (connector, mcp_client) in transports.items():
+            async with aiohttp.ClientSession(connector=connector(force_close=True)) as http:
+                print_summary(f"{name}, new connection per call", await measure_calls(
+                    lambda i: rest_call(http, i), calls, 1))
+            async with aiohttp.ClientSession(connector=connector()) as http:
+                print_summary(f"{name}, keep-alive", await measure_calls(
+                    lambda i: rest_call(http, i), calls, 1))
+                print_summary(f"{name}, keep-alive x{concurrency}", await measure_calls(
+                    lambda i: rest_call(http, i), calls, concurrency))
+            async with sse_client(f"{base_url}/sse", **mcp_client) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    print_summary(f"{name}, MCP session (SSE + POST)", await measure_calls(
+                        lambda i: session.call_tool("echo", {"message": str(i)}), calls, 1))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+# 64 KB of log lines, repeated to make a synthetic log of any size
+LOG_BLOCK = b"".join(f"2025-01-01T00:00:{i % 60:02d}Z INFO request {i} handled in {i % 97} ms\n".encode()
+                     for i in range(2000))[:64 * 1024]
+
+
+class GeneratedLog(resources.ResourceProvider):
+    """Seekable synthetic log produced chunk by chunk, never held in memory"""
+
+    def __init__(self, uri: str, length: int):
+        super().__init__(uri, "Generated log", mime_type="text/plain")
+        self.length = length
+
+    async def size(self) -> int:
+        return self.length
+
+    async def read(self):
+        return self.read_range(0, self.length - 1)
+
+    def read_range(self, start: int, end: int):
+        async def chunks():
+            offset = start
+            while offset <= end:
+                begin = offset % len(LOG_BLOCK)
+                chunk = LOG_BLOCK[begin:begin + min(len(LOG_BLOCK) - begin, end + 1 - offset)]
+                yield chunk
+                offset += len(chunk)
+
+        return chunks()
+
+
+async def legacy_read_resource_endpoint(request):
+    """Previous /resources/read: the whole resource in memory, then encoded to JSON at once"""
+    content = await resources.collect(await sse_server.resource_registry.get(request.query_params["uri"]).read())
+    return JSONResponse({"content": content.decode() if isinstance(content, bytes) else content})
+
+
+async def measure_download(http: httpx.AsyncClient, url: str, headers: Dict[str, str]) -> Dict[str, float]:
+    """Download url, discarding the body as it arrives; returns time to first byte, total time and bytes"""
+    start = time.perf_counter()
+    first_byte = None
+    received = 0
+    async with http.stream("GET", url, headers=headers) as response:
+        async for chunk in response.aiter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            received += len(chunk)
+    return {"ttfb_ms": (first_byte or 0.0) * 1000, "total_ms": (time.perf_counter() - start) * 1000,
+            "bytes": received}
+
+
+async def benchmark_resources(size_mb: int = 64):
+    """Peak memory and latency of reading a large resource as one JSON body vs streamed vs by Range"""
+    print("\n" + "="*60)
+    print("📜 Large Resource Read Benchmark")
+    print("="*60)
+    size = size_mb * 1024 * 1024
+    uri = "log://generated"
+    sse_server.resource_registry.add(GeneratedLog(uri, size))
+    print(f"{size_mb} MB generated log resource (client and server share one process)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    app = Starlette(routes=[Route("/legacy", legacy_read_resource_endpoint),
+                            Route("/resources/stream", sse_server.stream_resource_endpoint)])
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    middle = size // 2
+    rows = [
+        ("JSON body (previous)", f"/legacy?uri={uri}", {}),
+        ("Streamed", f"/resources/stream?uri={uri}", {}),
+        ("Range: 1 MB from the middle", f"/resources/stream?uri={uri}",
+         {"Range": f"bytes={middle}-{middle + 1024 * 1024 - 1}"}),
+    ]
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=None) as http:
+            for label, url, headers in rows:
+                timing = await measure_download(http, url, headers)
+                # Separate run for memory: tracing allocations slows everything down
+                tracemalloc.start()
+                await measure_download(http, url, headers)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"  {label:<34} {timing['bytes'] / 1024 / 1024:8.1f} MB   first byte {timing['ttfb_ms']:8.1f} ms"
+                      f"   total {timing['total_ms']:8.1f} ms   peak memory {peak / 1024 / 1024:8.1f} MB")
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def benchmark_files(size_mb: int = 256, downloads: int = 3):
+    """Downloading a large file resource through Python vs with sendfile, and a 1 MB mmap window of it"""
+    print("\n" + "="*60)
+    print("📂 File Resource Benchmark")
+    print("="*60)
+    root = tempfile.mkdtemp(prefix="mcp-files-")
+    path = os.path.join(root, "app.log")
+    with open(path, "wb") as file:
+        for _ in range(size_mb * 1024 * 1024 // len(LOG_BLOCK)):
+            file.write(LOG_BLOCK)
+    size = os.path.getsize(path)
+    print(f"{size_mb} MB log under MCP_RESOURCE_ROOT, GET /resources/stream x {downloads} "
+          f"against launcher.py --workers 1 (separate process)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    url = f"{base_url}/resources/stream?uri=file:///app.log"
+    rows = [("Read + write in Python (h11)", "h11"), ("sendfile (httptools)", "httptools")]
+    try:
+        for label, parser in rows:
+            process = subprocess.Popen(
+                [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+                 "--http", parser, "--log-level", "warning"],
+                cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL,
+                env={**os.environ, "MCP_RESOURCE_ROOT": root})
+            try:
+                await wait_until_ready(base_url)
+                worker = psutil.Process(process.pid).children()[0]
+                cpu = worker.cpu_times()
+                async with httpx.AsyncClient(timeout=None) as http:
+                    timings = [await measure_download(http, url, {"Accept-Encoding": "identity"})
+                               for _ in range(downloads)]
+                used = worker.cpu_times()
+                server_cpu = (used.user + used.system - cpu.user - cpu.system) / downloads * 1000
+                total = sum(timing["total_ms"] for timing in timings) / downloads
+                print(f"  {label:<34} {size / 1024 / 1024 / (total / 1000):8.0f} MB/s   total {total:8.1f} ms"
+                      f"   server CPU {server_cpu:8.1f} ms per download")
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait()
+
+        # resources/read of a 1 MB window, in this process: the slice vs the whole file read first
+        files = file_resources.FileRoot(root)
+        middle = size // 2
+        window = f"file:///app.log?range={middle}-{middle + 1024 * 1024 - 1}"
+
+        def whole_file_slice():
+            with open(path, "rb") as file:
+                return file.read()[middle:middle + 1024 * 1024].decode("utf-8", errors="replace")
+
+        for label, read in (("1 MB window, whole file read", whole_file_slice),
+                            ("1 MB window, mmap slice", lambda: files.read(window))):
+            tracemalloc.start()
+            start = time.perf_counter()
+            read()
+            elapsed = (time.perf_counter() - start) * 1000
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {label:<34} {elapsed:8.1f} ms   peak memory {peak / 1024 / 1024:8.1f} MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+async def benchmark_resource_index(files: int = 100_000, per_directory: int = 1000, listings: int = 20):
+    """list_resources over a large root: a walk per call vs the inotify-maintained index"""
+    print("\n" + "="*60)
+    print("🗂️ Resource Index Benchmark")
+    print("="*60)
+    root = tempfile.mkdtemp(prefix="mcp-index-")
+    for number in range(files):
+        directory = os.path.join(root, f"d{number // per_directory:04d}")
+        if number % per_directory == 0:
+            os.mkdir(directory)
+        with open(os.path.join(directory, f"f{number:06d}.log"), "wb") as file:
+            file.write(b"x")
+    print(f"{files:,} files in {files // per_directory} directories under the resource root")
+
+    try:
+        walk = file_resources.FileRoot(root)
+        start = time.perf_counter()
+        listed = len(walk.resources())
+        walk_ms = (time.perf_counter() - start) * 1000
+        print(f"  {'Walk per list_resources (previous)':<36} {walk_ms:10.1f} ms   {listed:,} resources")
+
+        index = resource_index.ResourceIndex(file_resources.FileRoot(root))
+        start = time.perf_counter()
+        await index.start()
+        print(f"  {'Index build + watches (' + index.mode + ')':<36} {(time.perf_counter() - start) * 1000:10.1f} ms"
+              f"   {index.stats()['watches']} watches, once at startup")
+        try:
+            start = time.perf_counter()
+            for _ in range(listings):
+                listed = len(index.resources())
+            indexed_ms = (time.perf_counter() - start) * 1000 / listings
+            print(f"  {'Indexed list_resources':<36} {indexed_ms:10.2f} ms   {walk_ms / indexed_ms:,.0f}x faster")
+
+            # One new file: time until the index has it, and the next listing after the change
+            changed = asyncio.Event()
+            index.on_change(lambda uris: changed.set())
+            start = time.perf_counter()
+            with open(os.path.join(root, "d0000", "new.log"), "wb") as file:
+                file.write(b"y")
+            await changed.wait()
+            update_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            listed = len(index.resources())
+            relist_ms = (time.perf_counter() - start) * 1000
+            print(f"  {'New file -> index updated':<36} {update_ms:10.2f} ms   next listing {relist_ms:.2f} ms"
+                  f" ({listed:,} resources)")
+        finally:
+            index.stop()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+async def benchmark_subscriptions(clients: int = 20, bursts: int = 5, burst_size: int = 20,
+                                  poll_interval: float = 0.1):
+    """Clients watching file://config.json: polling read_resource vs resources/subscribe"""
+    print("\n" + "="*60)
+    print("🔔 Resource Subscription Benchmark")
+    print("="*60)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(sse_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    print(f"{clients} clients watching file://config.json; {bursts} bursts of {burst_size} changes, 0.5 s apart")
+
+    async def change_config(changed_at: List[float]):
+        for burst in range(bursts):
+            await asyncio.sleep(0.5)
+            changed_at.append(time.perf_counter())
+            for change in range(burst_size):
+                sse_server.update_config({"revision": burst * burst_size + change})
+                await asyncio.sleep(0.002)
+        await asyncio.sleep(0.5)
+
+    def report(label: str, detections: List[List[float]], changed_at: List[float], requests: int):
+        # Latency from the start of each burst to the first time a client noticed it
+        bounds = changed_at + [math.inf]
+        latencies = [min(seen) - bounds[i] for times in detections for i in range(len(changed_at))
+                     if (seen := [t for t in times if bounds[i] <= t < bounds[i + 1]])]
+        noticed = sum(len(times) for times in detections) / clients
+        print(f"  {label:<32} {requests / clients:7.1f} requests/client   {noticed:5.1f} updates/client   "
+              f"latency {statistics.mean(latencies) * 1000:6.1f} ms (missed {bursts * clients - len(latencies)})")
+
+    try:
+        # Previous path: every client re-reads the resource and compares bodies
+        changed_at: List[float] = []
+        detections = [[] for _ in range(clients)]
+        requests = 0
+        done = asyncio.Event()
+
+        async def poll(http: aiohttp.ClientSession, times: List[float]):
+            nonlocal requests
+            last = None
+            while not done.is_set():
+                async with http.get(f"{base_url}/resources/read", params={"uri": "file://config.json"}) as response:
+                    body = await response.read()
+                requests += 1
+                if last is not None and body != last:
+                    times.append(time.perf_counter())
+                last = body
+                await asyncio.sleep(poll_interval)
+
+        async with aiohttp.ClientSession() as http:
+            pollers = [asyncio.create_task(poll(http, times)) for times in detections]
+            await change_config(changed_at)
+            done.set()
+            await asyncio.gather(*pollers)
+        report(f"Polling every {poll_interval * 1000:.0f} ms", detections, changed_at, requests)
+
+        changed_at = []
+        detections = [[] for _ in range(clients)]
+
+        async def watch(times: List[float], subscribed: asyncio.Event, finished: asyncio.Event):
+            async def on_message(message):
+                if (isinstance(message, types.ServerNotification)
+                        and isinstance(message.root, types.ResourceUpdatedNotification)):
+                    times.append(time.perf_counter())
+
+            async with sse_client(f"{base_url}/sse") as streams:
+                async with ClientSession(*streams, message_handler=on_message) as session:
+                    await session.initialize()
+                    await session.subscribe_resource("file://config.json")
+                    subscribed.set()
+                    await finished.wait()
+
+        finished = asyncio.Event()
+        ready = [asyncio.Event() for _ in range(clients)]
+        watchers = [asyncio.create_task(watch(times, event, finished)) for times, event in zip(detections, ready)]
+        await asyncio.gather(*(event.wait() for event in ready))
+        await change_config(changed_at)
+        finished.set()
+        await asyncio.gather(*watchers)
+        report(f"resources/subscribe ({subscriptions.hub.window * 1000:.0f} ms window)", detections, changed_at,
+               clients * 2)
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def measure_reads(uri: str, reads: int, update_every: int = 0) -> List[int]:
+    """Latency of every MCP read_resource call in nanoseconds; update_every > 0 changes the config that often"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for index in range(reads):
+        if update_every and index % update_every == 0:
+            sse_server.update_config({"revision": index})
+        start = clock()
+        await sse_server.read_resource(uri)
+        latencies.append(clock() - start)
+    return latencies
+
+
+async def benchmark_resource_cache(reads: int = 20000, keys: int = 2000):
+    """read_resource latency with the config rendered on every read vs served from the resource cache"""
+    print("\n" + "="*60)
+    print("🗃️ Resource Cache Benchmark")
+    print("="*60)
+    uri = "file://config.json"
+    cache = resource_cache.cache
+    original = dict(sse_server.config)
+    for size, rounds in ((0, reads), (keys, reads // 10)):
+        sse_server.config.clear()
+        sse_server.config.update(original)
+        sse_server.config.update({f"feature_{i}": {"enabled": i % 2 == 0, "limit": i} for i in range(size)})
+        cache.invalidate(uri)
+        print(f"config with {len(sse_server.config)} keys ({len(await sse_server.read_resource(uri)):,} bytes rendered), {rounds} reads")
+
+        # Every read a miss: what each read cost before the cache
+        latencies = []
+        for _ in range(rounds):
+            cache.invalidate(uri)
+            start = time.perf_counter_ns()
+            await sse_server.read_resource(uri)
+            latencies.append(time.perf_counter_ns() - start)
+        print_summary("Rendered per read (previous)", summarize(latencies))
+
+        for label, update_every in (("Cached", 0), ("Cached, 1% updates", 100)):
+            hits, misses = cache.hits, cache.misses
+            summary = summarize(await measure_reads(uri, rounds, update_every))
+            ratio = (cache.hits - hits) / ((cache.hits - hits) + (cache.misses - misses))
+            print_summary(f"{label} ({ratio:.1%} hits)", summary)
+    sse_server.config.clear()
+    sse_server.config.update(original)
+    cache.invalidate(uri)
+
+
+def legacy_code_review(name: str, arguments: dict) -> types.GetPromptResult:
+    """Previous get_prompt: the f-string and the GetPromptResult rebuilt on every request"""
+    code = arguments["code"]
+    return types.GetPromptResult(
+        description="Code review prompt",
+        messages=[types.PromptMessage(
+            role="user",
+            content=types.TextContent(type="text", text=f"Please review the following code:\n\n```\n{code}\n```")
+        )]
+    )
+
+
+async def measure_prompts(get_prompt: Callable[[str, dict], Any], codes: List[str], rounds: int) -> List[int]:
+    """Latency of every code_review prompt request in nanoseconds"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for code in codes:
+            # A fresh string, as decoded from each request: its hash is not computed yet
+            arguments = {"code": code[:1] + code[1:]}
+            start = clock()
+            result = get_prompt("code_review", arguments)
+            if asyncio.iscoroutine(result):
+                await result
+            latencies.append(clock() - start)
+    return latencies
+
+
+async def benchmark_prompts(code_kb: int = 100, inputs: int = 20, rounds: int = 50):
+    """code_review with 100 KB of code: f-string per request vs compiled template vs the prompt cache"""
+    print("\n" + "="*60)
+    print("📝 Prompt Engine Benchmark")
+    print("="*60)
+    alphabet = string.ascii_letters + string.digits + " \n\""
+    codes = ["".join(random.choices(alphabet, k=code_kb * 1024)) for _ in range(inputs)]
+    cache = prompt_engine.cache
+
+    print(f"Render only (MCP get_prompt): {inputs} distinct {code_kb} KB inputs x {rounds} rounds")
+    print_summary("f-string per request (previous)", summarize(
+        await measure_prompts(legacy_code_review, codes, rounds)))
+    print_summary("Compiled template", summarize(
+        await measure_prompts(lambda name, arguments: sse_server.render_code_review(arguments), codes, rounds)))
+    cache.clear()
+    print_summary("Cache lookup (hit)", summarize(
+        await measure_prompts(lambda name, arguments: cache.get_sync(
+            name, arguments, sse_server.prompt_renderer(name, arguments)), codes, rounds)))
+
+    print(f"Render + JSON body (REST /prompts/get)")
+    print_summary("f-string + encode (previous)", summarize(await measure_prompts(
+        lambda name, arguments: fast_json.dumps(legacy_code_review(name, arguments)), codes, rounds)))
+    cache.clear()
+    fresh = ["".join(random.choices(alphabet, k=code_kb * 1024)) for _ in range(inputs * 5)]
+    encoded = lambda name, arguments: cache.encoded(name, arguments, sse_server.prompt_renderer(name, arguments),
+                                                    fast_json.dumps)
+    print_summary("Cache miss (hash + render + encode)", summarize(await measure_prompts(encoded, fresh, 1)))
+    cache.clear()
+    hits = cache.hits
+    print_summary("Cache hit (code resent)", summarize(await measure_prompts(encoded, codes, rounds)))
+    print(f"  hit ratio {(cache.hits - hits) / (inputs * rounds):.1%}; key for {code_kb} KB (hashed once): "
+          f"{summarize(await measure_prompts(lambda name, arguments: hash(cache.key(name, arguments)), codes, rounds))['p50_us']:.1f} µs")
+    print(f"  cache stats: {cache.stats()}")
+    cache.clear()
+
+
+def print_usage():
+    """Print usage"""
+    print("""
+⏱️ MCP Server Benchmark Tool
+
+Usage:
+  python benchmark.py [options]
+
+Options:
+  --calculator    Calculator per-call latency (before/after compiled cache)
+  --engine        eval path vs AST expression engine (throughput and p99)
+  --json          JSON response serialization (json.dumps vs fast_json)
+  --sse           10k SSE connections: memory per connection and fan-out latency
+  --transport     Tool call throughput: REST routes vs one MCP session on /sse or /ws
+  --compression   Response compression: bytes saved and CPU time per content coding
+  --scaling       Throughput of launcher.py with 1..N worker processes
+  --runtime       Requests/s and p99 for each event loop / HTTP parser (uvloop, httptools)
+  --http2         Connections and latency of 1k concurrent MCP sessions, HTTP/1.1 vs h2c
+  --uds           Tool call latency over loopback TCP vs a Unix domain socket
+  --resources     Reading a 64 MB resource: one JSON body vs streamed vs a Range request
+  --resource-cache read_resource latency: rendered per read vs served from the resource cache
+  --files         256 MB file resource: read through Python vs sendfile, and a 1 MB mmap window
+  --index         list_resources over 100k files: walk per call vs the inotify-maintained index
+  --subscriptions Watching a resource for changes: polling read_resource vs resources/subscribe
+  --prompts       code_review with 100 KB of code: f-string per request vs compiled template vs prompt cache
+  --help          Show this help
+
+Examples:
+  python benchmark.py              # Run all benchmarks
+  python benchmark.py --calculator # Calculator only
+  python benchmark.py --engine     # Expression engine only
+  python benchmark.py --json       # JSON serialization only
+  python benchmark.py --sse        # SSE broadcast only
+  python benchmark.py --transport  # REST vs MCP sessions only
+  python benchmark.py --compression # Response compression only
+  python benchmark.py --scaling    # Multi-process scaling only
+  python benchmark.py --runtime    # Event loop / HTTP parser only
+  python benchmark.py --http2      # HTTP/1.1 vs HTTP/2 only
+  python benchmark.py --uds        # Loopback TCP vs Unix domain socket only
+  python benchmark.py --resources  # Large resource reads only
+  python benchmark.py --resource-cache # Resource cache only
+  python benchmark.py --files      # File resources only
+  python benchmark.py --index      # Resource index only
+  python benchmark.py --subscriptions # Resource subscriptions only
+  python benchmark.py --prompts    # Prompt engine only
+""")
+
+
+async def main():
+    """Main function"""
+    args = sys.argv[1:]
+
+    if "--help" in args or "-h" in args:
+        print_usage()
+        return
+
+    run_all = not any(arg.startswith("--") for arg in args)
+
+    if run_all or "--calculator" in args:
+        benchmark_calculator()
+
+    if run_all or "--engine" in args:
+        benchmark_engine()
+
+    if run_all or "--json" in args:
+        benchmark_serialization()
+
+    if run_all or "--sse" in args:
+        await benchmark_broadcast()
+
+    if run_all or "--transport" in args:
+        await benchmark_transport()
+
+    if run_all or "--compression" in args:
+        await benchmark_compression()
+
+    if run_all or "--scaling" in args:
+        await benchmark_scaling()
+
+    if run_all or "--runtime" in args:
+        await benchmark_runtime()
+
+    if run_all or "--http2" in args:
+        await benchmark_http2()
+
+    if run_all or "--uds" in args:
+        await benchmark_uds()
+
+    if run_all or "--resources" in args:
+        await benchmark_resources()
+
+    if run_all or "--resource-cache" in args:
+        await benchmark_resource_cache()
+
+    if run_all or "--files" in args:
+        await benchmark_files()
+
+    if run_all or "--index" in args:
+        await benchmark_resource_index()
+
+    if run_all or "--subscriptions" in args:
+        await benchmark_subscriptions()
+
+    if run_all or "--prompts" in args:
+        await benchmark_prompts()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
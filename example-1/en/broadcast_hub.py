@@ -0,0 +1,146 @@
+# broadcast_hub.py
+import asyncio
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+import fast_json
+
+
+def encode(event: Dict[str, Any]) -> bytes:
+    """Encode an event as one SSE frame"""
+    return b"data: " + fast_json.dumps_plain(event) + b"\n\n"
+
+
+class Subscription:
+    """Bounded frame queue of one SSE connection"""
+
+    __slots__ = ("frames", "waiter", "closed")
+
+    def __init__(self, queue_size: int):
+        self.frames: deque = deque(maxlen=queue_size)
+        self.waiter: Optional[asyncio.Future] = None
+        self.closed = False
+
+    def push(self, frame: bytes) -> bool:
+        """Queue a frame; returns False if the oldest queued frame had to be dropped"""
+        dropped = len(self.frames) == self.frames.maxlen
+        self.frames.append(frame)
+        self._wake()
+        return not dropped
+
+    def close(self):
+        """End the stream once the queued frames are sent"""
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        waiter = self.waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            while self.frames:
+                yield self.frames.popleft()
+            if self.closed:
+                return
+            # Only a connection that is waiting holds a future
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+
+
+class BroadcastHub:
+    """One heartbeat timer and event source fanned out to every SSE connection"""
+
+    def __init__(self, heartbeat_interval: float = 5.0, queue_size: int = 16):
+        self.heartbeat_interval = heartbeat_interval
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscription] = set()
+        self._timer: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def start(self):
+        """Start the heartbeat timer (idempotent)"""
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.get_running_loop().create_task(self._heartbeat())
+
+    def stop(self):
+        """Stop the timer and end every open stream"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for subscription in self.subscribers:
+            subscription.close()
+        self.subscribers.clear()
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if self.subscribers:
+                self.publish({"type": "heartbeat", "timestamp": loop.time()})
+
+    def subscribe(self) -> Subscription:
+        """Register a new connection"""
+        self.start()
+        subscription = Subscription(self.queue_size)
+        self.subscribers.add(subscription)
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Forget a connection that went away"""
+        self.subscribers.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]):
+        """Encode an event once and queue the frame on every connection"""
+        self.publish_frame(encode(event))
+
+    def publish_frame(self, frame: bytes):
+        """Queue a pre-encoded frame on every connection"""
+        self.published += 1
+        delivered = 0
+        for subscription in self.subscribers:
+            # A slow reader loses its oldest frames instead of growing without bound
+            delivered += subscription.push(frame)
+        self.delivered += delivered
+        self.dropped += len(self.subscribers) - delivered
+
+    async def stream(self, first: Optional[bytes] = None) -> AsyncIterator[bytes]:
+        """Frames for one connection, starting with an optional greeting"""
+        subscription = self.subscribe()
+        try:
+            if first is not None:
+                yield first
+            async for frame in subscription:
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return connection and fan-out metrics"""
+        return {
+            "subscribers": len(self.subscribers),
+            "connections": self.connections,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "heartbeat_interval_s": self.heartbeat_interval,
+            "queue_size": self.queue_size
+        }
+
+
+# Hub shared by all /sse connections, configured from the environment
+hub = BroadcastHub(
+    heartbeat_interval=float(os.environ.get("MCP_SSE_HEARTBEAT", "5.0")),
+    queue_size=int(os.environ.get("MCP_SSE_QUEUE_SIZE", "16"))
+)
@@ -0,0 +1,96 @@
+# calculator.py
+import math
+import os
+import types
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional
+
+import expression_engine
+
+
+# Sandbox namespace, built once at import time instead of on every call
+ALLOWED_NAMES: Dict[str, Any] = {
+    k: v for k, v in math.__dict__.items() if not k.startswith("__")
+}
+ALLOWED_NAMES.update({"abs": abs, "round": round})
+
+# Globals with no builtins so only ALLOWED_NAMES can be resolved
+SAFE_GLOBALS: Dict[str, Any] = {"__builtins__": {}}
+
+# Read-only view passed to eval() as locals, so an assignment expression such as
+# (sqrt := 5) fails instead of rebinding the name for every later call
+SAFE_LOCALS: Mapping[str, Any] = types.MappingProxyType(ALLOWED_NAMES)
+
+# Evaluation modes: "ast" uses the whitelist expression engine, "eval" the Python compiler
+MODES = ("ast", "eval")
+DEFAULT_MODE = os.environ.get("CALCULATOR_MODE", "ast")
+
+
+def compile_eval(expression: str) -> Any:
+    """Compile an expression to a Python code object for eval()"""
+    return compile(expression, "<calculator>", "eval")
+
+
+def compile_ast(expression: str) -> expression_engine.CompiledExpression:
+    """Compile an expression with the whitelist expression engine"""
+    return expression_engine.compile_expression(expression, ALLOWED_NAMES)
+
+
+class CompiledExpressionCache:
+    """Bounded LRU cache of compiled expressions keyed by expression text"""
+
+    def __init__(self, maxsize: int = 512, compiler: Callable[[str], Any] = compile_eval):
+        self.maxsize = maxsize
+        self.compiler = compiler
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, expression: str):
+        """Return the compiled code for an expression, compiling it on a miss"""
+        code = self._cache.get(expression)
+        if code is not None:
+            self._cache.move_to_end(expression)
+            self.hits += 1
+            return code
+
+        self.misses += 1
+        code = self.compiler(expression)
+        self._cache[expression] = code
+        if len(self._cache) > self.maxsize:
+            # Evict the least recently used expression
+            self._cache.popitem(last=False)
+        return code
+
+    def clear(self):
+        """Drop all cached code objects and reset counters"""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache size and hit/miss counters"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0
+        }
+
+
+# Caches shared by every calculator call in this process
+expression_cache = CompiledExpressionCache()
+ast_cache = CompiledExpressionCache(compiler=compile_ast)
+
+
+def evaluate(expression: str, mode: Optional[str] = None) -> Any:
+    """Evaluate an expression using the cached code and the shared namespace"""
+    mode = mode or DEFAULT_MODE
+    if mode == "ast":
+        return ast_cache.get(expression)()
+    if mode == "eval":
+        code = expression_cache.get(expression)
+        return eval(code, SAFE_GLOBALS, SAFE_LOCALS)
+    raise ValueError(f"Unknown calculator mode: {mode}")
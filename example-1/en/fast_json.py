@@ -0,0 +1,40 @@
+# fast_json.py
+import json
+from typing import Any
+
+import pydantic_core
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Falls back to the json module for plain data
+    orjson = None
+
+
+def dumps_plain(content: Any) -> bytes:
+    """Serialize plain data (dicts, lists, str, numbers) to JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_models(content: Any) -> bytes:
+    """Serialize MCP types (pydantic models), alone or inside plain containers, straight to bytes"""
+    # pydantic-core writes the JSON directly, without building intermediate dicts
+    return pydantic_core.to_json(content, by_alias=True, exclude_none=True)
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize any response payload to JSON bytes with the fastest available encoder"""
+    try:
+        return dumps_plain(content)
+    except TypeError:
+        # Both encoders stop at the first object they do not know, e.g. an MCP type
+        return dumps_models(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with orjson / pydantic-core instead of json.dumps"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
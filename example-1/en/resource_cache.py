@@ -0,0 +1,145 @@
+# resource_cache.py
+import functools
+import inspect
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Union
+
+
+Rendered = Union[str, bytes]
+
+
+def _size(body: Rendered) -> int:
+    """Bytes a body holds (for str, its UTF-8 size: len() counts characters)"""
+    return len(body.encode("utf-8", "surrogatepass")) if isinstance(body, str) else len(body)
+
+
+class ResourceCache:
+    """Rendered resource bodies by URI, each stamped with the version it was rendered at
+
+    A provider calls invalidate(uri) when its data changes; that bumps the
+    URI's version, so the next read renders again and stores the new body.
+    Until then every read returns the stored body without running the
+    provider. Only str and bytes bodies are kept (a streamed body passes
+    through), and the least recently read entries are dropped once the
+    stored bodies exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[str, Tuple[int, Rendered, int]]" = OrderedDict()
+        self._bytes = 0
+        self._listeners: List[Callable[[str], Any]] = []
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def version(self, uri: str) -> int:
+        """Current version of a resource; starts at 0 and grows with every invalidation"""
+        return self._versions.get(uri, 0)
+
+    def invalidate(self, uri: str) -> int:
+        """Mark a resource as changed; returns its new version"""
+        self._versions[uri] = self.version(uri) + 1
+        self.invalidations += 1
+        self._drop(uri)
+        for listener in self._listeners:
+            listener(uri)
+        return self._versions[uri]
+
+    def on_invalidate(self, listener: Callable[[str], Any]):
+        """Call listener with the URI of every invalidated resource (e.g. to notify subscribers)"""
+        self._listeners.append(listener)
+
+    def clear(self):
+        """Invalidate every resource"""
+        for uri in list(self._entries):
+            self.invalidate(uri)
+
+    def _drop(self, uri: str):
+        entry = self._entries.pop(uri, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _lookup(self, uri: str):
+        entry = self._entries.get(uri)
+        if entry is not None and entry[0] == self.version(uri):
+            self.hits += 1
+            self._entries.move_to_end(uri)
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def _store(self, uri: str, version: int, body: Any):
+        # An invalidation while rendering makes this body stale already
+        if not isinstance(body, (str, bytes)) or version != self.version(uri):
+            return
+        size = _size(body)
+        if size > self.max_bytes:
+            return
+        self._drop(uri)
+        self._entries[uri] = (version, body, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    async def get(self, uri: str, render: Callable[[], Awaitable[Any]]) -> Any:
+        """Stored body of uri at its current version, rendering it on a miss"""
+        body = self._lookup(uri)
+        if body is not None:
+            return body
+        version = self.version(uri)
+        body = await render()
+        self._store(uri, version, body)
+        return body
+
+    def get_sync(self, uri: str, render: Callable[[], Any]) -> Any:
+        """get() for synchronous renderers"""
+        body = self._lookup(uri)
+        if body is not None:
+            return body
+        version = self.version(uri)
+        body = render()
+        self._store(uri, version, body)
+        return body
+
+    def cached(self, uri: str):
+        """Decorator caching a resource handler's body under uri (sync or async handlers)"""
+
+        def decorator(render):
+            if inspect.iscoroutinefunction(render):
+                @functools.wraps(render)
+                async def wrapper(*args, **kwargs):
+                    return await self.get(uri, lambda: render(*args, **kwargs))
+            else:
+                @functools.wraps(render)
+                def wrapper(*args, **kwargs):
+                    return self.get_sync(uri, lambda: render(*args, **kwargs))
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit ratio, size and invalidation counts"""
+        reads = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / reads if reads else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "versions": dict(self._versions)
+        }
+
+
+# Cache shared by the server's resource handlers, sized from the environment
+cache = ResourceCache(max_bytes=int(os.environ.get("MCP_RESOURCE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
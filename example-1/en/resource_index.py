@@ -0,0 +1,384 @@
+# resource_index.py
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import stat
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from mcp import types
+
+import file_resources
+
+
+# Seconds between rescans of the tree when inotify is unavailable (not Linux, or out of watches)
+POLL_INTERVAL = float(os.environ.get("MCP_RESOURCE_POLL_INTERVAL", "2.0"))
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+# Watched on every directory under the root; a directory's own deletion is seen from its parent
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+# struct inotify_event header: wd, mask, cookie, len (the name follows, NUL-padded)
+EVENT = struct.Struct("iIII")
+
+# path -> (size, mtime in ns)
+Scan = Dict[str, Tuple[int, int]]
+
+
+class Inotify:
+    """Non-blocking inotify(7) instance, called through libc (Linux only)"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # AttributeError here means a libc without inotify (not Linux)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """Watch descriptor for path; OSError(ENOSPC) once fs.inotify.max_user_watches is used up"""
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._rm_watch(self.fd, wd)
+
+    def read(self) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) of every queued event"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 1024 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ResourceIndex:
+    """Listing of the files under a FileRoot, built once and kept current incrementally
+
+    list_resources returns the stored listing instead of walking the tree.
+    Every directory is watched with inotify, and each batch of events
+    updates only the files it names. Where inotify is unavailable (not
+    Linux, or fs.inotify.max_user_watches used up) the tree is rescanned
+    every poll_interval seconds in a thread instead, and only the files
+    whose size or mtime changed are updated. Like FileRoot.walk, symlinked
+    directories are not followed and symlinks leading out of the root are
+    left out.
+    """
+
+    def __init__(self, files: file_resources.FileRoot, poll_interval: float = POLL_INTERVAL):
+        self.files = files
+        self.poll_interval = poll_interval
+        # path -> (size, mtime in ns, listed resource)
+        self._entries: Dict[str, Tuple[int, int, types.Resource]] = {}
+        self._listing: Optional[List[types.Resource]] = None
+        self._built = False
+        self._listeners: List[Callable[[Set[str]], Any]] = []
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, str] = {}
+        # Guards _watches: scan threads add watches while the loop reads events
+        self._lock = threading.Lock()
+        self._poller: Optional[asyncio.Task] = None
+        self._resync: Optional[asyncio.Task] = None
+        self._scans: Set[asyncio.Task] = set()
+        # Paths events named while a scan ran in a thread (_scan_and_merge)
+        self._seen: Set[str] = set()
+        self._scanning = 0
+        self.mode = "stopped"
+
+        # Metrics
+        self.build_ms = 0.0
+        self.updates = 0
+        self.added = 0
+        self.removed = 0
+        self.rescans = 0
+        self.overflows = 0
+
+    def get(self, uri) -> Optional[file_resources.FileResource]:
+        """Provider for a file:/// URI (ResourceRegistry.mount)"""
+        return self.files.get(uri)
+
+    def resources(self) -> List[types.Resource]:
+        """Every indexed file, without touching the filesystem (built on first use if not started)"""
+        if not self._built:
+            self.build()
+        if self._listing is None:
+            self._listing = [resource for _, _, resource in self._entries.values()]
+        return list(self._listing)
+
+    def on_change(self, listener: Callable[[Set[str]], Any]):
+        """Call listener with the URIs of the files added, changed or removed by each update"""
+        self._listeners.append(listener)
+
+    def _entry(self, path: str, size: int, mtime: int) -> Tuple[int, int, types.Resource]:
+        return size, mtime, types.Resource(uri=self.files.uri(path), name=os.path.relpath(path, self.files.root),
+                                           mimeType=file_resources.media_type(path), size=size)
+
+    def _stat(self, path: str) -> Optional[Tuple[int, int]]:
+        """(size, mtime) of a regular file under the root, None for anything else"""
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(info.st_mode) or (os.path.islink(path) and not self.files.contains(path)):
+            return None
+        return info.st_size, info.st_mtime_ns
+
+    def _scan(self, top: str, watch: bool) -> Scan:
+        """Size and mtime of every file under top; with watch, each directory is watched before it is read"""
+        inotify = self._inotify if watch else None
+        found: Scan = {}
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            if inotify is not None:
+                try:
+                    # Registered under the lock, so events for the new watch already resolve to its directory
+                    with self._lock:
+                        self._watches[inotify.add_watch(directory)] = directory
+                except (FileNotFoundError, NotADirectoryError):
+                    # Removed before it could be watched; other errors (ENOSPC) reach the caller
+                    continue
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_symlink():
+                        found_stat = self._stat(entry.path)
+                        if found_stat is not None:
+                            found[entry.path] = found_stat
+                    elif entry.is_file(follow_symlinks=False):
+                        info = entry.stat(follow_symlinks=False)
+                        found[entry.path] = (info.st_size, info.st_mtime_ns)
+                except OSError:
+                    # Removed while being scanned
+                    continue
+        return found
+
+    def build(self):
+        """Index the whole tree (and watch it, once start() has opened inotify)"""
+        started = time.perf_counter()
+        found = self._scan(self.files.root, watch=self._inotify is not None)
+        self._entries = {path: self._entry(path, *found[path]) for path in found}
+        self._listing = None
+        self._built = True
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    async def start(self):
+        """Build the index in a thread, then follow inotify events (or poll when that is unavailable)"""
+        try:
+            self._inotify = Inotify()
+        except (OSError, AttributeError):
+            self._inotify = None
+        try:
+            await asyncio.to_thread(self.build)
+        except OSError:
+            # Typically ENOSPC: more directories than inotify watches
+            self._close_inotify()
+            await asyncio.to_thread(self.build)
+        if self._inotify is not None:
+            asyncio.get_running_loop().add_reader(self._inotify.fd, self._read_events)
+            self.mode = "inotify"
+        else:
+            self._start_polling()
+
+    def stop(self):
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._close_inotify()
+        for task in (self._poller, self._resync, *self._scans):
+            if task is not None:
+                task.cancel()
+        self._poller = self._resync = None
+        self._scans.clear()
+        self.mode = "stopped"
+
+    def _close_inotify(self):
+        self._inotify.close()
+        self._inotify = None
+        with self._lock:
+            self._watches.clear()
+
+    def _start_polling(self):
+        self.mode = "polling"
+        self._poller = asyncio.create_task(self._poll())
+
+    def _fall_back_to_polling(self):
+        if self._inotify is None:
+            # Already closed by another scan that ran out of watches, or by stop()
+            return
+        asyncio.get_running_loop().remove_reader(self._inotify.fd)
+        self._close_inotify()
+        self._start_polling()
+
+    def _set(self, path: str, found: Optional[Tuple[int, int]], changed: Set[str]):
+        """Record a file's new (size, mtime), or its removal when found is None"""
+        entry = self._entries.get(path)
+        if found is None:
+            if entry is not None:
+                del self._entries[path]
+                self.removed += 1
+                changed.add(str(entry[2].uri))
+        elif entry is None or entry[:2] != found:
+            if entry is None:
+                self.added += 1
+            entry = self._entry(path, *found)
+            self._entries[path] = entry
+            changed.add(str(entry[2].uri))
+
+    def _remove_tree(self, directory: str, changed: Set[str]):
+        """Forget every file and watch under a directory that was deleted or moved away"""
+        prefix = directory + os.sep
+        for path in [path for path in self._entries if path.startswith(prefix)]:
+            self._set(path, None, changed)
+        with self._lock:
+            for wd, watched in list(self._watches.items()):
+                if watched == directory or watched.startswith(prefix):
+                    del self._watches[wd]
+                    if self._inotify is not None:
+                        self._inotify.rm_watch(wd)
+
+    def _recheck(self, path: str, top: str, found: Optional[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+        """found, or a fresh stat when an event named path or a directory above it during a scan"""
+        parent = path
+        while self._seen and len(parent) >= len(top):
+            if parent in self._seen:
+                return self._stat(path)
+            parent = os.path.dirname(parent)
+        return found
+
+    def _apply(self, changed: Set[str]):
+        if not changed:
+            return
+        self._listing = None
+        self.updates += len(changed)
+        for listener in self._listeners:
+            listener(changed)
+
+    def _read_events(self):
+        changed: Set[str] = set()
+        touched: Set[str] = set()
+        with self._lock:
+            # Read and resolved under the lock: a scan thread may be adding watches
+            events = [(mask, name, self._watches.pop(wd, None) if mask & IN_IGNORED else self._watches.get(wd))
+                      for wd, mask, name in self._inotify.read()]
+        for mask, name, directory in events:
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped: compare the whole tree once instead
+                self.overflows += 1
+                if self._resync is None or self._resync.done():
+                    self._resync = asyncio.create_task(self._rescan(watch=True))
+                continue
+            if mask & IN_IGNORED or directory is None:
+                continue
+            path = os.path.join(directory, name)
+            if self._scanning:
+                self._seen.add(path)
+            if mask & IN_ISDIR:
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._remove_tree(path, changed)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may already be inside: scan it in a thread, watching it and its subdirectories
+                    scan = asyncio.create_task(self._scan_and_merge(path, watch=True, complete=False))
+                    self._scans.add(scan)
+                    scan.add_done_callback(self._scans.discard)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                touched.discard(path)
+                self._set(path, None, changed)
+            else:
+                touched.add(path)
+        # One stat per file however many writes it saw in this batch
+        for path in touched:
+            self._set(path, self._stat(path), changed)
+        self._apply(changed)
+
+    async def _scan_and_merge(self, top: str, watch: bool, complete: bool) -> bool:
+        """Scan top in a thread, then apply the difference with the index on the loop
+
+        The scan may predate events handled while it ran, so the paths those
+        events named are stat'ed again instead. With complete, indexed files
+        the scan did not find are removed.
+        """
+        self._scanning += 1
+        try:
+            found = await asyncio.to_thread(self._scan, top, watch)
+            changed: Set[str] = set()
+            if complete:
+                for path in [path for path in self._entries if path not in found]:
+                    self._set(path, self._recheck(path, top, None), changed)
+            for path, entry in found.items():
+                self._set(path, self._recheck(path, top, entry), changed)
+            self._apply(changed)
+            return True
+        except OSError:
+            # Out of watches for a new directory
+            self._fall_back_to_polling()
+            return False
+        finally:
+            self._scanning -= 1
+            if not self._scanning:
+                self._seen.clear()
+
+    async def _rescan(self, watch: bool = False):
+        """Compare a fresh scan of the tree (run in a thread) with the index and apply the difference"""
+        if await self._scan_and_merge(self.files.root, watch, complete=True):
+            self.rescans += 1
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self._rescan()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the index size, update mode and update counts"""
+        return {
+            "mode": self.mode,
+            "files": len(self._entries),
+            "watches": len(self._watches),
+            "build_ms": self.build_ms,
+            "updates": self.updates,
+            "added": self.added,
+            "removed": self.removed,
+            "rescans": self.rescans,
+            "overflows": self.overflows,
+            "poll_interval": self.poll_interval
+        }
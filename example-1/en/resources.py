@@ -0,0 +1,239 @@
+# resources.py
+import os
+import re
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from mcp import types
+from starlette.responses import Response, StreamingResponse
+
+
+# What a provider's read() may return: text, bytes, or bytes chunks streamed one by one
+ResourceBody = Union[str, bytes, AsyncIterator[bytes]]
+
+# Size of the chunks in-memory bodies are cut into when only part of them is streamed
+CHUNK_SIZE = int(os.environ.get("MCP_RESOURCE_CHUNK_SIZE", str(64 * 1024)))
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class ResourceNotFound(ValueError):
+    """Raised for a URI no provider is registered for"""
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header asks for bytes past the end of the resource"""
+
+    def __init__(self, size: int):
+        super().__init__(f"Range not satisfiable (resource is {size} bytes)")
+        self.size = size
+
+
+def normalize_uri(uri) -> str:
+    """URI as registered; over an MCP session it arrives as a normalized URL (file://config.json/)"""
+    return str(uri).rstrip("/")
+
+
+def to_bytes(body: Union[str, bytes]) -> bytes:
+    """Body as bytes (text is sent as UTF-8)"""
+    return body.encode("utf-8") if isinstance(body, str) else body
+
+
+async def collect(body: ResourceBody) -> Union[str, bytes]:
+    """Whole body in memory, for callers that need it at once (MCP resources/read)"""
+    if isinstance(body, (str, bytes)):
+        return body
+    return b"".join([chunk async for chunk in body])
+
+
+async def slice_stream(chunks: AsyncIterator[bytes], start: int, end: int) -> AsyncIterator[bytes]:
+    """Bytes start..end (inclusive) of a chunk stream, skipping the rest without keeping it"""
+    offset = 0
+    try:
+        async for chunk in chunks:
+            chunk_end = offset + len(chunk)
+            if chunk_end > start:
+                yield chunk[max(0, start - offset):end + 1 - offset]
+            offset = chunk_end
+            if offset > end:
+                break
+    finally:
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()
+
+
+async def iter_slices(data: bytes, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Bytes start..end (inclusive) of an in-memory body, chunk_size at a time"""
+    view = memoryview(data)
+    for offset in range(start, end + 1, chunk_size):
+        yield bytes(view[offset:min(offset + chunk_size, end + 1)])
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First and last byte of a single-range `bytes=` header; None when it is ignored
+
+    Multiple ranges and malformed headers are ignored (the whole resource is
+    sent), as RFC 9110 allows. Raises RangeNotSatisfiable when the range starts
+    past the end.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if size == 0:
+        raise RangeNotSatisfiable(size)
+    if first == "":
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable(size)
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(size)
+    if end < start:
+        return None
+    return start, end
+
+
+class ResourceProvider:
+    """One resource: its listing entry and how to read it
+
+    read() returns str, bytes or an async iterator of bytes, so a large
+    resource can be streamed without being held in memory. A provider that
+    knows its size and can seek overrides size() and read_range(); Range
+    requests then go straight to the requested bytes instead of skipping
+    through the stream. A provider that can send its bytes better than
+    streaming them overrides response().
+    """
+
+    def __init__(self, uri: str, name: str, description: Optional[str] = None,
+                 mime_type: Optional[str] = None):
+        self.uri = uri
+        self.name = name
+        self.description = description
+        self.mime_type = mime_type
+
+    def resource(self) -> types.Resource:
+        """Listing entry for list_resources"""
+        return types.Resource(uri=self.uri, name=self.name, description=self.description,
+                              mimeType=self.mime_type)
+
+    async def read(self) -> ResourceBody:
+        raise NotImplementedError
+
+    async def size(self) -> Optional[int]:
+        """Length in bytes when known without reading the body"""
+        return None
+
+    def read_range(self, start: int, end: int) -> AsyncIterator[bytes]:
+        """Bytes start..end (inclusive); by default read() is streamed and the rest skipped"""
+
+        async def chunks():
+            body = await self.read()
+            if isinstance(body, (str, bytes)):
+                data = to_bytes(body)
+                body = iter_slices(data, 0, len(data) - 1)
+            async for chunk in slice_stream(body, start, end):
+                yield chunk
+
+        return chunks()
+
+    async def response(self, range_header: Optional[str] = None) -> Response:
+        """HTTP response for /resources/stream"""
+        return await stream_response(self, range_header)
+
+
+class FunctionResource(ResourceProvider):
+    """Provider backed by an async function returning the body"""
+
+    def __init__(self, uri: str, read: Callable[[], Awaitable[ResourceBody]], name: str,
+                 description: Optional[str] = None, mime_type: Optional[str] = None):
+        super().__init__(uri, name, description, mime_type)
+        self._read = read
+
+    async def read(self) -> ResourceBody:
+        return await self._read()
+
+
+class ResourceRegistry:
+    """Resource providers by URI, shared by list_resources, read_resource and the HTTP routes
+
+    Mounted sources (such as a directory of files) serve URIs that are not
+    registered one by one: get(uri) returns a provider or None, resources()
+    lists what they hold.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, ResourceProvider] = {}
+        self._mounts: List = []
+
+    def add(self, provider: ResourceProvider) -> ResourceProvider:
+        self._providers[normalize_uri(provider.uri)] = provider
+        return provider
+
+    def provider(self, uri: str, name: str, description: Optional[str] = None, mime_type: Optional[str] = None):
+        """Decorator registering an async function as the provider of uri"""
+
+        def decorator(read: Callable[[], Awaitable[ResourceBody]]):
+            self.add(FunctionResource(uri, read, name, description, mime_type))
+            return read
+
+        return decorator
+
+    def mount(self, source):
+        """Serve the URIs a source resolves, after the registered providers"""
+        self._mounts.append(source)
+        return source
+
+    def get(self, uri) -> ResourceProvider:
+        provider = self._providers.get(normalize_uri(uri))
+        for source in self._mounts:
+            if provider is not None:
+                break
+            provider = source.get(uri)
+        if provider is None:
+            raise ResourceNotFound(f"Unknown resource: {uri}")
+        return provider
+
+    def resources(self) -> list[types.Resource]:
+        listed = [provider.resource() for provider in self._providers.values()]
+        for source in self._mounts:
+            listed.extend(source.resources())
+        return listed
+
+    async def read(self, uri) -> Union[str, bytes]:
+        """Whole resource body; streamed bodies are collected"""
+        return await collect(await self.get(uri).read())
+
+
+async def stream_response(provider: ResourceProvider, range_header: Optional[str] = None) -> Response:
+    """Resource bytes as an HTTP response, streamed, honouring a single byte Range
+
+    Bodies of unknown length go out with chunked transfer and without range
+    support. Raises RangeNotSatisfiable for a range past the end.
+    """
+    media_type = provider.mime_type or "application/octet-stream"
+    size = await provider.size()
+    body: Optional[ResourceBody] = None
+    if size is None:
+        body = await provider.read()
+        if not isinstance(body, (str, bytes)):
+            return StreamingResponse(body, media_type=media_type, headers={"Accept-Ranges": "none"})
+        body = to_bytes(body)
+        size = len(body)
+
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = parse_range(range_header, size) if range_header else None
+    if byte_range is None:
+        if body is None:
+            body = await provider.read()
+        if isinstance(body, (str, bytes)):
+            return Response(to_bytes(body), media_type=media_type, headers=headers)
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(body, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    chunks = iter_slices(body, start, end) if body is not None else provider.read_range(start, end)
+    return StreamingResponse(chunks, status_code=206, media_type=media_type, headers=headers)
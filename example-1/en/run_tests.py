@@ -16,12 +16,18 @@ Usage:
 Options:
   --stdio-only    Test only STDIO client
   --sse-only      Test only SSE client
+  --engine-only   Test only the expression engine (same results as eval)
+  --cost-only     Test only the cost estimator (adversarial expressions)
+  --behavior-only Test only status codes, caching and notifications (in process)
   --help          Show this help
 
 Examples:
   python run_tests.py              # Run all tests
   python run_tests.py --stdio-only # Test only STDIO
   python run_tests.py --sse-only   # Test only SSE
+  python run_tests.py --engine-only # Test only the expression engine
+  python run_tests.py --cost-only  # Test only the cost estimator
+  python run_tests.py --behavior-only # Test only server behavior
 """)
 
 
@@ -35,7 +41,16 @@ async def main():
     
     tester = MCPTester()
     
-    if "--stdio-only" in args:
+    if "--cost-only" in args:
+        print("🛡️ Testing only the cost estimator.")
+        await tester.test_cost_estimator()
+    elif "--engine-only" in args:
+        print("🧮 Testing only the expression engine.")
+        await tester.test_expression_engine()
+    elif "--behavior-only" in args:
+        print("🔬 Testing only server behavior.")
+        await tester.test_behavior()
+    elif "--stdio-only" in args:
         print("📱 Testing only STDIO client.")
         await tester.test_stdio_client()
     elif "--sse-only" in args:
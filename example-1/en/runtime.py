@@ -0,0 +1,144 @@
+# runtime.py
+import asyncio
+import importlib.util
+import os
+import socket
+import stat
+import sys
+from typing import Any, Dict, List
+
+import uvicorn
+
+import http2
+import zerocopy
+
+
+# Event loop and HTTP parser implementations uvicorn can run on, fastest first;
+# the last one of each is always installed
+LOOPS = ("uvloop", "asyncio")
+HTTP_PARSERS = ("httptools", "h11")
+
+# Requested implementations ("auto" picks the fastest installed one)
+LOOP = os.environ.get("MCP_LOOP", "auto")
+HTTP = os.environ.get("MCP_HTTP", "auto")
+
+# Serve HTTP/1.1 and cleartext HTTP/2 with Hypercorn instead of uvicorn
+HTTP2 = os.environ.get("MCP_HTTP2", "").lower() in ("1", "true", "yes")
+
+# Unix domain socket for clients on the same host, next to TCP or instead of it
+# (MCP_UDS_ONLY=1); MCP_UDS_MODE limits who may connect (default owner and group)
+UDS = os.environ.get("MCP_UDS", "")
+UDS_ONLY = os.environ.get("MCP_UDS_ONLY", "").lower() in ("1", "true", "yes")
+UDS_MODE = int(os.environ.get("MCP_UDS_MODE", "660"), 8)
+
+# What the server was actually started with, for /metrics
+selected: Dict[str, str] = {}
+
+
+def available(name: str) -> bool:
+    """Whether an implementation's package is installed"""
+    return importlib.util.find_spec(name) is not None
+
+
+def pick(kind: str, choice: str, options: tuple) -> str:
+    """Resolve one choice; a missing fast implementation falls back to the portable one"""
+    if choice == "auto":
+        return next(name for name in options if available(name))
+    if choice not in options:
+        raise ValueError(f"Unknown {kind} '{choice}' (choose from auto, {', '.join(options)})")
+    if not available(choice):
+        print(f"{choice} is not installed, falling back to {options[-1]}", file=sys.stderr)
+        return options[-1]
+    return choice
+
+
+def configure(loop: str = LOOP, http: str = HTTP) -> Dict[str, Any]:
+    """Resolve the event loop and HTTP parser and return them as uvicorn options
+
+    httptools is served by a protocol that also sends files with sendfile(2).
+    """
+    selected["loop"] = pick("event loop", loop, LOOPS)
+    selected["http"] = pick("HTTP parser", http, HTTP_PARSERS)
+    return {"loop": selected["loop"], "http": zerocopy.protocol(selected["http"])}
+
+
+def configure_http2(loop: str = LOOP) -> bool:
+    """Resolve the event loop for Hypercorn and install it; False when hypercorn is not installed"""
+    if http2.hypercorn_serve is None:
+        print("hypercorn is not installed, serving HTTP/1.1 with uvicorn", file=sys.stderr)
+        return False
+    selected["loop"] = pick("event loop", loop, LOOPS)
+    selected["http"] = "h11 + h2 (Hypercorn)"
+    if selected["loop"] == "uvloop":
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def describe() -> str:
+    """One-line summary of the configured runtime"""
+    return f"{selected.get('loop', 'default')} event loop, {selected.get('http', 'default')} HTTP parser"
+
+
+def bind_unix_socket(path: str, mode: int = UDS_MODE) -> socket.socket:
+    """Listening Unix domain socket at path, replacing a stale socket left by an earlier run"""
+    if os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise FileExistsError(f"{path} exists and is not a socket")
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, mode)
+    sock.listen(2048)
+    return sock
+
+
+def unlink_unix_socket(path: str):
+    """Remove a socket file once its server has stopped"""
+    if path and os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)
+
+
+def serve(app, host: str, port: int, loop: str = LOOP, http: str = HTTP, use_http2: bool = HTTP2,
+          uds: str = UDS, tcp: bool = not UDS_ONLY):
+    """Run the app on uvicorn, or on Hypercorn with h2c next to HTTP/1.1 when use_http2 is set
+
+    Listens on host:port, on the Unix domain socket uds, or on both.
+    """
+    if not (tcp or uds):
+        raise ValueError("Nothing to listen on: TCP is off and no Unix socket path is set (MCP_UDS)")
+    sockets: List[socket.socket] = [bind_unix_socket(uds)] if uds else []
+    if uds:
+        print(f"Listening on unix:{uds}" + ("" if tcp else " only"))
+    try:
+        if use_http2 and configure_http2(loop):
+            print(f"Runtime: {describe()}")
+            binds = [f"{host}:{port}"] if tcp else []
+            asyncio.run(http2.serve(app, binds + [f"fd://{sock.fileno()}" for sock in sockets]))
+            return
+        options = configure(loop, http)
+        print(f"Runtime: {describe()}")
+        if not sockets:
+            uvicorn.run(app, host=host, port=port, **options)
+            return
+        if tcp:
+            sockets.append(socket.create_server((host, port), backlog=2048))
+        # uvicorn binds one address by itself, so both listeners are handed over ready-made
+        config = uvicorn.Config(app, host=host, port=port, uds=None if tcp else uds, **options)
+        uvicorn.Server(config).run(sockets=sockets)
+    finally:
+        unlink_unix_socket(uds)
+
+
+def stats() -> Dict[str, Any]:
+    """Return the configured and running implementations"""
+    try:
+        running = type(asyncio.get_running_loop()).__module__.split(".")[0]
+    except RuntimeError:
+        running = None
+    return {
+        "loop": selected.get("loop"),
+        "http": selected.get("http"),
+        "running_loop": running,
+        "available": [name for name in LOOPS + HTTP_PARSERS if available(name)]
+    }
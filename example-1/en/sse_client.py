@@ -1,23 +1,35 @@
 # sse_client.py
 import asyncio
 import aiohttp
+import httpx
 import json
-from typing import Dict, Any, List, Optional
+import os
+from typing import AsyncIterator, Dict, Any, List, Optional
 import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+from mcp.client.websocket import websocket_client
+import http2
 
 
 class MCPSseClient:
     """SSE-based MCP client"""
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", uds: str = ""):
         self.base_url = base_url.rstrip('/')
         self.session = None
+        # Unix domain socket of a server on this host (MCP_UDS); base_url then only names the host
+        self.uds = uds
+        # Listings cached with their ETag: path -> (etag, data)
+        self._listings: Dict[str, tuple] = {}
     
     async def connect(self):
         """Create HTTP session"""
         try:
-            self.session = aiohttp.ClientSession()
-            print("✅ HTTP session created.")
+            connector = aiohttp.UnixConnector(path=self.uds) if self.uds else None
+            self.session = aiohttp.ClientSession(connector=connector)
+            print("✅ HTTP session created." + (f" (unix:{self.uds})" if self.uds else ""))
             return True
         except Exception as e:
             print(f"❌ Session creation failed: {e}")
@@ -29,19 +41,42 @@ class MCPSseClient:
             await self.session.close()
             print("🔌 HTTP session closed.")
     
+    def httpx_client_factory(self, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None,
+                             auth: Optional[httpx.Auth] = None) -> httpx.AsyncClient:
+        """httpx client for mcp's sse_client, over the Unix socket when one is set"""
+        transport = httpx.AsyncHTTPTransport(uds=self.uds) if self.uds else None
+        return httpx.AsyncClient(headers=headers, timeout=timeout or httpx.Timeout(30.0), auth=auth,
+                                 follow_redirects=True, transport=transport)
+
+    async def _get_listing(self, path: str):
+        """Fetch a listing, revalidating the cached copy with its ETag"""
+        cached = self._listings.get(path)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        async with self.session.get(f"{self.base_url}{path}", headers=headers) as response:
+            if response.status == 304 and cached:
+                # A 304 means the cached copy is still current, so nothing is downloaded again
+                return 304, cached[1]
+            if response.status == 200:
+                data = await response.json()
+                etag = response.headers.get("ETag")
+                if etag:
+                    self._listings[path] = (etag, data)
+                return 200, data
+            return response.status, []
+    
     async def list_tools(self) -> List[Dict[str, Any]]:
         """Get list of available tools"""
         try:
-            async with self.session.get(f"{self.base_url}/tools") as response:
-                if response.status == 200:
-                    tools = await response.json()
-                    print(f"📋 Available tools: {len(tools)}")
-                    for tool in tools:
-                        print(f"  - {tool['name']}: {tool['description']}")
-                    return tools
-                else:
-                    print(f"❌ Failed to get tool list: HTTP {response.status}")
-                    return []
+            status, tools = await self._get_listing("/tools")
+            if status in (200, 304):
+                note = " (not modified)" if status == 304 else ""
+                print(f"📋 Available tools: {len(tools)}{note}")
+                for tool in tools:
+                    print(f"  - {tool['name']}: {tool['description']}")
+                return tools
+            else:
+                print(f"❌ Failed to get tool list: HTTP {status}")
+                return []
         except Exception as e:
             print(f"❌ Failed to get tool list: {e}")
             return []
@@ -72,19 +107,47 @@ class MCPSseClient:
             print(f"❌ Tool call failed: {e}")
             return ""
     
-    async def list_resources(self) -> List[Dict[str, Any]]:
-        """Get list of available resources"""
+    async def call_tools_batch(self, calls: List[Dict[str, Any]],
+                               concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Call several tools in one request; results come back in order"""
         try:
-            async with self.session.get(f"{self.base_url}/resources") as response:
+            params = {"concurrency": concurrency} if concurrency else None
+            async with self.session.post(
+                f"{self.base_url}/tools/batch",
+                json=calls,
+                params=params,
+                headers={"Content-Type": "application/json"}
+            ) as response:
                 if response.status == 200:
-                    resources = await response.json()
-                    print(f"📁 Available resources: {len(resources)}")
-                    for resource in resources:
-                        print(f"  - {resource['name']}: {resource['description']}")
-                    return resources
+                    results = (await response.json()).get("results", [])
+                    print(f"🔧 Batch of {len(calls)} tool calls:")
+                    for call, item in zip(calls, results):
+                        if "error" in item:
+                            print(f"  ❌ {call.get('name')}: {item['error']}")
+                        for content in item.get("result", []):
+                            print(f"  {call.get('name')}: {content.get('text', '')}")
+                    return results
                 else:
-                    print(f"❌ Failed to get resource list: HTTP {response.status}")
+                    error = await response.text()
+                    print(f"❌ Batch tool call failed: HTTP {response.status} - {error}")
                     return []
+        except Exception as e:
+            print(f"❌ Batch tool call failed: {e}")
+            return []
+    
+    async def list_resources(self) -> List[Dict[str, Any]]:
+        """Get list of available resources"""
+        try:
+            status, resources = await self._get_listing("/resources")
+            if status in (200, 304):
+                note = " (not modified)" if status == 304 else ""
+                print(f"📁 Available resources: {len(resources)}{note}")
+                for resource in resources:
+                    print(f"  - {resource['name']}: {resource['description']}")
+                return resources
+            else:
+                print(f"❌ Failed to get resource list: HTTP {status}")
+                return []
         except Exception as e:
             print(f"❌ Failed to get resource list: {e}")
             return []
@@ -111,19 +174,58 @@ class MCPSseClient:
             print(f"❌ Failed to read resource: {e}")
             return ""
     
+    async def read_resource_stream(self, uri: str, start: Optional[int] = None, end: Optional[int] = None,
+                                   chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """Stream a resource's bytes as they arrive; start/end (inclusive) ask for just that byte range
+
+        Nothing is held in memory beyond one chunk. Raises RuntimeError when the
+        server answers with an error.
+        """
+        headers = {}
+        if start is not None or end is not None:
+            headers["Range"] = f"bytes={start or 0}-{'' if end is None else end}"
+        async with self.session.get(
+            f"{self.base_url}/resources/stream",
+            params={"uri": uri},
+            headers=headers
+        ) as response:
+            if response.status not in (200, 206):
+                raise RuntimeError(f"HTTP {response.status} - {await response.text()}")
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+    
+    async def update_config(self, changes: Dict[str, Any], token: Optional[str] = None) -> Optional[int]:
+        """Change configuration values with the admin token; returns file://config.json's new version"""
+        token = token or os.environ.get("MCP_ADMIN_TOKEN")
+        if not token:
+            print("⚙️ POST /config needs MCP_ADMIN_TOKEN, set for the server and this client")
+            return None
+        try:
+            async with self.session.post(f"{self.base_url}/config", json=changes,
+                                         headers={"Authorization": f"Bearer {token}"}) as response:
+                result = await response.json()
+                if response.status == 200:
+                    print(f"⚙️ Configuration updated, version: {result['version']}")
+                    return result["version"]
+                print(f"❌ Failed to update configuration: HTTP {response.status} - {result.get('error')}")
+                return None
+        except Exception as e:
+            print(f"❌ Failed to update configuration: {e}")
+            return None
+    
     async def list_prompts(self) -> List[Dict[str, Any]]:
         """Get list of available prompts"""
         try:
-            async with self.session.get(f"{self.base_url}/prompts") as response:
-                if response.status == 200:
-                    prompts = await response.json()
-                    print(f"💬 Available prompts: {len(prompts)}")
-                    for prompt in prompts:
-                        print(f"  - {prompt['name']}: {prompt['description']}")
-                    return prompts
-                else:
-                    print(f"❌ Failed to get prompt list: HTTP {response.status}")
-                    return []
+            status, prompts = await self._get_listing("/prompts")
+            if status in (200, 304):
+                note = " (not modified)" if status == 304 else ""
+                print(f"💬 Available prompts: {len(prompts)}{note}")
+                for prompt in prompts:
+                    print(f"  - {prompt['name']}: {prompt['description']}")
+                return prompts
+            else:
+                print(f"❌ Failed to get prompt list: HTTP {status}")
+                return []
         except Exception as e:
             print(f"❌ Failed to get prompt list: {e}")
             return []
@@ -156,11 +258,50 @@ class MCPSseClient:
             print(f"❌ Failed to get prompt: {e}")
             return ""
     
+    async def call_tools_in_session(self, calls: List[Dict[str, Any]]) -> List[List[str]]:
+        """Run several tool calls as JSON-RPC requests over one MCP session on /sse"""
+        try:
+            async with sse_client(f"{self.base_url}/sse", httpx_client_factory=self.httpx_client_factory) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    # All requests share the session's single long-lived stream
+                    results = await asyncio.gather(*(
+                        session.call_tool(call["name"], call.get("arguments", {})) for call in calls
+                    ))
+            texts = [[content.text for content in result.content] for result in results]
+            print(f"🔗 {len(calls)} tool calls over one MCP session: {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ MCP session failed: {e}")
+            return []
+
+    @asynccontextmanager
+    async def subscribe(self, *uris: str) -> AsyncIterator["ResourceUpdates"]:
+        """Subscribe to resources over an MCP session on /sse; yields an async iterator of the URIs that change
+
+        The server coalesces a burst of changes to a resource into one
+        update, so iterating replaces polling read_resource in a loop.
+        """
+        updates = ResourceUpdates()
+
+        async def on_message(message):
+            if (isinstance(message, types.ServerNotification)
+                    and isinstance(message.root, types.ResourceUpdatedNotification)):
+                updates.put(str(message.root.params.uri))
+
+        async with sse_client(f"{self.base_url}/sse", httpx_client_factory=self.httpx_client_factory) as streams:
+            async with ClientSession(*streams, message_handler=on_message) as session:
+                await session.initialize()
+                for uri in uris:
+                    await session.subscribe_resource(uri)
+                print(f"🔔 Subscribed to {len(uris)} resource(s): {', '.join(uris)}")
+                yield updates
+
     async def listen_sse(self, duration: int = 10):
-        """Listen to SSE stream (for specified duration)"""
+        """Listen to the broadcast event stream (for specified duration)"""
         try:
             print(f"📡 SSE stream listening started (max {duration} seconds)")
-            async with self.session.get(f"{self.base_url}/sse") as response:
+            async with self.session.get(f"{self.base_url}/events") as response:
                 if response.status == 200:
                     start_time = time.time()
                     async for line in response.content:
@@ -181,12 +322,183 @@ class MCPSseClient:
             print(f"❌ SSE listening failed: {e}")
 
 
+class ResourceUpdates:
+    """Async iterator of the URIs of updated resources, one per coalesced change
+
+    Waiting on it can time out (asyncio.wait_for) without ending the iteration.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, uri: str):
+        self._queue.put_nowait(uri)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._queue.get()
+
+
+class MCPWebSocketClient:
+    """WebSocket-based MCP client: one MCP session, both directions on one connection"""
+    
+    def __init__(self, url: str = "ws://localhost:8000/ws"):
+        self.url = url
+        self.session: Optional[ClientSession] = None
+        self._stack: Optional[AsyncExitStack] = None
+    
+    async def connect(self):
+        """Open the WebSocket and initialize the MCP session"""
+        try:
+            self._stack = AsyncExitStack()
+            streams = await self._stack.enter_async_context(websocket_client(self.url))
+            self.session = await self._stack.enter_async_context(ClientSession(*streams))
+            await self.session.initialize()
+            print("✅ WebSocket MCP session opened.")
+            return True
+        except Exception as e:
+            print(f"❌ WebSocket connection failed: {e}")
+            await self.disconnect()
+            return False
+    
+    async def disconnect(self):
+        """Close the MCP session and the WebSocket"""
+        if self._stack:
+            await self._stack.aclose()
+            self._stack = None
+            self.session = None
+            print("🔌 WebSocket closed.")
+    
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        """Get list of available tools"""
+        try:
+            tools = [tool.model_dump() for tool in (await self.session.list_tools()).tools]
+            print(f"📋 Available tools: {len(tools)}")
+            for tool in tools:
+                print(f"  - {tool['name']}: {tool['description']}")
+            return tools
+        except Exception as e:
+            print(f"❌ Failed to get tool list: {e}")
+            return []
+    
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> List[str]:
+        """Call a tool"""
+        try:
+            result = await self.session.call_tool(name, arguments)
+            texts = [content.text for content in result.content]
+            print(f"🔧 Tool '{name}' call result:")
+            for text in texts:
+                print(f"  {text}")
+            return texts
+        except Exception as e:
+            print(f"❌ Tool call failed: {e}")
+            return []
+    
+    async def call_tools(self, calls: List[Dict[str, Any]]) -> List[List[str]]:
+        """Send several tool calls at once; the requests are multiplexed on the connection"""
+        try:
+            results = await asyncio.gather(*(
+                self.session.call_tool(call["name"], call.get("arguments", {})) for call in calls
+            ))
+            texts = [[content.text for content in result.content] for result in results]
+            print(f"🔧 {len(calls)} tool calls over the WebSocket: {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ Tool calls failed: {e}")
+            return []
+
+
+class MCPHttp2Client:
+    """HTTP/2 (h2c) MCP client: REST calls and MCP sessions are multiplexed as streams on one connection
+    
+    Needs a server started with MCP_HTTP2=1 (or launcher.py --http2).
+    Concurrent calls need no extra connections; a second connection is opened
+    only past 100 open streams (each MCP session holds one for its SSE stream).
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000"):
+        self.base_url = base_url.rstrip('/')
+        self.pool: Optional[http2.Http2Pool] = None
+        self.http: Optional[httpx.AsyncClient] = None
+    
+    async def connect(self):
+        """Open the HTTP/2 connection"""
+        try:
+            self.pool = http2.Http2Pool()
+            self.http = self.pool.client(base_url=self.base_url, timeout=30.0)
+            response = await self.http.get("/metrics")
+            print(f"✅ {response.http_version} connection opened.")
+            return True
+        except Exception as e:
+            print(f"❌ HTTP/2 connection failed (is the server running with MCP_HTTP2=1?): {e!r}")
+            await self.disconnect()
+            return False
+    
+    async def disconnect(self):
+        """Close the connection and every stream on it"""
+        if self.pool:
+            await self.http.aclose()
+            await self.pool.aclose()
+            self.pool = None
+            self.http = None
+            print("🔌 HTTP/2 connection closed.")
+    
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> List[str]:
+        """Call a tool through /tools/call"""
+        try:
+            response = await self.http.post("/tools/call", json={"name": name, "arguments": arguments})
+            if response.status_code != 200:
+                print(f"❌ Tool call failed: HTTP {response.status_code} - {response.text}")
+                return []
+            texts = [content.get("text", "") for content in response.json().get("result", [])]
+            print(f"🔧 Tool '{name}' call result: {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ Tool call failed: {e}")
+            return []
+    
+    async def call_tools(self, calls: List[Dict[str, Any]]) -> List[List[str]]:
+        """Send several tool calls at once; each one is a stream on the shared connection"""
+        try:
+            responses = await asyncio.gather(*(
+                self.http.post("/tools/call", json={"name": call["name"], "arguments": call.get("arguments", {})})
+                for call in calls
+            ))
+            texts = [[content.get("text", "") for content in response.json().get("result", [])]
+                     for response in responses]
+            print(f"🔧 {len(calls)} tool calls over {self.pool.connections()} connection(s): {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ Tool calls failed: {e}")
+            return []
+    
+    async def call_tools_in_sessions(self, calls: List[Dict[str, Any]]) -> List[List[str]]:
+        """Run each tool call in its own MCP session on /sse; all sessions share the connection"""
+        async def in_session(call: Dict[str, Any]) -> List[str]:
+            async with sse_client(f"{self.base_url}/sse", httpx_client_factory=self.pool.client_factory) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    result = await session.call_tool(call["name"], call.get("arguments", {}))
+                    return [content.text for content in result.content]
+        
+        try:
+            texts = await asyncio.gather(*(in_session(call) for call in calls))
+            print(f"🔗 {len(calls)} MCP sessions over {self.pool.connections()} connection(s): {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ MCP sessions failed: {e}")
+            return []
+
+
 async def test_sse_client():
     """SSE client test"""
     print("🚀 SSE MCP client test started")
     print("=" * 50)
     
-    client = MCPSseClient()
+    # MCP_UDS=/path/to/socket connects through the server's Unix domain socket instead of TCP
+    client = MCPSseClient(uds=os.environ.get("MCP_UDS", ""))
     
     try:
         # Connect to server
@@ -204,6 +516,13 @@ async def test_sse_client():
             
             # Test echo tool
             await client.call_tool("echo", {"message": "Hello MCP SSE!"})
+            
+            # Test several calls in one batch request
+            await client.call_tools_batch([
+                {"name": "calculator", "arguments": {"expression": "2 ** 10"}},
+                {"name": "calculator", "arguments": {"expression": "log(100, 10)"}},
+                {"name": "echo", "arguments": {"message": "batch"}}
+            ])
         
         print("\n3️⃣ Get resource list")
         resources = await client.list_resources()
@@ -211,6 +530,12 @@ async def test_sse_client():
         print("\n4️⃣ Resource read test")
         if resources:
             await client.read_resource("file://config.json")
+            # Read the resource in streamed form, then just its first 16 bytes
+            chunks = [chunk async for chunk in client.read_resource_stream("file://config.json")]
+            total, count = sum(len(chunk) for chunk in chunks), len(chunks)
+            print(f"📦 Streamed {total} bytes in {count} chunk(s)")
+            part = b"".join([chunk async for chunk in client.read_resource_stream("file://config.json", 0, 15)])
+            print(f"✂️ Bytes 0-15: {part!r}")
         
         print("\n5️⃣ Get prompt list")
         prompts = await client.list_prompts()
@@ -224,6 +549,48 @@ async def test_sse_client():
         print("\n7️⃣ SSE stream test")
         await client.listen_sse(duration=5)
         
+        print("\n8️⃣ MCP session test")
+        await client.call_tools_in_session([
+            {"name": "calculator", "arguments": {"expression": "6 * 7"}},
+            {"name": "echo", "arguments": {"message": "Hello MCP session!"}}
+        ])
+        
+        print("\n9️⃣ WebSocket session test")
+        ws_client = MCPWebSocketClient(client.base_url.replace("http", "ws", 1) + "/ws")
+        if await ws_client.connect():
+            await ws_client.list_tools()
+            await ws_client.call_tool("calculator", {"expression": "2 ** 8"})
+            await ws_client.call_tools([
+                {"name": "echo", "arguments": {"message": "one"}},
+                {"name": "echo", "arguments": {"message": "two"}}
+            ])
+            await ws_client.disconnect()
+        
+        print("\n🔟 HTTP/2 test")
+        h2_client = MCPHttp2Client(client.base_url)
+        if await h2_client.connect():
+            await h2_client.call_tools([
+                {"name": "echo", "arguments": {"message": "one"}},
+                {"name": "calculator", "arguments": {"expression": "2 ** 16"}}
+            ])
+            await h2_client.call_tools_in_sessions([
+                {"name": "echo", "arguments": {"message": "session one"}},
+                {"name": "echo", "arguments": {"message": "session two"}}
+            ])
+            await h2_client.disconnect()
+        
+        print("\n1️⃣1️⃣ Resource subscription test")
+        async with client.subscribe("file://config.json") as updates:
+            # Two changes in a row arrive as one notification
+            if await client.update_config({"debug": False}) is not None:
+                await client.update_config({"debug": True})
+                try:
+                    # Pushed by the server when the configuration changes; nothing is polled meanwhile
+                    uri = await asyncio.wait_for(anext(updates), timeout=2)
+                    print(f"📨 Resource updated: {uri}")
+                except asyncio.TimeoutError:
+                    print("🔕 No updates within 2 seconds")
+        
         print("\n✅ All tests completed!")
         
     except Exception as e:
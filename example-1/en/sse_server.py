@@ -1,20 +1,86 @@
 # sse_server.py
 import asyncio
+import base64
+import contextlib
+import hashlib
 import json
-import math
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Callable
 from mcp.server import Server
 from mcp import types
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse, StreamingResponse
-from starlette.routing import Route
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route, WebSocketRoute
 from starlette.middleware.cors import CORSMiddleware
-import uvicorn
+import admin
+import admission
+import broadcast_hub
+import cancellation
+import compression
+import cost_estimator
+import evaluation_pool
+import fast_json
+import file_resources
+import prompt_engine
+import resource_cache
+import resource_index
+import resources
+import runtime
+import sse_sessions
+import subscriptions
+from fast_json import FastJSONResponse
 
 
 # Create server instance
 server = Server("my-mcp-server")
 
+# Batch tool calls: maximum calls per request and calls running at once
+MAX_BATCH_CALLS = int(os.environ.get("MCP_BATCH_MAX_CALLS", "100"))
+BATCH_CONCURRENCY = int(os.environ.get("MCP_BATCH_CONCURRENCY", "8"))
+
+# MCP sessions over /sse and /ws: maximum sessions open at once
+MAX_SESSIONS = int(os.environ.get("MCP_MAX_SESSIONS", "1000"))
+
+# Response compression: bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.environ.get("MCP_COMPRESSION_MIN_SIZE", "1024"))
+
+# Pre-serialized listings: path -> (JSON bytes, strong ETag)
+listings: Dict[str, tuple[bytes, str]] = {}
+
+# Pending re-serialization after a file change (rebuild_listings_later), and when it is due
+listings_rebuild = None
+listings_rebuild_due = 0.0
+# The index's (added, removed) counts when the last file change was seen
+listed_files = (0, 0)
+
+# Listings change only with the registry, so clients always revalidate instead of re-downloading
+LISTING_CACHE_CONTROL = "no-cache"
+
+# Resource providers behind list_resources, read_resource and the /resources routes
+resource_registry = resources.ResourceRegistry()
+
+# Files under MCP_RESOURCE_ROOT as file:/// resources (mmap for resources/read, sendfile over HTTP),
+# listed from an index that inotify keeps current instead of a walk per list_resources
+file_index = None
+if file_resources.ROOT:
+    file_index = resource_registry.mount(
+        resource_index.ResourceIndex(file_resources.FileRoot(file_resources.ROOT)))
+
+# Seconds to wait after a file change before re-serializing the listings, so a burst costs one rebuild
+LISTING_REBUILD_DELAY = 0.1
+
+# Files that only changed size or mtime wait longer, so a file being written to (IN_MODIFY on
+# every write) re-serializes the listings at most this often instead of after every burst
+LISTING_SIZE_DELAY = float(os.environ.get("MCP_LISTING_SIZE_DELAY", "5.0"))
+
+# Application configuration served as file://config.json; change it through update_config
+# (or POST /config, which is only served with MCP_ADMIN_TOKEN set; see admin.py)
+config = {
+    "version": "1.0",
+    "debug": True,
+    "max_connections": 100
+}
+
 
 @server.list_tools()
 async def list_tools() -> list[types.Tool]:
@@ -57,13 +123,10 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     if name == "calculator":
         expression = arguments.get("expression", "")
         try:
-            # Only allow limited functions for safe calculation
-            allowed_names = {
-                k: v for k, v in math.__dict__.items() if not k.startswith("__")
-            }
-            allowed_names.update({"abs": abs, "round": round})
-            
-            result = eval(expression, {"__builtins__": {}}, allowed_names)
+            # Rejected up front, without tying up a worker, when the estimated cost is over budget
+            cost_estimator.check(expression)
+            # Evaluated in a worker process so a runaway expression cannot block the event loop
+            result = await evaluation_pool.pool.evaluate(expression)
             return [types.TextContent(type="text", text=f"Calculation result: {result}")]
         except Exception as e:
             return [types.TextContent(type="text", text=f"Calculation error: {str(e)}")]
@@ -76,30 +139,35 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
         raise ValueError(f"Unknown tool: {name}")
 
 
+@resource_registry.provider("file://config.json", name="Configuration file",
+                            description="Application configuration file", mime_type="application/json")
+@resource_cache.cache.cached("file://config.json")
+async def read_config() -> str:
+    """Application configuration as JSON (rendered once per version)"""
+    return json.dumps(config, indent=2)
+
+
+def update_config(changes: Dict[str, Any]) -> int:
+    """Apply changes to the configuration; returns the resource's new version"""
+    config.update(changes)
+    return resource_cache.cache.invalidate("file://config.json")
+
+
 @server.list_resources()
 async def list_resources() -> list[types.Resource]:
     """Return list of available resources."""
-    return [
-        types.Resource(
-            uri="file://config.json",
-            name="Configuration file",
-            description="Application configuration file",
-            mimeType="application/json"
-        )
-    ]
+    return resource_registry.resources()
 
 
 @server.read_resource()
-async def read_resource(uri: str) -> str:
-    """Read and return a resource."""
-    if uri == "file://config.json":
-        return json.dumps({
-            "version": "1.0",
-            "debug": True,
-            "max_connections": 100
-        }, indent=2)
-    else:
-        raise ValueError(f"Unknown resource: {uri}")
+async def read_resource(uri: str) -> str | bytes:
+    """Read and return a resource (a streamed body is collected: MCP sends it in one message)."""
+    return await resource_registry.read(uri)
+
+
+# resources/subscribe: subscribers are told when a resource changes (coalesced) instead of polling it
+subscriptions.hub.attach(server)
+resource_cache.cache.on_invalidate(subscriptions.hub.changed)
 
 
 @server.list_prompts()
@@ -120,64 +188,59 @@ async def list_prompts() -> list[types.Prompt]:
     ]
 
 
-@server.get_prompt()
-async def get_prompt(name: str, arguments: dict) -> types.GetPromptResult:
-    """Return a prompt."""
-    if name == "code_review":
-        code = arguments["code"]
-        return types.GetPromptResult(
-            description="Code review prompt",
-            messages=[
-                types.PromptMessage(
-                    role="user",
-                    content=types.TextContent(
-                        type="text",
-                        text=f"Please review the following code:\n\n```\n{code}\n```"
-                    )
+# Parsed once; rendering copies the code straight into the prompt text
+CODE_REVIEW = prompt_engine.PromptTemplate("Please review the following code:\n\n```\n{code}\n```")
+
+
+def render_code_review(arguments: dict) -> types.GetPromptResult:
+    return types.GetPromptResult(
+        description="Code review prompt",
+        messages=[
+            types.PromptMessage(
+                role="user",
+                content=types.TextContent(
+                    type="text",
+                    text=CODE_REVIEW.render(arguments)
                 )
-            ]
-        )
+            )
+        ]
+    )
+
+
+def prompt_renderer(name: str, arguments: dict) -> Callable[[], types.GetPromptResult]:
+    """Render function for a prompt; ValueError for an unknown one"""
+    if name == "code_review":
+        return lambda: render_code_review(arguments)
     else:
         raise ValueError(f"Unknown prompt: {name}")
 
 
-# SSE endpoint
-async def sse_endpoint(request):
-    """Server-Sent Events endpoint"""
-    
-    async def event_generator():
-        # Initial connection message
-        yield f"data: {json.dumps({'type': 'connected', 'message': 'MCP Server connected'})}\n\n"
-        
-        # Queue for receiving messages from client
-        message_queue = asyncio.Queue()
-        
-        # Message processing task
-        async def process_messages():
-            while True:
-                try:
-                    # In actual implementation, client messages should be received via WebSocket or other methods
-                    # Here we only provide a simple structure for demo purposes
-                    await asyncio.sleep(1)
-                except Exception as e:
-                    print(f"Message processing error: {e}")
-                    break
-        
-        # Start message processing
-        task = asyncio.create_task(process_messages())
-        
-        try:
-            while True:
-                # Periodic status updates (in reality, respond to client messages)
-                yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': asyncio.get_event_loop().time()})}\n\n"
-                await asyncio.sleep(5)
-        except Exception as e:
-            print(f"SSE stream error: {e}")
-        finally:
-            task.cancel()
-    
+@server.get_prompt()
+async def get_prompt(name: str, arguments: dict) -> types.GetPromptResult:
+    """Return a prompt."""
+    # Not cached: rendering is a single copy of the code, cheaper than a cache lookup comparing it in full
+    return prompt_renderer(name, arguments)()
+
+
+# Tool calls in MCP sessions run under per-tool time budgets (notifications/cancelled and
+# session disconnects already cancel the handler)
+cancellation.track_requests(server)
+
+
+# SSE endpoints
+# MCP sessions: GET /sse runs server.run() per connection, POST /messages/?session_id=... feeds it;
+# WebSocket /ws runs it with both directions on one connection
+sessions = sse_sessions.SseSessionRegistry(server, "/messages/", max_sessions=MAX_SESSIONS)
+
+# Initial connection message of /events, encoded once for every connection
+CONNECTED_FRAME = broadcast_hub.encode({"type": "connected", "message": "MCP Server connected"})
+
+
+async def events_endpoint(request):
+    """Broadcast event stream (heartbeats and server events)"""
+    # Heartbeats and server events come from the shared hub, not from a timer per connection
     return StreamingResponse(
-        event_generator(),
+        broadcast_hub.hub.stream(CONNECTED_FRAME),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -189,10 +252,84 @@ async def sse_endpoint(request):
 
 
 # API endpoints
+async def build_listings():
+    """Serialize the tool, resource and prompt listings once; call again if the registry changes"""
+    for path, handler in (("/tools", list_tools), ("/resources", list_resources), ("/prompts", list_prompts)):
+        items = await handler()
+        body = fast_json.dumps_models(items)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        previous = listings.get(path)
+        listings[path] = (body, etag)
+        if previous is not None and previous[1] != etag:
+            # Connected clients learn that their cached listing is stale
+            broadcast_hub.hub.publish({"type": "list_changed", "path": path, "etag": etag})
+
+
+def rebuild_listings_later(changed):
+    """Re-serialize the listings after the file index changes (ResourceIndex.on_change)
+
+    Added or removed files are listed after LISTING_REBUILD_DELAY; new sizes
+    of existing files after LISTING_SIZE_DELAY. An earlier rebuild replaces a
+    later one that is still waiting.
+    """
+    global listings_rebuild, listings_rebuild_due, listed_files
+    files = (file_index.added, file_index.removed)
+    delay = LISTING_REBUILD_DELAY if files != listed_files else LISTING_SIZE_DELAY
+    listed_files = files
+    due = asyncio.get_running_loop().time() + delay
+    if listings_rebuild is not None and not listings_rebuild.done():
+        if listings_rebuild_due <= due:
+            return
+        listings_rebuild.cancel()
+    listings_rebuild_due = due
+    listings_rebuild = asyncio.create_task(rebuild_listings(delay))
+
+
+async def rebuild_listings(delay: float):
+    global listings_rebuild
+    await asyncio.sleep(delay)
+    # Changes from here on may be missed by this build, so they schedule another one
+    listings_rebuild = None
+    await build_listings()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches the given ETag"""
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix is ignored
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+async def listing_response(request, path: str) -> Response:
+    """Serve a pre-serialized listing, or 304 when the client's ETag still matches"""
+    if path not in listings:
+        # Built by the lifespan; built here too when the app runs without it
+        await build_listings()
+    body, etag = listings[path]
+    headers = {"ETag": etag, "Cache-Control": LISTING_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 async def list_tools_endpoint(request):
     """Return tool list"""
-    tools = await server.list_tools()
-    return JSONResponse(tools)
+    return await listing_response(request, "/tools")
+
+
+async def run_tool_call(name: str, arguments: Dict[str, Any]) -> list[types.TextContent]:
+    """Run a tool call and return its content items (MCP types)"""
+    # The decorated handler is a plain coroutine; Server only registers it
+    return await call_tool(name, arguments or {})
+
+
+def overloaded_response(error: admission.Overloaded) -> FastJSONResponse:
+    """503 telling the client when to retry"""
+    return FastJSONResponse({"error": str(error)}, status_code=503,
+                            headers={"Retry-After": str(error.retry_after)})
 
 
 async def call_tool_endpoint(request):
@@ -202,35 +339,105 @@ async def call_tool_endpoint(request):
     arguments = body.get("arguments", {})
     
     try:
-        result = await server.call_tool(name, arguments)
-        return JSONResponse({"result": result})
+        # Shed load up front instead of letting a burst slow every request down
+        async with admission.controller.admit():
+            # Cancelled when it runs past its budget or the client hangs up, so abandoned calls stop costing CPU
+            result = await cancellation.tracker.run(
+                name, run_tool_call(name, arguments),
+                disconnected=cancellation.wait_for_disconnect(request.receive))
+        return FastJSONResponse({"result": result})
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except cancellation.ToolTimeout as e:
+        return FastJSONResponse({"error": str(e)}, status_code=504)
+    except cancellation.ClientDisconnected:
+        # Nobody is left to read a response (499: client closed request)
+        return Response(status_code=499)
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+
+
+async def call_tools_batch_endpoint(request):
+    """Run several tool calls concurrently and return the results in order"""
+    try:
+        calls = await request.json()
+    except ValueError as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+    if not isinstance(calls, list):
+        return FastJSONResponse({"error": "Request body must be a JSON array of {name, arguments} items"}, status_code=400)
+    if len(calls) > MAX_BATCH_CALLS:
+        return FastJSONResponse({"error": f"Too many calls in one batch (max {MAX_BATCH_CALLS})"}, status_code=413)
+    try:
+        concurrency = int(request.query_params.get("concurrency", BATCH_CONCURRENCY))
+    except ValueError:
+        concurrency = 0
+    if concurrency < 1:
+        return FastJSONResponse({"error": "concurrency must be a positive integer"}, status_code=400)
+    semaphore = asyncio.Semaphore(min(concurrency, BATCH_CONCURRENCY))
+    try:
+        # Shed the whole batch with the same 503 as /tools/call when the server is overloaded
+        admission.controller.check()
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+
+    async def run_one(call):
+        if not isinstance(call, dict) or not call.get("name"):
+            return {"error": "Each item must be an object with a name"}
+        async with semaphore:
+            try:
+                # Each item holds an admission slot, like a single call
+                async with admission.controller.admit():
+                    return {"result": await cancellation.tracker.run(
+                        call["name"], run_tool_call(call["name"], call.get("arguments", {})))}
+            except admission.Overloaded as e:
+                return {"error": str(e), "retry_after": e.retry_after}
+            except Exception as e:
+                return {"error": str(e)}
+
+    results = await asyncio.gather(*(run_one(call) for call in calls))
+    return FastJSONResponse({"results": results})
 
 
 async def list_resources_endpoint(request):
     """Return resource list"""
-    resources = await server.list_resources()
-    return JSONResponse(resources)
+    return await listing_response(request, "/resources")
 
 
 async def read_resource_endpoint(request):
     """Read a resource"""
     uri = request.query_params.get("uri")
     if not uri:
-        return JSONResponse({"error": "URI is required"}, status_code=400)
+        return FastJSONResponse({"error": "URI is required"}, status_code=400)
     
     try:
-        content = await server.read_resource(uri)
-        return JSONResponse({"content": content})
+        content = await read_resource(uri)
+        if isinstance(content, bytes):
+            # Binary resources travel base64-encoded, as in MCP's blob contents
+            return FastJSONResponse({"blob": base64.b64encode(content).decode()})
+        return FastJSONResponse({"content": content})
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+
+
+async def stream_resource_endpoint(request):
+    """Stream a resource's raw bytes (files go out with sendfile); a `Range: bytes=` header gets 206 with just that part"""
+    uri = request.query_params.get("uri")
+    if not uri:
+        return FastJSONResponse({"error": "URI is required"}, status_code=400)
+    try:
+        provider = resource_registry.get(uri)
+        return await provider.response(request.headers.get("range"))
+    except resources.ResourceNotFound as e:
+        return FastJSONResponse({"error": str(e)}, status_code=404)
+    except resources.RangeNotSatisfiable as e:
+        return FastJSONResponse({"error": str(e)}, status_code=416, headers={"Content-Range": f"bytes */{e.size}"})
+    except Exception as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
 
 
 async def list_prompts_endpoint(request):
     """Return prompt list"""
-    prompts = await server.list_prompts()
-    return JSONResponse(prompts)
+    return await listing_response(request, "/prompts")
 
 
 async def get_prompt_endpoint(request):
@@ -240,23 +447,88 @@ async def get_prompt_endpoint(request):
     arguments = body.get("arguments", {})
     
     try:
-        result = await server.get_prompt(name, arguments)
-        return JSONResponse(result)
+        async with admission.controller.admit():
+            # Encoding the result is what costs: a repeat of the same arguments gets the stored JSON body
+            body = prompt_engine.cache.encoded(name, arguments, prompt_renderer(name, arguments), fast_json.dumps)
+        return Response(body, media_type="application/json")
+    except admission.Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+
+
+async def update_config_endpoint(request):
+    """Change configuration values (admin token required); subscribers to file://config.json are notified"""
+    if not admin.authorized(request.headers):
+        return FastJSONResponse({"error": "Unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    try:
+        changes = await request.json()
+    except ValueError as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+    error = admin.invalid_changes(changes, config)
+    if error:
+        return FastJSONResponse({"error": error}, status_code=400)
+    return FastJSONResponse({"version": update_config(changes)})
+
+
+async def metrics_endpoint(request):
+    """Return server metrics"""
+    return FastJSONResponse({
+        "evaluation_pool": evaluation_pool.pool.stats(),
+        "admission": admission.controller.stats(),
+        "tool_calls": cancellation.tracker.stats(),
+        "sse": broadcast_hub.hub.stats(),
+        "mcp_sessions": sessions.stats(),
+        "compression": compression.stats.stats(),
+        "resource_cache": resource_cache.cache.stats(),
+        "resource_index": file_index.stats() if file_index is not None else None,
+        "subscriptions": subscriptions.hub.stats(),
+        "prompt_cache": prompt_engine.cache.stats(),
+        "runtime": runtime.stats()
+    })
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Build the listings and start the calculator worker pool and SSE hub with the app; stop them and end open sessions on shutdown"""
+    if file_index is not None:
+        # Indexed (and watched) before the first listing is serialized
+        await file_index.start()
+        file_index.on_change(rebuild_listings_later)
+        file_index.on_change(lambda changed: subscriptions.hub.changed(*changed))
+    await build_listings()
+    evaluation_pool.pool.start()
+    broadcast_hub.hub.start()
+    try:
+        yield
+    finally:
+        if file_index is not None:
+            file_index.stop()
+        sessions.close()
+        broadcast_hub.hub.stop()
+        evaluation_pool.pool.shutdown()
 
 
 # Create Starlette application
 app = Starlette(
     routes=[
-        Route("/sse", sse_endpoint),
+        Route("/sse", sessions, methods=["GET"]),
+        Mount("/messages/", app=sessions.handle_post_message),
+        Route("/events", events_endpoint, methods=["GET"]),
+        WebSocketRoute("/ws", sessions.run_websocket),
         Route("/tools", list_tools_endpoint, methods=["GET"]),
         Route("/tools/call", call_tool_endpoint, methods=["POST"]),
+        Route("/tools/batch", call_tools_batch_endpoint, methods=["POST"]),
         Route("/resources", list_resources_endpoint, methods=["GET"]),
         Route("/resources/read", read_resource_endpoint, methods=["GET"]),
+        Route("/resources/stream", stream_resource_endpoint, methods=["GET"]),
         Route("/prompts", list_prompts_endpoint, methods=["GET"]),
         Route("/prompts/get", get_prompt_endpoint, methods=["POST"]),
-    ]
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        # Configuration writes are off unless an admin token is set
+        *([Route("/config", update_config_endpoint, methods=["POST"])] if admin.ADMIN_TOKEN else []),
+    ],
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -268,9 +540,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses for clients that accept it; SSE streams and WebSockets pass through untouched
+app.add_middleware(compression.CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 
 if __name__ == "__main__":
     print("MCP Server (SSE) starting...")
-    print("SSE endpoint: http://localhost:8000/sse")
+    print("SSE endpoint (MCP session): http://localhost:8000/sse")
+    print("WebSocket endpoint (MCP session): ws://localhost:8000/ws")
+    print("Event stream: http://localhost:8000/events")
     print("API endpoint: http://localhost:8000/tools")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    print("Batch endpoint: http://localhost:8000/tools/batch")
+    # uvloop / httptools when installed, unless MCP_LOOP / MCP_HTTP ask otherwise; MCP_HTTP2=1 adds h2c
+    runtime.serve(app, "0.0.0.0", 8000)
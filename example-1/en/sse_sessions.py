@@ -0,0 +1,145 @@
+# sse_sessions.py
+import time
+from typing import Any, Dict
+from uuid import uuid4
+
+import anyio
+from mcp import types
+from mcp.server import Server
+from mcp.server.websocket import websocket_server
+from mcp.shared.message import ServerMessageMetadata, SessionMessage
+from pydantic import ValidationError
+from sse_starlette import EventSourceResponse
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.websockets import WebSocket
+
+from fast_json import FastJSONResponse
+
+
+class SseSession:
+    """One MCP session: the stream feeding server.run() and its counters"""
+
+    __slots__ = ("id", "writer", "created", "received", "sent")
+
+    def __init__(self, session_id: str, writer):
+        self.id = session_id
+        self.writer = writer
+        self.created = time.monotonic()
+        self.received = 0
+        self.sent = 0
+
+
+class SseSessionRegistry:
+    """MCP sessions over SSE, keyed by session ID for the POST message endpoint
+
+    The registry itself is the ASGI app for GET /sse: each connection runs
+    server.run() for as long as the client stays connected. Client messages
+    arrive on the endpoint announced in the first event, and responses are
+    streamed back on the same connection. WebSocket sessions (run_websocket)
+    carry both directions on one connection and count against the same cap.
+    """
+
+    def __init__(self, server: Server, endpoint: str = "/messages/", max_sessions: int = 1000):
+        self.server = server
+        self.endpoint = endpoint
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, SseSession] = {}
+        self.websockets = 0
+
+        # Metrics
+        self.opened = 0
+        self.rejected = 0
+        self.messages = 0
+
+    async def __call__(self, scope, receive, send):
+        """GET /sse: one long-lived MCP session per connection"""
+        if len(self.sessions) + self.websockets >= self.max_sessions:
+            self.rejected += 1
+            response = FastJSONResponse({"error": "Too many sessions"}, status_code=503)
+            return await response(scope, receive, send)
+
+        read_writer, read_stream = anyio.create_memory_object_stream(0)
+        write_stream, write_reader = anyio.create_memory_object_stream(0)
+        session = SseSession(uuid4().hex, read_writer)
+        self.sessions[session.id] = session
+        self.opened += 1
+        endpoint = f"{scope.get('root_path', '').rstrip('/')}{self.endpoint}?session_id={session.id}"
+
+        async def events():
+            yield {"event": "endpoint", "data": endpoint}
+            async with write_reader:
+                async for message in write_reader:
+                    session.sent += 1
+                    yield {"event": "message",
+                           "data": message.message.model_dump_json(by_alias=True, exclude_none=True)}
+
+        async def run_server():
+            async with read_stream, write_stream:
+                await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(run_server)
+                await EventSourceResponse(events())(scope, receive, send)
+                # The client went away: stop the server side of the session
+                tg.cancel_scope.cancel()
+        finally:
+            self.sessions.pop(session.id, None)
+            read_writer.close()
+
+    async def handle_post_message(self, scope, receive, send):
+        """POST /messages/?session_id=...: hand one JSON-RPC message to its session"""
+        request = Request(scope, receive)
+        session = self.sessions.get(request.query_params.get("session_id", ""))
+        if session is None:
+            response = FastJSONResponse({"error": "Unknown session"}, status_code=404)
+            return await response(scope, receive, send)
+
+        try:
+            message = types.JSONRPCMessage.model_validate_json(await request.body())
+        except ValidationError:
+            response = FastJSONResponse({"error": "Invalid JSON-RPC message"}, status_code=400)
+            return await response(scope, receive, send)
+
+        try:
+            # Waits until the session has taken the message, so a busy session pushes back on the client
+            await session.writer.send(SessionMessage(message, metadata=ServerMessageMetadata(request_context=request)))
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            response = FastJSONResponse({"error": "Session closed"}, status_code=410)
+            return await response(scope, receive, send)
+        session.received += 1
+        self.messages += 1
+        await Response("Accepted", status_code=202)(scope, receive, send)
+
+    async def run_websocket(self, websocket: WebSocket):
+        """WebSocket /ws: one MCP session with both directions on the same connection"""
+        if len(self.sessions) + self.websockets >= self.max_sessions:
+            self.rejected += 1
+            # 1013: try again later
+            return await websocket.close(code=1013)
+
+        self.websockets += 1
+        self.opened += 1
+        try:
+            # The mcp transport pumps WebSocket text frames through memory streams into server.run()
+            async with websocket_server(websocket.scope, websocket._receive, websocket._send) as (read_stream, write_stream):
+                await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        finally:
+            self.websockets -= 1
+
+    def close(self):
+        """End every open session; used on shutdown"""
+        for session in list(self.sessions.values()):
+            session.writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return session count and message metrics"""
+        return {
+            "sessions": len(self.sessions),
+            "websocket_sessions": self.websockets,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "messages": self.messages,
+            "max_sessions": self.max_sessions
+        }
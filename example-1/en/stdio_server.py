@@ -2,10 +2,11 @@
 import asyncio
 import sys
 import json
-import math
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp import types
+import cost_estimator
+import evaluation_pool
 
 
 # Create server instance
@@ -53,13 +54,10 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     if name == "calculator":
         expression = arguments.get("expression", "")
         try:
-            # Only allow limited functions for safe calculation
-            allowed_names = {
-                k: v for k, v in math.__dict__.items() if not k.startswith("__")
-            }
-            allowed_names.update({"abs": abs, "round": round})
-            
-            result = eval(expression, {"__builtins__": {}}, allowed_names)
+            # Rejected up front, without tying up a worker, when the estimated cost is over budget
+            cost_estimator.check(expression)
+            # Evaluated in a worker process so a runaway expression cannot block the event loop
+            result = await evaluation_pool.pool.evaluate(expression)
             return [types.TextContent(type="text", text=f"Calculation result: {result}")]
         except Exception as e:
             return [types.TextContent(type="text", text=f"Calculation error: {str(e)}")]
@@ -139,6 +137,8 @@ async def get_prompt(name: str, arguments: dict) -> types.GetPromptResult:
 
 async def main():
     """Main function"""
+    # Pre-warm the calculator worker processes
+    evaluation_pool.pool.start()
     async with stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream,
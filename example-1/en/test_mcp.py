@@ -1,12 +1,28 @@
 # test_mcp.py
 import asyncio
+import json
 import subprocess
 import time
 import signal
 import sys
 import os
+from typing import Any, Dict, List
 from stdio_client import MCPStdioClient
-from sse_client import MCPSseClient
+from sse_client import MCPSseClient, MCPWebSocketClient
+import cost_estimator
+import cost_cases
+import calculator
+import engine_cases
+
+
+# Printed for each outcome of cost_cases.run
+COST_MESSAGES = {
+    "rejected": "✅ Rejected in {ms:.2f} ms: {label} ({detail})",
+    "too_slow": "❌ Rejected too slowly ({ms:.1f} ms): {label}",
+    "not_rejected": "❌ Not rejected: {label}",
+    "accepted": "✅ Accepted: {label}",
+    "wrongly_rejected": "❌ Wrongly rejected: {label} ({detail})",
+}
 
 
 class MCPTester:
@@ -119,9 +135,15 @@ class MCPTester:
             # Tool test
             print("\n🔧 Tool Test")
             tools = await self.sse_client.list_tools()
+            # Listing again only revalidates the cached copy (304 Not Modified)
+            await self.sse_client.list_tools()
             if tools:
                 await self.sse_client.call_tool("calculator", {"expression": "20 * 3"})
                 await self.sse_client.call_tool("echo", {"message": "SSE test"})
+                await self.sse_client.call_tools_batch([
+                    {"name": "calculator", "arguments": {"expression": "1 + 1"}},
+                    {"name": "echo", "arguments": {"message": "batch"}}
+                ])
             
             # Resource test
             print("\n📁 Resource Test")
@@ -141,6 +163,27 @@ class MCPTester:
             print("\n📡 SSE Stream Test")
             await self.sse_client.listen_sse(duration=3)
             
+            # MCP session test
+            print("\n🔗 MCP Session Test")
+            if not await self.sse_client.call_tools_in_session([
+                {"name": "calculator", "arguments": {"expression": "7 * 6"}},
+                {"name": "echo", "arguments": {"message": "session test"}}
+            ]):
+                return False
+            
+            # WebSocket session test
+            print("\n🔌 WebSocket Session Test")
+            ws_client = MCPWebSocketClient()
+            if not await ws_client.connect():
+                return False
+            results = await ws_client.call_tools([
+                {"name": "calculator", "arguments": {"expression": "3 ** 4"}},
+                {"name": "echo", "arguments": {"message": "websocket test"}}
+            ])
+            await ws_client.disconnect()
+            if not results:
+                return False
+            
             await self.sse_client.disconnect()
             print("✅ SSE client test completed")
             return True
@@ -149,17 +192,234 @@ class MCPTester:
             print(f"❌ SSE client test failed: {e}")
             return False
     
+    async def test_expression_engine(self):
+        """Expression engine test: the same results as eval()"""
+        print("\n" + "="*60)
+        print("🧮 Expression Engine Test")
+        print("="*60)
+        
+        passed = True
+        # The cases are in engine_cases.py
+        for same, expression, engine, python in engine_cases.run(calculator):
+            if same:
+                print(f"✅ {expression} → {engine}")
+            else:
+                print(f"❌ {expression}: engine {engine}, eval {python}")
+                passed = False
+        
+        print(f"{'✅' if passed else '❌'} Expression engine test completed")
+        return passed
+    
+    async def test_cost_estimator(self):
+        """Cost estimator test with adversarial expressions"""
+        print("\n" + "="*60)
+        print("🛡️ Cost Estimator Test")
+        print("="*60)
+        
+        passed = True
+        # The cases and the timing check are in cost_cases.py
+        for outcome, label, elapsed_ms, detail in cost_cases.run(cost_estimator):
+            print(COST_MESSAGES[outcome].format(label=label, ms=elapsed_ms, detail=detail))
+            if outcome not in cost_cases.PASSED:
+                passed = False
+        
+        print(f"{'✅' if passed else '❌'} Cost estimator test completed")
+        return passed
+    
+    @staticmethod
+    def _check(passed: bool, label: str) -> bool:
+        """Print one behavior check and return whether it passed"""
+        print(f"{'✅' if passed else '❌'} {label}")
+        return passed
+    
+    async def test_behavior(self):
+        """Status codes, caching and notifications, checked against the app in this process"""
+        print("\n" + "="*60)
+        print("🔬 Behavior Test")
+        print("="*60)
+        
+        # The server modules are only needed here; the other tests talk to a server process
+        import httpx
+        import sse_server
+        
+        app = sse_server.app
+        checks = []
+        try:
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                    for check in (
+                        self._check_batch,
+                        self._check_listings,
+                        self._check_admission,
+                        self._check_timeouts,
+                        self._check_ranges,
+                        self._check_resource_cache,
+                        self._check_subscriptions,
+                    ):
+                        checks.extend(await check(app, http))
+        except Exception as e:
+            print(f"❌ Behavior test failed: {e!r}")
+            return False
+        
+        passed = all(checks)
+        print(f"{'✅' if passed else '❌'} Behavior test completed")
+        return passed
+    
+    async def _check_batch(self, app, http) -> List[bool]:
+        """A failing item does not fail the rest of the batch"""
+        response = await http.post("/tools/batch", json=[
+            {"name": "echo", "arguments": {"message": "batch"}},
+            {"name": "missing"}
+        ])
+        items = response.json().get("results", [])
+        return [self._check(
+            response.status_code == 200 and len(items) == 2 and "result" in items[0] and "error" in items[1],
+            "Batch: a result and an error item")]
+    
+    async def _check_listings(self, app, http) -> List[bool]:
+        """An unchanged listing is only revalidated"""
+        response = await http.get("/tools")
+        response = await http.get("/tools", headers={"If-None-Match": response.headers["ETag"]})
+        return [self._check(response.status_code == 304, "Unchanged listing: 304 Not Modified")]
+    
+    async def _check_admission(self, app, http) -> List[bool]:
+        """Calls are shed with 503 and Retry-After when the server is full"""
+        import admission
+        
+        # The only slot is taken and nothing may queue, so calls are shed
+        shared = admission.controller
+        admission.controller = admission.AdmissionController(limit=1, queue_size=0)
+        try:
+            async with admission.controller.admit():
+                response = await http.post("/tools/call", json={
+                    "name": "echo", "arguments": {"message": "shed"}})
+                batch = await http.post("/tools/batch", json=[
+                    {"name": "echo", "arguments": {"message": "shed"}}])
+        finally:
+            admission.controller = shared
+        return [self._check(
+            response.status_code == 503 and "Retry-After" in response.headers and batch.status_code == 503,
+            "Overloaded: 503 with Retry-After")]
+    
+    async def _check_timeouts(self, app, http) -> List[bool]:
+        """Calls over their time budget get 504, calls whose client left get 499"""
+        import cancellation
+        
+        cancellation.tracker.timeouts["calculator"] = 0
+        try:
+            response = await http.post("/tools/call", json={
+                "name": "calculator", "arguments": {"expression": "1 + 1"}})
+        finally:
+            del cancellation.tracker.timeouts["calculator"]
+        checks = [self._check(response.status_code == 504, "Over the time budget: 504")]
+        
+        # httpx never disconnects mid-request, so the app is called directly
+        status = await self._post_and_disconnect(app, "/tools/call", {
+            "name": "calculator", "arguments": {"expression": "2 ** 10"}})
+        checks.append(self._check(status == 499, "Client gone during the call: 499"))
+        return checks
+    
+    @staticmethod
+    async def _post_and_disconnect(app, path: str, body: Dict[str, Any]) -> int:
+        """POST to the ASGI app and disconnect right after the body; returns the response status"""
+        messages = [{"type": "http.request", "body": json.dumps(body).encode()}, {"type": "http.disconnect"}]
+        statuses = []
+        
+        async def receive():
+            # After the disconnect every receive() reports it again
+            return messages.pop(0) if len(messages) > 1 else messages[0]
+        
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+        
+        await app({"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+                   "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+                   "headers": [(b"content-type", b"application/json")], "server": ("test", 80)}, receive, send)
+        return statuses[0]
+    
+    async def _check_ranges(self, app, http) -> List[bool]:
+        """Byte ranges of a streamed resource"""
+        response = await http.get("/resources/stream", params={"uri": "file://config.json"},
+                                  headers={"Range": "bytes=0-9"})
+        checks = [self._check(response.status_code == 206 and len(response.content) == 10,
+                              "Byte range: 206 with 10 bytes")]
+        response = await http.get("/resources/stream", params={"uri": "file://config.json"},
+                                  headers={"Range": "bytes=100000-"})
+        checks.append(self._check(response.status_code == 416, "Range past the end: 416"))
+        return checks
+    
+    async def _check_resource_cache(self, app, http) -> List[bool]:
+        """The cached rendering is dropped when the configuration changes"""
+        import admin
+        import sse_server
+        
+        await http.get("/resources/read", params={"uri": "file://config.json"})
+        sse_server.update_config({"debug": False})
+        try:
+            response = await http.get("/resources/read", params={"uri": "file://config.json"})
+        finally:
+            sse_server.update_config({"debug": True})
+        checks = [self._check(json.loads(response.json()["content"])["debug"] is False,
+                              "Configuration change: next read renders again")]
+        
+        # Writes over HTTP are off unless MCP_ADMIN_TOKEN is set, and values keep their type
+        response = await http.post("/config", json={"debug": False})
+        checks.append(self._check(response.status_code == 404, "Write route off without an admin token: 404"))
+        checks.append(self._check(admin.invalid_changes({"debug": "no"}, sse_server.config) is not None, "A value of another type is refused"))
+        return checks
+    
+    async def _check_subscriptions(self, app, http) -> List[bool]:
+        """Changes within one window reach a subscriber as one notification"""
+        from mcp import types
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import sse_server
+        import subscriptions
+        
+        updates = asyncio.Queue()
+        
+        async def on_message(message):
+            if (isinstance(message, types.ServerNotification)
+                    and isinstance(message.root, types.ResourceUpdatedNotification)):
+                updates.put_nowait(str(message.root.params.uri))
+        
+        async with create_connected_server_and_client_session(
+                sse_server.server, message_handler=on_message) as session:
+            await session.subscribe_resource("file://config.json")
+            sse_server.update_config({"debug": False})
+            sse_server.update_config({"debug": True})
+            uri = await asyncio.wait_for(updates.get(), 2)
+            # Both changes fall in one window
+            await asyncio.sleep(subscriptions.hub.window * 3)
+            checks = [self._check(uri.rstrip("/") == "file://config.json" and updates.empty(),
+                                  "Subscription: two changes, one notification")]
+        checks.append(self._check(subscriptions.hub.stats()["sessions"] == 0,
+                                  "Session ended: its subscriptions are dropped"))
+        return checks
+    
     async def run_all_tests(self):
         """Run all tests"""
         print("🧪 MCP Server Integrated Test Started")
         print("="*60)
         
         results = {
+            "engine": False,
+            "cost": False,
+            "behavior": False,
             "stdio": False,
             "sse": False
         }
         
         try:
+            # Expression engine test (no server needed)
+            results["engine"] = await self.test_expression_engine()
+            
+            # Cost estimator test (no server needed)
+            results["cost"] = await self.test_cost_estimator()
+            
+            # Behavior test (the app runs in this process)
+            results["behavior"] = await self.test_behavior()
+            
             # STDIO test (no server startup needed)
             results["stdio"] = await self.test_stdio_client()
             
@@ -183,6 +443,9 @@ class MCPTester:
         print("\n" + "="*60)
         print("📊 Test Result Summary")
         print("="*60)
+        print(f"Expression engine: {'✅ Success' if results['engine'] else '❌ Failed'}")
+        print(f"Cost estimator: {'✅ Success' if results['cost'] else '❌ Failed'}")
+        print(f"Behavior: {'✅ Success' if results['behavior'] else '❌ Failed'}")
         print(f"STDIO client: {'✅ Success' if results['stdio'] else '❌ Failed'}")
         print(f"SSE client: {'✅ Success' if results['sse'] else '❌ Failed'}")
         
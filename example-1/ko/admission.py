@@ -0,0 +1,142 @@
+# admission.py
+import asyncio
+import contextlib
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class Overloaded(Exception):
+    """호출이 허용되지 않고 거부될 때 발생; retry_after는 초 단위 정수"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """크기 제한 FIFO 대기 큐와 대기 기한을 가진 동시 실행 제한
+
+    최대 `limit`개의 호출이 동시에 실행되고 최대 `queue_size`개가 더 슬롯을
+    기다리며, 각각 최대 `max_wait`초까지 기다립니다. 큐가 가득 찼거나 최근
+    처리 시간으로 예측한 대기 시간이 이미 기한을 넘으면 호출을 바로 거부하므로,
+    버스트가 들어와도 다른 모든 요청을 느리게 만드는 대신 빠른 503으로
+    끝납니다.
+    """
+
+    def __init__(self, limit: int = 64, queue_size: int = 128, max_wait: float = 1.0):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # 허용된 호출이 슬롯을 점유하는 시간의 이동 평균
+        self._service_time = 0.0
+
+        # 메트릭
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_deadline = 0
+        self.total_wait = 0.0
+        self.max_observed_wait = 0.0
+        self.max_queue_depth = 0
+
+    def predicted_wait(self) -> float:
+        """지금 도착한 호출의 예상 대기 시간(초)"""
+        return (len(self._waiters) + 1) * self._service_time / self.limit
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.predicted_wait()))
+
+    def check(self):
+        """지금 도착한 호출이 거부될 상황이면 Overloaded 발생"""
+        if self.active < self.limit and not self._waiters:
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected_full += 1
+            raise Overloaded("queue full", self._retry_after())
+        if self.predicted_wait() > self.max_wait:
+            self.rejected_deadline += 1
+            raise Overloaded("wait over deadline", self._retry_after())
+
+    async def acquire(self):
+        """슬롯을 얻고 필요하면 큐에서 대기; 거부되면 Overloaded 발생"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        self.check()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        wait_start = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # 대기가 끝나는 순간 슬롯을 넘겨받음: 반납
+                self.release()
+            else:
+                waiter.cancel()
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.rejected_deadline += 1
+            raise Overloaded("wait over deadline", self._retry_after()) from None
+        finally:
+            waited = time.monotonic() - wait_start
+            self.total_wait += waited
+            self.max_observed_wait = max(self.max_observed_wait, waited)
+        self.admitted += 1
+
+    def release(self):
+        """가장 오래 기다린 호출에 슬롯을 넘기거나 해제"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @contextlib.asynccontextmanager
+    async def admit(self):
+        """async with controller.admit(): 허용된 슬롯에서 본문 실행"""
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_time += (time.monotonic() - started - self._service_time) * 0.1
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """큐 깊이, 대기 시간, 거부 횟수 반환"""
+        rejected = self.rejected_full + self.rejected_deadline
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "queue_size": self.queue_size,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_deadline": self.rejected_deadline,
+            "reject_rate": rejected / (self.admitted + rejected) if self.admitted + rejected else 0.0,
+            "avg_wait_ms": self.total_wait / self.admitted * 1000 if self.admitted else 0.0,
+            "max_wait_ms": self.max_observed_wait * 1000,
+            "avg_service_ms": self._service_time * 1000,
+            "max_wait_s": self.max_wait
+        }
+
+
+# 도구 호출과 프롬프트 엔드포인트가 공유하는 컨트롤러, 환경 변수로 설정
+controller = AdmissionController(
+    limit=int(os.environ.get("MCP_ADMISSION_LIMIT", "64")),
+    queue_size=int(os.environ.get("MCP_ADMISSION_QUEUE", "128")),
+    max_wait=float(os.environ.get("MCP_ADMISSION_MAX_WAIT", "1.0"))
+)
@@ -0,0 +1,1270 @@
+# benchmark.py
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import signal
+import statistics
+import socket
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import aiohttp
+import httpx
+import psutil
+import pydantic_core
+import uvicorn
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+from mcp.client.websocket import websocket_client
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+import broadcast_hub
+import calculator
+import compression
+import fast_json
+import file_resources
+import http2
+import prompt_engine
+import resource_cache
+import resource_index
+import resources
+import runtime
+import sse_server
+import subscriptions
+
+
+# 에이전트가 반복해서 보내는 대표적인 표현식
+EXPRESSIONS = [
+    "2 + 3 * 4",
+    "sqrt(16)",
+    "10 + 5",
+    "20 * 3",
+    "sin(pi / 4) ** 2 + cos(pi / 4) ** 2",
+    "log(1024, 2)",
+    "factorial(10) / factorial(8)",
+    "abs(-42) + round(3.14159, 2)",
+]
+
+
+def legacy_evaluate(expression: str) -> Any:
+    """기존 계산기 경로: 호출마다 네임스페이스를 다시 만들고 표현식을 컴파일"""
+    allowed_names = {
+        k: v for k, v in math.__dict__.items() if not k.startswith("__")
+    }
+    allowed_names.update({"abs": abs, "round": round})
+    return eval(expression, {"__builtins__": {}}, allowed_names)
+
+
+def measure_per_call(func: Callable[[str], Any], expressions: List[str], rounds: int) -> float:
+    """호출당 평균 지연 시간을 마이크로초 단위로 반환"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for expression in expressions:
+            func(expression)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(expressions)) * 1_000_000
+
+
+def measure_latencies(func: Callable[[str], Any], expressions: List[str], rounds: int) -> List[int]:
+    """모든 개별 호출의 지연 시간을 나노초 단위로 반환"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for expression in expressions:
+            start = clock()
+            func(expression)
+            latencies.append(clock() - start)
+    return latencies
+
+
+def summarize(latencies: List[int]) -> Dict[str, float]:
+    """지연 시간 목록의 처리량과 백분위 지연 시간을 반환"""
+    ordered = sorted(latencies)
+    total_seconds = sum(ordered) / 1_000_000_000
+    return {
+        "throughput": len(ordered) / total_seconds if total_seconds else 0.0,
+        "p50_us": ordered[len(ordered) // 2] / 1000,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1000,
+    }
+
+
+def print_summary(label: str, summary: Dict[str, float]):
+    """벤치마크 결과 한 줄 출력"""
+    print(f"  {label:<34} {summary['throughput']:>12,.0f} calls/s"
+          f"   p50 {summary['p50_us']:8.2f} µs   p99 {summary['p99_us']:8.2f} µs")
+
+
+def benchmark_calculator(rounds: int = 5000):
+    """컴파일 캐시 적용 전후의 계산기 호출당 지연 시간 비교"""
+    print("\n" + "="*60)
+    print("🧮 계산기 벤치마크")
+    print("="*60)
+    print(f"표현식 {len(EXPRESSIONS)}개 x {rounds}회 반복")
+
+    before = measure_per_call(legacy_evaluate, EXPRESSIONS, rounds)
+
+    calculator.expression_cache.clear()
+    after = measure_per_call(lambda e: calculator.evaluate(e, "eval"), EXPRESSIONS, rounds)
+
+    print(f"  이전 (호출마다 네임스페이스 + 컴파일): {before:8.2f} µs/call")
+    print(f"  이후 (공유 네임스페이스 + LRU 캐시): {after:8.2f} µs/call")
+    print(f"  속도 향상: {before / after:.1f}x")
+    print(f"  캐시 통계: {calculator.expression_cache.stats()}")
+
+
+def benchmark_engine(rounds: int = 2000, unique: int = 5000):
+    """eval 경로와 AST 표현식 엔진의 처리량과 p99 비교"""
+    print("\n" + "="*60)
+    print("🧠 표현식 엔진 벤치마크")
+    print("="*60)
+
+    # 웜: 같은 표현식을 반복하며 각 모드의 캐시에서 제공
+    print(f"반복 표현식 ({len(EXPRESSIONS)}개 x {rounds}회)")
+    print_summary("eval, 캐시 없음 (이전 경로)", summarize(
+        measure_latencies(legacy_evaluate, EXPRESSIONS, rounds)))
+    calculator.expression_cache.clear()
+    print_summary("eval, 캐시", summarize(
+        measure_latencies(lambda e: calculator.evaluate(e, "eval"), EXPRESSIONS, rounds)))
+    calculator.ast_cache.clear()
+    print_summary("ast 엔진, 캐시", summarize(
+        measure_latencies(lambda e: calculator.evaluate(e, "ast"), EXPRESSIONS, rounds)))
+
+    # 콜드: 모든 표현식이 새것이라 호출마다 파싱/컴파일 비용 발생
+    fresh = [f"{i} * sqrt({i}) + {i} % 7 - log({i} + 1)" for i in range(unique)]
+    print(f"고유 표현식 ({unique}개, 호출마다 컴파일)")
+    print_summary("eval, 컴파일 + 실행", summarize(measure_latencies(
+        lambda e: eval(calculator.compile_eval(e), calculator.SAFE_GLOBALS, calculator.SAFE_LOCALS),
+        fresh, 1)))
+    print_summary("ast 엔진, 컴파일 + 실행", summarize(measure_latencies(
+        lambda e: calculator.compile_ast(e)(), fresh, 1)))
+
+
+def serialization_payloads() -> Dict[str, Any]:
+    """SSE 서버의 REST 엔드포인트가 반환하는 형태의 응답 페이로드"""
+    tool = types.Tool(
+        name="calculator",
+        description="간단한 수학 계산을 수행합니다",
+        inputSchema={
+            "type": "object",
+            "properties": {"expression": {"type": "string", "description": "계산할 수학 표현식 (예: 2+2)"}},
+            "required": ["expression"]
+        }
+    )
+    code = "def fibonacci(n):\n    return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)\n" * 20
+    return {
+        "tools listing (20)": {"tools": [tool.model_copy(update={"name": f"tool_{i}"}) for i in range(20)]},
+        "tool result": {"result": [types.TextContent(type="text", text="계산 결과: 4")]},
+        "batch result (50)": {"results": [
+            {"result": [types.TextContent(type="text", text=f"계산 결과: {i}")]} for i in range(50)
+        ]},
+        "prompt result": {"result": types.GetPromptResult(
+            description="코드 리뷰 프롬프트",
+            messages=[types.PromptMessage(
+                role="user",
+                content=types.TextContent(type="text", text=f"다음 코드를 리뷰해주세요:\n\n```\n{code}\n```")
+            )]
+        )},
+        "metrics": {"evaluation_pool": {"workers": 4, "busy": 1, "queued": 0, "completed": 12345,
+                                        "timeouts": 2, "memory_kills": 1, "restarts": 3}},
+    }
+
+
+def legacy_render(content: Any) -> bytes:
+    """기존 응답 경로: model_dump()로 dict를 만든 뒤 JSONResponse의 json.dumps"""
+    plain = pydantic_core.to_jsonable_python(content, by_alias=True, exclude_none=True)
+    return json.dumps(plain, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def benchmark_serialization(rounds: int = 2000):
+    """응답 페이로드에서 JSONResponse 렌더링과 fast_json 인코더 비교"""
+    print("\n" + "="*60)
+    print("📦 JSON 응답 직렬화 벤치마크")
+    print("="*60)
+    encoder = "orjson" if fast_json.orjson is not None else "json (orjson 미설치)"
+    print(f"일반 데이터 인코더: {encoder}, MCP 타입: pydantic-core")
+
+    for name, payload in serialization_payloads().items():
+        assert json.loads(legacy_render(payload)) == json.loads(fast_json.dumps(payload))
+        print(f"{name} ({len(fast_json.dumps(payload))} 바이트)")
+        print_summary("json.dumps (이전 경로)", summarize(
+            measure_latencies(legacy_render, [payload], rounds)))
+        print_summary("fast_json", summarize(
+            measure_latencies(fast_json.dumps, [payload], rounds)))
+
+
+def weather_alerts(count: int = 40) -> str:
+    """example-3의 get_alerts 출력 형태의 경보 텍스트 (NWS 경보는 수십 KB에 달함)"""
+    alerts = []
+    for i in range(count):
+        alerts.append(f"""
+Event: {("Flood Warning", "Heat Advisory", "Winter Storm Watch")[i % 3]}
+Area: County {i}; County {i + 1}; Coastal Zone {i % 7}
+Severity: {("Moderate", "Severe", "Minor")[i % 3]}
+Description: * WHAT...Flooding caused by excessive rainfall is expected. * WHERE...Portions of the
+area including County {i}. * WHEN...Until {i % 12 + 1}:00 PM this afternoon. * IMPACTS...Flooding of
+rivers, creeks, streams, and other low-lying and flood-prone locations is imminent or occurring.
+Instructions: Turn around, don't drown when encountering flooded roads. Most flood deaths occur in vehicles.
+""")
+    return "\n---\n".join(alerts)
+
+
+async def compression_payloads() -> Dict[str, bytes]:
+    """서버가 보내는 그대로의 응답 본문, 압축 전"""
+    prompt = await sse_server.get_prompt("code_review", {"code": open(sse_server.__file__).read()})
+    await sse_server.build_listings()
+    return {
+        "code_review prompt (sse_server.py)": fast_json.dumps(prompt),
+        "weather alerts tool result": fast_json.dumps(
+            {"result": [types.TextContent(type="text", text=weather_alerts())]}),
+        "tools listing": sse_server.listings["/tools"][0],
+        "config resource": fast_json.dumps({"content": await sse_server.read_resource("file://config.json")}),
+    }
+
+
+async def benchmark_compression(rounds: int = 200):
+    """크고 작은 응답에서 사용 가능한 콘텐츠 코딩별 절약 바이트와 CPU 비용"""
+    print("\n" + "="*60)
+    print("🗜️ 응답 압축 벤치마크")
+    print("="*60)
+    minimum_size = sse_server.COMPRESSION_MIN_SIZE
+    print(f"사용 가능한 코딩: {', '.join(compression.ENCODERS)} (최소 크기 {minimum_size} 바이트)")
+
+    for name, body in (await compression_payloads()).items():
+        print(f"{name} ({len(body):,} 바이트)")
+        if len(body) < minimum_size:
+            print("  최소 크기 미만: 압축하지 않고 전송")
+            continue
+        for encoding, (factory, level) in compression.ENCODERS.items():
+            data = factory(level).compress(body, final=True)
+            started = time.perf_counter()
+            for _ in range(rounds):
+                factory(level).compress(body, final=True)
+            seconds = (time.perf_counter() - started) / rounds
+            print(f"  {encoding:<5} level {level}: {len(data):>8,} 바이트  절약 {1 - len(data) / len(body):6.1%}"
+                  f"  {seconds * 1e6:8.1f} µs  {len(body) / seconds / 1e6:7.1f} MB/s")
+
+
+async def legacy_sse_endpoint(request):
+    """기존 /sse 엔드포인트: 연결마다 하트비트 루프와 유휴 메시지 태스크"""
+
+    async def event_generator():
+        yield f"data: {json.dumps({'type': 'connected', 'message': 'MCP Server connected'})}\n\n"
+
+        async def process_messages():
+            while True:
+                await asyncio.sleep(1)
+
+        task = asyncio.create_task(process_messages())
+        try:
+            while True:
+                yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': asyncio.get_event_loop().time()})}\n\n"
+                await asyncio.sleep(5)
+        finally:
+            task.cancel()
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
+class SseConnections:
+    """ASGI 앱을 직접 호출하는 다수의 프로세스 내 SSE 요청"""
+
+    def __init__(self, app):
+        self.app = app
+        self.tasks: List[asyncio.Task] = []
+        self.disconnect = None
+        self.connected = 0
+        self.marker = b""
+        self.sent_at = 0
+        self.latencies: List[int] = []
+        self._all_connected = None
+        self._all_delivered = None
+
+    async def open(self, count: int):
+        """count개의 연결을 열고 각 연결이 첫 프레임을 받을 때까지 대기"""
+        loop = asyncio.get_running_loop()
+        self.disconnect = loop.create_future()
+        self._all_connected = loop.create_future()
+        for i in range(count):
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+                "method": "GET", "scheme": "http", "path": "/sse", "raw_path": b"/sse",
+                "query_string": b"", "root_path": "", "headers": [(b"host", b"localhost")],
+                "client": ("127.0.0.1", 10000 + i), "server": ("localhost", 8000)
+            }
+            self.tasks.append(loop.create_task(self.app(scope, self._receive, self._send)))
+        await self._all_connected
+        self.count = count
+
+    async def _receive(self):
+        await self.disconnect
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] != "http.response.body" or not message.get("body"):
+            return
+        if self.marker and self.marker in message["body"]:
+            self.latencies.append(time.perf_counter_ns() - self.sent_at)
+            if len(self.latencies) == self.count:
+                self._all_delivered.set_result(None)
+        elif not self._all_connected.done():
+            self.connected += 1
+            if self.connected == len(self.tasks):
+                self._all_connected.set_result(None)
+
+    async def fan_out(self, round_number: int) -> int:
+        """모든 연결에 이벤트 하나를 발행하고 publish 호출 시간을 나노초 단위로 반환"""
+        self.latencies = []
+        self._all_delivered = asyncio.get_running_loop().create_future()
+        self.marker = f'"round":{round_number}'.encode()
+        self.sent_at = time.perf_counter_ns()
+        broadcast_hub.hub.publish({"type": "benchmark", "round": round_number})
+        publish_ns = time.perf_counter_ns() - self.sent_at
+        await self._all_delivered
+        return publish_ns
+
+    async def close(self):
+        """모든 클라이언트 연결을 끊고 서버 쪽이 끝날 때까지 대기"""
+        self.disconnect.set_result(None)
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+async def measure_connections(app, count: int, idle: float = 3.0):
+    """count개의 SSE 연결을 열고 메모리, 태스크 수, 유휴 CPU 비율과 함께 반환"""
+    tasks_before = len(asyncio.all_tasks())
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    connections = SseConnections(app)
+    await connections.open(count)
+    memory = (tracemalloc.get_traced_memory()[0] - before) / count
+    tracemalloc.stop()
+    tasks = (len(asyncio.all_tasks()) - tasks_before) / count
+
+    # 모든 연결이 다음 이벤트를 기다리기만 하는 동안 사용한 CPU
+    cpu_start = time.process_time()
+    await asyncio.sleep(idle)
+    cpu = (time.process_time() - cpu_start) / idle
+    return connections, memory, tasks, cpu
+
+
+async def benchmark_broadcast(connections: int = 10000, rounds: int = 5):
+    """다수의 동시 SSE 연결을 열고 연결당 메모리와 팬아웃 지연 시간 측정"""
+    print("\n" + "="*60)
+    print("📡 SSE 브로드캐스트 벤치마크")
+    print("="*60)
+    print(f"프로세스 내 동시 SSE 연결 {connections}개 (ASGI, 소켓 제외)")
+
+    legacy, memory, tasks, cpu = await measure_connections(
+        Starlette(routes=[Route("/sse", legacy_sse_endpoint)]), connections)
+    print(f"  연결별 타이머 (이전 경로):              {memory / 1024:7.2f} KiB/conn"
+          f"   {tasks:.0f} 태스크/연결   유휴 CPU {cpu:6.1%}")
+    await legacy.close()
+
+    current, memory, tasks, cpu = await measure_connections(
+        Starlette(routes=[Route("/sse", sse_server.events_endpoint)]), connections)
+    print(f"  공유 브로드캐스트 허브:                 {memory / 1024:7.2f} KiB/conn"
+          f"   {tasks:.0f} 태스크/연결   유휴 CPU {cpu:6.1%}")
+
+    print(f"이벤트 하나를 연결 {connections}개로 팬아웃 ({rounds}회)")
+    latencies: List[int] = []
+    for round_number in range(rounds):
+        publish_ns = await current.fan_out(round_number)
+        latencies.extend(current.latencies)
+    summary = summarize(latencies)
+    print(f"  publish 호출: {publish_ns / 1000:8.0f} µs   전달 p50 {summary['p50_us'] / 1000:7.2f} ms"
+          f"   p99 {summary['p99_us'] / 1000:7.2f} ms   max {max(latencies) / 1_000_000:7.2f} ms")
+    print(f"  허브 통계: {broadcast_hub.hub.stats()}")
+    await current.close()
+    broadcast_hub.hub.stop()
+
+
+async def measure_calls(call: Callable[[int], Any], calls: int, concurrency: int) -> Dict[str, float]:
+    """동시에 최대 concurrency개씩 호출을 실행하고 실제 경과 시간 기준 처리량과 지연 시간 반환"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[int] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter_ns()
+            await call(i)
+            latencies.append(time.perf_counter_ns() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    summary = summarize(latencies)
+    summary["throughput"] = calls / (time.perf_counter() - start)
+    return summary
+
+
+async def benchmark_transport(calls: int = 500, concurrency: int = 16):
+    """REST 라우트로 하는 도구 호출과 MCP 세션 하나(SSE 또는 WebSocket)로 보내는 JSON-RPC 요청 비교"""
+    print("\n" + "="*60)
+    print("🔗 REST vs MCP 세션 벤치마크")
+    print("="*60)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(sse_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    print(f"echo 도구 {calls}회 호출, 루프백 (클라이언트와 서버가 같은 프로세스)")
+
+    async def rest_call(http: aiohttp.ClientSession, i: int):
+        async with http.post(f"{base_url}/tools/call",
+                             json={"name": "echo", "arguments": {"message": str(i)}}) as response:
+            await response.read()
+
+    try:
+        # 이전 경로: 호출마다 새 HTTP 연결
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True)) as http:
+            print_summary("REST, 호출마다 새 연결", await measure_calls(
+                lambda i: rest_call(http, i), calls, 1))
+        async with aiohttp.ClientSession() as http:
+            print_summary("REST, keep-alive", await measure_calls(
+                lambda i: rest_call(http, i), calls, 1))
+            print_summary(f"REST, keep-alive x{concurrency}", await measure_calls(
+                lambda i: rest_call(http, i), calls, concurrency))
+        # 아래 MCP 클라이언트는 httpx로 POST하므로 이 행이 같은 조건의 REST 비교 대상
+        async with httpx.AsyncClient() as http:
+            print_summary("REST, keep-alive (httpx)", await measure_calls(
+                lambda i: http.post(f"{base_url}/tools/call",
+                                    json={"name": "echo", "arguments": {"message": str(i)}}), calls, 1))
+
+        async with sse_client(f"{base_url}/sse") as streams:
+            async with ClientSession(*streams) as session:
+                await session.initialize()
+                call = lambda i: session.call_tool("echo", {"message": str(i)})
+                print_summary("MCP 세션 (SSE + POST)", await measure_calls(call, calls, 1))
+                print_summary(f"MCP 세션 (SSE + POST) x{concurrency}", await measure_calls(call, calls, concurrency))
+
+        async with websocket_client(f"ws://127.0.0.1:{port}/ws") as streams:
+            async with ClientSession(*streams) as session:
+                await session.initialize()
+                call = lambda i: session.call_tool("echo", {"message": str(i)})
+                print_summary("MCP 세션 (WebSocket)", await measure_calls(call, calls, 1))
+                print_summary(f"MCP 세션 (WebSocket) x{concurrency}", await measure_calls(call, calls, concurrency))
+        print(f"  세션 통계: {sse_server.sessions.stats()}")
+    finally:
+        server.should_exit = True
+        await serving
+
+
+def load_worker(url: str, seconds: float, concurrency: int) -> List[int]:
+    """클라이언트 프로세스 본체: `seconds` 동안 keep-alive echo 호출을 `concurrency`개씩 유지"""
+    async def run() -> List[int]:
+        latencies: List[int] = []
+        deadline = time.perf_counter() + seconds
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as http:
+            async def caller(i: int):
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter_ns()
+                    async with http.post(url, json={"name": "echo", "arguments": {"message": str(i)}}) as response:
+                        await response.read()
+                    latencies.append(time.perf_counter_ns() - start)
+
+            await asyncio.gather(*(caller(i) for i in range(concurrency)))
+        return latencies
+
+    return asyncio.run(run())
+
+
+async def check_sessions(base_url: str, sessions: int) -> int:
+    """MCP 세션을 차례로 열고 호출을 모두 마친 세션 수 반환"""
+    completed = 0
+    for i in range(sessions):
+        try:
+            async with sse_client(f"{base_url}/sse") as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    for j in range(3):
+                        await session.call_tool("echo", {"message": f"{i}.{j}"})
+            completed += 1
+        except Exception:
+            pass
+    return completed
+
+
+async def wait_until_ready(base_url: str):
+    """새로 시작한 서버가 응답할 때까지 /metrics 폴링"""
+    async with httpx.AsyncClient() as http:
+        for _ in range(300):
+            try:
+                if (await http.get(f"{base_url}/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+
+async def benchmark_scaling(seconds: float = 5.0, concurrency: int = 64):
+    """워커 프로세스 1..N개로 실행한 launcher.py의 도구 호출 처리량"""
+    print("\n" + "="*60)
+    print("🧵 멀티 프로세스 확장성 벤치마크")
+    print("="*60)
+    cores = os.cpu_count() or 1
+    clients = max(1, cores // 2)
+    print(f"CPU 코어 {cores}개; 클라이언트 프로세스 {clients}개에서 keep-alive REST로 echo 도구 호출"
+          f" x 연결 {concurrency // clients}개, 행마다 {seconds:g}초 (클라이언트가 같은 머신을 공유)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    loop = asyncio.get_running_loop()
+    baseline = None
+    with ProcessPoolExecutor(clients, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for workers in sorted({1, 2, 4, cores}):
+            process = subprocess.Popen(
+                [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port),
+                 "--workers", str(workers), "--log-level", "warning"],
+                cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+            try:
+                await wait_until_ready(base_url)
+                # 나머지 워커가 시작을 마칠 때까지 대기
+                await asyncio.sleep(1.0)
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(executor, load_worker, f"{base_url}/tools/call", seconds, concurrency // clients)
+                    for _ in range(clients)))
+                latencies = [latency for result in results for latency in result]
+                summary = summarize(latencies)
+                summary["throughput"] = len(latencies) / seconds
+                baseline = baseline or summary["throughput"]
+                print_summary(f"워커 {workers}개, x{summary['throughput'] / baseline:.2f}", summary)
+                # 연결이 어떻게 분산되든 상태가 있는 세션은 계속 동작해야 함
+                sessions = await check_sessions(base_url, 8)
+                print(f"  {'':<34} 여러 워커에 걸친 MCP 세션: {sessions}/8 완료")
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait()
+
+
+async def benchmark_runtime(seconds: float = 5.0, concurrency: int = 64):
+    """이벤트 루프 / HTTP 파서 조합별 도구 호출 처리량과 p99"""
+    print("\n" + "="*60)
+    print("🚀 이벤트 루프 / HTTP 파서 벤치마크")
+    print("="*60)
+    cores = os.cpu_count() or 1
+    clients = max(1, cores // 2)
+    print(f"서버 프로세스 1개에 POST /tools/call (echo), 클라이언트 프로세스 {clients}개에서 keep-alive REST"
+          f" x 연결 {concurrency // clients}개, 행마다 {seconds:g}초")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(clients, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for event_loop in runtime.LOOPS:
+            for http in runtime.HTTP_PARSERS:
+                label = f"{event_loop} + {http}"
+                missing = [name for name in (event_loop, http) if not runtime.available(name)]
+                if missing:
+                    print(f"  {label:<34} 건너뜀 ({', '.join(missing)} 미설치)")
+                    continue
+                process = subprocess.Popen(
+                    [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+                     "--loop", event_loop, "--http", http, "--log-level", "warning"],
+                    cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+                try:
+                    await wait_until_ready(base_url)
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(executor, load_worker, f"{base_url}/tools/call", seconds,
+                                             concurrency // clients)
+                        for _ in range(clients)))
+                    latencies = [latency for result in results for latency in result]
+                    summary = summarize(latencies)
+                    summary["throughput"] = len(latencies) / seconds
+                    print_summary(label, summary)
+                finally:
+                    process.send_signal(signal.SIGTERM)
+                    process.wait()
+
+
+def server_connections(port: int) -> int:
+    """이 프로세스가 `port`에서 받아들여 연결이 수립된 TCP 연결 수"""
+    return sum(1 for conn in psutil.Process().net_connections("tcp")
+               if conn.laddr.port == port and conn.status == psutil.CONN_ESTABLISHED)
+
+
+async def measure_sessions(base_url: str, port: int, sessions: int, calls: int, **client) -> Dict[str, Any]:
+    """MCP 세션 `sessions`개를 동시에 열어둔 채 세션마다 도구 호출 `calls`회 실행
+
+    모든 세션이 열려 있는 동안 서버가 유지하는 연결 수와
+    세션 열기 및 도구 호출 지연 시간(나노초)을 반환합니다.
+    """
+    open_latencies: List[int] = []
+    call_latencies: List[int] = []
+    all_open = asyncio.Event()
+    finished = asyncio.Event()
+    failed = 0
+
+    async def one(i: int):
+        nonlocal failed
+        start = time.perf_counter_ns()
+        try:
+            async with sse_client(f"{base_url}/sse", timeout=60, **client) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    open_latencies.append(time.perf_counter_ns() - start)
+                    if len(open_latencies) + failed == sessions:
+                        all_open.set()
+                    await all_open.wait()
+                    for j in range(calls):
+                        start = time.perf_counter_ns()
+                        await session.call_tool("echo", {"message": f"{i}.{j}"})
+                        call_latencies.append(time.perf_counter_ns() - start)
+                    # 연결 수를 셀 때까지 열어둠
+                    await finished.wait()
+        except Exception:
+            failed += 1
+            if len(open_latencies) + failed == sessions:
+                all_open.set()
+
+    tasks = [asyncio.create_task(one(i)) for i in range(sessions)]
+    await all_open.wait()
+    connections = server_connections(port)
+    while len(call_latencies) + failed * calls < sessions * calls and not all(task.done() for task in tasks):
+        await asyncio.sleep(0.1)
+    connections = max(connections, server_connections(port))
+    finished.set()
+    await asyncio.gather(*tasks)
+    return {"connections": connections, "failed": failed, "open": summarize(open_latencies),
+            "call": summarize(call_latencies)}
+
+
+async def benchmark_http2(sessions: int = 1000, calls: int = 3):
+    """HTTP/1.1과 h2c에서 동시에 열린 많은 MCP 세션의 연결 수와 지연 시간"""
+    print("\n" + "="*60)
+    print("🔀 HTTP/1.1 vs HTTP/2 (h2c) 벤치마크")
+    print("="*60)
+    print(f"/sse에 MCP 세션 {sessions}개를 동시에 연 뒤 세션마다 echo 호출 {calls}회"
+          f" (클라이언트와 서버가 한 프로세스를 공유)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    def report(label: str, result: Dict[str, Any]):
+        print(f"  {label:<34} 연결 {result['connections']:>6}개"
+              f"   open p50 {result['open']['p50_us'] / 1000:8.2f} ms  p99 {result['open']['p99_us'] / 1000:8.2f} ms"
+              f"   call p50 {result['call']['p50_us'] / 1000:8.2f} ms  p99 {result['call']['p99_us'] / 1000:8.2f} ms"
+              + (f"   ({result['failed']}개 실패)" if result["failed"] else ""))
+
+    server = uvicorn.Server(uvicorn.Config(sse_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        # 기존 구성: 세션마다 자체 SSE 연결과 POST 연결을 엶
+        report("HTTP/1.1, uvicorn", await measure_sessions(base_url, port, sessions, calls))
+    finally:
+        server.should_exit = True
+        await serving
+
+    if http2.hypercorn_serve is None or http2.h2 is None:
+        print("  HTTP/2 행 건너뜀 (pip install hypercorn h2)")
+        return
+    stop = asyncio.Event()
+    serving = asyncio.create_task(http2.serve(sse_server.app, [f"127.0.0.1:{port}"], log_level="warning",
+                                              shutdown_trigger=stop.wait))
+    await wait_until_ready(base_url)
+    try:
+        report("HTTP/1.1, Hypercorn", await measure_sessions(base_url, port, sessions, calls))
+        async with http2.Http2Pool() as pool:
+            report("HTTP/2 (h2c), shared pool", await measure_sessions(
+                base_url, port, sessions, calls, httpx_client_factory=pool.client_factory))
+    finally:
+        stop.set()
+        await serving
+
+
+async def benchmark_uds(calls: int = 1000, concurrency: int = 16):
+    """같은 호스트의 클라이언트가 루프백 TCP와 Unix 도메인 소켓으로 보내는 도구 호출 지연 시간"""
+    print("\n" + "="*60)
+    print("🔌 루프백 TCP vs Unix 도메인 소켓 벤치마크")
+    print("="*60)
+    print(f"둘 다에서 리슨하는 launcher.py --workers 1에 echo 도구 x {calls}회 호출 (별도 프로세스)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    socket_dir = tempfile.mkdtemp(prefix="mcp-uds-")
+    path = os.path.join(socket_dir, "mcp.sock")
+    process = subprocess.Popen(
+        [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+         "--uds", path, "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+
+    async def rest_call(http: aiohttp.ClientSession, i: int):
+        async with http.post(f"{base_url}/tools/call",
+                             json={"name": "echo", "arguments": {"message": str(i)}}) as response:
+            await response.read()
+
+    def uds_client(headers=None, timeout=None, auth=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=path), headers=headers,
+                                 timeout=timeout or httpx.Timeout(30.0), auth=auth)
+
+    transports = {
+        "TCP": (lambda **kw: aiohttp.TCPConnector(**kw), {}),
+        "UDS": (lambda **kw: aiohttp.UnixConnector(path=path, **kw), {"httpx_client_factory": uds_client}),
+    }
+    try:
+        await wait_until_ready(base_url)
+        for name, (connector, mcp_client) in transports.items():
+            async with aiohttp.ClientSession(connector=connector(force_close=True)) as http:
+                print_summary(f"{name}, 호출마다 새 연결", await measure_calls(
+                    lambda i: rest_call(http, i), calls, 1))
+            async with aiohttp.ClientSession(connector=connector()) as http:
+                print_summary(f"{name}, keep-alive", await measure_calls(
+                    lambda i: rest_call(http, i), calls, 1))
+                print_summary(f"{name}, keep-alive x{concurrency}", await measure_calls(
+                    lambda i: rest_call(http, i), calls, concurrency))
+            async with sse_client(f"{base_url}/sse", **mcp_client) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    print_summary(f"{name}, MCP 세션 (SSE + POST)", await measure_calls(
+                        lambda i: session.call_tool("echo", {"message": str(i)}), calls, 1))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+# 64 KB 분량의 로그 줄, 반복해서 원하는 크기의 합성 로그를 만듦
+LOG_BLOCK = b"".join(f"2025-01-01T00:00:{i % 60:02d}Z INFO request {i} handled in {i % 97} ms\n".encode()
+                     for i in range(2000))[:64 * 1024]
+
+
+class GeneratedLog(resources.ResourceProvider):
+    """청크 단위로 생성되어 메모리에 들고 있지 않는 탐색 가능한 합성 로그"""
+
+    def __init__(self, uri: str, length: int):
+        super().__init__(uri, "Generated log", mime_type="text/plain")
+        self.length = length
+
+    async def size(self) -> int:
+        return self.length
+
+    async def read(self):
+        return self.read_range(0, self.length - 1)
+
+    def read_range(self, start: int, end: int):
+        async def chunks():
+            offset = start
+            while offset <= end:
+                begin = offset % len(LOG_BLOCK)
+                chunk = LOG_BLOCK[begin:begin + min(len(LOG_BLOCK) - begin, end + 1 - offset)]
+                yield chunk
+                offset += len(chunk)
+
+        return chunks()
+
+
+async def legacy_read_resource_endpoint(request):
+    """기존 /resources/read: 리소스 전체를 메모리에 올린 뒤 한 번에 JSON으로 인코딩"""
+    content = await resources.collect(await sse_server.resource_registry.get(request.query_params["uri"]).read())
+    return JSONResponse({"content": content.decode() if isinstance(content, bytes) else content})
+
+
+async def measure_download(http: httpx.AsyncClient, url: str, headers: Dict[str, str]) -> Dict[str, float]:
+    """url을 내려받으며 도착한 본문은 버림; 첫 바이트까지 시간, 전체 시간, 바이트 수 반환"""
+    start = time.perf_counter()
+    first_byte = None
+    received = 0
+    async with http.stream("GET", url, headers=headers) as response:
+        async for chunk in response.aiter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            received += len(chunk)
+    return {"ttfb_ms": (first_byte or 0.0) * 1000, "total_ms": (time.perf_counter() - start) * 1000,
+            "bytes": received}
+
+
+async def benchmark_resources(size_mb: int = 64):
+    """큰 리소스를 JSON 본문 하나로 vs 스트리밍으로 vs Range로 읽을 때의 최대 메모리와 지연 시간"""
+    print("\n" + "="*60)
+    print("📜 큰 리소스 읽기 벤치마크")
+    print("="*60)
+    size = size_mb * 1024 * 1024
+    uri = "log://generated"
+    sse_server.resource_registry.add(GeneratedLog(uri, size))
+    print(f"{size_mb} MB 생성 로그 리소스 (클라이언트와 서버가 한 프로세스를 공유)")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    app = Starlette(routes=[Route("/legacy", legacy_read_resource_endpoint),
+                            Route("/resources/stream", sse_server.stream_resource_endpoint)])
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    middle = size // 2
+    rows = [
+        ("JSON 본문 (기존)", f"/legacy?uri={uri}", {}),
+        ("스트리밍", f"/resources/stream?uri={uri}", {}),
+        ("Range: 중간의 1 MB", f"/resources/stream?uri={uri}",
+         {"Range": f"bytes={middle}-{middle + 1024 * 1024 - 1}"}),
+    ]
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=None) as http:
+            for label, url, headers in rows:
+                timing = await measure_download(http, url, headers)
+                # 메모리는 따로 측정: 할당 추적은 모든 것을 느리게 함
+                tracemalloc.start()
+                await measure_download(http, url, headers)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"  {label:<34} {timing['bytes'] / 1024 / 1024:8.1f} MB   첫 바이트 {timing['ttfb_ms']:8.1f} ms"
+                      f"   전체 {timing['total_ms']:8.1f} ms   최대 메모리 {peak / 1024 / 1024:8.1f} MB")
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def benchmark_files(size_mb: int = 256, downloads: int = 3):
+    """큰 파일 리소스를 Python을 거쳐 vs sendfile로 다운로드, 그리고 그 파일의 1 MB mmap 구간"""
+    print("\n" + "="*60)
+    print("📂 파일 리소스 벤치마크")
+    print("="*60)
+    root = tempfile.mkdtemp(prefix="mcp-files-")
+    path = os.path.join(root, "app.log")
+    with open(path, "wb") as file:
+        for _ in range(size_mb * 1024 * 1024 // len(LOG_BLOCK)):
+            file.write(LOG_BLOCK)
+    size = os.path.getsize(path)
+    print(f"MCP_RESOURCE_ROOT 아래 {size_mb} MB 로그, launcher.py --workers 1(별도 프로세스)에 "
+          f"GET /resources/stream x {downloads}")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    url = f"{base_url}/resources/stream?uri=file:///app.log"
+    rows = [("Python에서 읽고 쓰기 (h11)", "h11"), ("sendfile (httptools)", "httptools")]
+    try:
+        for label, parser in rows:
+            process = subprocess.Popen(
+                [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+                 "--http", parser, "--log-level", "warning"],
+                cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL,
+                env={**os.environ, "MCP_RESOURCE_ROOT": root})
+            try:
+                await wait_until_ready(base_url)
+                worker = psutil.Process(process.pid).children()[0]
+                cpu = worker.cpu_times()
+                async with httpx.AsyncClient(timeout=None) as http:
+                    timings = [await measure_download(http, url, {"Accept-Encoding": "identity"})
+                               for _ in range(downloads)]
+                used = worker.cpu_times()
+                server_cpu = (used.user + used.system - cpu.user - cpu.system) / downloads * 1000
+                total = sum(timing["total_ms"] for timing in timings) / downloads
+                print(f"  {label:<34} {size / 1024 / 1024 / (total / 1000):8.0f} MB/s   전체 {total:8.1f} ms"
+                      f"   서버 CPU 다운로드당 {server_cpu:8.1f} ms")
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait()
+
+        # 이 프로세스에서 1 MB 구간의 resources/read: 조각 vs 파일 전체를 먼저 읽기
+        files = file_resources.FileRoot(root)
+        middle = size // 2
+        window = f"file:///app.log?range={middle}-{middle + 1024 * 1024 - 1}"
+
+        def whole_file_slice():
+            with open(path, "rb") as file:
+                return file.read()[middle:middle + 1024 * 1024].decode("utf-8", errors="replace")
+
+        for label, read in (("1 MB 구간, 파일 전체 읽기", whole_file_slice),
+                            ("1 MB 구간, mmap 조각", lambda: files.read(window))):
+            tracemalloc.start()
+            start = time.perf_counter()
+            read()
+            elapsed = (time.perf_counter() - start) * 1000
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {label:<34} {elapsed:8.1f} ms   최대 메모리 {peak / 1024 / 1024:8.1f} MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+async def benchmark_resource_index(files: int = 100_000, per_directory: int = 1000, listings: int = 20):
+    """큰 루트의 list_resources: 호출마다 순회 vs inotify가 유지하는 인덱스"""
+    print("\n" + "="*60)
+    print("🗂️ 리소스 인덱스 벤치마크")
+    print("="*60)
+    root = tempfile.mkdtemp(prefix="mcp-index-")
+    for number in range(files):
+        directory = os.path.join(root, f"d{number // per_directory:04d}")
+        if number % per_directory == 0:
+            os.mkdir(directory)
+        with open(os.path.join(directory, f"f{number:06d}.log"), "wb") as file:
+            file.write(b"x")
+    print(f"리소스 루트 아래 디렉터리 {files // per_directory}개에 파일 {files:,}개")
+
+    try:
+        walk = file_resources.FileRoot(root)
+        start = time.perf_counter()
+        listed = len(walk.resources())
+        walk_ms = (time.perf_counter() - start) * 1000
+        print(f"  {'list_resources마다 순회 (이전)':<36} {walk_ms:10.1f} ms   리소스 {listed:,}개")
+
+        index = resource_index.ResourceIndex(file_resources.FileRoot(root))
+        start = time.perf_counter()
+        await index.start()
+        print(f"  {'인덱스 생성 + 감시 (' + index.mode + ')':<36} {(time.perf_counter() - start) * 1000:10.1f} ms"
+              f"   감시 {index.stats()['watches']}개, 시작할 때 한 번")
+        try:
+            start = time.perf_counter()
+            for _ in range(listings):
+                listed = len(index.resources())
+            indexed_ms = (time.perf_counter() - start) * 1000 / listings
+            print(f"  {'인덱스 list_resources':<36} {indexed_ms:10.2f} ms   {walk_ms / indexed_ms:,.0f}배 빠름")
+
+            # 새 파일 하나: 인덱스에 반영될 때까지의 시간과 변경 후 다음 목록
+            changed = asyncio.Event()
+            index.on_change(lambda uris: changed.set())
+            start = time.perf_counter()
+            with open(os.path.join(root, "d0000", "new.log"), "wb") as file:
+                file.write(b"y")
+            await changed.wait()
+            update_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            listed = len(index.resources())
+            relist_ms = (time.perf_counter() - start) * 1000
+            print(f"  {'새 파일 -> 인덱스 갱신':<36} {update_ms:10.2f} ms   다음 목록 {relist_ms:.2f} ms"
+                  f" (리소스 {listed:,}개)")
+        finally:
+            index.stop()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+async def benchmark_subscriptions(clients: int = 20, bursts: int = 5, burst_size: int = 20,
+                                  poll_interval: float = 0.1):
+    """file://config.json을 지켜보는 클라이언트: read_resource 폴링 vs resources/subscribe"""
+    print("\n" + "="*60)
+    print("🔔 리소스 구독 벤치마크")
+    print("="*60)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(sse_server.app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    print(f"클라이언트 {clients}개가 file://config.json을 지켜봄; 0.5초 간격으로 변경 {burst_size}번짜리 묶음 {bursts}개")
+
+    async def change_config(changed_at: List[float]):
+        for burst in range(bursts):
+            await asyncio.sleep(0.5)
+            changed_at.append(time.perf_counter())
+            for change in range(burst_size):
+                sse_server.update_config({"revision": burst * burst_size + change})
+                await asyncio.sleep(0.002)
+        await asyncio.sleep(0.5)
+
+    def report(label: str, detections: List[List[float]], changed_at: List[float], requests: int):
+        # 각 묶음이 시작된 뒤 클라이언트가 처음 알아차리기까지의 지연 시간
+        bounds = changed_at + [math.inf]
+        latencies = [min(seen) - bounds[i] for times in detections for i in range(len(changed_at))
+                     if (seen := [t for t in times if bounds[i] <= t < bounds[i + 1]])]
+        noticed = sum(len(times) for times in detections) / clients
+        print(f"  {label:<32} 클라이언트당 요청 {requests / clients:7.1f}   클라이언트당 업데이트 {noticed:5.1f}   "
+              f"지연 시간 {statistics.mean(latencies) * 1000:6.1f} ms (놓침 {bursts * clients - len(latencies)})")
+
+    try:
+        # 이전 방식: 모든 클라이언트가 리소스를 다시 읽고 본문을 비교
+        changed_at: List[float] = []
+        detections = [[] for _ in range(clients)]
+        requests = 0
+        done = asyncio.Event()
+
+        async def poll(http: aiohttp.ClientSession, times: List[float]):
+            nonlocal requests
+            last = None
+            while not done.is_set():
+                async with http.get(f"{base_url}/resources/read", params={"uri": "file://config.json"}) as response:
+                    body = await response.read()
+                requests += 1
+                if last is not None and body != last:
+                    times.append(time.perf_counter())
+                last = body
+                await asyncio.sleep(poll_interval)
+
+        async with aiohttp.ClientSession() as http:
+            pollers = [asyncio.create_task(poll(http, times)) for times in detections]
+            await change_config(changed_at)
+            done.set()
+            await asyncio.gather(*pollers)
+        report(f"{poll_interval * 1000:.0f} ms마다 폴링", detections, changed_at, requests)
+
+        changed_at = []
+        detections = [[] for _ in range(clients)]
+
+        async def watch(times: List[float], subscribed: asyncio.Event, finished: asyncio.Event):
+            async def on_message(message):
+                if (isinstance(message, types.ServerNotification)
+                        and isinstance(message.root, types.ResourceUpdatedNotification)):
+                    times.append(time.perf_counter())
+
+            async with sse_client(f"{base_url}/sse") as streams:
+                async with ClientSession(*streams, message_handler=on_message) as session:
+                    await session.initialize()
+                    await session.subscribe_resource("file://config.json")
+                    subscribed.set()
+                    await finished.wait()
+
+        finished = asyncio.Event()
+        ready = [asyncio.Event() for _ in range(clients)]
+        watchers = [asyncio.create_task(watch(times, event, finished)) for times, event in zip(detections, ready)]
+        await asyncio.gather(*(event.wait() for event in ready))
+        await change_config(changed_at)
+        finished.set()
+        await asyncio.gather(*watchers)
+        report(f"resources/subscribe ({subscriptions.hub.window * 1000:.0f} ms 창)", detections, changed_at,
+               clients * 2)
+    finally:
+        server.should_exit = True
+        await serving
+
+
+async def measure_reads(uri: str, reads: int, update_every: int = 0) -> List[int]:
+    """MCP read_resource 호출마다의 지연 시간(나노초); update_every > 0이면 그 간격으로 설정을 변경"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for index in range(reads):
+        if update_every and index % update_every == 0:
+            sse_server.update_config({"revision": index})
+        start = clock()
+        await sse_server.read_resource(uri)
+        latencies.append(clock() - start)
+    return latencies
+
+
+async def benchmark_resource_cache(reads: int = 20000, keys: int = 2000):
+    """읽을 때마다 설정을 렌더링할 때 vs 리소스 캐시에서 제공할 때의 read_resource 지연 시간"""
+    print("\n" + "="*60)
+    print("🗃️ 리소스 캐시 벤치마크")
+    print("="*60)
+    uri = "file://config.json"
+    cache = resource_cache.cache
+    original = dict(sse_server.config)
+    for size, rounds in ((0, reads), (keys, reads // 10)):
+        sse_server.config.clear()
+        sse_server.config.update(original)
+        sse_server.config.update({f"feature_{i}": {"enabled": i % 2 == 0, "limit": i} for i in range(size)})
+        cache.invalidate(uri)
+        print(f"키 {len(sse_server.config)}개 설정 (렌더링 결과 {len(await sse_server.read_resource(uri)):,} 바이트), {rounds}회 읽기")
+
+        # 모든 읽기가 미스: 캐시 이전의 읽기 비용
+        latencies = []
+        for _ in range(rounds):
+            cache.invalidate(uri)
+            start = time.perf_counter_ns()
+            await sse_server.read_resource(uri)
+            latencies.append(time.perf_counter_ns() - start)
+        print_summary("읽을 때마다 렌더링 (이전 경로)", summarize(latencies))
+
+        for label, update_every in (("캐시", 0), ("캐시, 1% 업데이트", 100)):
+            hits, misses = cache.hits, cache.misses
+            summary = summarize(await measure_reads(uri, rounds, update_every))
+            ratio = (cache.hits - hits) / ((cache.hits - hits) + (cache.misses - misses))
+            print_summary(f"{label} (적중 {ratio:.1%})", summary)
+    sse_server.config.clear()
+    sse_server.config.update(original)
+    cache.invalidate(uri)
+
+
+def legacy_code_review(name: str, arguments: dict) -> types.GetPromptResult:
+    """이전 get_prompt: 요청마다 f-문자열과 GetPromptResult를 다시 만듦"""
+    code = arguments["code"]
+    return types.GetPromptResult(
+        description="코드 리뷰 프롬프트",
+        messages=[types.PromptMessage(
+            role="user",
+            content=types.TextContent(type="text", text=f"다음 코드를 리뷰해주세요:\n\n```\n{code}\n```")
+        )]
+    )
+
+
+async def measure_prompts(get_prompt: Callable[[str, dict], Any], codes: List[str], rounds: int) -> List[int]:
+    """code_review 프롬프트 요청 각각의 지연 시간 (나노초)"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for code in codes:
+            # 요청마다 디코딩된 것처럼 새 문자열: 해시가 아직 계산되지 않음
+            arguments = {"code": code[:1] + code[1:]}
+            start = clock()
+            result = get_prompt("code_review", arguments)
+            if asyncio.iscoroutine(result):
+                await result
+            latencies.append(clock() - start)
+    return latencies
+
+
+async def benchmark_prompts(code_kb: int = 100, inputs: int = 20, rounds: int = 50):
+    """100 KB 코드의 code_review: 요청마다 f-문자열 vs 컴파일된 템플릿 vs 프롬프트 캐시"""
+    print("\n" + "="*60)
+    print("📝 프롬프트 엔진 벤치마크")
+    print("="*60)
+    alphabet = string.ascii_letters + string.digits + " \n\""
+    codes = ["".join(random.choices(alphabet, k=code_kb * 1024)) for _ in range(inputs)]
+    cache = prompt_engine.cache
+
+    print(f"렌더링만 (MCP get_prompt): 서로 다른 {code_kb} KB 입력 {inputs}개 x {rounds}회")
+    print_summary("요청마다 f-문자열 (이전 경로)", summarize(
+        await measure_prompts(legacy_code_review, codes, rounds)))
+    print_summary("컴파일된 템플릿", summarize(
+        await measure_prompts(lambda name, arguments: sse_server.render_code_review(arguments), codes, rounds)))
+    cache.clear()
+    print_summary("캐시 조회 (적중)", summarize(
+        await measure_prompts(lambda name, arguments: cache.get_sync(
+            name, arguments, sse_server.prompt_renderer(name, arguments)), codes, rounds)))
+
+    print("렌더링 + JSON 본문 (REST /prompts/get)")
+    print_summary("f-문자열 + 인코딩 (이전 경로)", summarize(await measure_prompts(
+        lambda name, arguments: fast_json.dumps(legacy_code_review(name, arguments)), codes, rounds)))
+    cache.clear()
+    fresh = ["".join(random.choices(alphabet, k=code_kb * 1024)) for _ in range(inputs * 5)]
+    encoded = lambda name, arguments: cache.encoded(name, arguments, sse_server.prompt_renderer(name, arguments),
+                                                    fast_json.dumps)
+    print_summary("캐시 미스 (해시 + 렌더링 + 인코딩)", summarize(await measure_prompts(encoded, fresh, 1)))
+    cache.clear()
+    hits = cache.hits
+    print_summary("캐시 적중 (같은 코드 재전송)", summarize(await measure_prompts(encoded, codes, rounds)))
+    print(f"  적중률 {(cache.hits - hits) / (inputs * rounds):.1%}; {code_kb} KB의 키 (한 번 해시): "
+          f"{summarize(await measure_prompts(lambda name, arguments: hash(cache.key(name, arguments)), codes, rounds))['p50_us']:.1f} µs")
+    print(f"  캐시 통계: {cache.stats()}")
+    cache.clear()
+
+
+def print_usage():
+    """사용법 출력"""
+    print("""
+⏱️ MCP 서버 벤치마크 도구
+
+사용법:
+  python benchmark.py [옵션]
+
+옵션:
+  --calculator    계산기 호출당 지연 시간 (컴파일 캐시 전후)
+  --engine        eval 경로 vs AST 표현식 엔진 (처리량과 p99)
+  --json          JSON 응답 직렬화 (json.dumps vs fast_json)
+  --sse           SSE 연결 1만 개: 연결당 메모리와 팬아웃 지연 시간
+  --transport     도구 호출 처리량: REST 라우트 vs /sse 또는 /ws의 MCP 세션 하나
+  --compression   응답 압축: 콘텐츠 코딩별 절약 바이트와 CPU 시간
+  --scaling       워커 프로세스 1..N개로 실행한 launcher.py의 처리량
+  --runtime       이벤트 루프 / HTTP 파서별 초당 요청 수와 p99 (uvloop, httptools)
+  --http2         동시 MCP 세션 1천 개의 연결 수와 지연 시간, HTTP/1.1 vs h2c
+  --uds           루프백 TCP vs Unix 도메인 소켓의 도구 호출 지연 시간
+  --resources     64 MB 리소스 읽기: JSON 본문 하나 vs 스트리밍 vs Range 요청
+  --resource-cache read_resource 지연 시간: 읽을 때마다 렌더링 vs 리소스 캐시에서 제공
+  --files         256 MB 파일 리소스: Python을 거쳐 읽기 vs sendfile, 그리고 1 MB mmap 구간
+  --index         파일 10만 개의 list_resources: 호출마다 순회 vs inotify가 유지하는 인덱스
+  --subscriptions 리소스 변경 감지: read_resource 폴링 vs resources/subscribe
+  --prompts       100 KB 코드의 code_review: 요청마다 f-문자열 vs 컴파일된 템플릿 vs 프롬프트 캐시
+  --help          이 도움말 표시
+
+예시:
+  python benchmark.py              # 모든 벤치마크 실행
+  python benchmark.py --calculator # 계산기만 실행
+  python benchmark.py --engine     # 표현식 엔진만 실행
+  python benchmark.py --json       # JSON 직렬화만 실행
+  python benchmark.py --sse        # SSE 브로드캐스트만 실행
+  python benchmark.py --transport  # REST vs MCP 세션만 실행
+  python benchmark.py --compression # 응답 압축만 실행
+  python benchmark.py --scaling    # 멀티 프로세스 확장성만 실행
+  python benchmark.py --runtime    # 이벤트 루프 / HTTP 파서만 실행
+  python benchmark.py --http2      # HTTP/1.1 vs HTTP/2만 실행
+  python benchmark.py --uds        # 루프백 TCP vs Unix 도메인 소켓만 실행
+  python benchmark.py --resources  # 큰 리소스 읽기만 실행
+  python benchmark.py --resource-cache # 리소스 캐시만 실행
+  python benchmark.py --files      # 파일 리소스만 실행
+  python benchmark.py --index      # 리소스 인덱스만 실행
+  python benchmark.py --subscriptions # 리소스 구독만 실행
+  python benchmark.py --prompts    # 프롬프트 엔진만 실행
+""")
+
+
+async def main():
+    """메인 함수"""
+    args = sys.argv[1:]
+
+    if "--help" in args or "-h" in args:
+        print_usage()
+        return
+
+    run_all = not any(arg.startswith("--") for arg in args)
+
+    if run_all or "--calculator" in args:
+        benchmark_calculator()
+
+    if run_all or "--engine" in args:
+        benchmark_engine()
+
+    if run_all or "--json" in args:
+        benchmark_serialization()
+
+    if run_all or "--sse" in args:
+        await benchmark_broadcast()
+
+    if run_all or "--transport" in args:
+        await benchmark_transport()
+
+    if run_all or "--compression" in args:
+        await benchmark_compression()
+
+    if run_all or "--scaling" in args:
+        await benchmark_scaling()
+
+    if run_all or "--runtime" in args:
+        await benchmark_runtime()
+
+    if run_all or "--http2" in args:
+        await benchmark_http2()
+
+    if run_all or "--uds" in args:
+        await benchmark_uds()
+
+    if run_all or "--resources" in args:
+        await benchmark_resources()
+
+    if run_all or "--resource-cache" in args:
+        await benchmark_resource_cache()
+
+    if run_all or "--files" in args:
+        await benchmark_files()
+
+    if run_all or "--index" in args:
+        await benchmark_resource_index()
+
+    if run_all or "--subscriptions" in args:
+        await benchmark_subscriptions()
+
+    if run_all or "--prompts" in args:
+        await benchmark_prompts()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+# broadcast_hub.py
+import asyncio
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+import fast_json
+
+
+def encode(event: Dict[str, Any]) -> bytes:
+    """이벤트를 SSE 프레임 하나로 인코딩"""
+    return b"data: " + fast_json.dumps_plain(event) + b"\n\n"
+
+
+class Subscription:
+    """SSE 연결 하나의 크기 제한 프레임 큐"""
+
+    __slots__ = ("frames", "waiter", "closed")
+
+    def __init__(self, queue_size: int):
+        self.frames: deque = deque(maxlen=queue_size)
+        self.waiter: Optional[asyncio.Future] = None
+        self.closed = False
+
+    def push(self, frame: bytes) -> bool:
+        """프레임을 큐에 넣고, 가장 오래된 프레임을 버려야 했다면 False 반환"""
+        dropped = len(self.frames) == self.frames.maxlen
+        self.frames.append(frame)
+        self._wake()
+        return not dropped
+
+    def close(self):
+        """큐에 남은 프레임을 보낸 뒤 스트림 종료"""
+        self.closed = True
+        self._wake()
+
+    def _wake(self):
+        waiter = self.waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        while True:
+            while self.frames:
+                yield self.frames.popleft()
+            if self.closed:
+                return
+            # 대기 중인 연결만 future를 가짐
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self.waiter
+            finally:
+                self.waiter = None
+
+
+class BroadcastHub:
+    """모든 SSE 연결로 팬아웃되는 하나의 하트비트 타이머와 이벤트 소스"""
+
+    def __init__(self, heartbeat_interval: float = 5.0, queue_size: int = 16):
+        self.heartbeat_interval = heartbeat_interval
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscription] = set()
+        self._timer: Optional[asyncio.Task] = None
+
+        # 메트릭
+        self.connections = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def start(self):
+        """하트비트 타이머 시작 (멱등)"""
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.get_running_loop().create_task(self._heartbeat())
+
+    def stop(self):
+        """타이머를 멈추고 열린 모든 스트림 종료"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for subscription in self.subscribers:
+            subscription.close()
+        self.subscribers.clear()
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if self.subscribers:
+                self.publish({"type": "heartbeat", "timestamp": loop.time()})
+
+    def subscribe(self) -> Subscription:
+        """새 연결 등록"""
+        self.start()
+        subscription = Subscription(self.queue_size)
+        self.subscribers.add(subscription)
+        self.connections += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """끊어진 연결 제거"""
+        self.subscribers.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]):
+        """이벤트를 한 번만 인코딩하고 모든 연결의 큐에 프레임 추가"""
+        self.publish_frame(encode(event))
+
+    def publish_frame(self, frame: bytes):
+        """미리 인코딩된 프레임을 모든 연결의 큐에 추가"""
+        self.published += 1
+        delivered = 0
+        for subscription in self.subscribers:
+            # 느린 클라이언트는 큐가 끝없이 커지는 대신 가장 오래된 프레임을 잃음
+            delivered += subscription.push(frame)
+        self.delivered += delivered
+        self.dropped += len(self.subscribers) - delivered
+
+    async def stream(self, first: Optional[bytes] = None) -> AsyncIterator[bytes]:
+        """연결 하나의 프레임 (선택적인 첫 인사 프레임부터)"""
+        subscription = self.subscribe()
+        try:
+            if first is not None:
+                yield first
+            async for frame in subscription:
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        """연결 및 팬아웃 메트릭 반환"""
+        return {
+            "subscribers": len(self.subscribers),
+            "connections": self.connections,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "heartbeat_interval_s": self.heartbeat_interval,
+            "queue_size": self.queue_size
+        }
+
+
+# 모든 /sse 연결이 공유하는 허브, 환경 변수로 설정
+hub = BroadcastHub(
+    heartbeat_interval=float(os.environ.get("MCP_SSE_HEARTBEAT", "5.0")),
+    queue_size=int(os.environ.get("MCP_SSE_QUEUE_SIZE", "16"))
+)
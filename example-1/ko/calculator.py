@@ -0,0 +1,96 @@
+# calculator.py
+import math
+import os
+import types
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Mapping, Optional
+
+import expression_engine
+
+
+# 호출할 때마다가 아니라 임포트 시점에 한 번만 만드는 샌드박스 네임스페이스
+ALLOWED_NAMES: Dict[str, Any] = {
+    k: v for k, v in math.__dict__.items() if not k.startswith("__")
+}
+ALLOWED_NAMES.update({"abs": abs, "round": round})
+
+# builtins가 없는 전역 네임스페이스 (ALLOWED_NAMES만 참조 가능)
+SAFE_GLOBALS: Dict[str, Any] = {"__builtins__": {}}
+
+# eval()에 locals로 넘기는 읽기 전용 뷰: (sqrt := 5) 같은 할당 표현식은
+# 이후 모든 호출의 이름을 바꾸는 대신 실패함
+SAFE_LOCALS: Mapping[str, Any] = types.MappingProxyType(ALLOWED_NAMES)
+
+# 계산 모드: "ast"는 화이트리스트 표현식 엔진, "eval"은 파이썬 컴파일러 사용
+MODES = ("ast", "eval")
+DEFAULT_MODE = os.environ.get("CALCULATOR_MODE", "ast")
+
+
+def compile_eval(expression: str) -> Any:
+    """eval()용 파이썬 코드 객체로 표현식을 컴파일합니다"""
+    return compile(expression, "<calculator>", "eval")
+
+
+def compile_ast(expression: str) -> expression_engine.CompiledExpression:
+    """화이트리스트 표현식 엔진으로 표현식을 컴파일합니다"""
+    return expression_engine.compile_expression(expression, ALLOWED_NAMES)
+
+
+class CompiledExpressionCache:
+    """표현식 텍스트를 키로 하는 컴파일된 표현식의 크기 제한 LRU 캐시"""
+
+    def __init__(self, maxsize: int = 512, compiler: Callable[[str], Any] = compile_eval):
+        self.maxsize = maxsize
+        self.compiler = compiler
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+
+    def get(self, expression: str):
+        """표현식의 컴파일된 코드를 반환합니다 (미스일 때 컴파일)"""
+        code = self._cache.get(expression)
+        if code is not None:
+            self._cache.move_to_end(expression)
+            self.hits += 1
+            return code
+
+        self.misses += 1
+        code = self.compiler(expression)
+        self._cache[expression] = code
+        if len(self._cache) > self.maxsize:
+            # 가장 오래 사용되지 않은 표현식 제거
+            self._cache.popitem(last=False)
+        return code
+
+    def clear(self):
+        """캐시된 코드 객체를 모두 버리고 카운터를 초기화합니다"""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 크기와 히트/미스 카운터를 반환합니다"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0
+        }
+
+
+# 이 프로세스의 모든 계산기 호출이 공유하는 캐시
+expression_cache = CompiledExpressionCache()
+ast_cache = CompiledExpressionCache(compiler=compile_ast)
+
+
+def evaluate(expression: str, mode: Optional[str] = None) -> Any:
+    """캐시된 코드와 공유 네임스페이스로 표현식을 계산합니다"""
+    mode = mode or DEFAULT_MODE
+    if mode == "ast":
+        return ast_cache.get(expression)()
+    if mode == "eval":
+        code = expression_cache.get(expression)
+        return eval(code, SAFE_GLOBALS, SAFE_LOCALS)
+    raise ValueError(f"Unknown calculator mode: {mode}")
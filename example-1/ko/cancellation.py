@@ -0,0 +1,133 @@
+# cancellation.py
+import asyncio
+import contextlib
+import os
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from mcp import types
+from mcp.server import Server
+
+
+class ToolTimeout(Exception):
+    """도구 호출이 시간 예산을 넘을 때 발생"""
+
+
+class ClientDisconnected(Exception):
+    """도구 호출이 끝나기 전에 클라이언트가 떠났을 때 발생"""
+
+
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """"이름=초,이름=초" 형식의 도구별 타임아웃 파싱"""
+    timeouts = {}
+    for item in spec.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+async def wait_for_disconnect(receive):
+    """HTTP 클라이언트 연결이 끊기면 반환 (요청 본문을 읽은 뒤 호출)"""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _cancel(task: asyncio.Future):
+    """태스크를 취소하고 실제로 멈출 때까지 기다립니다 (결과는 더 이상 필요 없음)"""
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await task
+
+
+class ToolCallTracker:
+    """도구별 시간 예산 안에서 도구 호출을 실행하고, 결과를 기다리는 쪽이 없으면 취소
+
+    호출은 예산을 넘겼을 때, 클라이언트 연결이 끊겼을 때, 호출한 쪽이
+    취소됐을 때(MCP notifications/cancelled 메시지나 닫힌 세션) 취소됩니다.
+    계산기 호출을 취소하면 워커 프로세스도 교체되므로 버려진 작업이 더 이상
+    CPU를 쓰지 않습니다.
+    """
+
+    def __init__(self, default_timeout: float = 30.0, timeouts: Optional[Dict[str, float]] = None):
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.in_flight = 0
+
+        # 메트릭
+        self.completed = 0
+        self.timed_out = 0
+        self.disconnected = 0
+        self.cancelled = 0
+        self.cancelled_seconds = 0.0
+
+    def timeout_for(self, name: str) -> float:
+        """도구의 시간 예산(초)"""
+        return self.timeouts.get(name, self.default_timeout)
+
+    async def run(self, name: str, call: Awaitable, disconnected: Optional[Awaitable] = None) -> Any:
+        """예산 안에서 도구 호출을 기다리고, `disconnected`가 먼저 끝나면 취소"""
+        timeout = self.timeout_for(name)
+        self.in_flight += 1
+        started = time.monotonic()
+        task = asyncio.ensure_future(call)
+        watcher = asyncio.ensure_future(disconnected) if disconnected is not None else None
+        try:
+            done, _ = await asyncio.wait({task, watcher} - {None}, timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if task in done:
+                self.completed += 1
+                return task.result()
+            await _cancel(task)
+            self.cancelled_seconds += time.monotonic() - started
+            if watcher in done:
+                self.disconnected += 1
+                raise ClientDisconnected(f"Client disconnected during tool call: {name}")
+            self.timed_out += 1
+            raise ToolTimeout(f"Tool '{name}' exceeded its {timeout:g}s time budget")
+        except asyncio.CancelledError:
+            await _cancel(task)
+            self.cancelled += 1
+            self.cancelled_seconds += time.monotonic() - started
+            raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """진행 중, 타임아웃, 취소된 작업 메트릭 반환"""
+        return {
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "disconnected": self.disconnected,
+            "cancelled": self.cancelled,
+            "cancelled_work_s": self.cancelled_seconds,
+            "default_timeout_s": self.default_timeout,
+            "timeouts_s": dict(self.timeouts)
+        }
+
+
+def track_requests(server: Server):
+    """서버의 tools/call 핸들러를 트래커 아래에서 실행; 타임아웃은 오류 결과가 됨"""
+    handler = server.request_handlers[types.CallToolRequest]
+
+    async def tracked(request: types.CallToolRequest):
+        try:
+            return await tracker.run(request.params.name, handler(request))
+        except ToolTimeout as e:
+            return types.ServerResult(types.CallToolResult(
+                content=[types.TextContent(type="text", text=str(e))], isError=True))
+
+    server.request_handlers[types.CallToolRequest] = tracked
+
+
+# REST 라우트와 MCP 세션이 공유하는 트래커, 환경 변수로 설정
+# (MCP_TOOL_TIMEOUTS="calculator=5,echo=1"로 도구별로 MCP_TOOL_TIMEOUT을 덮어씀)
+tracker = ToolCallTracker(
+    default_timeout=float(os.environ.get("MCP_TOOL_TIMEOUT", "30")),
+    timeouts=parse_timeouts(os.environ.get("MCP_TOOL_TIMEOUTS", ""))
+)
@@ -0,0 +1,72 @@
+# cost_cases.py
+import time
+from typing import Iterator, Tuple
+
+# 계산 전에 정적 비용 추정기가 거부해야 하는 표현식
+ADVERSARIAL_EXPRESSIONS = [
+    "9**9**9",
+    "2**10**10",
+    "(10**10)**(10**10)",
+    "(2**10**6)**1000",
+    "factorial(10**9)",
+    "factorial(factorial(20))",
+    "comb(10**6, 5*10**5)",
+    "perm(10**5)",
+    "isqrt(10**10**8)",
+    "lcm(3**10**8, 2**10**8)",
+    "[1] * 10**9",
+    "prod([10**1000] * 10**5)",
+    "max(2**10**9, 1)",
+    "abs(-9**9**9)",
+    "9**9**9 if 1 else 0",
+    "[9**9**9 for a in [1]]",
+    "sqrt.__class__",
+    "(lambda: 1)()",
+    "1+" * 6000 + "1",
+]
+
+# 여전히 허용되어야 하는 일반 표현식
+BENIGN_EXPRESSIONS = [
+    "10 + 5",
+    "sqrt(144) + 2**3",
+    "log(100) + sin(pi/2)",
+    "factorial(100)",
+    "comb(1000, 500)",
+    "2**1000",
+    "fsum([0.1] * 10)",
+    "gcd(12, 18)",
+    "1 if 2 > 1 else 0",
+]
+
+# 이보다 느린 거부는 정적 분석이 아니라 표현식 실행에서 나온 것
+MAX_REJECT_MS = 50
+
+# 통과하는 결과; 나머지는 not_rejected, too_slow, wrongly_rejected
+PASSED = {"rejected", "accepted"}
+
+
+def run(cost_estimator) -> Iterator[Tuple[str, str, float, str]]:
+    """모든 케이스를 cost_estimator 모듈로 확인
+
+    표현식마다 (outcome, label, elapsed_ms, detail)을 내보냅니다. label은
+    40자로 줄인 표현식이고, detail은 추정기의 메시지입니다.
+    """
+    for expression in ADVERSARIAL_EXPRESSIONS:
+        label = expression if len(expression) <= 40 else expression[:37] + "..."
+        start = time.perf_counter()
+        try:
+            cost_estimator.check(expression)
+        except cost_estimator.CostLimitExceeded as e:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            yield ("too_slow" if elapsed_ms > MAX_REJECT_MS else "rejected"), label, elapsed_ms, str(e)
+        else:
+            yield "not_rejected", label, (time.perf_counter() - start) * 1000, ""
+
+    for expression in BENIGN_EXPRESSIONS:
+        start = time.perf_counter()
+        try:
+            cost_estimator.check(expression)
+        except cost_estimator.CostLimitExceeded as e:
+            yield "wrongly_rejected", expression, (time.perf_counter() - start) * 1000, str(e)
+        else:
+            yield "accepted", expression, (time.perf_counter() - start) * 1000, ""
@@ -0,0 +1,44 @@
+# engine_cases.py
+from typing import Any, Callable, Iterator, Tuple
+
+# and/or, 연쇄 비교, 조건 표현식이 필요 없는 피연산자를 건너뛰어야
+# eval()과 같은 결과가 나오는 표현식
+EXPRESSIONS = [
+    "1 if 1 else 1/0",
+    "1/0 if 0 else 2",
+    "1 if 0 else 1/0",
+    "sqrt(16) if 2 > 1 else log(-1)",
+    "0 and 1/0",
+    "1 or log(0)",
+    "1 and 0 and 1/0",
+    "0 or 0.0 or 3",
+    "(0 and 1/0) + 1",
+    "0 and factorial(10**9)",
+    "log(0) or 1",
+    "not 0 and 3",
+    "1 < 0 < 1/0",
+    "2 > 1 > 0",
+    "1 < 2 < 3 < 1/0",
+    "3 > 2 == 2 >= 1",
+    "1 == 1.0 < 2 if 0 or 2 else 1/0",
+]
+
+
+def _outcome(evaluate: Callable[[], Any]) -> str:
+    """결과의 repr 또는 발생한 예외의 이름"""
+    try:
+        return repr(evaluate())
+    except Exception as e:
+        return type(e).__name__
+
+
+def run(calculator) -> Iterator[Tuple[bool, str, str, str]]:
+    """모든 케이스를 엔진("ast" 모드)과 eval()로 계산합니다
+
+    (same, expression, engine_outcome, eval_outcome)을 내보내며, outcome은
+    결과의 repr 또는 발생한 예외의 이름입니다.
+    """
+    for expression in EXPRESSIONS:
+        engine = _outcome(lambda: calculator.evaluate(expression, "ast"))
+        python = _outcome(lambda: calculator.evaluate(expression, "eval"))
+        yield engine == python, expression, engine, python
@@ -0,0 +1,201 @@
+# evaluation_pool.py
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, Optional, Set
+
+try:
+    import resource
+except ImportError:  # Windows에는 없으므로 메모리 제한을 건너뜀
+    resource = None
+
+
+class EvaluationError(Exception):
+    """워커 프로세스 안에서 표현식 계산이 실패할 때 발생"""
+
+
+class EvaluationTimeout(EvaluationError):
+    """계산이 실행 시간 예산을 넘을 때 발생"""
+
+
+def _current_address_space() -> int:
+    """이 프로세스의 가상 메모리 크기를 바이트 단위로 반환 (알 수 없으면 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _worker_main(conn, memory_limit: int):
+    """워커 프로세스 루프: 표현식을 받아 (ok, value)를 돌려보냄"""
+    import calculator
+
+    if resource is not None and memory_limit:
+        # 인터프리터가 이미 사용 중인 메모리 위에 예산을 더함
+        limit = _current_address_space() + memory_limit
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    while True:
+        try:
+            expression = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        try:
+            conn.send((True, calculator.evaluate(expression)))
+        except MemoryError:
+            conn.send((False, "memory budget exceeded"))
+        except Exception as e:
+            conn.send((False, str(e)))
+
+
+class _Worker:
+    """워커 프로세스와 파이프의 부모 쪽 끝"""
+
+    def __init__(self, context, memory_limit: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, memory_limit), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        """프로세스를 즉시 종료합니다"""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class EvaluationPool:
+    """호출별 시간/메모리 예산을 가진, 미리 띄워 둔 워커 프로세스 풀"""
+
+    def __init__(self, size: Optional[int] = None, timeout: float = 2.0, memory_limit_mb: int = 256):
+        self.size = size or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        methods = multiprocessing.get_all_start_methods()
+        # forkserver는 이벤트 루프와 스레드가 이미 돌고 있는 프로세스의 fork를 피함
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._idle: Optional[asyncio.Queue] = None
+        # 계산 중인 워커, shutdown()이 함께 종료할 수 있도록
+        self._busy: Set[_Worker] = set()
+        self._started = False
+
+        # 메트릭
+        self.busy = 0
+        self.waiting = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.kills = 0
+        self.replacements = 0
+        self.total_wait = 0.0
+
+    def start(self):
+        """모든 워커 프로세스를 시작합니다 (멱등)"""
+        if self._started:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._idle.put_nowait(_Worker(self._context, self.memory_limit))
+        self._started = True
+
+    def shutdown(self):
+        """계산 중인 워커를 포함해 모든 워커를 종료합니다 (그 호출자는 EvaluationError를 받음)"""
+        if not self._started:
+            return
+        self._started = False
+        while not self._idle.empty():
+            self._idle.get_nowait().kill()
+        for worker in list(self._busy):
+            worker.kill()
+        self._busy.clear()
+        # 아직 워커를 기다리는 호출자는 워커를 받지 못함
+        for _ in range(self.waiting):
+            self._idle.put_nowait(None)
+
+    async def _replace(self, worker: _Worker):
+        """워커를 종료하고 새 워커를 풀에 다시 넣습니다"""
+        self.kills += 1
+        self._busy.discard(worker)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, worker.kill)
+        if not self._started:
+            # 그동안 종료됨: 교체하지 않음
+            return
+        replacement = await loop.run_in_executor(None, _Worker, self._context, self.memory_limit)
+        self.replacements += 1
+        if not self._started:
+            replacement.kill()
+            return
+        self._idle.put_nowait(replacement)
+
+    async def evaluate(self, expression: str, timeout: Optional[float] = None) -> Any:
+        """시간 예산 안에서 워커 프로세스로 표현식을 계산합니다"""
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+
+        self.waiting += 1
+        wait_start = time.monotonic()
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.waiting -= 1
+            self.total_wait += time.monotonic() - wait_start
+        if worker is None:
+            raise EvaluationError("evaluation pool is shut down")
+
+        self.busy += 1
+        self.calls += 1
+        self._busy.add(worker)
+        loop = asyncio.get_running_loop()
+        try:
+            worker.conn.send(expression)
+            ready = await loop.run_in_executor(None, worker.conn.poll, timeout)
+            if not ready:
+                self.timeouts += 1
+                await self._replace(worker)
+                raise EvaluationTimeout(f"evaluation exceeded the {timeout:g}s time budget")
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            # 워커가 죽었으므로 (예: OS에 의해 종료) 교체
+            await self._replace(worker)
+            raise EvaluationError("evaluation worker crashed")
+        except asyncio.CancelledError:
+            # 호출자가 계산 도중 사라짐: 워커가 아직 바쁠 수 있으므로 교체
+            asyncio.ensure_future(self._replace(worker))
+            raise
+        finally:
+            self.busy -= 1
+
+        self._busy.discard(worker)
+        self._idle.put_nowait(worker)
+        if not ok:
+            raise EvaluationError(value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 포화도와 종료 횟수 메트릭을 반환합니다"""
+        return {
+            "size": self.size,
+            "busy": self.busy,
+            "idle": self._idle.qsize() if self._idle else 0,
+            "waiting": self.waiting,
+            "saturation": self.busy / self.size,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "kills": self.kills,
+            "replacements": self.replacements,
+            "avg_wait_ms": self.total_wait / self.calls * 1000 if self.calls else 0.0,
+            "timeout_s": self.timeout,
+            "memory_limit_mb": self.memory_limit // (1024 * 1024)
+        }
+
+
+# 계산기 도구가 공유하는 풀 (환경 변수로 설정)
+pool = EvaluationPool(
+    size=int(os.environ.get("CALCULATOR_POOL_SIZE", "0")) or None,
+    timeout=float(os.environ.get("CALCULATOR_TIMEOUT", "2.0")),
+    memory_limit_mb=int(os.environ.get("CALCULATOR_MEMORY_MB", "256"))
+)
@@ -0,0 +1,306 @@
+# expression_engine.py
+import ast
+import operator
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+
+class ExpressionError(ValueError):
+    """표현식이 화이트리스트 밖의 구문을 사용할 때 발생"""
+
+
+# 화이트리스트 연산자와 그 구현
+BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Not: operator.not_,
+}
+
+COMPARE_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+# 상수 노드가 가질 수 있는 리터럴 타입
+CONSTANT_TYPES = (int, float, complex, bool)
+
+# "이 노드는 컴파일 시점 상수가 아님"을 나타내는 표식
+_DYNAMIC = object()
+
+# 컴파일된 노드: (변수 매핑을 받는 평가 함수, 접힌 값 또는 _DYNAMIC)
+Compiled = Tuple[Callable[[Mapping[str, Any]], Any], Any]
+
+
+def _constant(value: Any) -> Compiled:
+    """접힌 값을 컴파일된 노드로 감쌉니다"""
+    return (lambda env: value), value
+
+
+class CompiledExpression:
+    """화이트리스트로 검증되고 클로저로 컴파일된 표현식"""
+
+    __slots__ = ("source", "variables", "is_constant", "_evaluate")
+
+    def __init__(self, source: str, evaluate: Callable[[Mapping[str, Any]], Any],
+                 variables: Tuple[str, ...], is_constant: bool):
+        self.source = source
+        self.variables = variables
+        self.is_constant = is_constant
+        self._evaluate = evaluate
+
+    def __call__(self, values: Optional[Mapping[str, Any]] = None) -> Any:
+        """주어진 변수 값으로 계산합니다"""
+        return self._evaluate(values or {})
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r}, variables={self.variables})"
+
+
+class _Compiler:
+    """파싱된 표현식을 순회하며 모든 노드를 검사하고 클로저를 만듭니다"""
+
+    def __init__(self, namespace: Mapping[str, Any], variables: Optional[Iterable[str]]):
+        self.namespace = namespace
+        # None이면 자유 변수를 전혀 허용하지 않음
+        self.allowed_variables = None if variables is None else set(variables)
+        self.free_variables: Dict[str, None] = {}
+        # 선택되지 않은 분기처럼 실행되지 않을 수 있는 코드를 컴파일하는 동안 꺼짐
+        self.folding = True
+
+    def compile(self, node: ast.AST) -> Compiled:
+        """노드 하나를 컴파일합니다 (모든 입력이 상수이면 접음)"""
+        method = getattr(self, f"_compile_{type(node).__name__}", None)
+        if method is None:
+            raise ExpressionError(f"Unsupported expression element: {type(node).__name__}")
+        return method(node)
+
+    def compile_unfolded(self, node: ast.AST) -> Callable[[Mapping[str, Any]], Any]:
+        """실행되지 않을 수 있는 노드를 지금 계산하지 않고 검증하고 컴파일합니다"""
+        folding, self.folding = self.folding, False
+        try:
+            func, _ = self.compile(node)
+        finally:
+            self.folding = folding
+        return func
+
+    def _compile_Expression(self, node: ast.Expression) -> Compiled:
+        return self.compile(node.body)
+
+    def _compile_Constant(self, node: ast.Constant) -> Compiled:
+        if not isinstance(node.value, CONSTANT_TYPES):
+            raise ExpressionError(f"Unsupported constant: {node.value!r}")
+        return _constant(node.value)
+
+    def _compile_Name(self, node: ast.Name) -> Compiled:
+        name = node.id
+        if name in self.namespace:
+            return _constant(self.namespace[name])
+        if self.allowed_variables is None or (
+            self.allowed_variables and name not in self.allowed_variables
+        ):
+            raise ExpressionError(f"name '{name}' is not defined")
+        self.free_variables[name] = None
+        return (lambda env: env[name]), _DYNAMIC
+
+    def _compile_BinOp(self, node: ast.BinOp) -> Compiled:
+        op = BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        left, left_value = self.compile(node.left)
+        right, right_value = self.compile(node.right)
+        if self.folding and left_value is not _DYNAMIC and right_value is not _DYNAMIC:
+            return _constant(op(left_value, right_value))
+        return (lambda env: op(left(env), right(env))), _DYNAMIC
+
+    def _compile_UnaryOp(self, node: ast.UnaryOp) -> Compiled:
+        op = UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        operand, operand_value = self.compile(node.operand)
+        if self.folding and operand_value is not _DYNAMIC:
+            return _constant(op(operand_value))
+        return (lambda env: op(operand(env))), _DYNAMIC
+
+    def _compile_Compare(self, node: ast.Compare) -> Compiled:
+        ops = []
+        for op_node in node.ops:
+            op = COMPARE_OPERATORS.get(type(op_node))
+            if op is None:
+                raise ExpressionError(f"Unsupported operator: {type(op_node).__name__}")
+            ops.append(op)
+        left, left_value = self.compile(node.left)
+
+        if len(ops) == 1:
+            # 단일 비교: 연산자 결과를 그대로 반환 (배열이면 요소별)
+            op = ops[0]
+            right, right_value = self.compile(node.comparators[0])
+            if self.folding and left_value is not _DYNAMIC and right_value is not _DYNAMIC:
+                return _constant(op(left_value, right_value))
+            return (lambda env: op(left(env), right(env))), _DYNAMIC
+
+        funcs = [left]
+        for index, (op, child) in enumerate(zip(ops, node.comparators)):
+            if index and left_value is _DYNAMIC:
+                # 앞의 비교가 모두 참일 때만 실행
+                funcs.append(self.compile_unfolded(child))
+                continue
+            right, right_value = self.compile(child)
+            funcs.append(right)
+            if not self.folding or left_value is _DYNAMIC or right_value is _DYNAMIC:
+                left_value = _DYNAMIC
+            elif not op(left_value, right_value):
+                # 거짓으로 확정: 뒤의 비교 대상은 검증만 함
+                for rest in node.comparators[index + 1:]:
+                    self.compile_unfolded(rest)
+                return _constant(False)
+            else:
+                left_value = right_value
+        if left_value is not _DYNAMIC:
+            return _constant(True)
+
+        pairs = list(zip(ops, funcs[:-1], funcs[1:]))
+
+        def evaluate(env):
+            # 연쇄 비교: a < b < c 에서 b는 한 번만 계산
+            left = pairs[0][1](env)
+            for op, _, right_func in pairs:
+                right = right_func(env)
+                if not op(left, right):
+                    return False
+                left = right
+            return True
+
+        return evaluate, _DYNAMIC
+
+    def _compile_BoolOp(self, node: ast.BoolOp) -> Compiled:
+        is_and = isinstance(node.op, ast.And)
+        funcs = []
+        value = None
+        for index, child in enumerate(node.values):
+            if index and value is _DYNAMIC:
+                # 앞의 피연산자가 결과를 정하지 못할 때만 실행
+                funcs.append(self.compile_unfolded(child))
+                continue
+            func, value = self.compile(child)
+            funcs.append(func)
+            if not self.folding:
+                value = _DYNAMIC
+            elif value is not _DYNAMIC and bool(value) != is_and:
+                # 컴파일 시점에 결정됨: 뒤의 피연산자는 검증만 함
+                for rest in node.values[index + 1:]:
+                    self.compile_unfolded(rest)
+                return _constant(value)
+        if value is not _DYNAMIC:
+            return _constant(value)
+
+        def evaluate(env):
+            value = None
+            for func in funcs:
+                value = func(env)
+                if bool(value) != is_and:
+                    return value
+            return value
+
+        return evaluate, _DYNAMIC
+
+    def _compile_IfExp(self, node: ast.IfExp) -> Compiled:
+        test, test_value = self.compile(node.test)
+        if not self.folding or test_value is _DYNAMIC:
+            # 실행 중 어느 분기든 건너뛸 수 있으므로 둘 다 접지 않음
+            body = self.compile_unfolded(node.body)
+            orelse = self.compile_unfolded(node.orelse)
+            return (lambda env: body(env) if test(env) else orelse(env)), _DYNAMIC
+        # 상수 조건이 고르는 분기만 접고, 다른 분기는 검증만 함
+        if test_value:
+            compiled = self.compile(node.body)
+            self.compile_unfolded(node.orelse)
+        else:
+            self.compile_unfolded(node.body)
+            compiled = self.compile(node.orelse)
+        return compiled
+
+    def _compile_Tuple(self, node: ast.Tuple) -> Compiled:
+        return self._compile_sequence(node.elts, tuple)
+
+    def _compile_List(self, node: ast.List) -> Compiled:
+        return self._compile_sequence(node.elts, list)
+
+    def _compile_sequence(self, elements, factory) -> Compiled:
+        items = [self.compile(child) for child in elements]
+        funcs = [func for func, _ in items]
+        if self.folding and all(value is not _DYNAMIC for _, value in items):
+            folded = [value for _, value in items]
+            # 리스트는 가변이므로 계산할 때마다 새 복사본을 반환
+            return (lambda env: factory(folded)), factory(folded)
+        return (lambda env: factory([func(env) for func in funcs])), _DYNAMIC
+
+    def _compile_Call(self, node: ast.Call) -> Compiled:
+        if not isinstance(node.func, ast.Name) or node.func.id not in self.namespace:
+            raise ExpressionError("Only whitelisted functions can be called")
+        function = self.namespace[node.func.id]
+        if not callable(function):
+            raise ExpressionError(f"'{node.func.id}' is not callable")
+        if any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise ExpressionError("Unsupported expression element: Starred")
+        if any(keyword.arg is None for keyword in node.keywords):
+            raise ExpressionError("Unsupported expression element: **kwargs")
+
+        args = [self.compile(arg) for arg in node.args]
+        kwargs = [(keyword.arg, self.compile(keyword.value)) for keyword in node.keywords]
+        if self.folding and all(value is not _DYNAMIC for _, value in args) and all(
+            value is not _DYNAMIC for _, (_, value) in kwargs
+        ):
+            return _constant(function(
+                *[value for _, value in args],
+                **{name: value for name, (_, value) in kwargs}
+            ))
+
+        arg_funcs = [func for func, _ in args]
+        if not kwargs:
+            if len(arg_funcs) == 1:
+                only = arg_funcs[0]
+                return (lambda env: function(only(env))), _DYNAMIC
+            return (lambda env: function(*[func(env) for func in arg_funcs])), _DYNAMIC
+        kwarg_funcs = [(name, func) for name, (func, _) in kwargs]
+        return (lambda env: function(
+            *[func(env) for func in arg_funcs],
+            **{name: func(env) for name, func in kwarg_funcs}
+        )), _DYNAMIC
+
+
+def parse(expression: str) -> ast.Expression:
+    """표현식 텍스트를 AST로 파싱합니다 (eval 모드)"""
+    try:
+        return ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+
+
+def compile_expression(expression: str, namespace: Mapping[str, Any],
+                       variables: Optional[Iterable[str]] = None) -> CompiledExpression:
+    """표현식을 파싱, 검증, 상수 접기 후 컴파일합니다.
+
+    namespace에 있는 이름은 컴파일 시점에 결정됩니다. 그 밖의 이름은 자유 변수이며
+    variables가 주어졌을 때만 허용됩니다 (빈 iterable이면 모든 자유 변수 허용).
+    """
+    compiler = _Compiler(namespace, variables)
+    evaluate, value = compiler.compile(parse(expression))
+    return CompiledExpression(
+        expression,
+        evaluate,
+        tuple(compiler.free_variables),
+        value is not _DYNAMIC,
+    )
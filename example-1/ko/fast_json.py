@@ -0,0 +1,40 @@
+# fast_json.py
+import json
+from typing import Any
+
+import pydantic_core
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # 일반 데이터는 json 모듈로 대체
+    orjson = None
+
+
+def dumps_plain(content: Any) -> bytes:
+    """일반 데이터(dict, list, str, 숫자)를 JSON 바이트로 직렬화"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_models(content: Any) -> bytes:
+    """MCP 타입(pydantic 모델)을 단독으로 또는 일반 컨테이너 안에서 바로 바이트로 직렬화"""
+    # pydantic-core가 중간 dict 없이 JSON을 직접 작성
+    return pydantic_core.to_json(content, by_alias=True, exclude_none=True)
+
+
+def dumps(content: Any) -> bytes:
+    """사용 가능한 가장 빠른 인코더로 응답 페이로드를 JSON 바이트로 직렬화"""
+    try:
+        return dumps_plain(content)
+    except TypeError:
+        # 두 인코더 모두 모르는 객체(예: MCP 타입)를 만나면 바로 중단
+        return dumps_models(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """json.dumps 대신 orjson / pydantic-core로 렌더링하는 JSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,279 @@
+# launcher.py
+import argparse
+import asyncio
+import importlib
+import os
+import re
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+import http2
+import runtime
+
+
+# 홉 단위 헤더는 워커 사이에서 전달하지 않음
+HOP_BY_HOP = {b"connection", b"keep-alive", b"transfer-encoding", b"upgrade"}
+
+# Streamable HTTP 세션 ID를 담는 헤더 (example-3)
+SESSION_HEADER = b"mcp-session-id"
+
+ENDPOINT_SESSION = re.compile(rb"(session_id=[0-9a-fA-F]+)")
+
+
+def load_app(spec: str, factory: bool = False):
+    """"모듈:속성" 가져오기 (factory가 설정되면 호출)"""
+    module_name, _, attribute = spec.partition(":")
+    app = importlib.import_module(module_name)
+    for name in (attribute or "app").split("."):
+        app = getattr(app, name)
+    return app() if factory else app
+
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    """리슨 TCP 소켓; reuse_port면 워커마다 따로 바인드하고 커널이 연결을 분산"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class SessionAffinityMiddleware:
+    """Routes every request of a stateful MCP session to the worker that owns it
+
+    SSE sessions: the endpoint announced in the first event gets `&worker=N`,
+    so the client's POST /messages/ requests name their worker. Streamable
+    HTTP sessions: the mcp-session-id header is prefixed with `wN-`. A worker
+    that receives a request for another worker's session forwards it over that
+    worker's Unix socket and streams the response back.
+    """
+
+    def __init__(self, app, index: int, socket_dir: str):
+        self.app = app
+        self.index = index
+        self.prefix = f"w{index}-".encode()
+        self.socket_dir = socket_dir
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        owner = self._owner(scope)
+        if owner is not None and owner != self.index:
+            return await self._forward(scope, receive, send, owner)
+
+        if owner == self.index:
+            # 애플리케이션은 워커 접두사가 없는 세션 ID만 알고 있음
+            scope = dict(scope)
+            scope["headers"] = [(k, v[len(self.prefix):] if k == SESSION_HEADER else v)
+                                for k, v in scope["headers"]]
+
+        tagged = False
+
+        async def tagging_send(message):
+            nonlocal tagged
+            if message["type"] == "http.response.start":
+                message["headers"] = [(k, self.prefix + v if k == SESSION_HEADER else v)
+                                      for k, v in message["headers"]]
+            elif message["type"] == "http.response.body" and not tagged and b"event: endpoint" in message.get("body", b""):
+                tagged = True
+                message["body"] = ENDPOINT_SESSION.sub(rb"\1&worker=" + str(self.index).encode(), message["body"], count=1)
+            await send(message)
+
+        await self.app(scope, receive, tagging_send)
+
+    def _owner(self, scope) -> Optional[int]:
+        """요청이 지정한 워커 인덱스 (있다면)"""
+        match = re.search(rb"(?:^|&)worker=(\d+)", scope.get("query_string", b""))
+        if match:
+            return int(match.group(1))
+        session = Headers(scope=scope).get("mcp-session-id", "")
+        match = re.match(r"w(\d+)-", session)
+        return int(match.group(1)) if match else None
+
+    def _client(self, index: int) -> httpx.AsyncClient:
+        if index not in self._clients:
+            transport = httpx.AsyncHTTPTransport(uds=os.path.join(self.socket_dir, f"worker-{index}.sock"))
+            self._clients[index] = httpx.AsyncClient(transport=transport, base_url="http://worker", timeout=None)
+        return self._clients[index]
+
+    async def _forward(self, scope, receive, send, owner: int):
+        """소유 워커로 요청을 프록시하고 응답을 스트리밍으로 돌려줌"""
+        body = await Request(scope, receive).body()
+        headers = [(k, v) for k, v in scope["headers"] if k not in HOP_BY_HOP]
+        url = scope["path"] + ("?" + scope["query_string"].decode() if scope.get("query_string") else "")
+        try:
+            async with self._client(owner).stream(scope["method"], url, headers=headers, content=body) as response:
+                await send({
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [(k, v) for k, v in response.headers.raw if k.lower() not in HOP_BY_HOP]
+                })
+                async for chunk in response.aiter_raw():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b""})
+        except httpx.TransportError:
+            # 소유 워커가 사라졌고 그 세션들도 함께 사라짐
+            await JSONResponse({"error": "Unknown session"}, status_code=404)(scope, receive, send)
+
+
+def run_worker(app, index: int, sockets: List[socket.socket], socket_dir: str, log_level: str,
+               runtime_options: Dict[str, str], use_http2: bool = False):
+    """워커 프로세스 본체: 공유 소켓과 전용 소켓에서 미리 로드한 앱 제공"""
+    os.environ["MCP_WORKER_INDEX"] = str(index)
+    # 다른 워커가 전달한 요청을 받는 전용 소켓
+    private = runtime.bind_unix_socket(os.path.join(socket_dir, f"worker-{index}.sock"), 0o600)
+    app = SessionAffinityMiddleware(app, index, socket_dir)
+    if use_http2:
+        # The event loop policy was installed before forking
+        asyncio.run(http2.serve(app, [f"fd://{sock.fileno()}" for sock in sockets + [private]], log_level=log_level))
+        return
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level, **runtime_options))
+    # run() installs the selected event loop before serving
+    server.run(sockets=sockets + [private])
+
+
+class Supervisor:
+    """미리 로드한 앱에서 워커 N개를 포크하고, 죽은 워커는 재시작하며, SIGTERM/SIGINT에 모두 정지"""
+
+    def __init__(self, app, host: str, port: int, workers: int, reuse_port: bool = True,
+                 log_level: str = "info", runtime_options: Optional[Dict[str, str]] = None,
+                 use_http2: bool = False, uds: str = "", tcp: bool = True):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.reuse_port = reuse_port and hasattr(socket, "SO_REUSEPORT")
+        self.log_level = log_level
+        self.runtime_options = runtime_options or {}
+        self.use_http2 = use_http2
+        self.uds = uds
+        self.tcp = tcp
+        self.socket_dir = tempfile.mkdtemp(prefix="mcp-workers-")
+        self.shared: Optional[socket.socket] = None
+        self.unix: Optional[socket.socket] = None
+        self.pids: Dict[int, int] = {}  # pid -> 워커 인덱스
+        self.started: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, index: int):
+        """워커 하나 포크"""
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                sockets = [self.unix] if self.unix else []
+                if self.tcp:
+                    sockets.append(self.shared or bind_socket(self.host, self.port, True))
+                run_worker(self.app, index, sockets, self.socket_dir, self.log_level, self.runtime_options,
+                           self.use_http2)
+            except BaseException as e:
+                print(f"워커 {index} 실패: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        self.pids[pid] = index
+        self.started[index] = time.monotonic()
+
+    def stop(self, signum=None, frame=None):
+        """모든 워커에 열린 요청을 마치고 종료하도록 요청"""
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """워커를 시작하고 정지될 때까지 감독"""
+        if self.tcp and not self.reuse_port:
+            # 여기서 소켓 하나를 바인드하고 모든 워커가 상속
+            self.shared = bind_socket(self.host, self.port, False)
+        if self.uds:
+            # Unix 소켓에는 SO_REUSEPORT가 없으므로 여기서 바인드한 소켓 하나에서 모든 워커가 accept
+            self.unix = runtime.bind_unix_socket(self.uds)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        mode = "SO_REUSEPORT" if self.reuse_port else "공유 소켓"
+        listeners = ([f"{self.host}:{self.port} ({mode})"] if self.tcp else []) + ([f"unix:{self.uds}"] if self.uds else [])
+        print(f"워커 {self.workers}개 시작: {', '.join(listeners)} (pid {os.getpid()})")
+        for index in range(self.workers):
+            self.spawn(index)
+        try:
+            while self.pids:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+                index = self.pids.pop(pid, None)
+                if index is None or self.stopping:
+                    continue
+                print(f"워커 {index} (pid {pid})가 상태 {status}로 종료됨; 재시작", file=sys.stderr)
+                if time.monotonic() - self.started[index] < 1.0:
+                    # 시작하자마자 죽는 경우: 헛돌지 않도록 대기
+                    time.sleep(1.0)
+                self.spawn(index)
+        finally:
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
+            runtime.unlink_unix_socket(self.uds)
+
+
+def main():
+    """인자를 파싱하고 앱을 미리 로드한 뒤 워커를 감독"""
+    parser = argparse.ArgumentParser(description="MCP 서버 앱을 여러 워커 프로세스로 실행")
+    parser.add_argument("app", nargs="?", default="sse_server:app", help="모듈:속성 형식의 애플리케이션")
+    parser.add_argument("--factory", action=argparse.BooleanOptionalAction, default=False,
+                        help="애플리케이션을 호출할 팩토리로 취급")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shared-socket", action="store_true",
+                        help="SO_REUSEPORT 대신 한 번 바인드한 소켓을 공유")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--loop", choices=("auto",) + runtime.LOOPS, default=runtime.LOOP,
+                        help="Event loop (auto: uvloop when installed)")
+    parser.add_argument("--http", choices=("auto",) + runtime.HTTP_PARSERS, default=runtime.HTTP,
+                        help="HTTP parser (auto: httptools when installed)")
+    parser.add_argument("--http2", action="store_true", default=runtime.HTTP2,
+                        help="Serve HTTP/1.1 and cleartext HTTP/2 (h2c) with Hypercorn")
+    parser.add_argument("--uds", default=runtime.UDS, help="이 Unix 도메인 소켓 경로에서도 리슨")
+    parser.add_argument("--uds-only", action="store_true", default=runtime.UDS_ONLY,
+                        help="TCP 없이 Unix 도메인 소켓에서만 리슨")
+    args = parser.parse_args()
+    if args.uds_only and not args.uds:
+        parser.error("--uds-only needs --uds PATH")
+
+    # 포크 전에 여기서 한 번 가져오므로 워커들이 로드된 코드를 공유
+    sys.path.insert(0, os.getcwd())
+    # 계산기 풀은 앱을 가져올 때 크기가 정해짐: 크기를 지정하지 않으면 워커마다 CPU 수만큼
+    # 프로세스를 띄우게 되므로, 대신 워커마다 CPU를 나눈 몫을 줌
+    os.environ.setdefault("CALCULATOR_POOL_SIZE", str(max(1, (os.cpu_count() or 1) // args.workers)))
+    app = load_app(args.app, args.factory)
+    use_http2 = args.http2 and runtime.configure_http2(args.loop)
+    options = {} if use_http2 else runtime.configure(args.loop, args.http)
+    print(f"Runtime: {runtime.describe()}")
+    Supervisor(app, args.host, args.port, args.workers, reuse_port=not args.shared_socket,
+               log_level=args.log_level, runtime_options=options, use_http2=use_http2,
+               uds=args.uds, tcp=not args.uds_only).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# prompt_engine.py
+import os
+import string
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+class PromptTemplate:
+    """{name} 자리표시자가 있는 프롬프트 텍스트, 한 번만 파싱
+
+    템플릿은 생성될 때 리터럴 조각과 인수 슬롯으로 나뉩니다. render()는
+    그 목록의 복사본에 슬롯을 채워 join하므로, 각 인수는 템플릿을 다시
+    읽거나 중간 문자열을 만들지 않고 결과에 정확히 한 번만 복사됩니다.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._pieces: List[Optional[str]] = []
+        self._slots: List[Tuple[int, str]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if literal:
+                self._pieces.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"프롬프트 템플릿에서 지원하지 않는 자리표시자: {{{field}}}")
+            self._slots.append((len(self._pieces), field))
+            self._pieces.append(None)
+        self.fields = tuple(dict.fromkeys(field for _, field in self._slots))
+
+    def render(self, arguments: Mapping[str, Any]) -> str:
+        """모든 자리표시자를 채운 템플릿 텍스트; 인수가 없으면 KeyError"""
+        pieces = self._pieces.copy()
+        for index, field in self._slots:
+            pieces[index] = str(arguments[field])
+        return "".join(pieces)
+
+
+# GetPromptResult, 또는 프롬프트 핸들러가 그 대신 반환하는 값
+PromptResult = Any
+
+class PromptKey(tuple):
+    """프롬프트 이름과 인수 문자열로 된 dict 키, 전체를 한 번 해시
+
+    해시는 모든 문자를 포함하며 키를 만들 때 한 번 계산해 보관합니다. dict
+    조회, LRU 이동, 이후의 제거는 100 KB 인수를 다시 해시하지 않고 이 값을
+    재사용합니다. 해시가 일치한 조회는 문자열 전체를 비교(memcmp)해
+    확인합니다.
+    """
+
+    def __new__(cls, parts):
+        key = super().__new__(cls, parts)
+        key._hash = tuple.__hash__(key)
+        return key
+
+    def __hash__(self) -> int:
+        return self._hash
+
+
+class PromptCache:
+    """프롬프트 이름과 인수의 해시를 키로 렌더링된 GetPromptResult 객체를 보관
+
+    에이전트는 리뷰 루프에서 같은 인수(코드 블록 전체)를 여러 번 다시
+    보냅니다. 반복 요청은 새로 렌더링하고 인코딩하는 대신 저장된 결과와,
+    REST에서는 처음 인코딩한 JSON 본문을 받습니다. 키는 PromptKey로, 전체를
+    한 번 해시하고 전체를 비교합니다. 인수를 포함해 보관한 텍스트가
+    max_bytes를 넘으면 가장 오래 사용되지 않은 결과부터 버립니다. 저장된
+    결과는 요청 간에 공유되므로 읽기 전용으로 다루세요.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # 키 -> [크기, 결과, 인코딩된 본문 또는 None]
+        self._entries: "OrderedDict[PromptKey, list]" = OrderedDict()
+        self._bytes = 0
+
+        # 메트릭
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(name: str, arguments: Optional[Mapping[str, Any]]) -> PromptKey:
+        """이름과 인수 이름, 값을 담은 평평한 키 (str()은 str 인수를 그대로 반환)"""
+        return PromptKey((name, *(str(item) for pair in sorted((arguments or {}).items()) for item in pair)))
+
+    @staticmethod
+    def size(key: PromptKey, result: PromptResult) -> int:
+        """항목이 담고 있는 텍스트의 문자 수, 키 포함 (메모리의 대부분)"""
+        messages = getattr(result, "messages", [])
+        text = sum(len(getattr(message.content, "text", "")) for message in messages)
+        return text + sum(len(part) for part in key) + 256
+
+    def _lookup(self, key: PromptKey) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: PromptKey, result: PromptResult) -> list:
+        entry = [self.size(key, result), result, None]
+        if entry[0] <= self.max_bytes:
+            # 그 사이 다른 요청이 같은 프롬프트를 저장했을 수 있음
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self._bytes -= replaced[0]
+            self._entries[key] = entry
+            self._grow(entry[0])
+        return entry
+
+    def _grow(self, size: int):
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted[0]
+            self.evictions += 1
+
+    async def get(self, name: str, arguments: Optional[Mapping[str, Any]],
+                  render: Callable[[], Awaitable[PromptResult]]) -> PromptResult:
+        """이 인수에 대해 저장된 결과; 캐시에 없으면 렌더링"""
+        key = self.key(name, arguments)
+        entry = self._lookup(key) or self._store(key, await render())
+        return entry[1]
+
+    def get_sync(self, name: str, arguments: Optional[Mapping[str, Any]],
+                 render: Callable[[], PromptResult]) -> PromptResult:
+        """동기 렌더러용 get()"""
+        key = self.key(name, arguments)
+        entry = self._lookup(key) or self._store(key, render())
+        return entry[1]
+
+    def encoded(self, name: str, arguments: Optional[Mapping[str, Any]],
+                render: Callable[[], PromptResult], encode: Callable[[PromptResult], bytes]) -> bytes:
+        """encode로 인코딩한 저장된 결과 (JSON 본문); 한 번만 인코딩해 결과와 함께 보관"""
+        key = self.key(name, arguments)
+        entry = self._lookup(key) or self._store(key, render())
+        if entry[2] is None:
+            entry[2] = encode(entry[1])
+            if self._entries.get(key) is entry:
+                entry[0] += len(entry[2])
+                self._grow(len(entry[2]))
+        return entry[2]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률, 크기, 축출 횟수를 반환"""
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions
+        }
+
+
+# 서버의 프롬프트가 공유하는 캐시, 크기는 환경 변수로 지정
+cache = PromptCache(max_bytes=int(os.environ.get("MCP_PROMPT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
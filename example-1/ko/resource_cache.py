@@ -0,0 +1,144 @@
+# resource_cache.py
+import functools
+import inspect
+import os
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Union
+
+
+Rendered = Union[str, bytes]
+
+
+def _size(body: Rendered) -> int:
+    """본문의 바이트 수 (str은 len()이 문자 수를 세므로 UTF-8로 인코딩한 크기)"""
+    return len(body.encode("utf-8", "surrogatepass")) if isinstance(body, str) else len(body)
+
+
+class ResourceCache:
+    """URI별로 렌더링된 리소스 본문과 렌더링 당시의 버전을 함께 보관
+
+    프로바이더는 데이터가 바뀌면 invalidate(uri)를 호출합니다. URI의 버전이
+    올라가므로 다음 읽기에서 다시 렌더링하고 새 본문을 저장합니다. 그 전까지는
+    프로바이더를 실행하지 않고 저장된 본문을 반환합니다. str과 bytes 본문만
+    보관하며(스트리밍 본문은 그대로 통과), 저장된 본문이 max_bytes를 넘으면
+    가장 오래 읽히지 않은 항목부터 제거합니다.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[str, Tuple[int, Rendered, int]]" = OrderedDict()
+        self._bytes = 0
+        self._listeners: List[Callable[[str], Any]] = []
+
+        # 메트릭
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def version(self, uri: str) -> int:
+        """리소스의 현재 버전; 0에서 시작해 무효화할 때마다 증가"""
+        return self._versions.get(uri, 0)
+
+    def invalidate(self, uri: str) -> int:
+        """리소스가 바뀌었음을 표시하고 새 버전을 반환"""
+        self._versions[uri] = self.version(uri) + 1
+        self.invalidations += 1
+        self._drop(uri)
+        for listener in self._listeners:
+            listener(uri)
+        return self._versions[uri]
+
+    def on_invalidate(self, listener: Callable[[str], Any]):
+        """무효화된 모든 리소스의 URI로 listener를 호출 (예: 구독자에게 알림)"""
+        self._listeners.append(listener)
+
+    def clear(self):
+        """모든 리소스를 무효화"""
+        for uri in list(self._entries):
+            self.invalidate(uri)
+
+    def _drop(self, uri: str):
+        entry = self._entries.pop(uri, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def _lookup(self, uri: str):
+        entry = self._entries.get(uri)
+        if entry is not None and entry[0] == self.version(uri):
+            self.hits += 1
+            self._entries.move_to_end(uri)
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def _store(self, uri: str, version: int, body: Any):
+        # 렌더링 중에 무효화되었다면 이 본문은 이미 오래된 것
+        if not isinstance(body, (str, bytes)) or version != self.version(uri):
+            return
+        size = _size(body)
+        if size > self.max_bytes:
+            return
+        self._drop(uri)
+        self._entries[uri] = (version, body, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self.evictions += 1
+
+    async def get(self, uri: str, render: Callable[[], Awaitable[Any]]) -> Any:
+        """현재 버전의 uri 본문; 캐시에 없으면 렌더링"""
+        body = self._lookup(uri)
+        if body is not None:
+            return body
+        version = self.version(uri)
+        body = await render()
+        self._store(uri, version, body)
+        return body
+
+    def get_sync(self, uri: str, render: Callable[[], Any]) -> Any:
+        """동기 렌더러용 get()"""
+        body = self._lookup(uri)
+        if body is not None:
+            return body
+        version = self.version(uri)
+        body = render()
+        self._store(uri, version, body)
+        return body
+
+    def cached(self, uri: str):
+        """리소스 핸들러의 본문을 uri로 캐싱하는 데코레이터 (동기/비동기 핸들러)"""
+
+        def decorator(render):
+            if inspect.iscoroutinefunction(render):
+                @functools.wraps(render)
+                async def wrapper(*args, **kwargs):
+                    return await self.get(uri, lambda: render(*args, **kwargs))
+            else:
+                @functools.wraps(render)
+                def wrapper(*args, **kwargs):
+                    return self.get_sync(uri, lambda: render(*args, **kwargs))
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률, 크기, 무효화 횟수를 반환"""
+        reads = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / reads if reads else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "versions": dict(self._versions)
+        }
+
+
+# 서버의 리소스 핸들러가 공유하는 캐시; 크기는 환경 변수로 설정
+cache = ResourceCache(max_bytes=int(os.environ.get("MCP_RESOURCE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
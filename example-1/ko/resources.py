@@ -0,0 +1,239 @@
+# resources.py
+import os
+import re
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from mcp import types
+from starlette.responses import Response, StreamingResponse
+
+
+# 프로바이더의 read()가 반환할 수 있는 값: 텍스트, 바이트, 또는 하나씩 스트리밍되는 바이트 청크
+ResourceBody = Union[str, bytes, AsyncIterator[bytes]]
+
+# 메모리에 있는 본문의 일부만 스트리밍할 때 자르는 청크 크기
+CHUNK_SIZE = int(os.environ.get("MCP_RESOURCE_CHUNK_SIZE", str(64 * 1024)))
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+
+class ResourceNotFound(ValueError):
+    """등록된 프로바이더가 없는 URI일 때 발생"""
+
+
+class RangeNotSatisfiable(Exception):
+    """Range 헤더가 리소스 끝을 넘는 바이트를 요청할 때 발생"""
+
+    def __init__(self, size: int):
+        super().__init__(f"Range not satisfiable (resource is {size} bytes)")
+        self.size = size
+
+
+def normalize_uri(uri) -> str:
+    """등록된 형태의 URI; MCP 세션에서는 정규화된 URL(file://config.json/)로 들어옴"""
+    return str(uri).rstrip("/")
+
+
+def to_bytes(body: Union[str, bytes]) -> bytes:
+    """바이트로 변환한 본문 (텍스트는 UTF-8로 전송)"""
+    return body.encode("utf-8") if isinstance(body, str) else body
+
+
+async def collect(body: ResourceBody) -> Union[str, bytes]:
+    """한 번에 필요한 호출자를 위해 메모리에 모은 전체 본문 (MCP resources/read)"""
+    if isinstance(body, (str, bytes)):
+        return body
+    return b"".join([chunk async for chunk in body])
+
+
+async def slice_stream(chunks: AsyncIterator[bytes], start: int, end: int) -> AsyncIterator[bytes]:
+    """청크 스트림의 start..end(포함) 바이트, 나머지는 보관하지 않고 건너뜀"""
+    offset = 0
+    try:
+        async for chunk in chunks:
+            chunk_end = offset + len(chunk)
+            if chunk_end > start:
+                yield chunk[max(0, start - offset):end + 1 - offset]
+            offset = chunk_end
+            if offset > end:
+                break
+    finally:
+        if hasattr(chunks, "aclose"):
+            await chunks.aclose()
+
+
+async def iter_slices(data: bytes, start: int, end: int, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """메모리에 있는 본문의 start..end(포함) 바이트, chunk_size씩"""
+    view = memoryview(data)
+    for offset in range(start, end + 1, chunk_size):
+        yield bytes(view[offset:min(offset + chunk_size, end + 1)])
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """단일 범위 `bytes=` 헤더의 첫 바이트와 마지막 바이트; 무시할 때는 None
+
+    여러 범위와 잘못된 헤더는 RFC 9110이 허용하는 대로 무시합니다
+    (리소스 전체를 전송). 범위가 끝을 넘어서 시작하면
+    RangeNotSatisfiable을 발생시킵니다.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if size == 0:
+        raise RangeNotSatisfiable(size)
+    if first == "":
+        # 접미사 범위: 마지막 N바이트
+        if int(last) == 0:
+            raise RangeNotSatisfiable(size)
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(size)
+    if end < start:
+        return None
+    return start, end
+
+
+class ResourceProvider:
+    """리소스 하나: 목록 항목과 읽는 방법
+
+    read()는 str, bytes 또는 바이트 비동기 이터레이터를 반환하므로 큰 리소스를
+    메모리에 들고 있지 않고 스트리밍할 수 있습니다. 크기를 알고 탐색할 수 있는
+    프로바이더는 size()와 read_range()를 재정의하며, 그러면 Range 요청은
+    스트림을 건너뛰며 읽지 않고 요청된 바이트로 바로
+    이동합니다. 스트리밍보다 나은 방법으로 바이트를 보낼 수 있는
+    프로바이더는 response()를 재정의합니다.
+    """
+
+    def __init__(self, uri: str, name: str, description: Optional[str] = None,
+                 mime_type: Optional[str] = None):
+        self.uri = uri
+        self.name = name
+        self.description = description
+        self.mime_type = mime_type
+
+    def resource(self) -> types.Resource:
+        """list_resources용 목록 항목"""
+        return types.Resource(uri=self.uri, name=self.name, description=self.description,
+                              mimeType=self.mime_type)
+
+    async def read(self) -> ResourceBody:
+        raise NotImplementedError
+
+    async def size(self) -> Optional[int]:
+        """본문을 읽지 않고 알 수 있을 때의 바이트 길이"""
+        return None
+
+    def read_range(self, start: int, end: int) -> AsyncIterator[bytes]:
+        """start..end(포함) 바이트; 기본 구현은 read()를 스트리밍하며 나머지를 건너뜀"""
+
+        async def chunks():
+            body = await self.read()
+            if isinstance(body, (str, bytes)):
+                data = to_bytes(body)
+                body = iter_slices(data, 0, len(data) - 1)
+            async for chunk in slice_stream(body, start, end):
+                yield chunk
+
+        return chunks()
+
+    async def response(self, range_header: Optional[str] = None) -> Response:
+        """/resources/stream의 HTTP 응답"""
+        return await stream_response(self, range_header)
+
+
+class FunctionResource(ResourceProvider):
+    """본문을 반환하는 비동기 함수 기반 프로바이더"""
+
+    def __init__(self, uri: str, read: Callable[[], Awaitable[ResourceBody]], name: str,
+                 description: Optional[str] = None, mime_type: Optional[str] = None):
+        super().__init__(uri, name, description, mime_type)
+        self._read = read
+
+    async def read(self) -> ResourceBody:
+        return await self._read()
+
+
+class ResourceRegistry:
+    """URI별 리소스 프로바이더, list_resources, read_resource, HTTP 라우트가 공유
+
+    마운트된 소스(파일 디렉터리 등)는 하나씩 등록되지 않은 URI를 제공합니다.
+    get(uri)는 프로바이더 또는 None을 반환하고, resources()는 소스가 가진
+    리소스를 나열합니다.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, ResourceProvider] = {}
+        self._mounts: List = []
+
+    def add(self, provider: ResourceProvider) -> ResourceProvider:
+        self._providers[normalize_uri(provider.uri)] = provider
+        return provider
+
+    def provider(self, uri: str, name: str, description: Optional[str] = None, mime_type: Optional[str] = None):
+        """비동기 함수를 uri의 프로바이더로 등록하는 데코레이터"""
+
+        def decorator(read: Callable[[], Awaitable[ResourceBody]]):
+            self.add(FunctionResource(uri, read, name, description, mime_type))
+            return read
+
+        return decorator
+
+    def mount(self, source):
+        """등록된 프로바이더 다음으로, 소스가 찾아 주는 URI를 제공"""
+        self._mounts.append(source)
+        return source
+
+    def get(self, uri) -> ResourceProvider:
+        provider = self._providers.get(normalize_uri(uri))
+        for source in self._mounts:
+            if provider is not None:
+                break
+            provider = source.get(uri)
+        if provider is None:
+            raise ResourceNotFound(f"알 수 없는 리소스: {uri}")
+        return provider
+
+    def resources(self) -> list[types.Resource]:
+        listed = [provider.resource() for provider in self._providers.values()]
+        for source in self._mounts:
+            listed.extend(source.resources())
+        return listed
+
+    async def read(self, uri) -> Union[str, bytes]:
+        """리소스 전체 본문; 스트리밍 본문은 모아서 반환"""
+        return await collect(await self.get(uri).read())
+
+
+async def stream_response(provider: ResourceProvider, range_header: Optional[str] = None) -> Response:
+    """리소스 바이트를 스트리밍 HTTP 응답으로 반환, 단일 바이트 Range를 지원
+
+    길이를 모르는 본문은 범위 지원 없이 청크 전송으로
+    보냅니다. 끝을 넘는 범위에는 RangeNotSatisfiable을 발생시킵니다.
+    """
+    media_type = provider.mime_type or "application/octet-stream"
+    size = await provider.size()
+    body: Optional[ResourceBody] = None
+    if size is None:
+        body = await provider.read()
+        if not isinstance(body, (str, bytes)):
+            return StreamingResponse(body, media_type=media_type, headers={"Accept-Ranges": "none"})
+        body = to_bytes(body)
+        size = len(body)
+
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = parse_range(range_header, size) if range_header else None
+    if byte_range is None:
+        if body is None:
+            body = await provider.read()
+        if isinstance(body, (str, bytes)):
+            return Response(to_bytes(body), media_type=media_type, headers=headers)
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(body, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    chunks = iter_slices(body, start, end) if body is not None else provider.read_range(start, end)
+    return StreamingResponse(chunks, status_code=206, media_type=media_type, headers=headers)
@@ -16,12 +16,18 @@ def print_usage():
 옵션:
   --stdio-only    stdio 클라이언트만 테스트
   --sse-only      SSE 클라이언트만 테스트
+  --engine-only   표현식 엔진만 테스트 (eval과 같은 결과)
+  --cost-only     비용 추정기만 테스트 (공격적인 표현식)
+  --behavior-only 상태 코드, 캐싱, 알림만 테스트 (프로세스 안에서)
   --help          이 도움말 표시
 
 예시:
   python run_tests.py              # 모든 테스트 실행
   python run_tests.py --stdio-only # stdio만 테스트
   python run_tests.py --sse-only   # SSE만 테스트
+  python run_tests.py --engine-only # 표현식 엔진만 테스트
+  python run_tests.py --cost-only  # 비용 추정기만 테스트
+  python run_tests.py --behavior-only # 서버 동작만 테스트
 """)
 
 
@@ -35,7 +41,16 @@ async def main():
     
     tester = MCPTester()
     
-    if "--stdio-only" in args:
+    if "--cost-only" in args:
+        print("🛡️ 비용 추정기만 테스트합니다.")
+        await tester.test_cost_estimator()
+    elif "--engine-only" in args:
+        print("🧮 표현식 엔진만 테스트합니다.")
+        await tester.test_expression_engine()
+    elif "--behavior-only" in args:
+        print("🔬 서버 동작만 테스트합니다.")
+        await tester.test_behavior()
+    elif "--stdio-only" in args:
         print("📱 stdio 클라이언트만 테스트합니다.")
         await tester.test_stdio_client()
     elif "--sse-only" in args:
@@ -1,23 +1,35 @@
 # sse_client.py
 import asyncio
 import aiohttp
+import httpx
 import json
-from typing import Dict, Any, List, Optional
+import os
+from typing import AsyncIterator, Dict, Any, List, Optional
 import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+from mcp.client.websocket import websocket_client
+import http2
 
 
 class MCPSseClient:
     """SSE 방식 MCP 클라이언트"""
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", uds: str = ""):
         self.base_url = base_url.rstrip('/')
         self.session = None
+        # 같은 호스트에 있는 서버의 Unix 도메인 소켓 (MCP_UDS); 이때 base_url은 호스트 이름만 나타냄
+        self.uds = uds
+        # ETag와 함께 캐시된 목록: 경로 -> (etag, 데이터)
+        self._listings: Dict[str, tuple] = {}
     
     async def connect(self):
         """HTTP 세션 생성"""
         try:
-            self.session = aiohttp.ClientSession()
-            print("✅ HTTP 세션이 생성되었습니다.")
+            connector = aiohttp.UnixConnector(path=self.uds) if self.uds else None
+            self.session = aiohttp.ClientSession(connector=connector)
+            print("✅ HTTP 세션이 생성되었습니다." + (f" (unix:{self.uds})" if self.uds else ""))
             return True
         except Exception as e:
             print(f"❌ 세션 생성 실패: {e}")
@@ -29,19 +41,42 @@ class MCPSseClient:
             await self.session.close()
             print("🔌 HTTP 세션이 종료되었습니다.")
     
+    def httpx_client_factory(self, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None,
+                             auth: Optional[httpx.Auth] = None) -> httpx.AsyncClient:
+        """mcp sse_client용 httpx 클라이언트, Unix 소켓이 지정되면 그 소켓으로 연결"""
+        transport = httpx.AsyncHTTPTransport(uds=self.uds) if self.uds else None
+        return httpx.AsyncClient(headers=headers, timeout=timeout or httpx.Timeout(30.0), auth=auth,
+                                 follow_redirects=True, transport=transport)
+
+    async def _get_listing(self, path: str):
+        """목록을 가져오며, 캐시된 사본은 ETag로 재검증"""
+        cached = self._listings.get(path)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        async with self.session.get(f"{self.base_url}{path}", headers=headers) as response:
+            if response.status == 304 and cached:
+                # 304는 캐시된 사본이 여전히 최신이라는 뜻이므로 다시 받지 않음
+                return 304, cached[1]
+            if response.status == 200:
+                data = await response.json()
+                etag = response.headers.get("ETag")
+                if etag:
+                    self._listings[path] = (etag, data)
+                return 200, data
+            return response.status, []
+    
     async def list_tools(self) -> List[Dict[str, Any]]:
         """사용 가능한 도구 목록 조회"""
         try:
-            async with self.session.get(f"{self.base_url}/tools") as response:
-                if response.status == 200:
-                    tools = await response.json()
-                    print(f"📋 사용 가능한 도구: {len(tools)}개")
-                    for tool in tools:
-                        print(f"  - {tool['name']}: {tool['description']}")
-                    return tools
-                else:
-                    print(f"❌ 도구 목록 조회 실패: HTTP {response.status}")
-                    return []
+            status, tools = await self._get_listing("/tools")
+            if status in (200, 304):
+                note = " (변경 없음)" if status == 304 else ""
+                print(f"📋 사용 가능한 도구: {len(tools)}개{note}")
+                for tool in tools:
+                    print(f"  - {tool['name']}: {tool['description']}")
+                return tools
+            else:
+                print(f"❌ 도구 목록 조회 실패: HTTP {status}")
+                return []
         except Exception as e:
             print(f"❌ 도구 목록 조회 실패: {e}")
             return []
@@ -72,19 +107,47 @@ class MCPSseClient:
             print(f"❌ 도구 호출 실패: {e}")
             return ""
     
-    async def list_resources(self) -> List[Dict[str, Any]]:
-        """사용 가능한 리소스 목록 조회"""
+    async def call_tools_batch(self, calls: List[Dict[str, Any]],
+                               concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """요청 하나로 여러 도구 호출 (결과는 순서대로 반환)"""
         try:
-            async with self.session.get(f"{self.base_url}/resources") as response:
+            params = {"concurrency": concurrency} if concurrency else None
+            async with self.session.post(
+                f"{self.base_url}/tools/batch",
+                json=calls,
+                params=params,
+                headers={"Content-Type": "application/json"}
+            ) as response:
                 if response.status == 200:
-                    resources = await response.json()
-                    print(f"📁 사용 가능한 리소스: {len(resources)}개")
-                    for resource in resources:
-                        print(f"  - {resource['name']}: {resource['description']}")
-                    return resources
+                    results = (await response.json()).get("results", [])
+                    print(f"🔧 도구 호출 {len(calls)}개 배치 결과:")
+                    for call, item in zip(calls, results):
+                        if "error" in item:
+                            print(f"  ❌ {call.get('name')}: {item['error']}")
+                        for content in item.get("result", []):
+                            print(f"  {call.get('name')}: {content.get('text', '')}")
+                    return results
                 else:
-                    print(f"❌ 리소스 목록 조회 실패: HTTP {response.status}")
+                    error = await response.text()
+                    print(f"❌ 배치 도구 호출 실패: HTTP {response.status} - {error}")
                     return []
+        except Exception as e:
+            print(f"❌ 배치 도구 호출 실패: {e}")
+            return []
+    
+    async def list_resources(self) -> List[Dict[str, Any]]:
+        """사용 가능한 리소스 목록 조회"""
+        try:
+            status, resources = await self._get_listing("/resources")
+            if status in (200, 304):
+                note = " (변경 없음)" if status == 304 else ""
+                print(f"📁 사용 가능한 리소스: {len(resources)}개{note}")
+                for resource in resources:
+                    print(f"  - {resource['name']}: {resource['description']}")
+                return resources
+            else:
+                print(f"❌ 리소스 목록 조회 실패: HTTP {status}")
+                return []
         except Exception as e:
             print(f"❌ 리소스 목록 조회 실패: {e}")
             return []
@@ -111,19 +174,58 @@ class MCPSseClient:
             print(f"❌ 리소스 읽기 실패: {e}")
             return ""
     
+    async def read_resource_stream(self, uri: str, start: Optional[int] = None, end: Optional[int] = None,
+                                   chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """리소스 바이트를 도착하는 대로 스트리밍; start/end(포함)를 주면 그 바이트 범위만 요청
+
+        청크 하나 이상을 메모리에 들고 있지 않습니다. 서버가 오류로 응답하면
+        RuntimeError를 발생시킵니다.
+        """
+        headers = {}
+        if start is not None or end is not None:
+            headers["Range"] = f"bytes={start or 0}-{'' if end is None else end}"
+        async with self.session.get(
+            f"{self.base_url}/resources/stream",
+            params={"uri": uri},
+            headers=headers
+        ) as response:
+            if response.status not in (200, 206):
+                raise RuntimeError(f"HTTP {response.status} - {await response.text()}")
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+    
+    async def update_config(self, changes: Dict[str, Any], token: Optional[str] = None) -> Optional[int]:
+        """관리자 토큰으로 설정 값을 바꾸고 file://config.json의 새 버전을 반환"""
+        token = token or os.environ.get("MCP_ADMIN_TOKEN")
+        if not token:
+            print("⚙️ POST /config에는 서버와 이 클라이언트에 설정한 MCP_ADMIN_TOKEN이 필요합니다")
+            return None
+        try:
+            async with self.session.post(f"{self.base_url}/config", json=changes,
+                                         headers={"Authorization": f"Bearer {token}"}) as response:
+                result = await response.json()
+                if response.status == 200:
+                    print(f"⚙️ 설정 변경, 버전: {result['version']}")
+                    return result["version"]
+                print(f"❌ 설정 변경 실패: HTTP {response.status} - {result.get('error')}")
+                return None
+        except Exception as e:
+            print(f"❌ 설정 변경 실패: {e}")
+            return None
+    
     async def list_prompts(self) -> List[Dict[str, Any]]:
         """사용 가능한 프롬프트 목록 조회"""
         try:
-            async with self.session.get(f"{self.base_url}/prompts") as response:
-                if response.status == 200:
-                    prompts = await response.json()
-                    print(f"💬 사용 가능한 프롬프트: {len(prompts)}개")
-                    for prompt in prompts:
-                        print(f"  - {prompt['name']}: {prompt['description']}")
-                    return prompts
-                else:
-                    print(f"❌ 프롬프트 목록 조회 실패: HTTP {response.status}")
-                    return []
+            status, prompts = await self._get_listing("/prompts")
+            if status in (200, 304):
+                note = " (변경 없음)" if status == 304 else ""
+                print(f"💬 사용 가능한 프롬프트: {len(prompts)}개{note}")
+                for prompt in prompts:
+                    print(f"  - {prompt['name']}: {prompt['description']}")
+                return prompts
+            else:
+                print(f"❌ 프롬프트 목록 조회 실패: HTTP {status}")
+                return []
         except Exception as e:
             print(f"❌ 프롬프트 목록 조회 실패: {e}")
             return []
@@ -156,11 +258,50 @@ class MCPSseClient:
             print(f"❌ 프롬프트 가져오기 실패: {e}")
             return ""
     
+    async def call_tools_in_session(self, calls: List[Dict[str, Any]]) -> List[List[str]]:
+        """/sse의 MCP 세션 하나로 여러 도구 호출을 JSON-RPC 요청으로 실행"""
+        try:
+            async with sse_client(f"{self.base_url}/sse", httpx_client_factory=self.httpx_client_factory) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    # 모든 요청이 세션의 오래 유지되는 스트림 하나를 공유
+                    results = await asyncio.gather(*(
+                        session.call_tool(call["name"], call.get("arguments", {})) for call in calls
+                    ))
+            texts = [[content.text for content in result.content] for result in results]
+            print(f"🔗 MCP 세션 하나로 도구 {len(calls)}개 호출: {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ MCP 세션 실패: {e}")
+            return []
+
+    @asynccontextmanager
+    async def subscribe(self, *uris: str) -> AsyncIterator["ResourceUpdates"]:
+        """/sse의 MCP 세션으로 리소스를 구독하고, 변경된 URI의 비동기 이터레이터를 제공
+
+        서버는 리소스의 연속된 변경을 업데이트 하나로 병합하므로, 루프에서
+        read_resource를 폴링하는 대신 이터레이터를 순회하면 됩니다.
+        """
+        updates = ResourceUpdates()
+
+        async def on_message(message):
+            if (isinstance(message, types.ServerNotification)
+                    and isinstance(message.root, types.ResourceUpdatedNotification)):
+                updates.put(str(message.root.params.uri))
+
+        async with sse_client(f"{self.base_url}/sse", httpx_client_factory=self.httpx_client_factory) as streams:
+            async with ClientSession(*streams, message_handler=on_message) as session:
+                await session.initialize()
+                for uri in uris:
+                    await session.subscribe_resource(uri)
+                print(f"🔔 리소스 {len(uris)}개 구독: {', '.join(uris)}")
+                yield updates
+
     async def listen_sse(self, duration: int = 10):
-        """SSE 스트림 수신 (지정된 시간 동안)"""
+        """브로드캐스트 이벤트 스트림 수신 (지정된 시간 동안)"""
         try:
             print(f"📡 SSE 스트림 수신 시작 (최대 {duration}초)")
-            async with self.session.get(f"{self.base_url}/sse") as response:
+            async with self.session.get(f"{self.base_url}/events") as response:
                 if response.status == 200:
                     start_time = time.time()
                     async for line in response.content:
@@ -181,12 +322,183 @@ class MCPSseClient:
             print(f"❌ SSE 수신 실패: {e}")
 
 
+class ResourceUpdates:
+    """업데이트된 리소스 URI의 비동기 이터레이터, 병합된 변경마다 하나
+
+    기다리다 시간이 초과되어도(asyncio.wait_for) 순회는 끝나지 않습니다.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, uri: str):
+        self._queue.put_nowait(uri)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._queue.get()
+
+
+class MCPWebSocketClient:
+    """WebSocket 기반 MCP 클라이언트: MCP 세션 하나, 양방향을 연결 하나로"""
+    
+    def __init__(self, url: str = "ws://localhost:8000/ws"):
+        self.url = url
+        self.session: Optional[ClientSession] = None
+        self._stack: Optional[AsyncExitStack] = None
+    
+    async def connect(self):
+        """WebSocket을 열고 MCP 세션 초기화"""
+        try:
+            self._stack = AsyncExitStack()
+            streams = await self._stack.enter_async_context(websocket_client(self.url))
+            self.session = await self._stack.enter_async_context(ClientSession(*streams))
+            await self.session.initialize()
+            print("✅ WebSocket MCP 세션이 열렸습니다.")
+            return True
+        except Exception as e:
+            print(f"❌ WebSocket 연결 실패: {e}")
+            await self.disconnect()
+            return False
+    
+    async def disconnect(self):
+        """MCP 세션과 WebSocket 종료"""
+        if self._stack:
+            await self._stack.aclose()
+            self._stack = None
+            self.session = None
+            print("🔌 WebSocket이 종료되었습니다.")
+    
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        """사용 가능한 도구 목록 조회"""
+        try:
+            tools = [tool.model_dump() for tool in (await self.session.list_tools()).tools]
+            print(f"📋 사용 가능한 도구: {len(tools)}개")
+            for tool in tools:
+                print(f"  - {tool['name']}: {tool['description']}")
+            return tools
+        except Exception as e:
+            print(f"❌ 도구 목록 조회 실패: {e}")
+            return []
+    
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> List[str]:
+        """도구 호출"""
+        try:
+            result = await self.session.call_tool(name, arguments)
+            texts = [content.text for content in result.content]
+            print(f"🔧 도구 '{name}' 호출 결과:")
+            for text in texts:
+                print(f"  {text}")
+            return texts
+        except Exception as e:
+            print(f"❌ 도구 호출 실패: {e}")
+            return []
+    
+    async def call_tools(self, calls: List[Dict[str, Any]]) -> List[List[str]]:
+        """여러 도구 호출을 한 번에 보내고 요청은 연결 하나에서 다중화됨"""
+        try:
+            results = await asyncio.gather(*(
+                self.session.call_tool(call["name"], call.get("arguments", {})) for call in calls
+            ))
+            texts = [[content.text for content in result.content] for result in results]
+            print(f"🔧 WebSocket으로 도구 {len(calls)}개 호출: {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ 도구 호출 실패: {e}")
+            return []
+
+
+class MCPHttp2Client:
+    """HTTP/2 (h2c) MCP 클라이언트: REST 호출과 MCP 세션이 연결 하나의 스트림으로 다중화됨
+    
+    MCP_HTTP2=1 (또는 launcher.py --http2)로 시작한 서버가 필요합니다.
+    동시 호출에 연결이 더 필요하지 않고, 열린 스트림이 100개를 넘을 때만
+    두 번째 연결을 엽니다 (MCP 세션마다 SSE 스트림으로 하나를 차지).
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000"):
+        self.base_url = base_url.rstrip('/')
+        self.pool: Optional[http2.Http2Pool] = None
+        self.http: Optional[httpx.AsyncClient] = None
+    
+    async def connect(self):
+        """HTTP/2 연결 열기"""
+        try:
+            self.pool = http2.Http2Pool()
+            self.http = self.pool.client(base_url=self.base_url, timeout=30.0)
+            response = await self.http.get("/metrics")
+            print(f"✅ {response.http_version} 연결이 열렸습니다.")
+            return True
+        except Exception as e:
+            print(f"❌ HTTP/2 연결 실패 (서버가 MCP_HTTP2=1로 실행 중인가요?): {e!r}")
+            await self.disconnect()
+            return False
+    
+    async def disconnect(self):
+        """연결과 그 위의 모든 스트림 닫기"""
+        if self.pool:
+            await self.http.aclose()
+            await self.pool.aclose()
+            self.pool = None
+            self.http = None
+            print("🔌 HTTP/2 연결이 닫혔습니다.")
+    
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> List[str]:
+        """/tools/call로 도구 호출"""
+        try:
+            response = await self.http.post("/tools/call", json={"name": name, "arguments": arguments})
+            if response.status_code != 200:
+                print(f"❌ 도구 호출 실패: HTTP {response.status_code} - {response.text}")
+                return []
+            texts = [content.get("text", "") for content in response.json().get("result", [])]
+            print(f"🔧 도구 '{name}' 호출 결과: {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ 도구 호출 실패: {e}")
+            return []
+    
+    async def call_tools(self, calls: List[Dict[str, Any]]) -> List[List[str]]:
+        """여러 도구 호출을 한 번에 전송; 각 호출은 공유 연결의 스트림"""
+        try:
+            responses = await asyncio.gather(*(
+                self.http.post("/tools/call", json={"name": call["name"], "arguments": call.get("arguments", {})})
+                for call in calls
+            ))
+            texts = [[content.get("text", "") for content in response.json().get("result", [])]
+                     for response in responses]
+            print(f"🔧 연결 {self.pool.connections()}개로 도구 호출 {len(calls)}개: {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ 도구 호출 실패: {e}")
+            return []
+    
+    async def call_tools_in_sessions(self, calls: List[Dict[str, Any]]) -> List[List[str]]:
+        """각 도구 호출을 /sse의 개별 MCP 세션에서 실행; 모든 세션이 연결을 공유"""
+        async def in_session(call: Dict[str, Any]) -> List[str]:
+            async with sse_client(f"{self.base_url}/sse", httpx_client_factory=self.pool.client_factory) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    result = await session.call_tool(call["name"], call.get("arguments", {}))
+                    return [content.text for content in result.content]
+        
+        try:
+            texts = await asyncio.gather(*(in_session(call) for call in calls))
+            print(f"🔗 연결 {self.pool.connections()}개로 MCP 세션 {len(calls)}개: {texts}")
+            return texts
+        except Exception as e:
+            print(f"❌ MCP 세션 실패: {e}")
+            return []
+
+
 async def test_sse_client():
     """SSE 클라이언트 테스트"""
     print("🚀 SSE MCP 클라이언트 테스트 시작")
     print("=" * 50)
     
-    client = MCPSseClient()
+    # MCP_UDS=/path/to/socket이면 TCP 대신 서버의 Unix 도메인 소켓으로 연결
+    client = MCPSseClient(uds=os.environ.get("MCP_UDS", ""))
     
     try:
         # 서버 연결
@@ -204,6 +516,13 @@ async def test_sse_client():
             
             # echo 도구 테스트
             await client.call_tool("echo", {"message": "Hello MCP SSE!"})
+            
+            # 배치 요청 하나로 여러 호출 테스트
+            await client.call_tools_batch([
+                {"name": "calculator", "arguments": {"expression": "2 ** 10"}},
+                {"name": "calculator", "arguments": {"expression": "log(100, 10)"}},
+                {"name": "echo", "arguments": {"message": "batch"}}
+            ])
         
         print("\n3️⃣ 리소스 목록 조회")
         resources = await client.list_resources()
@@ -211,6 +530,12 @@ async def test_sse_client():
         print("\n4️⃣ 리소스 읽기 테스트")
         if resources:
             await client.read_resource("file://config.json")
+            # 리소스를 스트리밍으로 읽은 뒤 처음 16바이트만 읽기
+            chunks = [chunk async for chunk in client.read_resource_stream("file://config.json")]
+            total, count = sum(len(chunk) for chunk in chunks), len(chunks)
+            print(f"📦 청크 {count}개로 {total}바이트 스트리밍")
+            part = b"".join([chunk async for chunk in client.read_resource_stream("file://config.json", 0, 15)])
+            print(f"✂️ 0-15 바이트: {part!r}")
         
         print("\n5️⃣ 프롬프트 목록 조회")
         prompts = await client.list_prompts()
@@ -224,6 +549,48 @@ async def test_sse_client():
         print("\n7️⃣ SSE 스트림 테스트")
         await client.listen_sse(duration=5)
         
+        print("\n8️⃣ MCP 세션 테스트")
+        await client.call_tools_in_session([
+            {"name": "calculator", "arguments": {"expression": "6 * 7"}},
+            {"name": "echo", "arguments": {"message": "Hello MCP session!"}}
+        ])
+        
+        print("\n9️⃣ WebSocket 세션 테스트")
+        ws_client = MCPWebSocketClient(client.base_url.replace("http", "ws", 1) + "/ws")
+        if await ws_client.connect():
+            await ws_client.list_tools()
+            await ws_client.call_tool("calculator", {"expression": "2 ** 8"})
+            await ws_client.call_tools([
+                {"name": "echo", "arguments": {"message": "one"}},
+                {"name": "echo", "arguments": {"message": "two"}}
+            ])
+            await ws_client.disconnect()
+        
+        print("\n🔟 HTTP/2 테스트")
+        h2_client = MCPHttp2Client(client.base_url)
+        if await h2_client.connect():
+            await h2_client.call_tools([
+                {"name": "echo", "arguments": {"message": "one"}},
+                {"name": "calculator", "arguments": {"expression": "2 ** 16"}}
+            ])
+            await h2_client.call_tools_in_sessions([
+                {"name": "echo", "arguments": {"message": "session one"}},
+                {"name": "echo", "arguments": {"message": "session two"}}
+            ])
+            await h2_client.disconnect()
+        
+        print("\n1️⃣1️⃣ 리소스 구독 테스트")
+        async with client.subscribe("file://config.json") as updates:
+            # 설정 변경 두 번이 알림 하나로 합쳐짐
+            if await client.update_config({"debug": False}) is not None:
+                await client.update_config({"debug": True})
+                try:
+                    # 설정이 바뀌면 서버가 푸시; 그동안 아무것도 폴링하지 않음
+                    uri = await asyncio.wait_for(anext(updates), timeout=2)
+                    print(f"📨 리소스 업데이트: {uri}")
+                except asyncio.TimeoutError:
+                    print("🔕 2초 안에 업데이트 없음")
+        
         print("\n✅ 모든 테스트가 완료되었습니다!")
         
     except Exception as e:
@@ -1,20 +1,86 @@
 # sse_server.py
 import asyncio
+import base64
+import contextlib
+import hashlib
 import json
-import math
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Callable
 from mcp.server import Server
 from mcp import types
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse, StreamingResponse
-from starlette.routing import Route
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route, WebSocketRoute
 from starlette.middleware.cors import CORSMiddleware
-import uvicorn
+import admin
+import admission
+import broadcast_hub
+import cancellation
+import compression
+import cost_estimator
+import evaluation_pool
+import fast_json
+import file_resources
+import prompt_engine
+import resource_cache
+import resource_index
+import resources
+import runtime
+import sse_sessions
+import subscriptions
+from fast_json import FastJSONResponse
 
 
 # 서버 인스턴스 생성
 server = Server("my-mcp-server")
 
+# 배치 도구 호출: 요청당 최대 호출 수와 동시에 실행되는 호출 수
+MAX_BATCH_CALLS = int(os.environ.get("MCP_BATCH_MAX_CALLS", "100"))
+BATCH_CONCURRENCY = int(os.environ.get("MCP_BATCH_CONCURRENCY", "8"))
+
+# /sse와 /ws의 MCP 세션: 동시에 열 수 있는 최대 세션 수
+MAX_SESSIONS = int(os.environ.get("MCP_MAX_SESSIONS", "1000"))
+
+# 응답 압축: 이 크기보다 작은 본문은 압축하지 않고 전송
+COMPRESSION_MIN_SIZE = int(os.environ.get("MCP_COMPRESSION_MIN_SIZE", "1024"))
+
+# 미리 직렬화된 목록: 경로 -> (JSON 바이트, 강한 ETag)
+listings: Dict[str, tuple[bytes, str]] = {}
+
+# 파일 변경 후 대기 중인 재직렬화 (rebuild_listings_later)와 그 예정 시각
+listings_rebuild = None
+listings_rebuild_due = 0.0
+# 마지막 파일 변경을 봤을 때 인덱스의 (추가, 삭제) 횟수
+listed_files = (0, 0)
+
+# 목록은 레지스트리와 함께만 바뀌므로 클라이언트는 다시 받지 않고 항상 재검증
+LISTING_CACHE_CONTROL = "no-cache"
+
+# list_resources, read_resource, /resources 라우트가 사용하는 리소스 프로바이더
+resource_registry = resources.ResourceRegistry()
+
+# MCP_RESOURCE_ROOT 아래의 파일을 file:/// 리소스로 제공 (resources/read는 mmap, HTTP는 sendfile),
+# list_resources마다 순회하지 않고 inotify가 최신으로 유지하는 인덱스에서 목록을 제공
+file_index = None
+if file_resources.ROOT:
+    file_index = resource_registry.mount(
+        resource_index.ResourceIndex(file_resources.FileRoot(file_resources.ROOT)))
+
+# 파일이 바뀐 뒤 목록을 다시 직렬화하기 전에 기다리는 시간(초); 연속된 변경은 한 번만 다시 만듦
+LISTING_REBUILD_DELAY = 0.1
+
+# 크기나 mtime만 바뀐 파일은 더 오래 기다림: 쓰기가 계속되는 파일(쓰기마다 IN_MODIFY)이
+# 변경 묶음마다가 아니라 최대 이 간격으로만 목록을 다시 직렬화하게 함
+LISTING_SIZE_DELAY = float(os.environ.get("MCP_LISTING_SIZE_DELAY", "5.0"))
+
+# file://config.json으로 제공되는 애플리케이션 설정; update_config로 변경
+# (또는 POST /config: MCP_ADMIN_TOKEN이 설정되어 있을 때만 제공; admin.py 참고)
+config = {
+    "version": "1.0",
+    "debug": True,
+    "max_connections": 100
+}
+
 
 @server.list_tools()
 async def list_tools() -> list[types.Tool]:
@@ -57,13 +123,10 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     if name == "calculator":
         expression = arguments.get("expression", "")
         try:
-            # 안전한 계산을 위해 제한된 함수만 허용
-            allowed_names = {
-                k: v for k, v in math.__dict__.items() if not k.startswith("__")
-            }
-            allowed_names.update({"abs": abs, "round": round})
-            
-            result = eval(expression, {"__builtins__": {}}, allowed_names)
+            # 예상 비용이 예산을 넘으면 워커를 쓰지 않고 바로 거부
+            cost_estimator.check(expression)
+            # 폭주하는 표현식이 이벤트 루프를 막지 않도록 워커 프로세스에서 계산
+            result = await evaluation_pool.pool.evaluate(expression)
             return [types.TextContent(type="text", text=f"계산 결과: {result}")]
         except Exception as e:
             return [types.TextContent(type="text", text=f"계산 오류: {str(e)}")]
@@ -76,30 +139,35 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
         raise ValueError(f"알 수 없는 도구: {name}")
 
 
+@resource_registry.provider("file://config.json", name="설정 파일",
+                            description="애플리케이션 설정 파일", mime_type="application/json")
+@resource_cache.cache.cached("file://config.json")
+async def read_config() -> str:
+    """애플리케이션 설정 JSON (버전마다 한 번만 렌더링)"""
+    return json.dumps(config, indent=2)
+
+
+def update_config(changes: Dict[str, Any]) -> int:
+    """설정에 변경 사항을 적용하고 리소스의 새 버전을 반환"""
+    config.update(changes)
+    return resource_cache.cache.invalidate("file://config.json")
+
+
 @server.list_resources()
 async def list_resources() -> list[types.Resource]:
     """사용 가능한 리소스 목록을 반환합니다."""
-    return [
-        types.Resource(
-            uri="file://config.json",
-            name="설정 파일",
-            description="애플리케이션 설정 파일",
-            mimeType="application/json"
-        )
-    ]
+    return resource_registry.resources()
 
 
 @server.read_resource()
-async def read_resource(uri: str) -> str:
-    """리소스를 읽어 반환합니다."""
-    if uri == "file://config.json":
-        return json.dumps({
-            "version": "1.0",
-            "debug": True,
-            "max_connections": 100
-        }, indent=2)
-    else:
-        raise ValueError(f"알 수 없는 리소스: {uri}")
+async def read_resource(uri: str) -> str | bytes:
+    """리소스를 읽어 반환합니다 (MCP는 한 메시지로 보내므로 스트리밍 본문은 모아서 반환)."""
+    return await resource_registry.read(uri)
+
+
+# resources/subscribe: 구독자는 리소스를 폴링하지 않고 변경될 때 (병합된) 알림을 받음
+subscriptions.hub.attach(server)
+resource_cache.cache.on_invalidate(subscriptions.hub.changed)
 
 
 @server.list_prompts()
@@ -120,64 +188,59 @@ async def list_prompts() -> list[types.Prompt]:
     ]
 
 
-@server.get_prompt()
-async def get_prompt(name: str, arguments: dict) -> types.GetPromptResult:
-    """프롬프트를 반환합니다."""
-    if name == "code_review":
-        code = arguments["code"]
-        return types.GetPromptResult(
-            description="코드 리뷰 프롬프트",
-            messages=[
-                types.PromptMessage(
-                    role="user",
-                    content=types.TextContent(
-                        type="text",
-                        text=f"다음 코드를 리뷰해주세요:\n\n```\n{code}\n```"
-                    )
+# 한 번만 파싱; 렌더링은 코드를 프롬프트 텍스트에 바로 복사
+CODE_REVIEW = prompt_engine.PromptTemplate("다음 코드를 리뷰해주세요:\n\n```\n{code}\n```")
+
+
+def render_code_review(arguments: dict) -> types.GetPromptResult:
+    return types.GetPromptResult(
+        description="코드 리뷰 프롬프트",
+        messages=[
+            types.PromptMessage(
+                role="user",
+                content=types.TextContent(
+                    type="text",
+                    text=CODE_REVIEW.render(arguments)
                 )
-            ]
-        )
+            )
+        ]
+    )
+
+
+def prompt_renderer(name: str, arguments: dict) -> Callable[[], types.GetPromptResult]:
+    """프롬프트의 렌더 함수; 알 수 없는 프롬프트면 ValueError"""
+    if name == "code_review":
+        return lambda: render_code_review(arguments)
     else:
         raise ValueError(f"알 수 없는 프롬프트: {name}")
 
 
+@server.get_prompt()
+async def get_prompt(name: str, arguments: dict) -> types.GetPromptResult:
+    """프롬프트를 반환합니다."""
+    # 캐시하지 않음: 렌더링은 코드를 한 번 복사할 뿐이라, 코드를 전부 비교하는 캐시 조회보다 저렴함
+    return prompt_renderer(name, arguments)()
+
+
+# MCP 세션의 도구 호출은 도구별 시간 예산 안에서 실행 (notifications/cancelled와
+# 세션 연결 끊김은 이미 핸들러를 취소함)
+cancellation.track_requests(server)
+
+
 # SSE 엔드포인트
-async def sse_endpoint(request):
-    """Server-Sent Events 엔드포인트"""
-    
-    async def event_generator():
-        # 초기 연결 메시지
-        yield f"data: {json.dumps({'type': 'connected', 'message': 'MCP Server connected'})}\n\n"
-        
-        # 클라이언트로부터 메시지를 받기 위한 큐
-        message_queue = asyncio.Queue()
-        
-        # 메시지 처리 태스크
-        async def process_messages():
-            while True:
-                try:
-                    # 실제 구현에서는 WebSocket이나 다른 방식으로 클라이언트 메시지를 받아야 함
-                    # 여기서는 데모를 위해 간단한 구조만 제공
-                    await asyncio.sleep(1)
-                except Exception as e:
-                    print(f"메시지 처리 오류: {e}")
-                    break
-        
-        # 메시지 처리 시작
-        task = asyncio.create_task(process_messages())
-        
-        try:
-            while True:
-                # 주기적으로 상태 업데이트 (실제로는 클라이언트 메시지에 응답)
-                yield f"data: {json.dumps({'type': 'heartbeat', 'timestamp': asyncio.get_event_loop().time()})}\n\n"
-                await asyncio.sleep(5)
-        except Exception as e:
-            print(f"SSE 스트림 오류: {e}")
-        finally:
-            task.cancel()
-    
+# MCP 세션: GET /sse는 연결마다 server.run()을 실행하고, POST /messages/?session_id=...가 메시지를 전달;
+# WebSocket /ws는 양방향을 연결 하나로 처리
+sessions = sse_sessions.SseSessionRegistry(server, "/messages/", max_sessions=MAX_SESSIONS)
+
+# /events의 초기 연결 메시지, 모든 연결에 쓰도록 한 번만 인코딩
+CONNECTED_FRAME = broadcast_hub.encode({"type": "connected", "message": "MCP Server connected"})
+
+
+async def events_endpoint(request):
+    """브로드캐스트 이벤트 스트림 (하트비트와 서버 이벤트)"""
+    # 하트비트와 서버 이벤트는 연결마다 타이머를 두지 않고 공유 허브에서 받음
     return StreamingResponse(
-        event_generator(),
+        broadcast_hub.hub.stream(CONNECTED_FRAME),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -189,10 +252,84 @@ async def sse_endpoint(request):
 
 
 # API 엔드포인트들
+async def build_listings():
+    """도구/리소스/프롬프트 목록을 한 번만 직렬화합니다 (레지스트리가 바뀌면 다시 호출)"""
+    for path, handler in (("/tools", list_tools), ("/resources", list_resources), ("/prompts", list_prompts)):
+        items = await handler()
+        body = fast_json.dumps_models(items)
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        previous = listings.get(path)
+        listings[path] = (body, etag)
+        if previous is not None and previous[1] != etag:
+            # 연결된 클라이언트에게 캐시한 목록이 오래되었음을 알림
+            broadcast_hub.hub.publish({"type": "list_changed", "path": path, "etag": etag})
+
+
+def rebuild_listings_later(changed):
+    """파일 인덱스가 바뀐 뒤 목록을 다시 직렬화 (ResourceIndex.on_change)
+
+    추가되거나 삭제된 파일은 LISTING_REBUILD_DELAY 뒤에, 기존 파일의 새
+    크기는 LISTING_SIZE_DELAY 뒤에 목록에 반영합니다. 더 이른 재직렬화가
+    아직 기다리는 더 늦은 재직렬화를 대신합니다.
+    """
+    global listings_rebuild, listings_rebuild_due, listed_files
+    files = (file_index.added, file_index.removed)
+    delay = LISTING_REBUILD_DELAY if files != listed_files else LISTING_SIZE_DELAY
+    listed_files = files
+    due = asyncio.get_running_loop().time() + delay
+    if listings_rebuild is not None and not listings_rebuild.done():
+        if listings_rebuild_due <= due:
+            return
+        listings_rebuild.cancel()
+    listings_rebuild_due = due
+    listings_rebuild = asyncio.create_task(rebuild_listings(delay))
+
+
+async def rebuild_listings(delay: float):
+    global listings_rebuild
+    await asyncio.sleep(delay)
+    # 여기부터의 변경은 이번 재직렬화에 빠질 수 있으므로 다음 재직렬화를 예약함
+    listings_rebuild = None
+    await build_listings()
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match 헤더가 주어진 ETag와 일치하는지 여부"""
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match는 약한 비교를 사용하므로 W/ 접두사는 무시
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+async def listing_response(request, path: str) -> Response:
+    """미리 직렬화된 목록을 제공하거나, 클라이언트의 ETag가 그대로면 304를 반환"""
+    if path not in listings:
+        # lifespan에서 만들지만, lifespan 없이 실행될 때는 여기서 만듦
+        await build_listings()
+    body, etag = listings[path]
+    headers = {"ETag": etag, "Cache-Control": LISTING_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 async def list_tools_endpoint(request):
     """도구 목록 반환"""
-    tools = await server.list_tools()
-    return JSONResponse(tools)
+    return await listing_response(request, "/tools")
+
+
+async def run_tool_call(name: str, arguments: Dict[str, Any]) -> list[types.TextContent]:
+    """도구 호출을 실행하고 결과 콘텐츠(MCP 타입)를 반환"""
+    # 데코레이트된 핸들러는 일반 코루틴이며 Server는 등록만 함
+    return await call_tool(name, arguments or {})
+
+
+def overloaded_response(error: admission.Overloaded) -> FastJSONResponse:
+    """클라이언트에 재시도 시점을 알려주는 503"""
+    return FastJSONResponse({"error": str(error)}, status_code=503,
+                            headers={"Retry-After": str(error.retry_after)})
 
 
 async def call_tool_endpoint(request):
@@ -202,35 +339,105 @@ async def call_tool_endpoint(request):
     arguments = body.get("arguments", {})
     
     try:
-        result = await server.call_tool(name, arguments)
-        return JSONResponse({"result": result})
+        # 버스트가 모든 요청을 느리게 만들기 전에 미리 부하를 덜어냄
+        async with admission.controller.admit():
+            # 예산을 넘기거나 클라이언트가 연결을 끊으면 취소되므로 버려진 호출이 CPU를 쓰지 않음
+            result = await cancellation.tracker.run(
+                name, run_tool_call(name, arguments),
+                disconnected=cancellation.wait_for_disconnect(request.receive))
+        return FastJSONResponse({"result": result})
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+    except cancellation.ToolTimeout as e:
+        return FastJSONResponse({"error": str(e)}, status_code=504)
+    except cancellation.ClientDisconnected:
+        # 응답을 읽을 클라이언트가 없음 (499: 클라이언트가 요청을 닫음)
+        return Response(status_code=499)
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+
+
+async def call_tools_batch_endpoint(request):
+    """여러 도구 호출을 동시에 실행하고 결과를 순서대로 반환"""
+    try:
+        calls = await request.json()
+    except ValueError as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+    if not isinstance(calls, list):
+        return FastJSONResponse({"error": "Request body must be a JSON array of {name, arguments} items"}, status_code=400)
+    if len(calls) > MAX_BATCH_CALLS:
+        return FastJSONResponse({"error": f"Too many calls in one batch (max {MAX_BATCH_CALLS})"}, status_code=413)
+    try:
+        concurrency = int(request.query_params.get("concurrency", BATCH_CONCURRENCY))
+    except ValueError:
+        concurrency = 0
+    if concurrency < 1:
+        return FastJSONResponse({"error": "concurrency must be a positive integer"}, status_code=400)
+    semaphore = asyncio.Semaphore(min(concurrency, BATCH_CONCURRENCY))
+    try:
+        # 과부하 상태면 /tools/call과 같은 503으로 배치 전체를 거부
+        admission.controller.check()
+    except admission.Overloaded as e:
+        return overloaded_response(e)
+
+    async def run_one(call):
+        if not isinstance(call, dict) or not call.get("name"):
+            return {"error": "Each item must be an object with a name"}
+        async with semaphore:
+            try:
+                # 각 항목은 단일 호출처럼 승인 슬롯을 차지
+                async with admission.controller.admit():
+                    return {"result": await cancellation.tracker.run(
+                        call["name"], run_tool_call(call["name"], call.get("arguments", {})))}
+            except admission.Overloaded as e:
+                return {"error": str(e), "retry_after": e.retry_after}
+            except Exception as e:
+                return {"error": str(e)}
+
+    results = await asyncio.gather(*(run_one(call) for call in calls))
+    return FastJSONResponse({"results": results})
 
 
 async def list_resources_endpoint(request):
     """리소스 목록 반환"""
-    resources = await server.list_resources()
-    return JSONResponse(resources)
+    return await listing_response(request, "/resources")
 
 
 async def read_resource_endpoint(request):
     """리소스 읽기"""
     uri = request.query_params.get("uri")
     if not uri:
-        return JSONResponse({"error": "URI is required"}, status_code=400)
+        return FastJSONResponse({"error": "URI is required"}, status_code=400)
     
     try:
-        content = await server.read_resource(uri)
-        return JSONResponse({"content": content})
+        content = await read_resource(uri)
+        if isinstance(content, bytes):
+            # 바이너리 리소스는 MCP의 blob 콘텐츠처럼 base64로 인코딩해 전달
+            return FastJSONResponse({"blob": base64.b64encode(content).decode()})
+        return FastJSONResponse({"content": content})
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+
+
+async def stream_resource_endpoint(request):
+    """리소스의 원본 바이트를 스트리밍 (파일은 sendfile로 전송); `Range: bytes=` 헤더가 있으면 그 부분만 206으로 응답"""
+    uri = request.query_params.get("uri")
+    if not uri:
+        return FastJSONResponse({"error": "URI is required"}, status_code=400)
+    try:
+        provider = resource_registry.get(uri)
+        return await provider.response(request.headers.get("range"))
+    except resources.ResourceNotFound as e:
+        return FastJSONResponse({"error": str(e)}, status_code=404)
+    except resources.RangeNotSatisfiable as e:
+        return FastJSONResponse({"error": str(e)}, status_code=416, headers={"Content-Range": f"bytes */{e.size}"})
+    except Exception as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
 
 
 async def list_prompts_endpoint(request):
     """프롬프트 목록 반환"""
-    prompts = await server.list_prompts()
-    return JSONResponse(prompts)
+    return await listing_response(request, "/prompts")
 
 
 async def get_prompt_endpoint(request):
@@ -240,23 +447,88 @@ async def get_prompt_endpoint(request):
     arguments = body.get("arguments", {})
     
     try:
-        result = await server.get_prompt(name, arguments)
-        return JSONResponse(result)
+        async with admission.controller.admit():
+            # 비용은 결과 인코딩에 있음: 같은 인수가 반복되면 저장된 JSON 본문을 받음
+            body = prompt_engine.cache.encoded(name, arguments, prompt_renderer(name, arguments), fast_json.dumps)
+        return Response(body, media_type="application/json")
+    except admission.Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+
+
+async def update_config_endpoint(request):
+    """설정 값을 변경합니다 (관리자 토큰 필요). file://config.json 구독자에게 알림이 갑니다"""
+    if not admin.authorized(request.headers):
+        return FastJSONResponse({"error": "Unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    try:
+        changes = await request.json()
+    except ValueError as e:
+        return FastJSONResponse({"error": str(e)}, status_code=400)
+    error = admin.invalid_changes(changes, config)
+    if error:
+        return FastJSONResponse({"error": error}, status_code=400)
+    return FastJSONResponse({"version": update_config(changes)})
+
+
+async def metrics_endpoint(request):
+    """서버 메트릭을 반환합니다"""
+    return FastJSONResponse({
+        "evaluation_pool": evaluation_pool.pool.stats(),
+        "admission": admission.controller.stats(),
+        "tool_calls": cancellation.tracker.stats(),
+        "sse": broadcast_hub.hub.stats(),
+        "mcp_sessions": sessions.stats(),
+        "compression": compression.stats.stats(),
+        "resource_cache": resource_cache.cache.stats(),
+        "resource_index": file_index.stats() if file_index is not None else None,
+        "subscriptions": subscriptions.hub.stats(),
+        "prompt_cache": prompt_engine.cache.stats(),
+        "runtime": runtime.stats()
+    })
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """목록을 만들고 앱과 함께 계산기 워커 풀과 SSE 허브를 시작하며, 종료 시 이들을 정리하고 열린 세션을 끝냅니다"""
+    if file_index is not None:
+        # 첫 목록을 직렬화하기 전에 인덱스를 만들고 감시
+        await file_index.start()
+        file_index.on_change(rebuild_listings_later)
+        file_index.on_change(lambda changed: subscriptions.hub.changed(*changed))
+    await build_listings()
+    evaluation_pool.pool.start()
+    broadcast_hub.hub.start()
+    try:
+        yield
+    finally:
+        if file_index is not None:
+            file_index.stop()
+        sessions.close()
+        broadcast_hub.hub.stop()
+        evaluation_pool.pool.shutdown()
 
 
 # Starlette 애플리케이션 생성
 app = Starlette(
     routes=[
-        Route("/sse", sse_endpoint),
+        Route("/sse", sessions, methods=["GET"]),
+        Mount("/messages/", app=sessions.handle_post_message),
+        Route("/events", events_endpoint, methods=["GET"]),
+        WebSocketRoute("/ws", sessions.run_websocket),
         Route("/tools", list_tools_endpoint, methods=["GET"]),
         Route("/tools/call", call_tool_endpoint, methods=["POST"]),
+        Route("/tools/batch", call_tools_batch_endpoint, methods=["POST"]),
         Route("/resources", list_resources_endpoint, methods=["GET"]),
         Route("/resources/read", read_resource_endpoint, methods=["GET"]),
+        Route("/resources/stream", stream_resource_endpoint, methods=["GET"]),
         Route("/prompts", list_prompts_endpoint, methods=["GET"]),
         Route("/prompts/get", get_prompt_endpoint, methods=["POST"]),
-    ]
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        # 관리자 토큰이 설정되지 않으면 설정 쓰기는 꺼져 있음
+        *([Route("/config", update_config_endpoint, methods=["POST"])] if admin.ADMIN_TOKEN else []),
+    ],
+    lifespan=lifespan
 )
 
 # CORS 미들웨어 추가
@@ -268,9 +540,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 압축을 받아들이는 클라이언트에 응답 압축; SSE 스트림과 WebSocket은 그대로 통과
+app.add_middleware(compression.CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 
 if __name__ == "__main__":
     print("MCP Server (SSE) 시작 중...")
-    print("SSE 엔드포인트: http://localhost:8000/sse")
+    print("SSE 엔드포인트 (MCP 세션): http://localhost:8000/sse")
+    print("WebSocket 엔드포인트 (MCP 세션): ws://localhost:8000/ws")
+    print("이벤트 스트림: http://localhost:8000/events")
     print("API 엔드포인트: http://localhost:8000/tools")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    print("배치 엔드포인트: http://localhost:8000/tools/batch")
+    # 설치되어 있으면 uvloop / httptools 사용 (MCP_LOOP / MCP_HTTP로 변경 가능); MCP_HTTP2=1이면 h2c 추가
+    runtime.serve(app, "0.0.0.0", 8000)
@@ -0,0 +1,145 @@
+# sse_sessions.py
+import time
+from typing import Any, Dict
+from uuid import uuid4
+
+import anyio
+from mcp import types
+from mcp.server import Server
+from mcp.server.websocket import websocket_server
+from mcp.shared.message import ServerMessageMetadata, SessionMessage
+from pydantic import ValidationError
+from sse_starlette import EventSourceResponse
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.websockets import WebSocket
+
+from fast_json import FastJSONResponse
+
+
+class SseSession:
+    """MCP 세션 하나: server.run()에 메시지를 넣는 스트림과 카운터"""
+
+    __slots__ = ("id", "writer", "created", "received", "sent")
+
+    def __init__(self, session_id: str, writer):
+        self.id = session_id
+        self.writer = writer
+        self.created = time.monotonic()
+        self.received = 0
+        self.sent = 0
+
+
+class SseSessionRegistry:
+    """POST 메시지 엔드포인트를 위해 세션 ID로 관리하는 SSE 기반 MCP 세션
+
+    레지스트리 자체가 GET /sse의 ASGI 앱입니다. 각 연결은 클라이언트가
+    연결되어 있는 동안 server.run()을 실행합니다. 클라이언트 메시지는 첫
+    이벤트로 알려준 엔드포인트로 들어오고, 응답은 같은 연결로 스트리밍됩니다.
+    WebSocket 세션(run_websocket)은 양방향을 연결 하나로 주고받으며 같은
+    상한에 포함됩니다.
+    """
+
+    def __init__(self, server: Server, endpoint: str = "/messages/", max_sessions: int = 1000):
+        self.server = server
+        self.endpoint = endpoint
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, SseSession] = {}
+        self.websockets = 0
+
+        # 메트릭
+        self.opened = 0
+        self.rejected = 0
+        self.messages = 0
+
+    async def __call__(self, scope, receive, send):
+        """GET /sse: 연결마다 오래 유지되는 MCP 세션 하나"""
+        if len(self.sessions) + self.websockets >= self.max_sessions:
+            self.rejected += 1
+            response = FastJSONResponse({"error": "Too many sessions"}, status_code=503)
+            return await response(scope, receive, send)
+
+        read_writer, read_stream = anyio.create_memory_object_stream(0)
+        write_stream, write_reader = anyio.create_memory_object_stream(0)
+        session = SseSession(uuid4().hex, read_writer)
+        self.sessions[session.id] = session
+        self.opened += 1
+        endpoint = f"{scope.get('root_path', '').rstrip('/')}{self.endpoint}?session_id={session.id}"
+
+        async def events():
+            yield {"event": "endpoint", "data": endpoint}
+            async with write_reader:
+                async for message in write_reader:
+                    session.sent += 1
+                    yield {"event": "message",
+                           "data": message.message.model_dump_json(by_alias=True, exclude_none=True)}
+
+        async def run_server():
+            async with read_stream, write_stream:
+                await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(run_server)
+                await EventSourceResponse(events())(scope, receive, send)
+                # 클라이언트가 떠났으므로 세션의 서버 쪽을 중지
+                tg.cancel_scope.cancel()
+        finally:
+            self.sessions.pop(session.id, None)
+            read_writer.close()
+
+    async def handle_post_message(self, scope, receive, send):
+        """POST /messages/?session_id=...: JSON-RPC 메시지 하나를 해당 세션에 전달"""
+        request = Request(scope, receive)
+        session = self.sessions.get(request.query_params.get("session_id", ""))
+        if session is None:
+            response = FastJSONResponse({"error": "Unknown session"}, status_code=404)
+            return await response(scope, receive, send)
+
+        try:
+            message = types.JSONRPCMessage.model_validate_json(await request.body())
+        except ValidationError:
+            response = FastJSONResponse({"error": "Invalid JSON-RPC message"}, status_code=400)
+            return await response(scope, receive, send)
+
+        try:
+            # 세션이 메시지를 받을 때까지 기다리므로 바쁜 세션은 클라이언트에 배압을 검
+            await session.writer.send(SessionMessage(message, metadata=ServerMessageMetadata(request_context=request)))
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            response = FastJSONResponse({"error": "Session closed"}, status_code=410)
+            return await response(scope, receive, send)
+        session.received += 1
+        self.messages += 1
+        await Response("Accepted", status_code=202)(scope, receive, send)
+
+    async def run_websocket(self, websocket: WebSocket):
+        """WebSocket /ws: 양방향을 같은 연결로 주고받는 MCP 세션 하나"""
+        if len(self.sessions) + self.websockets >= self.max_sessions:
+            self.rejected += 1
+            # 1013: 나중에 다시 시도
+            return await websocket.close(code=1013)
+
+        self.websockets += 1
+        self.opened += 1
+        try:
+            # mcp 트랜스포트가 WebSocket 텍스트 프레임을 메모리 스트림을 통해 server.run()으로 전달
+            async with websocket_server(websocket.scope, websocket._receive, websocket._send) as (read_stream, write_stream):
+                await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        finally:
+            self.websockets -= 1
+
+    def close(self):
+        """열린 모든 세션 종료 (서버 종료 시 사용)"""
+        for session in list(self.sessions.values()):
+            session.writer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """세션 수와 메시지 메트릭 반환"""
+        return {
+            "sessions": len(self.sessions),
+            "websocket_sessions": self.websockets,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "messages": self.messages,
+            "max_sessions": self.max_sessions
+        }
@@ -2,10 +2,11 @@
 import asyncio
 import sys
 import json
-import math
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp import types
+import cost_estimator
+import evaluation_pool
 
 
 # 서버 인스턴스 생성
@@ -53,13 +54,10 @@ async def call_tool(name: str, arguments: dict) -> list[types.TextContent]:
     if name == "calculator":
         expression = arguments.get("expression", "")
         try:
-            # 안전한 계산을 위해 제한된 함수만 허용
-            allowed_names = {
-                k: v for k, v in math.__dict__.items() if not k.startswith("__")
-            }
-            allowed_names.update({"abs": abs, "round": round})
-            
-            result = eval(expression, {"__builtins__": {}}, allowed_names)
+            # 예상 비용이 예산을 넘으면 워커를 쓰지 않고 바로 거부
+            cost_estimator.check(expression)
+            # 폭주하는 표현식이 이벤트 루프를 막지 않도록 워커 프로세스에서 계산
+            result = await evaluation_pool.pool.evaluate(expression)
             return [types.TextContent(type="text", text=f"계산 결과: {result}")]
         except Exception as e:
             return [types.TextContent(type="text", text=f"계산 오류: {str(e)}")]
@@ -139,6 +137,8 @@ async def get_prompt(name: str, arguments: dict) -> types.GetPromptResult:
 
 async def main():
     """메인 함수"""
+    # 계산기 워커 프로세스를 미리 시작
+    evaluation_pool.pool.start()
     async with stdio_server() as (read_stream, write_stream):
         await server.run(
             read_stream,
@@ -1,12 +1,28 @@
 # test_mcp.py
 import asyncio
+import json
 import subprocess
 import time
 import signal
 import sys
 import os
+from typing import Any, Dict, List
 from stdio_client import MCPStdioClient
-from sse_client import MCPSseClient
+from sse_client import MCPSseClient, MCPWebSocketClient
+import cost_estimator
+import cost_cases
+import calculator
+import engine_cases
+
+
+# cost_cases.run의 결과마다 출력하는 메시지
+COST_MESSAGES = {
+    "rejected": "✅ {ms:.2f} ms 만에 거부: {label} ({detail})",
+    "too_slow": "❌ 거부가 너무 느림 ({ms:.1f} ms): {label}",
+    "not_rejected": "❌ 거부되지 않음: {label}",
+    "accepted": "✅ 허용: {label}",
+    "wrongly_rejected": "❌ 잘못 거부됨: {label} ({detail})",
+}
 
 
 class MCPTester:
@@ -119,9 +135,15 @@ class MCPTester:
             # 도구 테스트
             print("\n🔧 도구 테스트")
             tools = await self.sse_client.list_tools()
+            # 다시 조회하면 캐시된 사본만 재검증 (304 Not Modified)
+            await self.sse_client.list_tools()
             if tools:
                 await self.sse_client.call_tool("calculator", {"expression": "20 * 3"})
                 await self.sse_client.call_tool("echo", {"message": "SSE 테스트"})
+                await self.sse_client.call_tools_batch([
+                    {"name": "calculator", "arguments": {"expression": "1 + 1"}},
+                    {"name": "echo", "arguments": {"message": "batch"}}
+                ])
             
             # 리소스 테스트
             print("\n📁 리소스 테스트")
@@ -141,6 +163,27 @@ class MCPTester:
             print("\n📡 SSE 스트림 테스트")
             await self.sse_client.listen_sse(duration=3)
             
+            # MCP 세션 테스트
+            print("\n🔗 MCP 세션 테스트")
+            if not await self.sse_client.call_tools_in_session([
+                {"name": "calculator", "arguments": {"expression": "7 * 6"}},
+                {"name": "echo", "arguments": {"message": "session test"}}
+            ]):
+                return False
+            
+            # WebSocket 세션 테스트
+            print("\n🔌 WebSocket 세션 테스트")
+            ws_client = MCPWebSocketClient()
+            if not await ws_client.connect():
+                return False
+            results = await ws_client.call_tools([
+                {"name": "calculator", "arguments": {"expression": "3 ** 4"}},
+                {"name": "echo", "arguments": {"message": "websocket test"}}
+            ])
+            await ws_client.disconnect()
+            if not results:
+                return False
+            
             await self.sse_client.disconnect()
             print("✅ SSE 클라이언트 테스트 완료")
             return True
@@ -149,17 +192,234 @@ class MCPTester:
             print(f"❌ SSE 클라이언트 테스트 실패: {e}")
             return False
     
+    async def test_expression_engine(self):
+        """표현식 엔진 테스트: eval()과 같은 결과"""
+        print("\n" + "="*60)
+        print("🧮 표현식 엔진 테스트")
+        print("="*60)
+        
+        passed = True
+        # 케이스는 engine_cases.py에 있음
+        for same, expression, engine, python in engine_cases.run(calculator):
+            if same:
+                print(f"✅ {expression} → {engine}")
+            else:
+                print(f"❌ {expression}: 엔진 {engine}, eval {python}")
+                passed = False
+        
+        print(f"{'✅' if passed else '❌'} 표현식 엔진 테스트 완료")
+        return passed
+    
+    async def test_cost_estimator(self):
+        """공격적인 표현식으로 비용 추정기 테스트"""
+        print("\n" + "="*60)
+        print("🛡️ 비용 추정기 테스트")
+        print("="*60)
+        
+        passed = True
+        # 케이스와 시간 확인은 cost_cases.py에 있음
+        for outcome, label, elapsed_ms, detail in cost_cases.run(cost_estimator):
+            print(COST_MESSAGES[outcome].format(label=label, ms=elapsed_ms, detail=detail))
+            if outcome not in cost_cases.PASSED:
+                passed = False
+        
+        print(f"{'✅' if passed else '❌'} 비용 추정기 테스트 완료")
+        return passed
+    
+    @staticmethod
+    def _check(passed: bool, label: str) -> bool:
+        """동작 확인 하나를 출력하고 통과 여부를 반환"""
+        print(f"{'✅' if passed else '❌'} {label}")
+        return passed
+    
+    async def test_behavior(self):
+        """상태 코드, 캐싱, 알림을 이 프로세스 안의 앱으로 확인"""
+        print("\n" + "="*60)
+        print("🔬 동작 테스트")
+        print("="*60)
+        
+        # 서버 모듈은 여기서만 필요; 다른 테스트는 서버 프로세스와 통신
+        import httpx
+        import sse_server
+        
+        app = sse_server.app
+        checks = []
+        try:
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                    for check in (
+                        self._check_batch,
+                        self._check_listings,
+                        self._check_admission,
+                        self._check_timeouts,
+                        self._check_ranges,
+                        self._check_resource_cache,
+                        self._check_subscriptions,
+                    ):
+                        checks.extend(await check(app, http))
+        except Exception as e:
+            print(f"❌ 동작 테스트 실패: {e!r}")
+            return False
+        
+        passed = all(checks)
+        print(f"{'✅' if passed else '❌'} 동작 테스트 완료")
+        return passed
+    
+    async def _check_batch(self, app, http) -> List[bool]:
+        """실패한 항목이 배치의 나머지를 실패시키지 않음"""
+        response = await http.post("/tools/batch", json=[
+            {"name": "echo", "arguments": {"message": "batch"}},
+            {"name": "missing"}
+        ])
+        items = response.json().get("results", [])
+        return [self._check(
+            response.status_code == 200 and len(items) == 2 and "result" in items[0] and "error" in items[1],
+            "배치: 결과 항목과 오류 항목")]
+    
+    async def _check_listings(self, app, http) -> List[bool]:
+        """바뀌지 않은 목록은 재검증만 함"""
+        response = await http.get("/tools")
+        response = await http.get("/tools", headers={"If-None-Match": response.headers["ETag"]})
+        return [self._check(response.status_code == 304, "바뀌지 않은 목록: 304 Not Modified")]
+    
+    async def _check_admission(self, app, http) -> List[bool]:
+        """서버가 가득 차면 호출을 503과 Retry-After로 거부"""
+        import admission
+        
+        # 유일한 슬롯이 차 있고 대기할 수 없으므로 호출이 거부됨
+        shared = admission.controller
+        admission.controller = admission.AdmissionController(limit=1, queue_size=0)
+        try:
+            async with admission.controller.admit():
+                response = await http.post("/tools/call", json={
+                    "name": "echo", "arguments": {"message": "shed"}})
+                batch = await http.post("/tools/batch", json=[
+                    {"name": "echo", "arguments": {"message": "shed"}}])
+        finally:
+            admission.controller = shared
+        return [self._check(
+            response.status_code == 503 and "Retry-After" in response.headers and batch.status_code == 503,
+            "과부하: Retry-After와 503")]
+    
+    async def _check_timeouts(self, app, http) -> List[bool]:
+        """시간 예산을 넘은 호출은 504, 클라이언트가 떠난 호출은 499"""
+        import cancellation
+        
+        cancellation.tracker.timeouts["calculator"] = 0
+        try:
+            response = await http.post("/tools/call", json={
+                "name": "calculator", "arguments": {"expression": "1 + 1"}})
+        finally:
+            del cancellation.tracker.timeouts["calculator"]
+        checks = [self._check(response.status_code == 504, "시간 예산 초과: 504")]
+        
+        # httpx는 요청 도중 연결을 끊지 않으므로 앱을 직접 호출
+        status = await self._post_and_disconnect(app, "/tools/call", {
+            "name": "calculator", "arguments": {"expression": "2 ** 10"}})
+        checks.append(self._check(status == 499, "호출 중 클라이언트가 떠남: 499"))
+        return checks
+    
+    @staticmethod
+    async def _post_and_disconnect(app, path: str, body: Dict[str, Any]) -> int:
+        """ASGI 앱에 POST하고 본문 직후 연결을 끊음; 응답 상태 코드를 반환"""
+        messages = [{"type": "http.request", "body": json.dumps(body).encode()}, {"type": "http.disconnect"}]
+        statuses = []
+        
+        async def receive():
+            # 연결이 끊긴 뒤에는 모든 receive()가 다시 그것을 알림
+            return messages.pop(0) if len(messages) > 1 else messages[0]
+        
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+        
+        await app({"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+                   "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+                   "headers": [(b"content-type", b"application/json")], "server": ("test", 80)}, receive, send)
+        return statuses[0]
+    
+    async def _check_ranges(self, app, http) -> List[bool]:
+        """스트리밍되는 리소스의 바이트 범위"""
+        response = await http.get("/resources/stream", params={"uri": "file://config.json"},
+                                  headers={"Range": "bytes=0-9"})
+        checks = [self._check(response.status_code == 206 and len(response.content) == 10,
+                              "바이트 범위: 10바이트와 206")]
+        response = await http.get("/resources/stream", params={"uri": "file://config.json"},
+                                  headers={"Range": "bytes=100000-"})
+        checks.append(self._check(response.status_code == 416, "끝을 넘는 범위: 416"))
+        return checks
+    
+    async def _check_resource_cache(self, app, http) -> List[bool]:
+        """설정이 바뀌면 캐시된 렌더링을 버림"""
+        import admin
+        import sse_server
+        
+        await http.get("/resources/read", params={"uri": "file://config.json"})
+        sse_server.update_config({"debug": False})
+        try:
+            response = await http.get("/resources/read", params={"uri": "file://config.json"})
+        finally:
+            sse_server.update_config({"debug": True})
+        checks = [self._check(json.loads(response.json()["content"])["debug"] is False,
+                              "설정 변경: 다음 읽기에서 다시 렌더링")]
+        
+        # MCP_ADMIN_TOKEN이 없으면 HTTP 쓰기는 꺼져 있고, 값은 타입을 유지해야 함
+        response = await http.post("/config", json={"debug": False})
+        checks.append(self._check(response.status_code == 404, "관리자 토큰이 없으면 쓰기 라우트 없음: 404"))
+        checks.append(self._check(admin.invalid_changes({"debug": "no"}, sse_server.config) is not None, "다른 타입의 값은 거부"))
+        return checks
+    
+    async def _check_subscriptions(self, app, http) -> List[bool]:
+        """한 창 안의 변경은 구독자에게 알림 하나로 전달됨"""
+        from mcp import types
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import sse_server
+        import subscriptions
+        
+        updates = asyncio.Queue()
+        
+        async def on_message(message):
+            if (isinstance(message, types.ServerNotification)
+                    and isinstance(message.root, types.ResourceUpdatedNotification)):
+                updates.put_nowait(str(message.root.params.uri))
+        
+        async with create_connected_server_and_client_session(
+                sse_server.server, message_handler=on_message) as session:
+            await session.subscribe_resource("file://config.json")
+            sse_server.update_config({"debug": False})
+            sse_server.update_config({"debug": True})
+            uri = await asyncio.wait_for(updates.get(), 2)
+            # 두 변경이 한 창 안에 들어옴
+            await asyncio.sleep(subscriptions.hub.window * 3)
+            checks = [self._check(uri.rstrip("/") == "file://config.json" and updates.empty(),
+                                  "구독: 변경 두 번, 알림 한 번")]
+        checks.append(self._check(subscriptions.hub.stats()["sessions"] == 0,
+                                  "세션 종료: 그 구독을 지움"))
+        return checks
+    
     async def run_all_tests(self):
         """모든 테스트 실행"""
         print("🧪 MCP 서버 통합 테스트 시작")
         print("="*60)
         
         results = {
+            "engine": False,
+            "cost": False,
+            "behavior": False,
             "stdio": False,
             "sse": False
         }
         
         try:
+            # 표현식 엔진 테스트 (서버 불필요)
+            results["engine"] = await self.test_expression_engine()
+            
+            # 비용 추정기 테스트 (서버 불필요)
+            results["cost"] = await self.test_cost_estimator()
+            
+            # 동작 테스트 (앱이 이 프로세스 안에서 실행)
+            results["behavior"] = await self.test_behavior()
+            
             # stdio 테스트 (서버 시작 불필요)
             results["stdio"] = await self.test_stdio_client()
             
@@ -183,6 +443,9 @@ class MCPTester:
         print("\n" + "="*60)
         print("📊 테스트 결과 요약")
         print("="*60)
+        print(f"표현식 엔진: {'✅ 성공' if results['engine'] else '❌ 실패'}")
+        print(f"비용 추정기: {'✅ 성공' if results['cost'] else '❌ 실패'}")
+        print(f"동작: {'✅ 성공' if results['behavior'] else '❌ 실패'}")
         print(f"stdio 클라이언트: {'✅ 성공' if results['stdio'] else '❌ 실패'}")
         print(f"SSE 클라이언트: {'✅ 성공' if results['sse'] else '❌ 실패'}")
         
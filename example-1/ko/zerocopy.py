@@ -0,0 +1,183 @@
+# zerocopy.py
+import asyncio
+import os
+from typing import AsyncIterator, BinaryIO, Mapping, Optional
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+try:
+    import uvicorn
+    from uvicorn.protocols.http.httptools_impl import HttpToolsProtocol as _HttpToolsProtocol
+    from uvicorn.protocols.http.httptools_impl import RequestResponseCycle as _RequestResponseCycle
+except ImportError:  # 제로 카피 전송에는 uvicorn의 httptools 프로토콜이 필요 (pip install httptools)
+    _HttpToolsProtocol = None
+
+# 제로 카피 프로토콜이 기대는 httptools 프로토콜 내부 구조(비공개 클래스와 속성)를 확인한
+# uvicorn 버전 [최소, 최대). 다른 버전에서는 확장을 제공하지 않고 청크로 읽어 보냄
+UVICORN_VERSIONS = ((0, 22), (0, 35))
+
+
+def _uvicorn_version() -> tuple:
+    try:
+        return tuple(int(part) for part in uvicorn.__version__.split(".")[:2])
+    except ValueError:
+        return ()
+
+
+if _HttpToolsProtocol is not None and not UVICORN_VERSIONS[0] <= _uvicorn_version() < UVICORN_VERSIONS[1]:
+    _HttpToolsProtocol = None
+
+
+# ASGI 확장: 서버가 파일의 바이트를 직접 소켓으로 전송 (sendfile(2))
+EXTENSION = "http.response.zerocopysend"
+
+# 바이트가 Python을 거쳐야 할 때의 청크 크기 (확장이 없거나 본문을 압축할 때)
+CHUNK_SIZE = 256 * 1024
+
+
+async def read_chunks(file: BinaryIO, offset: int, count: int,
+                      chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """파일의 offset부터 count 바이트를 chunk_size씩, 파일 위치를 옮기지 않고 스레드에서 읽기"""
+    fd = file.fileno()
+    end = offset + count
+    while offset < end:
+        chunk = await anyio.to_thread.run_sync(os.pread, fd, min(chunk_size, end - offset), offset)
+        if not chunk:
+            raise RuntimeError("파일이 전송한 Content-Length보다 짧습니다")
+        offset += len(chunk)
+        yield chunk
+
+
+def _writable(loop: asyncio.AbstractEventLoop, fd: int) -> asyncio.Future:
+    """fd에 쓸 수 있게 되면 완료되는 Future"""
+    future = loop.create_future()
+    loop.add_writer(fd, lambda: future.done() or future.set_result(None))
+    future.add_done_callback(lambda _: loop.remove_writer(fd))
+    return future
+
+
+async def sendfile(transport: asyncio.Transport, file: BinaryIO, offset: int, count: int):
+    """파일의 offset부터 count 바이트를 sendfile(2)로 트랜스포트의 소켓에 전송
+
+    asyncio는 loop.sendfile이 직접 처리합니다. uvloop에는 없으므로 복제한 소켓에서
+    sendfile(2)을 실행합니다: 트랜스포트에 이미 버퍼링된 바이트가 나갈 때까지, 그리고
+    소켓의 송신 버퍼가 가득 찰 때마다 소켓이 쓰기 가능해지기를 기다립니다.
+    """
+    loop = asyncio.get_running_loop()
+    if type(loop).sendfile is not asyncio.AbstractEventLoop.sendfile:
+        await loop.sendfile(transport, file, offset, count)
+        return
+    fd = os.dup(transport.get_extra_info("socket").fileno())
+    try:
+        # 트랜스포트에 버퍼링된 바이트(헤더)가 먼저 나가야 함: 소켓이 쓰기 가능해지면
+        # 트랜스포트가 버퍼를 비우므로, 버퍼가 빌 때까지 쓰기 가능 상태를 기다림
+        while transport.get_write_buffer_size():
+            await _writable(loop, fd)
+        end = offset + count
+        while offset < end:
+            try:
+                sent = os.sendfile(fd, file.fileno(), offset, end - offset)
+            except BlockingIOError:
+                await _writable(loop, fd)
+                continue
+            if sent == 0:
+                raise RuntimeError("파일이 전송한 Content-Length보다 짧습니다")
+            offset += sent
+    finally:
+        os.close(fd)
+
+
+class FileSendResponse(Response):
+    """열린 파일의 offset부터 count 바이트를 서버에 넘겨 sendfile(2)로 전송
+
+    zerocopysend 확장을 제공하지 않는 서버(h11, Hypercorn)에는 대신
+    CHUNK_SIZE씩 읽은 바이트를 보냅니다. 응답을 보내면 파일을 닫습니다.
+    """
+
+    def __init__(self, file: BinaryIO, offset: int, count: int, status_code: int = 200,
+                 headers: Optional[Mapping[str, str]] = None, media_type: Optional[str] = None,
+                 background: Optional[BackgroundTask] = None):
+        self.file = file
+        self.offset = offset
+        self.count = count
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = background
+        self.init_headers(headers)
+        self.headers["content-length"] = str(count)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope["method"] == "HEAD" or not self.count:
+                await send({"type": "http.response.body", "body": b""})
+            elif EXTENSION in scope.get("extensions", {}):
+                await send({"type": EXTENSION, "file": self.file, "offset": self.offset, "count": self.count})
+            else:
+                chunks = read_chunks(self.file, self.offset, self.count)
+                chunk = await chunks.__anext__()
+                async for following in chunks:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    chunk = following
+                await send({"type": "http.response.body", "body": chunk})
+        finally:
+            self.file.close()
+        if self.background is not None:
+            await self.background()
+
+
+if _HttpToolsProtocol is not None:
+
+    class _SendfileCycle(_RequestResponseCycle):
+        """zerocopysend 메시지도 받는 요청 사이클"""
+
+        async def send(self, message):
+            if message["type"] != EXTENSION:
+                return await super().send(message)
+            if not self.response_started or self.response_complete or self.chunked_encoding:
+                raise RuntimeError("zerocopysend에는 Content-Length가 있는 시작된 응답이 필요합니다")
+            file = message["file"]
+            offset = message.get("offset", 0)
+            count = message.get("count")
+            if count is None:
+                count = os.fstat(file.fileno()).st_size - offset
+            if count > self.expected_content_length:
+                raise RuntimeError("응답 본문이 Content-Length보다 깁니다")
+            if self.flow.write_paused and not self.disconnected:
+                await self.flow.drain()
+            if self.disconnected:
+                return
+            if self.scope["method"] != "HEAD" and count:
+                # 이미 쓴 헤더가 전송되기를 기다린 뒤 커널이 파일 -> 소켓으로 복사
+                await sendfile(self.transport, file, offset, count)
+            self.expected_content_length -= count
+            await super().send({"type": "http.response.body", "body": b"",
+                                "more_body": message.get("more_body", False)})
+
+    class HttpToolsProtocol(_HttpToolsProtocol):
+        """TLS가 아닌 연결에서 zerocopysend 확장을 알리고 처리하는 uvicorn의 httptools 프로토콜"""
+
+        def on_message_begin(self):
+            super().on_message_begin()
+            # TLS에서는 바이트가 SSL 객체를 거쳐야 하므로 sendfile(2)는 암호화를 건너뛰게 됨
+            if self.scope["scheme"] == "https" or self.transport.get_extra_info("sslcontext") is not None:
+                return
+            self.scope["extensions"] = {EXTENSION: {}}
+
+        def on_headers_complete(self):
+            super().on_headers_complete()
+            # 요청 태스크는 생성되었지만 아직 실행 전이므로, 전송은 하위 클래스를 거침
+            if type(self.cycle) is _RequestResponseCycle:
+                self.cycle.__class__ = _SendfileCycle
+
+else:
+    HttpToolsProtocol = None
+
+
+def protocol(http: str):
+    """결정된 HTTP 파서의 uvicorn `http` 옵션: httptools는 제로 카피 프로토콜"""
+    if http == "httptools" and HttpToolsProtocol is not None:
+        return HttpToolsProtocol
+    return http
@@ -0,0 +1,360 @@
+# benchmark.py
+"""
+FastMCP MCP server benchmark tool
+Measures the hot paths of the example servers, in-process and over HTTP
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import random
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import httpx
+from fastmcp import FastMCP
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+
+import calculator
+import prompt_engine
+import sse_server
+import runtime
+import vectorized
+
+
+# Expressions typical of what agents send repeatedly
+EXPRESSIONS = [
+    "2 + 3 * 4",
+    "sqrt(16)",
+    "10 + 5",
+    "20 * 3",
+    "sin(pi / 4) ** 2 + cos(pi / 4) ** 2",
+    "log(1024, 2)",
+    "factorial(10) / factorial(8)",
+    "abs(-42) + round(3.14159, 2)",
+    "max(3, 7) - min(1, 2)",
+]
+
+
+def legacy_evaluate(expression: str) -> Any:
+    """Previous calculator path: namespace rebuilt and expression compiled per call"""
+    allowed_names = {
+        k: v for k, v in math.__dict__.items() if not k.startswith("__")
+    }
+    allowed_names.update({"abs": abs, "round": round, "min": min, "max": max})
+    return eval(expression, {"__builtins__": {}}, allowed_names)
+
+
+def measure_per_call(func: Callable[[str], Any], expressions: List[str], rounds: int) -> float:
+    """Return mean latency per call in microseconds"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for expression in expressions:
+            func(expression)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(expressions)) * 1_000_000
+
+
+def measure_latencies(func: Callable[[str], Any], expressions: List[str], rounds: int) -> List[int]:
+    """Return the latency of every single call in nanoseconds"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for expression in expressions:
+            start = clock()
+            func(expression)
+            latencies.append(clock() - start)
+    return latencies
+
+
+def summarize(latencies: List[int]) -> Dict[str, float]:
+    """Return throughput and latency percentiles for a list of latencies"""
+    ordered = sorted(latencies)
+    total_seconds = sum(ordered) / 1_000_000_000
+    return {
+        "throughput": len(ordered) / total_seconds if total_seconds else 0.0,
+        "p50_us": ordered[len(ordered) // 2] / 1000,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1000,
+    }
+
+
+def print_summary(label: str, summary: Dict[str, float]):
+    """Print one benchmark result row"""
+    print(f"  {label:<34} {summary['throughput']:>12,.0f} calls/s"
+          f"   p50 {summary['p50_us']:8.2f} µs   p99 {summary['p99_us']:8.2f} µs")
+
+
+def benchmark_calculator(rounds: int = 5000):
+    """Compare per-call calculator latency before and after the compiled cache"""
+    print("\n" + "="*60)
+    print("🧮 Calculator Benchmark")
+    print("="*60)
+    print(f"{len(EXPRESSIONS)} expressions x {rounds} rounds")
+
+    before = measure_per_call(legacy_evaluate, EXPRESSIONS, rounds)
+
+    calculator.expression_cache.clear()
+    after = measure_per_call(lambda e: calculator.evaluate(e, "eval"), EXPRESSIONS, rounds)
+
+    print(f"  before (namespace + compile per call): {before:8.2f} µs/call")
+    print(f"  after  (shared namespace + LRU cache): {after:8.2f} µs/call")
+    print(f"  speedup: {before / after:.1f}x")
+    print(f"  cache stats: {calculator.expression_cache.stats()}")
+
+
+def benchmark_engine(rounds: int = 2000, unique: int = 5000):
+    """Compare the eval path with the AST expression engine on throughput and p99"""
+    print("\n" + "="*60)
+    print("🧠 Expression Engine Benchmark")
+    print("="*60)
+
+    # Warm: the same expressions repeated, served from each mode's cache
+    print(f"Repeated expressions ({len(EXPRESSIONS)} x {rounds} rounds)")
+    print_summary("eval, uncached (previous path)", summarize(
+        measure_latencies(legacy_evaluate, EXPRESSIONS, rounds)))
+    calculator.expression_cache.clear()
+    print_summary("eval, cached", summarize(
+        measure_latencies(lambda e: calculator.evaluate(e, "eval"), EXPRESSIONS, rounds)))
+    calculator.ast_cache.clear()
+    print_summary("ast engine, cached", summarize(
+        measure_latencies(lambda e: calculator.evaluate(e, "ast"), EXPRESSIONS, rounds)))
+
+    # Cold: every expression is new, so parse/compile cost is paid on every call
+    fresh = [f"{i} * sqrt({i}) + {i} % 7 - log({i} + 1)" for i in range(unique)]
+    print(f"Unique expressions ({unique}, compile on every call)")
+    print_summary("eval, compile + run", summarize(measure_latencies(
+        lambda e: eval(calculator.compile_eval(e), calculator.SAFE_GLOBALS, calculator.SAFE_LOCALS),
+        fresh, 1)))
+    print_summary("ast engine, compile + run", summarize(measure_latencies(
+        lambda e: calculator.compile_ast(e)(), fresh, 1)))
+
+
+def benchmark_batch(points: int = 10000):
+    """Compare one calculate call per data point with a single vectorized batch pass"""
+    print("\n" + "="*60)
+    print("📊 Batch Calculation Benchmark")
+    print("="*60)
+
+    formula = "sqrt(x) * sin(x) + log(x + 1)"
+    xs = [i / 10 for i in range(points)]
+    print(f"{formula!r} over {points} points (in-process, transport round trips excluded)")
+
+    # Previous approach: one expression per data point, each a new string
+    calculator.ast_cache.clear()
+    start = time.perf_counter()
+    for x in xs:
+        calculator.evaluate(formula.replace("x", repr(x)))
+    per_point = time.perf_counter() - start
+
+    vectorized.batch_cache.clear()
+    start = time.perf_counter()
+    vectorized.evaluate_batch(formula, {"x": xs})
+    batch = time.perf_counter() - start
+
+    print(f"  calculate per point: {per_point * 1000:10.2f} ms")
+    print(f"  calculate_batch:     {batch * 1000:10.2f} ms")
+    print(f"  speedup: {per_point / batch:.1f}x")
+
+
+def session_worker(base_url: str, seconds: float, concurrency: int) -> List[int]:
+    """Client process body: one MCP session over SSE keeping `concurrency` echo calls in flight for `seconds`"""
+    async def run() -> List[int]:
+        latencies: List[int] = []
+        deadline = time.perf_counter() + seconds
+        async with sse_client(f"{base_url}/sse") as streams:
+            async with ClientSession(*streams) as session:
+                await session.initialize()
+
+                async def caller(i: int):
+                    while time.perf_counter() < deadline:
+                        start = time.perf_counter_ns()
+                        await session.call_tool("echo", {"message": str(i)})
+                        latencies.append(time.perf_counter_ns() - start)
+
+                await asyncio.gather(*(caller(i) for i in range(concurrency)))
+        return latencies
+
+    return asyncio.run(run())
+
+
+async def wait_until_ready(base_url: str):
+    """Poll /metrics until a freshly started server answers"""
+    async with httpx.AsyncClient() as http:
+        for _ in range(300):
+            try:
+                if (await http.get(f"{base_url}/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+
+async def benchmark_runtime(seconds: float = 5.0, sessions: int = 4, concurrency: int = 8):
+    """Tool calls through the SSE message endpoint on each event loop / HTTP parser combination"""
+    print("\n" + "="*60)
+    print("🚀 Event Loop / HTTP Parser Benchmark")
+    print("="*60)
+    print(f"echo tool via POST /messages/ + SSE on one server process, {sessions} client session(s)"
+          f" x {concurrency} calls in flight, {seconds:g}s per row")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(sessions, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for event_loop in runtime.LOOPS:
+            for http in runtime.HTTP_PARSERS:
+                label = f"{event_loop} + {http}"
+                missing = [name for name in (event_loop, http) if not runtime.available(name)]
+                if missing:
+                    print(f"  {label:<34} skipped ({', '.join(missing)} not installed)")
+                    continue
+                process = subprocess.Popen(
+                    [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+                     "--loop", event_loop, "--http", http, "--log-level", "warning"],
+                    cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL)
+                try:
+                    await wait_until_ready(base_url)
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(executor, session_worker, base_url, seconds, concurrency)
+                        for _ in range(sessions)))
+                    latencies = [latency for result in results for latency in result]
+                    summary = summarize(latencies)
+                    summary["throughput"] = len(latencies) / seconds
+                    print_summary(label, summary)
+                finally:
+                    process.send_signal(signal.SIGTERM)
+                    process.wait()
+
+
+def legacy_code_review_prompt(code: str, language: str = "python") -> str:
+    """Previous code_review prompt: the f-string rebuilt on every request"""
+    return f"""
+Please review the following {language} code:
+
+```{language}
+{code}
+```
+
+Please check the following items:
+1. Code style and readability
+2. Potential bugs or errors
+3. Performance optimization possibilities
+4. Security vulnerabilities
+5. Improvement suggestions
+
+Please provide specific feedback for each item.
+"""
+
+
+async def measure_prompts(handler: Callable[[types.GetPromptRequest], Any], codes: List[str],
+                          rounds: int) -> List[int]:
+    """Latency of every prompts/get request for code_review in nanoseconds"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for code in codes:
+            # A fresh string, as decoded from each request: its hash is not computed yet
+            request = types.GetPromptRequest(method="prompts/get", params=types.GetPromptRequestParams(
+                name="code_review", arguments={"code": code[:1] + code[1:], "language": "python"}))
+            start = clock()
+            await handler(request)
+            latencies.append(clock() - start)
+    return latencies
+
+
+async def benchmark_prompts(code_kb: int = 100, inputs: int = 20, rounds: int = 50):
+    """prompts/get for code_review with 100 KB of code: f-string vs compiled template vs the prompt cache"""
+    print("\n" + "="*60)
+    print("📝 Prompt Engine Benchmark")
+    print("="*60)
+    alphabet = string.ascii_letters + string.digits + " \n\""
+    codes = ["".join(random.choices(alphabet, k=code_kb * 1024)) for _ in range(inputs)]
+    print(f"FastMCP prompts/get handler, {inputs} distinct {code_kb} KB inputs x {rounds} rounds")
+
+    legacy = FastMCP("Prompt Benchmark")
+    legacy.prompt("code_review")(legacy_code_review_prompt)
+    print_summary("f-string per request (previous)", summarize(await measure_prompts(
+        legacy._mcp_server.request_handlers[types.GetPromptRequest], codes, rounds)))
+
+    # The example server's own prompts; create_starlette_app is not called, so nothing else wraps the handler
+    server = sse_server.mcp._mcp_server
+    handler = server.request_handlers[types.GetPromptRequest]
+    print_summary("Compiled template", summarize(await measure_prompts(handler, codes, rounds)))
+
+    cache = prompt_engine.PromptCache()
+    prompt_engine.cache_prompts(server, cache)
+    cached = server.request_handlers[types.GetPromptRequest]
+    server.request_handlers[types.GetPromptRequest] = handler
+    fresh = ["".join(random.choices(alphabet, k=code_kb * 1024)) for _ in range(inputs * 5)]
+    print_summary("Cache miss (key + render)", summarize(await measure_prompts(cached, fresh, 1)))
+    cache.clear()
+    hits = cache.hits
+    print_summary("Cache hit (code resent)", summarize(await measure_prompts(cached, codes, rounds)))
+    print(f"  hit ratio {(cache.hits - hits) / (inputs * rounds):.1%}")
+    print(f"  cache stats: {cache.stats()}")
+
+
+def print_usage():
+    """Print usage"""
+    print("""
+⏱️ FastMCP MCP Server Benchmark Tool
+
+Usage:
+  python benchmark.py [options]
+
+Options:
+  --calculator    Calculator per-call latency (before/after compiled cache)
+  --engine        eval path vs AST expression engine (throughput and p99)
+  --batch         Per-point calculate vs vectorized calculate_batch
+  --runtime       Requests/s and p99 for each event loop / HTTP parser (uvloop, httptools)
+  --prompts       code_review with 100 KB of code: f-string vs compiled template vs prompt cache
+  --help          Show this help
+
+Examples:
+  python benchmark.py              # Run all benchmarks
+  python benchmark.py --calculator # Calculator only
+  python benchmark.py --engine     # Expression engine only
+  python benchmark.py --batch      # Batch calculation only
+  python benchmark.py --runtime    # Event loop / HTTP parser only
+  python benchmark.py --prompts    # Prompt engine only
+""")
+
+
+async def main():
+    """Main function"""
+    args = sys.argv[1:]
+
+    if "--help" in args or "-h" in args:
+        print_usage()
+        return
+
+    run_all = not any(arg.startswith("--") for arg in args)
+
+    if run_all or "--calculator" in args:
+        benchmark_calculator()
+
+    if run_all or "--engine" in args:
+        benchmark_engine()
+
+    if run_all or "--batch" in args:
+        benchmark_batch()
+
+    if run_all or "--runtime" in args:
+        await benchmark_runtime()
+
+    if run_all or "--prompts" in args:
+        await benchmark_prompts()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
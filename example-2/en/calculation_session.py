@@ -0,0 +1,412 @@
+# calculation_session.py
+"""
+Incremental calculation sessions for the calculate_session tool
+Named cells form a dependency graph, so changing one cell recomputes only its dependents
+"""
+
+import ast
+import asyncio
+import json
+import math
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import calculator
+import cost_estimator
+import expression_engine
+
+
+class CalculationSessionError(ValueError):
+    """Raised when a cell definition is invalid"""
+
+
+# Rough per-cell bookkeeping overhead on top of the value and source sizes
+CELL_OVERHEAD = 256
+
+# Total estimated cost of the cells one update may recompute
+UPDATE_COST_BUDGET = float(os.environ.get("CALCULATOR_SESSION_COST_BUDGET", "2e7"))
+
+# Wall-clock budget of a calculate_session call, the same as a calculate call in the worker pool
+SESSION_TIMEOUT = float(os.environ.get("CALCULATOR_TIMEOUT", "2.0"))
+
+# Error given to cells (and reason given to statements) the call had no time left for
+TIME_BUDGET_ERROR = "not computed: the call ran out of time"
+
+
+def compile_cell(expression: str) -> expression_engine.CompiledExpression:
+    """Compile a cell expression; free names refer to other cells"""
+    return expression_engine.compile_expression(expression, calculator.ALLOWED_NAMES, variables=())
+
+
+# Compiled cell expressions, shared by all sessions
+cell_cache = calculator.CompiledExpressionCache(compiler=compile_cell)
+
+
+def parse_statement(statement: str):
+    """Split 'name = expression' into its name and expression text"""
+    try:
+        tree = ast.parse(statement.strip(), mode="exec")
+    except SyntaxError as e:
+        raise CalculationSessionError(f"Invalid statement: {e.msg}") from None
+    if (len(tree.body) != 1 or not isinstance(tree.body[0], ast.Assign)
+            or len(tree.body[0].targets) != 1 or not isinstance(tree.body[0].targets[0], ast.Name)):
+        raise CalculationSessionError(f"Expected 'name = expression', got {statement!r}")
+    assign = tree.body[0]
+    name = assign.targets[0].id
+    if name in calculator.ALLOWED_NAMES:
+        raise CalculationSessionError(f"'{name}' is a built-in name and cannot be redefined")
+    return name, ast.get_source_segment(statement.strip(), assign.value)
+
+
+class Cell:
+    """A named expression, its dependencies and its last computed value"""
+
+    __slots__ = ("name", "source", "compiled", "value", "error")
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.compiled = cell_cache.get(source)
+        self.value: Any = None
+        self.error: Optional[str] = None
+
+    @property
+    def dependencies(self) -> tuple:
+        return self.compiled.variables
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by this cell"""
+        return CELL_OVERHEAD + len(self.source) + (sys.getsizeof(self.value) if self.error is None else 0)
+
+
+class CalculationSession:
+    """Cells of one MCP session and the reverse dependency graph between them"""
+
+    def __init__(self, max_cells: int = 1000, max_bytes: int = 16 * 1024 * 1024):
+        self.max_cells = max_cells
+        self.max_bytes = max_bytes
+        self.cells: Dict[str, Cell] = {}
+        # name -> cells whose expression uses that name (the name may not be defined yet)
+        self.dependents: Dict[str, Set[str]] = {}
+        self.bytes_used = 0
+        self.evaluations = 0
+        # Held by the thread running an update (see run_session)
+        self.lock = threading.Lock()
+
+    def _link(self, cell: Cell):
+        for dependency in cell.dependencies:
+            self.dependents.setdefault(dependency, set()).add(cell.name)
+
+    def _unlink(self, cell: Cell):
+        for dependency in cell.dependencies:
+            users = self.dependents.get(dependency)
+            if users is not None:
+                users.discard(cell.name)
+                if not users:
+                    del self.dependents[dependency]
+
+    def _creates_cycle(self, name: str, dependencies: Iterable[str]) -> bool:
+        """Whether name would depend on itself through the given dependencies"""
+        # Walk downstream from name: cells nothing depends on (the common case) cost nothing
+        targets = set(dependencies)
+        stack, seen = [name], set()
+        while stack:
+            current = stack.pop()
+            if current in targets:
+                return True
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(self.dependents.get(current, ()))
+        return False
+
+    def _affected(self, changed: Iterable[str]) -> List[str]:
+        """Changed cells and everything downstream of them, in dependency order"""
+        affected: Set[str] = set()
+        stack = list(changed)
+        while stack:
+            name = stack.pop()
+            if name in affected:
+                continue
+            affected.add(name)
+            stack.extend(self.dependents.get(name, ()))
+
+        # Kahn's topological sort restricted to the affected cells
+        pending = {
+            name: sum(1 for dependency in set(self.cells[name].dependencies)
+                      if dependency in affected and dependency in self.cells)
+            for name in affected if name in self.cells
+        }
+        ready = sorted(name for name, count in pending.items() if count == 0)
+        order: List[str] = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for user in self.dependents.get(name, ()):
+                if user in pending:
+                    pending[user] -= 1
+                    if pending[user] == 0:
+                        ready.append(user)
+        return order
+
+    def _set(self, cell: Cell, value: Any, error: Optional[str] = None):
+        """Store a cell result and keep the memory total up to date"""
+        self.bytes_used -= cell.memory_bytes()
+        cell.value, cell.error = value, error
+        self.bytes_used += cell.memory_bytes()
+
+    def _evaluate(self, cell: Cell, budget: Optional[float] = None) -> float:
+        """Compute one cell from the current values of its dependencies; returns the estimated cost spent"""
+        values = {}
+        for dependency in cell.dependencies:
+            source = self.cells.get(dependency)
+            if source is None:
+                self._set(cell, None, f"name '{dependency}' is not defined")
+                return 0.0
+            if source.error is not None:
+                self._set(cell, None, f"depends on failed cell '{dependency}'")
+                return 0.0
+            values[dependency] = source.value
+        try:
+            # Same static budget as calculate, with the actual sizes of the inputs
+            estimate = cost_estimator.check(cell.source, values=values)
+            if budget is not None and estimate.cost > budget:
+                raise cost_estimator.CostLimitExceeded(
+                    f"cell rejected: estimated cost {estimate.cost:.3g} exceeds the {max(budget, 0):.3g} "
+                    f"left of this update's budget"
+                )
+            value = cell.compiled(values)
+        except Exception as e:
+            self._set(cell, None, str(e))
+            return 0.0
+        self.evaluations += 1
+        if self.bytes_used - cell.memory_bytes() + CELL_OVERHEAD + len(cell.source) + sys.getsizeof(value) > self.max_bytes:
+            self._set(cell, None, "value does not fit in the session memory cap")
+        else:
+            self._set(cell, value)
+        return estimate.cost
+
+    def clear(self):
+        """Remove every cell"""
+        self.cells.clear()
+        self.dependents.clear()
+        self.bytes_used = 0
+
+    def _define(self, statement: str) -> Optional[str]:
+        """Define or redefine one cell; returns its name if the definition changed"""
+        name, source = parse_statement(statement)
+        old = self.cells.get(name)
+        if old is not None and old.source == source:
+            return None
+        if old is None and len(self.cells) >= self.max_cells:
+            raise CalculationSessionError(f"Too many cells (max {self.max_cells})")
+        # Constant subexpressions are folded while compiling, so check them first
+        cost_estimator.check(source)
+        cell = Cell(name, source)
+        if self._creates_cycle(name, cell.dependencies):
+            raise CalculationSessionError(f"Cycle detected: '{name}' depends on itself")
+        if old is not None:
+            self._unlink(old)
+            self.bytes_used -= old.memory_bytes()
+            cell.value, cell.error = old.value, old.error
+        self.cells[name] = cell
+        self.bytes_used += cell.memory_bytes()
+        self._link(cell)
+        return name
+
+    def update(self, statements: Iterable[str] = (), remove: Iterable[str] = (),
+               cost_budget: Optional[float] = None, deadline: float = math.inf):
+        """Define, redefine or remove cells and recompute only what depends on them
+
+        The estimated costs of the recomputed cells add up to at most
+        cost_budget (UPDATE_COST_BUDGET by default); a cell past it gets an
+        error instead. Past deadline (time.monotonic()), the remaining
+        statements are rejected and the remaining cells get an error, so a
+        call that ran out of time stops between cells. Returns the names of
+        the cells whose value or error changed, and the statements that were
+        rejected with the reason.
+        """
+        changed: List[str] = []
+        rejected: Dict[str, str] = {}
+        for name in remove:
+            cell = self.cells.pop(name, None)
+            if cell is not None:
+                self._unlink(cell)
+                self.bytes_used -= cell.memory_bytes()
+                changed.append(name)
+
+        for statement in statements:
+            if time.monotonic() > deadline:
+                rejected[statement] = TIME_BUDGET_ERROR
+                continue
+            try:
+                name = self._define(statement)
+            except Exception as e:
+                # The remaining statements still apply
+                rejected[statement] = str(e)
+                continue
+            if name is not None:
+                changed.append(name)
+
+        # A dependent is recomputed only if one of its inputs actually changed
+        dirty = set(changed)
+        updated: List[str] = []
+        remaining = UPDATE_COST_BUDGET if cost_budget is None else cost_budget
+        for name in self._affected(changed):
+            cell = self.cells.get(name)
+            if cell is None:
+                continue
+            if name not in dirty and not dirty.intersection(cell.dependencies):
+                continue
+            before = (cell.value, cell.error)
+            if time.monotonic() > deadline:
+                self._set(cell, None, TIME_BUDGET_ERROR)
+            else:
+                remaining -= self._evaluate(cell, remaining)
+            if name in changed or (cell.value, cell.error) != before or type(cell.value) is not type(before[0]):
+                dirty.add(name)
+                updated.append(name)
+        return updated + [name for name in changed if name not in self.cells], rejected
+
+    def snapshot(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Values (or errors) of the given cells, or of every cell"""
+        names = self.cells if names is None else names
+        result = {}
+        for name in names:
+            cell = self.cells.get(name)
+            if cell is None:
+                result[name] = None
+            elif cell.error is not None:
+                result[name] = {"error": cell.error}
+            else:
+                result[name] = _plain(cell.value)
+        return result
+
+
+def _plain(value: Any) -> Any:
+    """JSON-friendly form of a cell value"""
+    if isinstance(value, complex):
+        return str(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value.bit_length() > 64:
+        try:
+            return str(value)
+        except ValueError:  # Above the interpreter's int-to-str digit limit
+            return f"<{value.bit_length()}-bit integer>"
+    return value
+
+
+class SessionStore:
+    """Calculation sessions keyed by MCP session, with an LRU cap on count and memory
+
+    Each session may hold an even share of max_bytes, but at least room
+    for max_cells small cells, so one session cannot fill the whole store.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 max_cells: int = 1000):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_cells = max_cells
+        # Memory cap of each session
+        self.session_bytes = max(max_bytes // max_sessions, max_cells * CELL_OVERHEAD)
+        self._sessions: "OrderedDict[int, CalculationSession]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, owner: Any) -> CalculationSession:
+        """Return the session for an MCP session object, creating it if needed"""
+        key = id(owner)
+        session = self._sessions.get(key)
+        if session is None:
+            session = CalculationSession(self.max_cells, self.session_bytes)
+            self._sessions[key] = session
+            # Drop the cells as soon as the MCP session goes away
+            weakref.finalize(owner, self._sessions.pop, key, None)
+        self._sessions.move_to_end(key)
+        return session
+
+    def enforce_limits(self):
+        """Evict least recently used sessions until count and memory are under the caps"""
+        total = sum(session.bytes_used for session in self._sessions.values())
+        # The most recently used session is never evicted
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or total > self.max_bytes):
+            _, session = self._sessions.popitem(last=False)
+            total -= session.bytes_used
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return session count, memory use and eviction metrics"""
+        return {
+            "sessions": len(self._sessions),
+            "cells": sum(len(session.cells) for session in self._sessions.values()),
+            "memory_bytes": sum(session.bytes_used for session in self._sessions.values()),
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "session_max_bytes": self.session_bytes,
+            "evictions": self.evictions
+        }
+
+
+def run(session: CalculationSession, statements: Optional[List[str]] = None,
+        remove: Optional[List[str]] = None, reset: bool = False,
+        deadline: float = math.inf) -> Dict[str, Any]:
+    """Apply a calculate_session call and report the cells that changed"""
+    if reset:
+        session.clear()
+    before = session.evaluations
+    updated, rejected = session.update(statements or (), remove or (), deadline=deadline)
+    result: Dict[str, Any] = {
+        "updated": session.snapshot(updated),
+        "recomputed": session.evaluations - before,
+        "cells": len(session.cells)
+    }
+    if rejected:
+        result["rejected"] = rejected
+    if not statements and not remove:
+        result["values"] = session.snapshot()
+    return result
+
+
+async def run_session(session: CalculationSession, statements: Optional[List[str]] = None,
+                      remove: Optional[List[str]] = None, reset: bool = False,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+    """run() in a thread within the time budget
+
+    The event loop is not blocked while cells are recomputed. Calls on the
+    same session run one at a time under session.lock. The update checks
+    the deadline between cells, so a call past the time budget stops in its
+    thread and the cells it did not reach get an error.
+    """
+    timeout = SESSION_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+
+    def locked_run():
+        if not session.lock.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            # Still held by an earlier call of this session that used up this call's time
+            raise TimeoutError
+        try:
+            return run(session, statements, remove, reset, deadline)
+        finally:
+            session.lock.release()
+
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(locked_run), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"calculation exceeded the {timeout:g}s time budget") from None
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Serialize a session result as compact JSON"""
+    return json.dumps(result, separators=(",", ":"), default=str)
+
+
+# Store shared by the calculate_session tool, configured from the environment
+store = SessionStore(
+    max_sessions=int(os.environ.get("CALCULATOR_MAX_SESSIONS", "1000")),
+    max_bytes=int(os.environ.get("CALCULATOR_SESSION_MEMORY_MB", "64")) * 1024 * 1024,
+    max_cells=int(os.environ.get("CALCULATOR_MAX_CELLS", "1000"))
+)
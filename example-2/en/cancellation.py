@@ -0,0 +1,153 @@
+# cancellation.py
+"""
+Per-tool timeouts and cancellation of abandoned tool calls
+Cancels a call past its budget, on notifications/cancelled, or when the SSE session drops
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+import anyio
+from mcp import types
+from mcp.server import Server
+
+
+class ToolTimeout(Exception):
+    """Raised when a tool call exceeds its time budget"""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before the tool call finished"""
+
+
+def parse_timeouts(spec: str) -> Dict[str, float]:
+    """Parse per-tool timeouts from "name=seconds,name=seconds" """
+    timeouts = {}
+    for item in spec.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            timeouts[name.strip()] = float(seconds)
+    return timeouts
+
+
+async def _cancel(task: asyncio.Future):
+    """Cancel a task and wait until it has actually stopped (its outcome no longer matters)"""
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await task
+
+
+class ToolCallTracker:
+    """Runs tool calls under per-tool time budgets and cancels them when nobody waits for the result
+
+    A call is cancelled when it runs past its budget, when the client
+    disconnects, or when the caller itself is cancelled (an MCP
+    notifications/cancelled message or a dropped SSE session). Cancelling
+    calculate also recycles its worker process, so abandoned work stops
+    using CPU.
+    """
+
+    def __init__(self, default_timeout: float = 30.0, timeouts: Optional[Dict[str, float]] = None):
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.in_flight = 0
+
+        # Metrics
+        self.completed = 0
+        self.timed_out = 0
+        self.disconnected = 0
+        self.cancelled = 0
+        self.cancelled_seconds = 0.0
+
+    def timeout_for(self, name: str) -> float:
+        """Time budget in seconds for a tool"""
+        return self.timeouts.get(name, self.default_timeout)
+
+    async def run(self, name: str, call: Awaitable, disconnected: Optional[Awaitable] = None) -> Any:
+        """Await a tool call within its budget, cancelling it if `disconnected` finishes first"""
+        timeout = self.timeout_for(name)
+        self.in_flight += 1
+        started = time.monotonic()
+        task = asyncio.ensure_future(call)
+        watcher = asyncio.ensure_future(disconnected) if disconnected is not None else None
+        try:
+            done, _ = await asyncio.wait({task, watcher} - {None}, timeout=timeout,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if task in done:
+                self.completed += 1
+                return task.result()
+            await _cancel(task)
+            self.cancelled_seconds += time.monotonic() - started
+            if watcher in done:
+                self.disconnected += 1
+                raise ClientDisconnected(f"Client disconnected during tool call: {name}")
+            self.timed_out += 1
+            raise ToolTimeout(f"Tool '{name}' exceeded its {timeout:g}s time budget")
+        except asyncio.CancelledError:
+            await _cancel(task)
+            self.cancelled += 1
+            self.cancelled_seconds += time.monotonic() - started
+            raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return in-flight, timeout and cancelled-work metrics"""
+        return {
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "timed_out": self.timed_out,
+            "disconnected": self.disconnected,
+            "cancelled": self.cancelled,
+            "cancelled_work_s": self.cancelled_seconds,
+            "default_timeout_s": self.default_timeout,
+            "timeouts_s": dict(self.timeouts)
+        }
+
+
+def track_requests(server: Server):
+    """Run the server's tools/call handler under the tracker; a timeout becomes an error result"""
+    handler = server.request_handlers[types.CallToolRequest]
+
+    async def tracked(request: types.CallToolRequest):
+        try:
+            return await tracker.run(request.params.name, handler(request))
+        except ToolTimeout as e:
+            return types.ServerResult(types.CallToolResult(
+                content=[types.TextContent(type="text", text=str(e))], isError=True))
+
+    server.request_handlers[types.CallToolRequest] = tracked
+
+
+async def run_session(server: Server, read_stream, write_stream):
+    """Run server.run() for one SSE session; in-flight handlers are cancelled when the client drops
+
+    server.run() waits for its in-flight handlers once the client's stream
+    ends, so without this a dropped session keeps its tool calls running
+    until they finish.
+    """
+    relay_writer, relay_reader = anyio.create_memory_object_stream(0)
+    async with anyio.create_task_group() as tg:
+        async def relay():
+            async with read_stream, relay_writer:
+                async for message in read_stream:
+                    await relay_writer.send(message)
+            # The SSE connection is gone: nobody is left to receive the results
+            tg.cancel_scope.cancel()
+
+        tg.start_soon(relay)
+        await server.run(relay_reader, write_stream, server.create_initialization_options())
+        tg.cancel_scope.cancel()
+
+
+# Tracker shared by every MCP session, configured from the environment
+# (MCP_TOOL_TIMEOUTS="calculate=5,calculate_batch=10" overrides MCP_TOOL_TIMEOUT per tool)
+tracker = ToolCallTracker(
+    default_timeout=float(os.environ.get("MCP_TOOL_TIMEOUT", "30")),
+    timeouts=parse_timeouts(os.environ.get("MCP_TOOL_TIMEOUTS", ""))
+)
@@ -0,0 +1,78 @@
+# cost_cases.py
+"""
+Calculator expressions for the cost estimator test
+cost_estimator must reject ADVERSARIAL_EXPRESSIONS quickly and accept BENIGN_EXPRESSIONS
+"""
+
+import time
+from typing import Iterator, Tuple
+
+# Expressions that must be rejected by the static cost estimator before evaluation
+ADVERSARIAL_EXPRESSIONS = [
+    "9**9**9",
+    "2**10**10",
+    "(10**10)**(10**10)",
+    "(2**10**6)**1000",
+    "factorial(10**9)",
+    "factorial(factorial(20))",
+    "comb(10**6, 5*10**5)",
+    "perm(10**5)",
+    "isqrt(10**10**8)",
+    "lcm(3**10**8, 2**10**8)",
+    "[1] * 10**9",
+    "prod([10**1000] * 10**5)",
+    "max(2**10**9, 1)",
+    "abs(-9**9**9)",
+    "9**9**9 if 1 else 0",
+    "[9**9**9 for a in [1]]",
+    "sqrt.__class__",
+    "(lambda: 1)()",
+    "1+" * 6000 + "1",
+]
+
+# Ordinary expressions that must still be accepted
+BENIGN_EXPRESSIONS = [
+    "10 + 5",
+    "sqrt(144) + 2**3",
+    "log(100) + sin(pi/2)",
+    "factorial(100)",
+    "comb(1000, 500)",
+    "2**1000",
+    "fsum([0.1] * 10)",
+    "gcd(12, 18)",
+    "1 if 2 > 1 else 0",
+]
+
+# A rejection slower than this came from running the expression, not from the static analysis
+MAX_REJECT_MS = 50
+
+# Outcomes that pass; the others are not_rejected, too_slow and wrongly_rejected
+PASSED = {"rejected", "accepted"}
+
+
+def run(cost_estimator) -> Iterator[Tuple[str, str, float, str]]:
+    """Check every case against the cost_estimator module
+
+    Yields (outcome, label, elapsed_ms, detail) per expression; the label is
+    the expression, shortened to 40 characters, and the detail the
+    estimator's message.
+    """
+    for expression in ADVERSARIAL_EXPRESSIONS:
+        label = expression if len(expression) <= 40 else expression[:37] + "..."
+        start = time.perf_counter()
+        try:
+            cost_estimator.check(expression)
+        except cost_estimator.CostLimitExceeded as e:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            yield ("too_slow" if elapsed_ms > MAX_REJECT_MS else "rejected"), label, elapsed_ms, str(e)
+        else:
+            yield "not_rejected", label, (time.perf_counter() - start) * 1000, ""
+
+    for expression in BENIGN_EXPRESSIONS:
+        start = time.perf_counter()
+        try:
+            cost_estimator.check(expression)
+        except cost_estimator.CostLimitExceeded as e:
+            yield "wrongly_rejected", expression, (time.perf_counter() - start) * 1000, str(e)
+        else:
+            yield "accepted", expression, (time.perf_counter() - start) * 1000, ""
@@ -0,0 +1,310 @@
+# cost_estimator.py
+"""
+Static cost estimator for calculator expressions
+Rejects expressions whose projected cost or result size is too large before evaluation
+"""
+
+import ast
+import math
+import os
+from typing import Any, Dict, Mapping, Optional
+
+import calculator
+import expression_engine
+
+
+class CostLimitExceeded(expression_engine.ExpressionError):
+    """Raised when an expression is projected to exceed the evaluation budget"""
+
+
+# Budgets, in abstract work units (roughly one machine-word operation each) and result bits
+COST_BUDGET = float(os.environ.get("CALCULATOR_COST_BUDGET", "1e7"))
+MAX_RESULT_BITS = float(os.environ.get("CALCULATOR_MAX_RESULT_BITS", "1e7"))
+MAX_EXPRESSION_LENGTH = int(os.environ.get("CALCULATOR_MAX_LENGTH", "10000"))
+
+# Exponent of the multiplication cost for large integers (Karatsuba)
+KARATSUBA = math.log2(3)
+
+# Magnitude of any finite float, in bits
+FLOAT_BITS = 1024.0
+
+# Ints up to this many bits are tracked exactly so exponents and arguments stay precise
+EXACT_BITS = 64
+
+# Functions whose cost grows with the size of their integer arguments
+FACTORIAL_LIKE = {"factorial", "comb", "perm"}
+INTEGER_FUNCTIONS = {"gcd", "lcm", "isqrt"}
+SEQUENCE_FUNCTIONS = {"fsum", "prod", "max", "min"}
+
+
+def _words(bits: float) -> float:
+    """Number of 64-bit machine words needed for a value of the given size"""
+    return max(1.0, bits / 64)
+
+
+def _multiply_cost(left_bits: float, right_bits: float) -> float:
+    """Cost of multiplying two integers of the given sizes"""
+    small, large = sorted((_words(left_bits), _words(right_bits)))
+    return large * small ** (KARATSUBA - 1)
+
+
+class _Value:
+    """Abstract value: kind, upper bound of log2 |value|, and the exact value when cheap"""
+
+    __slots__ = ("kind", "bits", "exact", "length")
+
+    def __init__(self, kind: str, bits: float = 0.0, exact: Any = None, length: float = 0.0):
+        self.kind = kind  # "int", "float", "seq" or "other"
+        self.bits = bits
+        self.exact = exact
+        self.length = length
+
+    @classmethod
+    def of(cls, value: Any) -> "_Value":
+        """Abstract value of a concrete Python value"""
+        if isinstance(value, int):
+            bits = float(abs(int(value)).bit_length())
+            return cls("int", bits, value if bits <= EXACT_BITS else None)
+        if isinstance(value, (float, complex)):
+            return cls("float", FLOAT_BITS, value)
+        return cls("other")
+
+    @property
+    def max_int(self) -> float:
+        """Upper bound of the integer value (inf when too large to represent)"""
+        if isinstance(self.exact, int):
+            return abs(self.exact)
+        return 2.0 ** self.bits if self.bits < 1024 else math.inf
+
+
+class CostEstimate:
+    """Result of analyzing an expression"""
+
+    __slots__ = ("cost", "result_bits")
+
+    def __init__(self, cost: float, result_bits: float):
+        self.cost = cost
+        self.result_bits = result_bits
+
+    def __repr__(self) -> str:
+        return f"CostEstimate(cost={self.cost:.3g}, result_bits={self.result_bits:.3g})"
+
+
+class _Analyzer:
+    """Walks an expression AST and accumulates a worst-case cost estimate"""
+
+    def __init__(self, namespace: Dict[str, Any]):
+        self.namespace = namespace
+        self.cost = 0.0
+        self.peak_bits = 0.0
+
+    def visit(self, node: ast.AST) -> _Value:
+        method = getattr(self, f"_visit_{type(node).__name__}", None)
+        if method is None:
+            # Anything the expression engine does not accept (comprehensions, attributes,
+            # lambdas) could hide unbounded work, so it is not estimated at all
+            raise CostLimitExceeded(f"expression rejected: {type(node).__name__} cannot be estimated")
+        value = method(node)
+        self.cost += 1
+        if value.kind == "int":
+            self.peak_bits = max(self.peak_bits, value.bits)
+        elif value.kind == "seq":
+            self.peak_bits = max(self.peak_bits, value.length * max(value.bits, 64))
+        return value
+
+    def _visit_Expression(self, node: ast.Expression) -> _Value:
+        return self.visit(node.body)
+
+    def _visit_Constant(self, node: ast.Constant) -> _Value:
+        return _Value.of(node.value)
+
+    def _visit_Name(self, node: ast.Name) -> _Value:
+        if node.id in self.namespace:
+            return _Value.of(self.namespace[node.id])
+        return _Value("other")
+
+    def _visit_UnaryOp(self, node: ast.UnaryOp) -> _Value:
+        operand = self.visit(node.operand)
+        if operand.kind == "int" and operand.exact is not None and isinstance(node.op, ast.USub):
+            return _Value("int", operand.bits, -operand.exact)
+        if operand.kind == "int" and operand.exact is not None and isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(node.op, ast.Not):
+            return _Value("int", 1.0)
+        return _Value(operand.kind, operand.bits, length=operand.length)
+
+    def _visit_BinOp(self, node: ast.BinOp) -> _Value:
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = type(node.op)
+
+        # Sequence repetition: [x] * n allocates n items
+        if op is ast.Mult and (left.kind == "seq") != (right.kind == "seq"):
+            seq, count = (left, right) if left.kind == "seq" else (right, left)
+            length = seq.length * (count.max_int if count.kind == "int" else 0)
+            self.cost += length
+            return _Value("seq", seq.bits, length=length)
+        if op is ast.Add and left.kind == "seq" and right.kind == "seq":
+            length = left.length + right.length
+            self.cost += length
+            return _Value("seq", max(left.bits, right.bits), length=length)
+
+        if left.kind != "int" or right.kind != "int":
+            if op is ast.Pow and left.kind == "int" and right.kind == "float":
+                # Float exponent: the result is a float or an OverflowError, both cheap
+                return _Value("float", FLOAT_BITS)
+            self.cost += _words(max(left.bits, right.bits))
+            return _Value("float" if "float" in (left.kind, right.kind) else "other", FLOAT_BITS)
+
+        if op is ast.Pow:
+            return self._int_power(left, right)
+        if op in (ast.Add, ast.Sub):
+            self.cost += _words(max(left.bits, right.bits))
+            return self._exact_or(left, right, op, max(left.bits, right.bits) + 1)
+        if op is ast.Mult:
+            self.cost += _multiply_cost(left.bits, right.bits)
+            return self._exact_or(left, right, op, left.bits + right.bits)
+        if op in (ast.FloorDiv, ast.Mod):
+            self.cost += _words(left.bits) * _words(right.bits)
+            return self._exact_or(left, right, op, left.bits)
+        if op is ast.Div:
+            self.cost += _words(max(left.bits, right.bits))
+            return _Value("float", FLOAT_BITS)
+        return _Value("other")
+
+    def _exact_or(self, left: _Value, right: _Value, op: type, bits: float) -> _Value:
+        """Compute the exact result when both operands are small known ints"""
+        if left.exact is not None and right.exact is not None and bits <= EXACT_BITS:
+            try:
+                return _Value.of(expression_engine.BINARY_OPERATORS[op](left.exact, right.exact))
+            except ArithmeticError:
+                pass
+        return _Value("int", bits)
+
+    def _int_power(self, base: _Value, exponent: _Value) -> _Value:
+        """Integer power: the result has base_bits * exponent bits"""
+        if isinstance(exponent.exact, int) and exponent.exact < 0:
+            return _Value("float", FLOAT_BITS)
+        if isinstance(base.exact, int) and abs(base.exact) <= 1:
+            return _Value("int", 1.0, base.exact if exponent.exact is not None else None)
+        bits = base.bits * exponent.max_int
+        if base.exact is not None and exponent.exact is not None and bits <= EXACT_BITS:
+            return _Value.of(base.exact ** exponent.exact)
+        # Repeated squaring: cost is dominated by the last multiplication
+        self.cost += _multiply_cost(bits, bits)
+        return _Value("int", bits)
+
+    def _visit_Compare(self, node: ast.Compare) -> _Value:
+        for child in [node.left, *node.comparators]:
+            self.visit(child)
+        return _Value("int", 1.0)
+
+    def _visit_BoolOp(self, node: ast.BoolOp) -> _Value:
+        values = [self.visit(child) for child in node.values]
+        return max(values, key=lambda value: value.bits)
+
+    def _visit_IfExp(self, node: ast.IfExp) -> _Value:
+        self.visit(node.test)
+        # Either branch may run, so assume the more expensive one
+        return max((self.visit(node.body), self.visit(node.orelse)), key=lambda value: value.bits)
+
+    def _visit_Tuple(self, node: ast.Tuple) -> _Value:
+        return self._sequence(node.elts)
+
+    def _visit_List(self, node: ast.List) -> _Value:
+        return self._sequence(node.elts)
+
+    def _sequence(self, elements) -> _Value:
+        values = [self.visit(child) for child in elements]
+        bits = max((value.bits for value in values), default=0.0)
+        return _Value("seq", bits, length=float(len(values)))
+
+    def _visit_Call(self, node: ast.Call) -> _Value:
+        args = [self.visit(arg) for arg in node.args]
+        for keyword in node.keywords:
+            self.visit(keyword.value)
+        if not isinstance(node.func, ast.Name) or node.func.id not in self.namespace:
+            raise CostLimitExceeded("expression rejected: only whitelisted functions can be called")
+        name = node.func.id
+
+        if name in FACTORIAL_LIKE and args and args[0].kind == "int":
+            n = args[0].max_int
+            if n == math.inf:
+                self.cost = math.inf
+                return _Value("int", math.inf)
+            log_n = max(1.0, math.log2(n + 1))
+            if name == "factorial":
+                # log2(n!) ~ n * log2(n), built by a balanced product tree
+                bits = n * log_n
+                self.cost += _words(bits) ** KARATSUBA + n
+                return _Value("int", bits)
+            k = args[1].max_int if len(args) > 1 and args[1].kind == "int" else n
+            # perm(n, k) has ~k * log2(n) bits; comb(n, k) is also below 2**n
+            bits = min(k, n) * log_n
+            if name == "comb":
+                bits = min(bits, float(n))
+            self.cost += _words(bits) ** KARATSUBA * max(1.0, math.log2(min(k, n) + 1))
+            return _Value("int", bits)
+        if name in INTEGER_FUNCTIONS and args:
+            bits = sum(arg.bits for arg in args) if name == "lcm" else max(arg.bits for arg in args)
+            self.cost += sum(_words(arg.bits) for arg in args) ** 2
+            return _Value("int", bits)
+        if name in SEQUENCE_FUNCTIONS and args:
+            length = sum(arg.length if arg.kind == "seq" else 1 for arg in args)
+            bits = max(arg.bits for arg in args)
+            self.cost += length * _words(bits)
+            if name == "prod":
+                # The product of n items of b bits has up to n * b bits
+                product_bits = sum(arg.length * arg.bits if arg.kind == "seq" else arg.bits for arg in args)
+                self.cost += _multiply_cost(product_bits, bits) * length
+                return _Value("int", product_bits)
+            if name == "fsum":
+                return _Value("float", FLOAT_BITS)
+            return _Value("int" if all(arg.kind == "int" for arg in args) else "float", bits)
+        if name in ("abs", "round") and args:
+            return _Value(args[0].kind, args[0].bits)
+
+        # Everything else in the math module returns a float in constant time
+        self.cost += sum(_words(arg.bits) for arg in args)
+        return _Value("float", FLOAT_BITS)
+
+
+def analyze(expression: str, values: Optional[Mapping[str, Any]] = None) -> CostEstimate:
+    """Estimate the evaluation cost of an expression from its AST
+
+    values gives the current value of free variables, so their size is known.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        return CostEstimate(math.inf, 0.0)
+    namespace = {**calculator.ALLOWED_NAMES, **values} if values else calculator.ALLOWED_NAMES
+    analyzer = _Analyzer(namespace)
+    tree = expression_engine.parse(expression)
+    analyzer.visit(tree)
+    return CostEstimate(analyzer.cost, analyzer.peak_bits)
+
+
+# Estimates are cached like compiled expressions, rejections included
+estimate_cache = calculator.CompiledExpressionCache(compiler=analyze)
+
+
+def check(expression: str, budget: Optional[float] = None,
+          max_result_bits: Optional[float] = None,
+          values: Optional[Mapping[str, Any]] = None) -> CostEstimate:
+    """Reject an expression whose estimated cost or result size exceeds the budget"""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CostLimitExceeded(f"expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    budget = COST_BUDGET if budget is None else budget
+    max_result_bits = MAX_RESULT_BITS if max_result_bits is None else max_result_bits
+
+    # Estimates that depend on variable values cannot be shared through the cache
+    estimate = analyze(expression, values) if values else estimate_cache.get(expression)
+    if estimate.cost > budget:
+        raise CostLimitExceeded(
+            f"expression rejected: estimated cost {estimate.cost:.3g} exceeds the budget of {budget:.3g}"
+        )
+    if estimate.result_bits > max_result_bits:
+        raise CostLimitExceeded(
+            f"expression rejected: estimated result size of {estimate.result_bits:.3g} bits "
+            f"exceeds the limit of {max_result_bits:.3g}"
+        )
+    return estimate
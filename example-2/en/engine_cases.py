@@ -0,0 +1,49 @@
+# engine_cases.py
+"""
+Calculator expressions for the expression engine test
+The engine must give the same result, or raise the same error, as eval()
+"""
+
+from typing import Any, Callable, Iterator, Tuple
+
+# Expressions that only give eval()'s result when and/or, chained comparisons
+# and conditional expressions skip the operands they do not need
+EXPRESSIONS = [
+    "1 if 1 else 1/0",
+    "1/0 if 0 else 2",
+    "1 if 0 else 1/0",
+    "sqrt(16) if 2 > 1 else log(-1)",
+    "0 and 1/0",
+    "1 or log(0)",
+    "1 and 0 and 1/0",
+    "0 or 0.0 or 3",
+    "(0 and 1/0) + 1",
+    "0 and factorial(10**9)",
+    "log(0) or 1",
+    "not 0 and 3",
+    "1 < 0 < 1/0",
+    "2 > 1 > 0",
+    "1 < 2 < 3 < 1/0",
+    "3 > 2 == 2 >= 1",
+    "1 == 1.0 < 2 if 0 or 2 else 1/0",
+]
+
+
+def _outcome(evaluate: Callable[[], Any]) -> str:
+    """repr of the result, or the name of the exception raised"""
+    try:
+        return repr(evaluate())
+    except Exception as e:
+        return type(e).__name__
+
+
+def run(calculator) -> Iterator[Tuple[bool, str, str, str]]:
+    """Evaluate every case with the engine ("ast" mode) and with eval()
+
+    Yields (same, expression, engine_outcome, eval_outcome); an outcome is
+    the repr of the result, or the name of the exception raised.
+    """
+    for expression in EXPRESSIONS:
+        engine = _outcome(lambda: calculator.evaluate(expression, "ast"))
+        python = _outcome(lambda: calculator.evaluate(expression, "eval"))
+        yield engine == python, expression, engine, python
@@ -0,0 +1,206 @@
+# evaluation_pool.py
+"""
+Process pool for calculator evaluation
+Runs expressions in pre-warmed worker processes with time and memory budgets
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, Optional, Set
+
+try:
+    import resource
+except ImportError:  # Not available on Windows: memory limits are skipped
+    resource = None
+
+
+class EvaluationError(Exception):
+    """Raised when an expression fails inside a worker process"""
+
+
+class EvaluationTimeout(EvaluationError):
+    """Raised when an evaluation exceeds its wall-clock budget"""
+
+
+def _current_address_space() -> int:
+    """Return the virtual memory size of this process in bytes (0 if unknown)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _worker_main(conn, memory_limit: int):
+    """Worker process loop: receive an expression, send back (ok, value)"""
+    import calculator
+
+    if resource is not None and memory_limit:
+        # The budget is on top of what the interpreter already maps
+        limit = _current_address_space() + memory_limit
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    while True:
+        try:
+            expression = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        try:
+            conn.send((True, calculator.evaluate(expression)))
+        except MemoryError:
+            conn.send((False, "memory budget exceeded"))
+        except Exception as e:
+            conn.send((False, str(e)))
+
+
+class _Worker:
+    """A worker process and the parent end of its pipe"""
+
+    def __init__(self, context, memory_limit: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, memory_limit), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        """Terminate the process immediately"""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class EvaluationPool:
+    """Pre-warmed pool of worker processes with per-call time and memory budgets"""
+
+    def __init__(self, size: Optional[int] = None, timeout: float = 2.0, memory_limit_mb: int = 256):
+        self.size = size or os.cpu_count() or 1
+        self.timeout = timeout
+        self.memory_limit = memory_limit_mb * 1024 * 1024
+        methods = multiprocessing.get_all_start_methods()
+        # forkserver avoids forking a process that already runs an event loop and threads
+        self._context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._idle: Optional[asyncio.Queue] = None
+        # Workers currently evaluating, so shutdown() can kill them too
+        self._busy: Set[_Worker] = set()
+        self._started = False
+
+        # Metrics
+        self.busy = 0
+        self.waiting = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.kills = 0
+        self.replacements = 0
+        self.total_wait = 0.0
+
+    def start(self):
+        """Start all worker processes (idempotent)"""
+        if self._started:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._idle.put_nowait(_Worker(self._context, self.memory_limit))
+        self._started = True
+
+    def shutdown(self):
+        """Kill all workers, including the ones still evaluating (their callers get EvaluationError)"""
+        if not self._started:
+            return
+        self._started = False
+        while not self._idle.empty():
+            self._idle.get_nowait().kill()
+        for worker in list(self._busy):
+            worker.kill()
+        self._busy.clear()
+        # Callers still waiting for a worker get none
+        for _ in range(self.waiting):
+            self._idle.put_nowait(None)
+
+    async def _replace(self, worker: _Worker):
+        """Kill a worker and put a fresh one back into the pool"""
+        self.kills += 1
+        self._busy.discard(worker)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, worker.kill)
+        if not self._started:
+            # Shut down meanwhile: no replacement
+            return
+        replacement = await loop.run_in_executor(None, _Worker, self._context, self.memory_limit)
+        self.replacements += 1
+        if not self._started:
+            replacement.kill()
+            return
+        self._idle.put_nowait(replacement)
+
+    async def evaluate(self, expression: str, timeout: Optional[float] = None) -> Any:
+        """Evaluate an expression in a worker process within the time budget"""
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+
+        self.waiting += 1
+        wait_start = time.monotonic()
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.waiting -= 1
+            self.total_wait += time.monotonic() - wait_start
+        if worker is None:
+            raise EvaluationError("evaluation pool is shut down")
+
+        self.busy += 1
+        self.calls += 1
+        self._busy.add(worker)
+        loop = asyncio.get_running_loop()
+        try:
+            worker.conn.send(expression)
+            ready = await loop.run_in_executor(None, worker.conn.poll, timeout)
+            if not ready:
+                self.timeouts += 1
+                await self._replace(worker)
+                raise EvaluationTimeout(f"evaluation exceeded the {timeout:g}s time budget")
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            # The worker died (e.g. killed by the OS); replace it
+            await self._replace(worker)
+            raise EvaluationError("evaluation worker crashed")
+        except asyncio.CancelledError:
+            # The caller went away mid-evaluation: the worker may still be busy, so recycle it
+            asyncio.ensure_future(self._replace(worker))
+            raise
+        finally:
+            self.busy -= 1
+
+        self._busy.discard(worker)
+        self._idle.put_nowait(worker)
+        if not ok:
+            raise EvaluationError(value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool saturation and kill-count metrics"""
+        return {
+            "size": self.size,
+            "busy": self.busy,
+            "idle": self._idle.qsize() if self._idle else 0,
+            "waiting": self.waiting,
+            "saturation": self.busy / self.size,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "kills": self.kills,
+            "replacements": self.replacements,
+            "avg_wait_ms": self.total_wait / self.calls * 1000 if self.calls else 0.0,
+            "timeout_s": self.timeout,
+            "memory_limit_mb": self.memory_limit // (1024 * 1024)
+        }
+
+
+# Pool shared by the calculator tool, configured from the environment
+pool = EvaluationPool(
+    size=int(os.environ.get("CALCULATOR_POOL_SIZE", "0")) or None,
+    timeout=float(os.environ.get("CALCULATOR_TIMEOUT", "2.0")),
+    memory_limit_mb=int(os.environ.get("CALCULATOR_MEMORY_MB", "256"))
+)
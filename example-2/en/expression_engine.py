@@ -0,0 +1,312 @@
+# expression_engine.py
+"""
+Whitelist expression engine for the calculate tool
+Parses once, validates every node, folds constants and compiles to closures
+"""
+
+import ast
+import operator
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Tuple
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression uses a construct outside the whitelist"""
+
+
+# Whitelisted operators mapped to their implementations
+BINARY_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+UNARY_OPERATORS: Dict[type, Callable[[Any], Any]] = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Not: operator.not_,
+}
+
+COMPARE_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+# Literal types a constant node may hold
+CONSTANT_TYPES = (int, float, complex, bool)
+
+# Marker for "this node is not a compile-time constant"
+_DYNAMIC = object()
+
+# A compiled node: (evaluator taking the variable mapping, folded value or _DYNAMIC)
+Compiled = Tuple[Callable[[Mapping[str, Any]], Any], Any]
+
+
+def _constant(value: Any) -> Compiled:
+    """Wrap a folded value as a compiled node"""
+    return (lambda env: value), value
+
+
+class CompiledExpression:
+    """Expression validated against the whitelist and compiled to closures"""
+
+    __slots__ = ("source", "variables", "is_constant", "_evaluate")
+
+    def __init__(self, source: str, evaluate: Callable[[Mapping[str, Any]], Any],
+                 variables: Tuple[str, ...], is_constant: bool):
+        self.source = source
+        self.variables = variables
+        self.is_constant = is_constant
+        self._evaluate = evaluate
+
+    def __call__(self, values: Optional[Mapping[str, Any]] = None) -> Any:
+        """Evaluate with the given variable values"""
+        return self._evaluate(values or {})
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r}, variables={self.variables})"
+
+
+class _Compiler:
+    """Walks a parsed expression, checks every node and builds closures"""
+
+    def __init__(self, namespace: Mapping[str, Any], variables: Optional[Iterable[str]]):
+        self.namespace = namespace
+        # None means free variables are not allowed at all
+        self.allowed_variables = None if variables is None else set(variables)
+        self.free_variables: Dict[str, None] = {}
+        # Off while compiling code that may never run, such as an untaken branch
+        self.folding = True
+
+    def compile(self, node: ast.AST) -> Compiled:
+        """Compile a single node, folding it when all inputs are constant"""
+        method = getattr(self, f"_compile_{type(node).__name__}", None)
+        if method is None:
+            raise ExpressionError(f"Unsupported expression element: {type(node).__name__}")
+        return method(node)
+
+    def compile_unfolded(self, node: ast.AST) -> Callable[[Mapping[str, Any]], Any]:
+        """Validate and compile a node that may never run, without evaluating any of it now"""
+        folding, self.folding = self.folding, False
+        try:
+            func, _ = self.compile(node)
+        finally:
+            self.folding = folding
+        return func
+
+    def _compile_Expression(self, node: ast.Expression) -> Compiled:
+        return self.compile(node.body)
+
+    def _compile_Constant(self, node: ast.Constant) -> Compiled:
+        if not isinstance(node.value, CONSTANT_TYPES):
+            raise ExpressionError(f"Unsupported constant: {node.value!r}")
+        return _constant(node.value)
+
+    def _compile_Name(self, node: ast.Name) -> Compiled:
+        name = node.id
+        if name in self.namespace:
+            return _constant(self.namespace[name])
+        if self.allowed_variables is None or (
+            self.allowed_variables and name not in self.allowed_variables
+        ):
+            raise ExpressionError(f"name '{name}' is not defined")
+        self.free_variables[name] = None
+        return (lambda env: env[name]), _DYNAMIC
+
+    def _compile_BinOp(self, node: ast.BinOp) -> Compiled:
+        op = BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        left, left_value = self.compile(node.left)
+        right, right_value = self.compile(node.right)
+        if self.folding and left_value is not _DYNAMIC and right_value is not _DYNAMIC:
+            return _constant(op(left_value, right_value))
+        return (lambda env: op(left(env), right(env))), _DYNAMIC
+
+    def _compile_UnaryOp(self, node: ast.UnaryOp) -> Compiled:
+        op = UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+        operand, operand_value = self.compile(node.operand)
+        if self.folding and operand_value is not _DYNAMIC:
+            return _constant(op(operand_value))
+        return (lambda env: op(operand(env))), _DYNAMIC
+
+    def _compile_Compare(self, node: ast.Compare) -> Compiled:
+        ops = []
+        for op_node in node.ops:
+            op = COMPARE_OPERATORS.get(type(op_node))
+            if op is None:
+                raise ExpressionError(f"Unsupported operator: {type(op_node).__name__}")
+            ops.append(op)
+        left, left_value = self.compile(node.left)
+
+        if len(ops) == 1:
+            # Single comparison: return the operator result as is (elementwise for arrays)
+            op = ops[0]
+            right, right_value = self.compile(node.comparators[0])
+            if self.folding and left_value is not _DYNAMIC and right_value is not _DYNAMIC:
+                return _constant(op(left_value, right_value))
+            return (lambda env: op(left(env), right(env))), _DYNAMIC
+
+        funcs = [left]
+        for index, (op, child) in enumerate(zip(ops, node.comparators)):
+            if index and left_value is _DYNAMIC:
+                # Only runs while every comparison before it holds
+                funcs.append(self.compile_unfolded(child))
+                continue
+            right, right_value = self.compile(child)
+            funcs.append(right)
+            if not self.folding or left_value is _DYNAMIC or right_value is _DYNAMIC:
+                left_value = _DYNAMIC
+            elif not op(left_value, right_value):
+                # Known to fail: the comparators after it are only validated
+                for rest in node.comparators[index + 1:]:
+                    self.compile_unfolded(rest)
+                return _constant(False)
+            else:
+                left_value = right_value
+        if left_value is not _DYNAMIC:
+            return _constant(True)
+
+        pairs = list(zip(ops, funcs[:-1], funcs[1:]))
+
+        def evaluate(env):
+            # Chained comparison: a < b < c evaluates b only once
+            left = pairs[0][1](env)
+            for op, _, right_func in pairs:
+                right = right_func(env)
+                if not op(left, right):
+                    return False
+                left = right
+            return True
+
+        return evaluate, _DYNAMIC
+
+    def _compile_BoolOp(self, node: ast.BoolOp) -> Compiled:
+        is_and = isinstance(node.op, ast.And)
+        funcs = []
+        value = None
+        for index, child in enumerate(node.values):
+            if index and value is _DYNAMIC:
+                # Only runs when the operands before it do not decide the result
+                funcs.append(self.compile_unfolded(child))
+                continue
+            func, value = self.compile(child)
+            funcs.append(func)
+            if not self.folding:
+                value = _DYNAMIC
+            elif value is not _DYNAMIC and bool(value) != is_and:
+                # Decided at compile time: the operands after it are only validated
+                for rest in node.values[index + 1:]:
+                    self.compile_unfolded(rest)
+                return _constant(value)
+        if value is not _DYNAMIC:
+            return _constant(value)
+
+        def evaluate(env):
+            value = None
+            for func in funcs:
+                value = func(env)
+                if bool(value) != is_and:
+                    return value
+            return value
+
+        return evaluate, _DYNAMIC
+
+    def _compile_IfExp(self, node: ast.IfExp) -> Compiled:
+        test, test_value = self.compile(node.test)
+        if not self.folding or test_value is _DYNAMIC:
+            # Either branch may be skipped at run time, so neither is folded
+            body = self.compile_unfolded(node.body)
+            orelse = self.compile_unfolded(node.orelse)
+            return (lambda env: body(env) if test(env) else orelse(env)), _DYNAMIC
+        # Only the branch the constant test selects is folded; the other one is only validated
+        if test_value:
+            compiled = self.compile(node.body)
+            self.compile_unfolded(node.orelse)
+        else:
+            self.compile_unfolded(node.body)
+            compiled = self.compile(node.orelse)
+        return compiled
+
+    def _compile_Tuple(self, node: ast.Tuple) -> Compiled:
+        return self._compile_sequence(node.elts, tuple)
+
+    def _compile_List(self, node: ast.List) -> Compiled:
+        return self._compile_sequence(node.elts, list)
+
+    def _compile_sequence(self, elements, factory) -> Compiled:
+        items = [self.compile(child) for child in elements]
+        funcs = [func for func, _ in items]
+        if self.folding and all(value is not _DYNAMIC for _, value in items):
+            folded = [value for _, value in items]
+            # Lists are mutable, so hand out a fresh copy on every evaluation
+            return (lambda env: factory(folded)), factory(folded)
+        return (lambda env: factory([func(env) for func in funcs])), _DYNAMIC
+
+    def _compile_Call(self, node: ast.Call) -> Compiled:
+        if not isinstance(node.func, ast.Name) or node.func.id not in self.namespace:
+            raise ExpressionError("Only whitelisted functions can be called")
+        function = self.namespace[node.func.id]
+        if not callable(function):
+            raise ExpressionError(f"'{node.func.id}' is not callable")
+        if any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise ExpressionError("Unsupported expression element: Starred")
+        if any(keyword.arg is None for keyword in node.keywords):
+            raise ExpressionError("Unsupported expression element: **kwargs")
+
+        args = [self.compile(arg) for arg in node.args]
+        kwargs = [(keyword.arg, self.compile(keyword.value)) for keyword in node.keywords]
+        if self.folding and all(value is not _DYNAMIC for _, value in args) and all(
+            value is not _DYNAMIC for _, (_, value) in kwargs
+        ):
+            return _constant(function(
+                *[value for _, value in args],
+                **{name: value for name, (_, value) in kwargs}
+            ))
+
+        arg_funcs = [func for func, _ in args]
+        if not kwargs:
+            if len(arg_funcs) == 1:
+                only = arg_funcs[0]
+                return (lambda env: function(only(env))), _DYNAMIC
+            return (lambda env: function(*[func(env) for func in arg_funcs])), _DYNAMIC
+        kwarg_funcs = [(name, func) for name, (func, _) in kwargs]
+        return (lambda env: function(
+            *[func(env) for func in arg_funcs],
+            **{name: func(env) for name, func in kwarg_funcs}
+        )), _DYNAMIC
+
+
+def parse(expression: str) -> ast.Expression:
+    """Parse expression text into an AST (eval mode)"""
+    try:
+        return ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from None
+
+
+def compile_expression(expression: str, namespace: Mapping[str, Any],
+                       variables: Optional[Iterable[str]] = None) -> CompiledExpression:
+    """Parse, validate, fold and compile an expression.
+
+    Names found in namespace are resolved at compile time. Any other name is a
+    free variable, which is only accepted when variables is given (an empty
+    iterable accepts any free variable name).
+    """
+    compiler = _Compiler(namespace, variables)
+    evaluate, value = compiler.compile(parse(expression))
+    return CompiledExpression(
+        expression,
+        evaluate,
+        tuple(compiler.free_variables),
+        value is not _DYNAMIC,
+    )
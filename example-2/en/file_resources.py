@@ -0,0 +1,156 @@
+# file_resources.py
+"""
+Files under a root directory as file:/// resources
+Memory-mapped slices for resources/read, sendfile(2) for /resources/stream
+"""
+import mimetypes
+import mmap
+import os
+import re
+from typing import Optional, Tuple, Union
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import anyio
+from starlette.responses import Response
+
+import zerocopy
+
+
+# Directory whose files are served as file:/// resources; unset, no files are exposed
+ROOT = os.environ.get("MCP_RESOURCE_ROOT", "")
+
+# Most bytes one resources/read returns; larger files are read in ?range=START-END slices
+MAX_READ = int(os.environ.get("MCP_RESOURCE_MAX_READ", str(16 * 1024 * 1024)))
+
+# File URIs name paths relative to the root, as if it were /
+URI_PREFIX = "file:///"
+
+# Returned to MCP clients as text; everything else travels as a base64 blob
+TEXT_TYPES = ("text/", "application/json", "application/xml", "application/x-ndjson")
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+mimetypes.add_type("text/plain", ".log")
+
+
+class FileNotFound(ValueError):
+    """Raised for a URI that names no file under the root"""
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a range starts past the end of the file"""
+
+    def __init__(self, size: int):
+        super().__init__(f"Range not satisfiable (file is {size} bytes)")
+        self.size = size
+
+
+def media_type(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First and last byte of a single-range `bytes=` header; None when it is ignored
+
+    Multiple ranges and malformed headers are ignored (the whole file is
+    sent), as RFC 9110 allows.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if size == 0:
+        raise RangeNotSatisfiable(size)
+    if first == "":
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            raise RangeNotSatisfiable(size)
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(size)
+    if end < start:
+        return None
+    return start, end
+
+
+def mmap_slice(path: str, start: int, end: int) -> bytes:
+    """Bytes start..end (inclusive) of a file, copied out of a read-only memory map
+
+    Only the pages of the slice are read from disk, so a window into a large
+    log costs the window, not the file.
+    """
+    with open(path, "rb") as file:
+        if start > end or os.fstat(file.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start:end + 1]
+
+
+class FileRoot:
+    """Files under a root directory as file:/// resources
+
+    The MCP read path returns memory-mapped slices: a whole file up to
+    max_read bytes, or the ?range=START-END part of a larger one. The HTTP
+    path hands the open file to the server, which sends it with sendfile(2).
+    Paths that resolve outside the root (.., symlinks) do not exist.
+    """
+
+    def __init__(self, root: str, max_read: int = MAX_READ):
+        self.root = os.path.realpath(root)
+        self.max_read = max_read
+
+    def uri(self, path: str) -> str:
+        return URI_PREFIX + quote(os.path.relpath(path, self.root).replace(os.sep, "/"))
+
+    def contains(self, path: str) -> bool:
+        """Whether path, symlinks resolved, is under the root"""
+        return os.path.commonpath([self.root, os.path.realpath(path)]) == self.root
+
+    def resolve(self, uri) -> Tuple[str, Optional[str]]:
+        """File a URI names and its ?range= value; raises FileNotFound for anything else"""
+        parts = urlsplit(str(uri))
+        if not str(uri).startswith(URI_PREFIX):
+            raise FileNotFound(f"Unknown resource: {uri}")
+        path = os.path.join(self.root, unquote(parts.path).lstrip("/"))
+        if not self.contains(path) or not os.path.isfile(path):
+            raise FileNotFound(f"Unknown resource: {uri}")
+        return path, parse_qs(parts.query).get("range", [None])[0]
+
+    def read(self, uri) -> Union[str, bytes]:
+        """Whole file, or its ?range=START-END bytes, for resources/read"""
+        path, query = self.resolve(uri)
+        size = os.path.getsize(path)
+        byte_range = parse_range(f"bytes={query}", size) if query else None
+        start, end = byte_range or (0, size - 1)
+        if end - start + 1 > self.max_read:
+            raise ValueError(f"{uri} is {size} bytes; read at most {self.max_read} at a time "
+                             f"with ?range=START-END, or stream it from /resources/stream")
+        data = mmap_slice(path, start, end)
+        if media_type(path).startswith(TEXT_TYPES):
+            # A slice may cut a UTF-8 sequence in two
+            return data.decode("utf-8", errors="replace")
+        return data
+
+    async def read_in_thread(self, uri) -> Union[str, bytes]:
+        """read() in a worker thread, so copying up to max_read bytes out of the map does not block the event loop"""
+        return await anyio.to_thread.run_sync(self.read, uri)
+
+    def response(self, uri, range_header: Optional[str] = None) -> Response:
+        """File bytes over HTTP, sent with sendfile(2); a single byte Range gets 206"""
+        path, _ = self.resolve(uri)
+        file = open(path, "rb")
+        try:
+            size = os.fstat(file.fileno()).st_size
+            byte_range = parse_range(range_header, size) if range_header else None
+        except BaseException:
+            file.close()
+            raise
+        headers = {"Accept-Ranges": "bytes"}
+        if byte_range is None:
+            return zerocopy.FileSendResponse(file, 0, size, headers=headers, media_type=media_type(path))
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return zerocopy.FileSendResponse(file, start, end - start + 1, status_code=206, headers=headers,
+                                         media_type=media_type(path))
@@ -0,0 +1,176 @@
+# prompt_engine.py
+"""
+Prompt templates parsed once, and an LRU cache of rendered prompts/get results
+Repeated requests with the same arguments are answered from the cache
+"""
+import os
+import string
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+
+from mcp import types
+from mcp.server import Server
+
+
+class PromptTemplate:
+    """Prompt text with {name} placeholders, parsed once
+
+    The template is split into literal pieces and argument slots when it is
+    created. render() fills the slots into a copy of that list and joins it,
+    so each argument is copied exactly once, straight into the result,
+    without re-reading the template or building intermediate strings.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._pieces: List[Optional[str]] = []
+        self._slots: List[Tuple[int, str]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if literal:
+                self._pieces.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"Unsupported placeholder in prompt template: {{{field}}}")
+            self._slots.append((len(self._pieces), field))
+            self._pieces.append(None)
+        self.fields = tuple(dict.fromkeys(field for _, field in self._slots))
+
+    def render(self, arguments: Mapping[str, Any]) -> str:
+        """Template text with every placeholder replaced; KeyError for a missing argument"""
+        pieces = self._pieces.copy()
+        for index, field in self._slots:
+            pieces[index] = str(arguments[field])
+        return "".join(pieces)
+
+
+# A GetPromptResult, or whatever a prompt handler returns for one
+PromptResult = Any
+
+class PromptKey(tuple):
+    """Prompt name and argument strings as a dict key, hashed in full once
+
+    The hash covers every character and is computed when the key is built,
+    then kept: the dict lookup, the LRU move and a later eviction reuse it
+    instead of hashing a 100 KB argument again. A lookup whose hash matches
+    is confirmed by comparing the strings in full (a memcmp).
+    """
+
+    def __new__(cls, parts):
+        key = super().__new__(cls, parts)
+        key._hash = tuple.__hash__(key)
+        return key
+
+    def __hash__(self) -> int:
+        return self._hash
+
+
+class PromptCache:
+    """Rendered GetPromptResult objects keyed by a hash of the prompt name and arguments
+
+    Agents resend the same arguments (a whole code block) many times in a
+    review loop; a repeat gets the stored result instead of a new render. Keys
+    are PromptKeys: hashed in full once, compared in full.
+    The least recently used results are dropped once the text they hold,
+    arguments included, exceeds max_bytes. Stored results are shared
+    between requests: treat them as read-only.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        # Key -> [size, result]
+        self._entries: "OrderedDict[PromptKey, list]" = OrderedDict()
+        self._bytes = 0
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(name: str, arguments: Optional[Mapping[str, Any]]) -> PromptKey:
+        """Name, argument names and values as one flat key (str() returns a str argument as is)"""
+        return PromptKey((name, *(str(item) for pair in sorted((arguments or {}).items()) for item in pair)))
+
+    @staticmethod
+    def size(key: PromptKey, result: PromptResult) -> int:
+        """Characters of text an entry holds, key included (the bulk of its memory)"""
+        messages = getattr(result, "messages", [])
+        text = sum(len(getattr(message.content, "text", "")) for message in messages)
+        return text + sum(len(part) for part in key) + 256
+
+    def _lookup(self, key: PromptKey) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: PromptKey, result: PromptResult) -> list:
+        entry = [self.size(key, result), result]
+        if entry[0] <= self.max_bytes:
+            # Another request may have stored the same prompt meanwhile
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self._bytes -= replaced[0]
+            self._entries[key] = entry
+            self._grow(entry[0])
+        return entry
+
+    def _grow(self, size: int):
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted[0]
+            self.evictions += 1
+
+    async def get(self, name: str, arguments: Optional[Mapping[str, Any]],
+                  render: Callable[[], Awaitable[PromptResult]]) -> PromptResult:
+        """Stored result for these arguments, rendering it on a miss"""
+        key = self.key(name, arguments)
+        entry = self._lookup(key) or self._store(key, await render())
+        return entry[1]
+
+    def get_sync(self, name: str, arguments: Optional[Mapping[str, Any]],
+                 render: Callable[[], PromptResult]) -> PromptResult:
+        """get() for synchronous renderers"""
+        key = self.key(name, arguments)
+        entry = self._lookup(key) or self._store(key, render())
+        return entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit ratio, size and evictions"""
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions
+        }
+
+
+# Cache shared by the server's prompts, sized from the environment
+cache = PromptCache(max_bytes=int(os.environ.get("MCP_PROMPT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
+
+
+def cache_prompts(server: Server, prompt_cache: PromptCache = cache):
+    """Answer the server's prompts/get requests from prompt_cache, rendering only on a miss"""
+    handler = server.request_handlers[types.GetPromptRequest]
+
+    async def cached(request: types.GetPromptRequest):
+        async def render():
+            return (await handler(request)).root
+
+        params = request.params
+        return types.ServerResult(await prompt_cache.get(params.name, params.arguments, render))
+
+    server.request_handlers[types.GetPromptRequest] = cached
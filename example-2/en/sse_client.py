@@ -5,28 +5,53 @@ Implemented based on Medium article examples
 """
 
 import asyncio
-from mcp import ClientSession
+import os
+import sys
+import httpx
+from mcp import ClientSession, types
 from mcp.client.sse import sse_client
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional
+import http2
 
 
 class MCPSseClient:
     """SSE-based MCP client"""
     
-    def __init__(self, server_url: str = "http://localhost:8080/sse"):
+    def __init__(self, server_url: str = "http://localhost:8080/sse", http2: bool = False, uds: str = ""):
         self.server_url = server_url
         self.session = None
+        # HTTP/2 mode: the SSE stream and every POST share one h2c connection (server started with MCP_HTTP2=1)
+        self.http2 = http2
+        # Unix domain socket of a server on this host (MCP_UDS); server_url then only names the host
+        self.uds = uds
+        self.connection = None
+        # Resources the server reports as updated (resources/subscribe)
+        self.updates = ResourceUpdates()
+    
+    def httpx_client_factory(self, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None,
+                             auth: Optional[httpx.Auth] = None) -> httpx.AsyncClient:
+        """httpx client for sse_client, over the Unix socket when one is set"""
+        transport = httpx.AsyncHTTPTransport(uds=self.uds) if self.uds else None
+        return httpx.AsyncClient(headers=headers, timeout=timeout or httpx.Timeout(30.0), auth=auth,
+                                 follow_redirects=True, transport=transport)
     
     async def connect(self) -> bool:
         """Connect to MCP server"""
         try:
-            print(f"🔌 Connecting to SSE server: {self.server_url}")
+            print(f"🔌 Connecting to SSE server: {self.server_url}" + (f" (unix:{self.uds})" if self.uds else ""))
             
             # Create connection through SSE transport
-            self.streams = await sse_client(url=self.server_url).__aenter__()
+            if self.http2:
+                self.connection = http2.Http2Pool(uds=self.uds)
+                self._streams_context = sse_client(
+                    url=self.server_url, httpx_client_factory=self.connection.client_factory)
+            else:
+                self._streams_context = sse_client(url=self.server_url, httpx_client_factory=self.httpx_client_factory)
+            self.streams = await self._streams_context.__aenter__()
             
             # Create client session
-            self.session = ClientSession(*self.streams)
+            self.session = ClientSession(*self.streams, message_handler=self._on_message)
             await self.session.__aenter__()
             
             # Initialize session
@@ -44,8 +69,10 @@ class MCPSseClient:
         try:
             if self.session:
                 await self.session.__aexit__(None, None, None)
-            if hasattr(self, 'streams'):
-                await self.streams.__aexit__(None, None, None)
+            if hasattr(self, '_streams_context'):
+                await self._streams_context.__aexit__(None, None, None)
+            if self.connection:
+                await self.connection.aclose()
             print("🔌 SSE server connection closed.")
         except Exception as e:
             print(f"⚠️ Error during disconnection: {e}")
@@ -102,6 +129,48 @@ class MCPSseClient:
             print(f"❌ Failed to read resource: {e}")
             return ""
     
+    async def _on_message(self, message):
+        """Queue notifications/resources/updated for subscribe()"""
+        if (isinstance(message, types.ServerNotification)
+                and isinstance(message.root, types.ResourceUpdatedNotification)):
+            self.updates.put(str(message.root.params.uri))
+    
+    @asynccontextmanager
+    async def subscribe(self, *uris: str) -> AsyncIterator["ResourceUpdates"]:
+        """Subscribe to resources; yields an async iterator of the URIs that change, unsubscribing on exit
+
+        The server coalesces a burst of changes to a resource into one
+        update, so iterating replaces polling read_resource in a loop.
+        """
+        for uri in uris:
+            await self.session.subscribe_resource(uri)
+        print(f"🔔 Subscribed to {len(uris)} resource(s): {', '.join(uris)}")
+        try:
+            yield self.updates
+        finally:
+            for uri in uris:
+                await self.session.unsubscribe_resource(uri)
+    
+    async def update_settings(self, changes: Dict[str, Any], token: Optional[str] = None) -> Optional[int]:
+        """Change settings through POST /settings with the admin token; returns config://settings' new version"""
+        token = token or os.environ.get("MCP_ADMIN_TOKEN")
+        if not token:
+            print("⚙️ POST /settings needs MCP_ADMIN_TOKEN, set for the server and this client")
+            return None
+        try:
+            url = self.server_url.rsplit("/sse", 1)[0] + "/settings"
+            async with self.httpx_client_factory() as http:
+                response = await http.post(url, json=changes, headers={"Authorization": f"Bearer {token}"})
+            result = response.json()
+            if response.status_code == 200:
+                print(f"⚙️ Settings updated, version: {result['version']}")
+                return result["version"]
+            print(f"❌ Failed to update settings: HTTP {response.status_code} - {result.get('error')}")
+            return None
+        except Exception as e:
+            print(f"❌ Failed to update settings: {e}")
+            return None
+    
     async def list_prompts(self) -> List[Dict[str, Any]]:
         """Get list of available prompts"""
         try:
@@ -129,12 +198,31 @@ class MCPSseClient:
             return ""
 
 
-async def test_sse_client():
+class ResourceUpdates:
+    """Async iterator of the URIs of updated resources, one per coalesced change
+
+    Waiting on it can time out (asyncio.wait_for) without ending the iteration.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, uri: str):
+        self._queue.put_nowait(uri)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._queue.get()
+
+
+async def test_sse_client(http2: bool = False, uds: str = ""):
     """SSE client test"""
-    print("🚀 SSE MCP client test started")
+    print("🚀 SSE MCP client test started" + (" (HTTP/2)" if http2 else ""))
     print("=" * 60)
     
-    client = MCPSseClient()
+    client = MCPSseClient(http2=http2, uds=uds)
     
     try:
         # Connect to server
@@ -191,6 +279,18 @@ async def test_sse_client():
                 "language": "python"
             })
         
+        print("\n7️⃣ Resource subscription test")
+        async with client.subscribe("config://settings") as updates:
+            # Two changes in a row arrive as one notification
+            if await client.update_settings({"debug_mode": False}) is not None:
+                await client.update_settings({"debug_mode": True})
+                try:
+                    # Pushed by the server when the settings change; nothing is polled meanwhile
+                    uri = await asyncio.wait_for(anext(updates), timeout=2)
+                    print(f"📨 Resource updated: {uri}")
+                except asyncio.TimeoutError:
+                    print("🔕 No updates within 2 seconds")
+        
         print("\n✅ All SSE tests completed!")
         
     except Exception as e:
@@ -200,4 +300,6 @@ async def test_sse_client():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_sse_client())
+    # python sse_client.py --http2 talks to a server started with MCP_HTTP2=1 over one h2c connection;
+    # MCP_UDS=/path/to/socket connects through the server's Unix domain socket instead of TCP
+    asyncio.run(test_sse_client("--http2" in sys.argv, os.environ.get("MCP_UDS", "")))
@@ -4,17 +4,32 @@ SSE-based MCP server using FastMCP
 Implemented based on Medium article examples
 """
 
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 from mcp.server.sse import SseServerTransport
 from mcp.server import Server
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import JSONResponse
 from starlette.routing import Mount, Route
 from starlette.middleware.cors import CORSMiddleware
-import uvicorn
-import math
+import contextlib
 import json
-from typing import Dict, Any, List
+import os
+import admin
+import admission
+import calculation_session
+import cancellation
+import compression
+import cost_estimator
+import evaluation_pool
+import file_resources
+import prompt_engine
+import resource_cache
+import resource_index
+import runtime
+import subscriptions
+import vectorized
+from typing import Dict, Any, List, Optional
 
 # Create MCP server
 mcp = FastMCP("SSE Example Server")
@@ -36,20 +51,47 @@ def multiply(a: float, b: float) -> str:
     return f"The product of {a} and {b} is {result}"
 
 @mcp.tool()
-def calculate(expression: str) -> str:
+async def calculate(expression: str) -> str:
     """Calculate mathematical expression (safe calculation)"""
     try:
-        # Only allow limited functions for safe calculation
-        allowed_names = {
-            k: v for k, v in math.__dict__.items() if not k.startswith("__")
-        }
-        allowed_names.update({"abs": abs, "round": round, "min": min, "max": max})
-        
-        result = eval(expression, {"__builtins__": {}}, allowed_names)
+        # Rejected up front, without tying up a worker, when the estimated cost is over budget
+        cost_estimator.check(expression)
+        # Evaluated in a worker process so a runaway expression cannot block the event loop
+        result = await evaluation_pool.pool.evaluate(expression)
         return f"Calculation result: {result}"
     except Exception as e:
         return f"Calculation error: {str(e)}"
 
+@mcp.tool()
+async def calculate_batch(
+    expression: str = "",
+    variables: Optional[Dict[str, List[float]]] = None,
+    expressions: Optional[List[str]] = None
+) -> str:
+    """Evaluate an expression over named variable arrays in one vectorized pass"""
+    try:
+        # Evaluated in a thread so a large batch cannot block the event loop
+        return await vectorized.run_batch(expression, variables, expressions)
+    except Exception as e:
+        return f"Calculation error: {str(e)}"
+
+@mcp.tool()
+async def calculate_session(
+    statements: Optional[List[str]] = None,
+    remove: Optional[List[str]] = None,
+    reset: bool = False,
+    ctx: Context = None
+) -> str:
+    """Define named cells ('x = 3', 'y = sqrt(x) * 2') kept for this session; only dependent cells are recomputed"""
+    try:
+        session = calculation_session.store.get(ctx.session)
+        # Recomputed in a thread so a long update cannot block the event loop
+        result = await calculation_session.run_session(session, statements, remove, reset)
+        calculation_session.store.enforce_limits()
+        return calculation_session.format_result(result)
+    except Exception as e:
+        return f"Calculation error: {str(e)}"
+
 @mcp.tool()
 def get_system_info() -> str:
     """Return system information"""
@@ -81,25 +123,40 @@ def get_server_status() -> str:
         "uptime": time.time(),
         "cpu_percent": psutil.cpu_percent(),
         "memory_percent": psutil.virtual_memory().percent,
+        "evaluation_pool": evaluation_pool.pool.stats(),
+        "calculation_sessions": calculation_session.store.stats(),
         "status": "running"
     }
     
     return f"Server Status:\n{json.dumps(status, indent=2)}"
 
+# Server configuration served as config://settings; change it through update_settings
+# (or POST /settings, which is only served with MCP_ADMIN_TOKEN set; see admin.py)
+settings = {
+    "server_name": "SSE Example Server",
+    "version": "1.0.0",
+    "features": ["tools", "resources", "prompts", "sse"],
+    "max_connections": 1000,
+    "debug_mode": True,
+    "sse_endpoint": "/sse"
+}
+
 @mcp.resource("config://settings")
+@resource_cache.cache.cached("config://settings")
 def get_config() -> str:
-    """Return configuration file resource"""
-    config = {
-        "server_name": "SSE Example Server",
-        "version": "1.0.0",
-        "features": ["tools", "resources", "prompts", "sse"],
-        "max_connections": 1000,
-        "debug_mode": True,
-        "sse_endpoint": "/sse"
-    }
-    return json.dumps(config, indent=2)
+    """Return configuration file resource (rendered once per version)"""
+    return json.dumps(settings, indent=2)
+
+def update_settings(changes: Dict[str, Any]) -> int:
+    """Apply changes to the configuration; returns the resource's new version"""
+    settings.update(changes)
+    return resource_cache.cache.invalidate("config://settings")
+
+# Subscribers to a resource are told when it changes (coalesced) instead of polling it
+resource_cache.cache.on_invalidate(subscriptions.hub.changed)
 
 @mcp.resource("file://readme")
+@resource_cache.cache.cached("file://readme")
 def get_readme() -> str:
     """Return README resource"""
     return """
@@ -112,6 +169,8 @@ This server is an SSE-based MCP server implemented using FastMCP.
 - add: Add two numbers
 - multiply: Multiply two numbers
 - calculate: Calculate mathematical expressions
+- calculate_batch: Evaluate an expression over variable arrays (NumPy)
+- calculate_session: Incremental calculation with named cells (per session)
 - get_system_info: Get system information
 - echo: Return message
 - get_server_status: Get server status
@@ -129,10 +188,22 @@ This server is an SSE-based MCP server implemented using FastMCP.
 - /messages/: Message processing endpoint
 """
 
-@mcp.prompt("code_review")
-def code_review_prompt(code: str, language: str = "python") -> str:
-    """Generate prompt for code review"""
-    return f"""
+# Files under MCP_RESOURCE_ROOT as file:///path resources; ?range=START-END reads part of a large file
+files = file_resources.FileRoot(file_resources.ROOT) if file_resources.ROOT else None
+
+# Listed from an index that inotify keeps current: resources/list never walks the tree
+index = resource_index.ResourceIndex(files) if files is not None else None
+if index is not None:
+    index.on_change(lambda changed: subscriptions.hub.changed(*changed))
+
+if files is not None:
+    @mcp.resource("file:///{path*}", name="file", description="File under the resource root")
+    async def read_file(path: str) -> str | bytes:
+        """Return a file, or a slice of it, copied out of a memory map in a worker thread"""
+        return await files.read_in_thread(file_resources.URI_PREFIX + path)
+
+# Prompt templates, parsed once; rendering copies the code straight into the prompt text
+CODE_REVIEW = prompt_engine.PromptTemplate("""
 Please review the following {language} code:
 
 ```{language}
@@ -147,12 +218,9 @@ Please check the following items:
 5. Improvement suggestions
 
 Please provide specific feedback for each item.
-"""
+""")
 
-@mcp.prompt("explain_code")
-def explain_code_prompt(code: str, language: str = "python") -> str:
-    """Generate prompt for code explanation"""
-    return f"""
+EXPLAIN_CODE = prompt_engine.PromptTemplate("""
 Please explain in detail what the following {language} code does:
 
 ```{language}
@@ -165,11 +233,36 @@ Please include the following:
 3. Algorithms or patterns used
 4. Input and output
 5. Example usage
-"""
+""")
+
+@mcp.prompt("code_review")
+def code_review_prompt(code: str, language: str = "python") -> str:
+    """Generate prompt for code review"""
+    return CODE_REVIEW.render({"code": code, "language": language})
+
+@mcp.prompt("explain_code")
+def explain_code_prompt(code: str, language: str = "python") -> str:
+    """Generate prompt for code explanation"""
+    return EXPLAIN_CODE.render({"code": code, "language": language})
+
+# Response compression: bodies smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.environ.get("MCP_COMPRESSION_MIN_SIZE", "1024"))
+
 
 def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
     """Create Starlette application that provides MCP server through SSE"""
     sse = SseServerTransport("/messages/")
+    # Tool calls run under per-tool time budgets (the admission slot is taken first, outside the budget)
+    cancellation.track_requests(mcp_server)
+    # Tool calls and prompt renders run in admitted slots; bursts are shed instead of queued without bound
+    admission.admit_requests(mcp_server)
+    # Repeated prompts/get requests (the same code resent) are answered from the prompt cache without taking a slot
+    prompt_engine.cache_prompts(mcp_server)
+    # resources/subscribe, answered with notifications/resources/updated
+    subscriptions.hub.attach(mcp_server)
+    if index is not None:
+        # The files under the resource root are listed from the index, after the server's own resources
+        resource_index.list_resources_from(mcp_server, index)
 
     async def handle_sse(request: Request) -> None:
         async with sse.connect_sse(
@@ -177,19 +270,77 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
                 request.receive,
                 request._send,
         ) as (read_stream, write_stream):
-            await mcp_server.run(
-                read_stream,
-                write_stream,
-                mcp_server.create_initialization_options(),
-            )
+            # Dropping the SSE connection cancels the session's in-flight tool calls
+            await cancellation.run_session(mcp_server, read_stream, write_stream)
+
+    async def handle_metrics(request: Request) -> JSONResponse:
+        """Return server metrics"""
+        return JSONResponse({
+            "evaluation_pool": evaluation_pool.pool.stats(),
+            "admission": admission.controller.stats(),
+            "tool_calls": cancellation.tracker.stats(),
+            "calculation_sessions": calculation_session.store.stats(),
+            "compression": compression.stats.stats(),
+            "resource_cache": resource_cache.cache.stats(),
+            "resource_index": index.stats() if index is not None else None,
+            "subscriptions": subscriptions.hub.stats(),
+            "prompt_cache": prompt_engine.cache.stats(),
+            "runtime": runtime.stats()
+        })
+
+    async def handle_settings_update(request: Request) -> JSONResponse:
+        """Change settings (admin token required); subscribers to config://settings are notified"""
+        if not admin.authorized(request.headers):
+            return JSONResponse({"error": "Unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        try:
+            changes = await request.json()
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        error = admin.invalid_changes(changes, settings)
+        if error:
+            return JSONResponse({"error": error}, status_code=400)
+        return JSONResponse({"version": update_settings(changes)})
+
+    async def handle_resource_stream(request: Request):
+        """Send a file resource's raw bytes with sendfile; a `Range: bytes=` header gets 206 with just that part"""
+        uri = request.query_params.get("uri")
+        if not uri:
+            return JSONResponse({"error": "URI is required"}, status_code=400)
+        if files is None:
+            return JSONResponse({"error": "No resource root is configured (MCP_RESOURCE_ROOT)"}, status_code=404)
+        try:
+            return files.response(uri, request.headers.get("range"))
+        except file_resources.FileNotFound as e:
+            return JSONResponse({"error": str(e)}, status_code=404)
+        except file_resources.RangeNotSatisfiable as e:
+            return JSONResponse({"error": str(e)}, status_code=416, headers={"Content-Range": f"bytes */{e.size}"})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        """Start the calculator worker pool (and the file index) with the app and stop them on shutdown"""
+        evaluation_pool.pool.start()
+        if index is not None:
+            await index.start()
+        try:
+            yield
+        finally:
+            if index is not None:
+                index.stop()
+            evaluation_pool.pool.shutdown()
 
     # Add CORS middleware
     app = Starlette(
         debug=debug,
         routes=[
             Route("/sse", endpoint=handle_sse),
-            Mount("/messages/", app=sse.handle_post_message),
+            # Gated: a tool call or prompt render is turned away with 503 while the controller is shedding
+            Mount("/messages/", app=admission.MessageGate(sse.handle_post_message)),
+            Route("/metrics", endpoint=handle_metrics),
+            Route("/resources/stream", endpoint=handle_resource_stream),
+            # Settings writes are off unless an admin token is set
+            *([Route("/settings", endpoint=handle_settings_update, methods=["POST"])] if admin.ADMIN_TOKEN else []),
         ],
+        lifespan=lifespan,
     )
     
     app.add_middleware(
@@ -199,9 +350,17 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
         allow_methods=["*"],
         allow_headers=["*"],
     )
+
+    # Compress large responses; the SSE stream carrying MCP messages passes through untouched
+    app.add_middleware(compression.CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
     
     return app
 
+
+def create_app() -> Starlette:
+    """Application factory for launcher.py (python launcher.py sse_server:create_app)"""
+    return create_starlette_app(mcp._mcp_server)
+
 if __name__ == "__main__":
     # Get MCP server instance
     mcp_server = mcp._mcp_server
@@ -212,9 +371,10 @@ if __name__ == "__main__":
     port = 8080
     print(f"Starting MCP server with SSE transport on port {port}...")
     print(f"SSE endpoint available at: http://localhost:{port}/sse")
-    print("Available tools: greet, add, multiply, calculate, get_system_info, echo, get_server_status")
+    print("Available tools: greet, add, multiply, calculate, calculate_batch, calculate_session, get_system_info, echo, get_server_status")
     print("Available resources: config://settings, file://readme")
     print("Available prompts: code_review, explain_code")
 
-    # Run server using uvicorn
-    uvicorn.run(starlette_app, host="0.0.0.0", port=port)
+    # Run server using uvicorn; uvloop / httptools when installed, unless MCP_LOOP / MCP_HTTP ask otherwise.
+    # MCP_HTTP2=1 runs it on Hypercorn with h2c next to HTTP/1.1
+    runtime.serve(starlette_app, "0.0.0.0", port)
@@ -4,10 +4,16 @@ STDIO-based MCP server using FastMCP
 Implemented based on Medium article examples
 """
 
-from fastmcp import FastMCP
-import math
+from fastmcp import FastMCP, Context
 import json
-from typing import Dict, Any, List
+import calculation_session
+import cost_estimator
+import evaluation_pool
+import prompt_engine
+import resource_cache
+import subscriptions
+import vectorized
+from typing import Dict, Any, List, Optional
 
 # Create MCP server
 mcp = FastMCP("STDIO Example Server")
@@ -29,20 +35,47 @@ def multiply(a: float, b: float) -> str:
     return f"The product of {a} and {b} is {result}"
 
 @mcp.tool()
-def calculate(expression: str) -> str:
+async def calculate(expression: str) -> str:
     """Calculate mathematical expression (safe calculation)"""
     try:
-        # Only allow limited functions for safe calculation
-        allowed_names = {
-            k: v for k, v in math.__dict__.items() if not k.startswith("__")
-        }
-        allowed_names.update({"abs": abs, "round": round, "min": min, "max": max})
-        
-        result = eval(expression, {"__builtins__": {}}, allowed_names)
+        # Rejected up front, without tying up a worker, when the estimated cost is over budget
+        cost_estimator.check(expression)
+        # Evaluated in a worker process so a runaway expression cannot block the event loop
+        result = await evaluation_pool.pool.evaluate(expression)
         return f"Calculation result: {result}"
     except Exception as e:
         return f"Calculation error: {str(e)}"
 
+@mcp.tool()
+async def calculate_batch(
+    expression: str = "",
+    variables: Optional[Dict[str, List[float]]] = None,
+    expressions: Optional[List[str]] = None
+) -> str:
+    """Evaluate an expression over named variable arrays in one vectorized pass"""
+    try:
+        # Evaluated in a thread so a large batch cannot block the event loop
+        return await vectorized.run_batch(expression, variables, expressions)
+    except Exception as e:
+        return f"Calculation error: {str(e)}"
+
+@mcp.tool()
+async def calculate_session(
+    statements: Optional[List[str]] = None,
+    remove: Optional[List[str]] = None,
+    reset: bool = False,
+    ctx: Context = None
+) -> str:
+    """Define named cells ('x = 3', 'y = sqrt(x) * 2') kept for this session; only dependent cells are recomputed"""
+    try:
+        session = calculation_session.store.get(ctx.session)
+        # Recomputed in a thread so a long update cannot block the event loop
+        result = await calculation_session.run_session(session, statements, remove, reset)
+        calculation_session.store.enforce_limits()
+        return calculation_session.format_result(result)
+    except Exception as e:
+        return f"Calculation error: {str(e)}"
+
 @mcp.tool()
 def get_system_info() -> str:
     """Return system information"""
@@ -63,19 +96,32 @@ def echo(message: str) -> str:
     """Return the input message as is"""
     return f"Echo: {message}"
 
+# Server configuration served as config://settings; change it through update_settings
+settings = {
+    "server_name": "STDIO Example Server",
+    "version": "1.0.0",
+    "features": ["tools", "resources", "prompts"],
+    "max_connections": 100,
+    "debug_mode": True
+}
+
 @mcp.resource("config://settings")
+@resource_cache.cache.cached("config://settings")
 def get_config() -> str:
-    """Return configuration file resource"""
-    config = {
-        "server_name": "STDIO Example Server",
-        "version": "1.0.0",
-        "features": ["tools", "resources", "prompts"],
-        "max_connections": 100,
-        "debug_mode": True
-    }
-    return json.dumps(config, indent=2)
+    """Return configuration file resource (rendered once per version)"""
+    return json.dumps(settings, indent=2)
+
+def update_settings(changes: Dict[str, Any]) -> int:
+    """Apply changes to the configuration; returns the resource's new version"""
+    settings.update(changes)
+    return resource_cache.cache.invalidate("config://settings")
+
+# Subscribers to a resource are told when it changes (coalesced) instead of polling it
+resource_cache.cache.on_invalidate(subscriptions.hub.changed)
+subscriptions.hub.attach(mcp._mcp_server)
 
 @mcp.resource("file://readme")
+@resource_cache.cache.cached("file://readme")
 def get_readme() -> str:
     """Return README resource"""
     return """
@@ -88,6 +134,8 @@ This server is a STDIO-based MCP server implemented using FastMCP.
 - add: Add two numbers
 - multiply: Multiply two numbers
 - calculate: Calculate mathematical expressions
+- calculate_batch: Evaluate an expression over variable arrays (NumPy)
+- calculate_session: Incremental calculation with named cells (per session)
 - get_system_info: Get system information
 - echo: Return message
 
@@ -96,10 +144,8 @@ This server is a STDIO-based MCP server implemented using FastMCP.
 - file://readme: This README file
 """
 
-@mcp.prompt("code_review")
-def code_review_prompt(code: str, language: str = "python") -> str:
-    """Generate prompt for code review"""
-    return f"""
+# Prompt templates, parsed once; rendering copies the code straight into the prompt text
+CODE_REVIEW = prompt_engine.PromptTemplate("""
 Please review the following {language} code:
 
 ```{language}
@@ -114,12 +160,9 @@ Please check the following items:
 5. Improvement suggestions
 
 Please provide specific feedback for each item.
-"""
+""")
 
-@mcp.prompt("explain_code")
-def explain_code_prompt(code: str, language: str = "python") -> str:
-    """Generate prompt for code explanation"""
-    return f"""
+EXPLAIN_CODE = prompt_engine.PromptTemplate("""
 Please explain in detail what the following {language} code does:
 
 ```{language}
@@ -132,13 +175,29 @@ Please include the following:
 3. Algorithms or patterns used
 4. Input and output
 5. Example usage
-"""
+""")
+
+@mcp.prompt("code_review")
+def code_review_prompt(code: str, language: str = "python") -> str:
+    """Generate prompt for code review"""
+    return CODE_REVIEW.render({"code": code, "language": language})
+
+@mcp.prompt("explain_code")
+def explain_code_prompt(code: str, language: str = "python") -> str:
+    """Generate prompt for code explanation"""
+    return EXPLAIN_CODE.render({"code": code, "language": language})
+
+# Repeated prompts/get requests (the same code resent) are answered from the prompt cache
+prompt_engine.cache_prompts(mcp._mcp_server)
 
 if __name__ == "__main__":
     print("Starting MCP server with STDIO transport...")
-    print("Available tools: greet, add, multiply, calculate, get_system_info, echo")
+    print("Available tools: greet, add, multiply, calculate, calculate_batch, calculate_session, get_system_info, echo")
     print("Available resources: config://settings, file://readme")
     print("Available prompts: code_review, explain_code")
     
+    # Pre-warm the calculator worker processes
+    evaluation_pool.pool.start()
+
     # run() method uses stdio by default
     mcp.run()
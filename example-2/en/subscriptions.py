@@ -0,0 +1,181 @@
+# subscriptions.py
+"""
+resources/subscribe with coalesced notifications/resources/updated
+A burst of changes to a resource reaches each subscriber as one push
+"""
+import asyncio
+import contextlib
+import contextvars
+import os
+import threading
+from typing import Any, Dict, Optional, Set
+
+from mcp import types
+from mcp.server import Server
+from mcp.server.session import ServerSession
+
+
+class SubscriptionHub:
+    """resources/subscribe per MCP session, with coalesced notifications/resources/updated
+
+    changed(uri) only marks a subscribed resource as changed. The first
+    change opens a window of `window` seconds; when it closes, every
+    session subscribed to a changed resource gets one
+    notifications/resources/updated for it, however many changes the window
+    saw. A session that does not take a notification within send_timeout
+    seconds (or has gone away) loses its subscriptions, as does a session
+    whose server.run() returns. changed() may be called from any thread.
+    """
+
+    def __init__(self, window: float = 0.1, send_timeout: float = 5.0):
+        self.window = window
+        self.send_timeout = send_timeout
+        # Normalized URI -> {session: URI as the session subscribed to it}
+        self._subscribers: Dict[str, Dict[ServerSession, Any]] = {}
+        self._pending: Set[str] = set()
+        self._flush: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        # Loop the subscribers live on; changed() from other threads hands its flush to it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Sessions subscribed within the current server.run() (see session_scope)
+        self._scope: contextvars.ContextVar[Set[ServerSession]] = contextvars.ContextVar("subscription_scope")
+
+        # Metrics
+        self.changes = 0
+        self.notifications = 0
+        self.dropped = 0
+        self.ended = 0
+
+    @staticmethod
+    def _key(uri) -> str:
+        # Over an MCP session a URI arrives as a normalized URL (file://config.json/)
+        return str(uri).rstrip("/")
+
+    def subscribe(self, uri, session: ServerSession):
+        self._subscribers.setdefault(self._key(uri), {})[session] = uri
+
+    def unsubscribe(self, uri, session: ServerSession):
+        key = self._key(uri)
+        sessions = self._subscribers.get(key, {})
+        sessions.pop(session, None)
+        if not sessions:
+            self._subscribers.pop(key, None)
+
+    def drop(self, session: ServerSession):
+        """Forget every subscription of a session"""
+        for key in list(self._subscribers):
+            if session in self._subscribers[key]:
+                self.unsubscribe(key, session)
+
+    def changed(self, *uris):
+        """Mark resources as changed; subscribers hear about them once the window closes"""
+        with self._lock:
+            for uri in uris:
+                key = self._key(uri)
+                if key not in self._subscribers:
+                    continue
+                self.changes += 1
+                self._pending.add(key)
+            if not self._pending or self._loop is None:
+                return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._start_flush()
+        else:
+            # Called from sync code or another thread: the flush starts on the subscribers' loop
+            with contextlib.suppress(RuntimeError):  # the loop has closed
+                self._loop.call_soon_threadsafe(self._start_flush)
+
+    def _start_flush(self):
+        if self._flush is None or self._flush.done():
+            self._flush = self._loop.create_task(self._send_after_window())
+
+    async def _send_after_window(self):
+        await asyncio.sleep(self.window)
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        sends = [(session, uri) for key in pending for session, uri in self._subscribers.get(key, {}).items()]
+        results = await asyncio.gather(*(self._notify(session, uri) for session, uri in sends))
+        for (session, _), sent in zip(sends, results):
+            if not sent:
+                self.dropped += 1
+                self.drop(session)
+
+    async def _notify(self, session: ServerSession, uri) -> bool:
+        try:
+            await asyncio.wait_for(session.send_resource_updated(uri), self.send_timeout)
+        except Exception:
+            return False
+        self.notifications += 1
+        return True
+
+    @contextlib.contextmanager
+    def session_scope(self):
+        """Forget the subscriptions of the sessions run inside this block when it ends"""
+        sessions: Set[ServerSession] = set()
+        token = self._scope.set(sessions)
+        try:
+            yield
+        finally:
+            self._scope.reset(token)
+            for session in sessions:
+                self.ended += 1
+                self.drop(session)
+
+    def attach(self, server: Server):
+        """Handle resources/subscribe and resources/unsubscribe on server, and advertise them"""
+
+        @server.subscribe_resource()
+        async def subscribe_resource(uri):
+            session = server.request_context.session
+            self._loop = asyncio.get_running_loop()
+            # Request handlers run in tasks started by server.run(), which inherit its context
+            sessions = self._scope.get(None)
+            if sessions is not None:
+                sessions.add(session)
+            self.subscribe(uri, session)
+
+        @server.unsubscribe_resource()
+        async def unsubscribe_resource(uri):
+            self.unsubscribe(uri, server.request_context.session)
+
+        # Server.get_capabilities always reports subscribe=False
+        get_capabilities = server.get_capabilities
+
+        def with_subscribe(*args, **kwargs) -> types.ServerCapabilities:
+            capabilities = get_capabilities(*args, **kwargs)
+            if capabilities.resources is not None:
+                capabilities.resources.subscribe = True
+            return capabilities
+
+        server.get_capabilities = with_subscribe
+
+        # Every session's subscriptions end with its server.run(), whatever the transport
+        run = server.run
+
+        async def run_in_scope(*args, **kwargs):
+            with self.session_scope():
+                return await run(*args, **kwargs)
+
+        server.run = run_in_scope
+
+    def stats(self) -> Dict[str, Any]:
+        """Return subscription counts and how many changes were folded into each notification"""
+        sessions = {session for subscribers in self._subscribers.values() for session in subscribers}
+        return {
+            "resources": len(self._subscribers),
+            "subscriptions": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "sessions": len(sessions),
+            "window_ms": self.window * 1000,
+            "changes": self.changes,
+            "notifications": self.notifications,
+            "dropped_sessions": self.dropped,
+            "ended_sessions": self.ended
+        }
+
+
+# Hub shared by the server's resource providers; MCP_SUBSCRIPTION_WINDOW seconds of changes make one push
+hub = SubscriptionHub(window=float(os.environ.get("MCP_SUBSCRIPTION_WINDOW", "0.1")))
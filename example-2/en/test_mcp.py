@@ -5,13 +5,31 @@ Implemented based on Medium article examples
 """
 
 import asyncio
+import json
+import tempfile
 import subprocess
 import time
 import signal
 import sys
 import os
+from typing import List
 from stdio_client import MCPStdioClient
 from sse_client import MCPSseClient
+import cost_estimator
+import cost_cases
+import calculator
+import engine_cases
+import calculation_session
+
+
+# Printed for each outcome of cost_cases.run
+COST_MESSAGES = {
+    "rejected": "✅ Rejected in {ms:.2f} ms: {label} ({detail})",
+    "too_slow": "❌ Rejected too slowly ({ms:.1f} ms): {label}",
+    "not_rejected": "❌ Not rejected: {label}",
+    "accepted": "✅ Accepted: {label}",
+    "wrongly_rejected": "❌ Wrongly rejected: {label} ({detail})",
+}
 
 
 class MCPTester:
@@ -86,6 +104,8 @@ class MCPTester:
                 await self.stdio_client.call_tool("add", {"a": 15, "b": 25})
                 await self.stdio_client.call_tool("multiply", {"a": 3.14, "b": 2.0})
                 await self.stdio_client.call_tool("calculate", {"expression": "sqrt(144) + 2**3"})
+                await self.stdio_client.call_tool("calculate_session", {"statements": ["x = 3", "y = sqrt(x) * 2"]})
+                await self.stdio_client.call_tool("calculate_session", {"statements": ["x = 4"]})
                 await self.stdio_client.call_tool("echo", {"message": "STDIO FastMCP test"})
             
             # Resource test
@@ -133,6 +153,8 @@ class MCPTester:
                 await self.sse_client.call_tool("add", {"a": 100, "b": 200})
                 await self.sse_client.call_tool("multiply", {"a": 7.5, "b": 4.0})
                 await self.sse_client.call_tool("calculate", {"expression": "log(100) + sin(pi/2)"})
+                await self.sse_client.call_tool("calculate_session", {"statements": ["x = 3", "y = sqrt(x) * 2"]})
+                await self.sse_client.call_tool("calculate_session", {"statements": ["x = 4"]})
                 await self.sse_client.call_tool("get_server_status", {})
                 await self.sse_client.call_tool("echo", {"message": "SSE FastMCP test"})
             
@@ -160,6 +182,257 @@ class MCPTester:
             print(f"❌ SSE client test failed: {e}")
             return False
     
+    async def test_expression_engine(self):
+        """Expression engine test: the same results as eval()"""
+        print("\n" + "="*60)
+        print("🧮 Expression Engine Test")
+        print("="*60)
+        
+        passed = True
+        # The cases are in engine_cases.py
+        for same, expression, engine, python in engine_cases.run(calculator):
+            if same:
+                print(f"✅ {expression} → {engine}")
+            else:
+                print(f"❌ {expression}: engine {engine}, eval {python}")
+                passed = False
+        
+        print(f"{'✅' if passed else '❌'} Expression engine test completed")
+        return passed
+    
+    async def test_cost_estimator(self):
+        """Cost estimator test with adversarial expressions"""
+        print("\n" + "="*60)
+        print("🛡️ Cost Estimator Test")
+        print("="*60)
+        
+        passed = True
+        # The cases and the timing check are in cost_cases.py
+        for outcome, label, elapsed_ms, detail in cost_cases.run(cost_estimator):
+            print(COST_MESSAGES[outcome].format(label=label, ms=elapsed_ms, detail=detail))
+            if outcome not in cost_cases.PASSED:
+                passed = False
+        
+        print(f"{'✅' if passed else '❌'} Cost estimator test completed")
+        return passed
+    
+    async def test_calculation_session(self):
+        """Calculation session test: incremental recompute, cycles, removals and limits"""
+        print("\n" + "="*60)
+        print("🧩 Calculation Session Test")
+        print("="*60)
+        
+        session = calculation_session.CalculationSession()
+        session.update(["a = 1", "b = a * 2", "c = b + 1", "d = 5", "p = a > 0", "q = p * 10"])
+        checks = [self._check(session.snapshot(["b", "c", "q"]) == {"b": 2, "c": 3, "q": 10}, "Cells computed in dependency order")]
+        
+        before = session.evaluations
+        updated, _ = session.update(["a = 2"])
+        checks.append(self._check(
+            sorted(updated) == ["a", "b", "c"] and session.evaluations - before == 4 and session.snapshot(["c"]) == {"c": 5},
+            "Changing a recomputes b and c; q is skipped because p did not change"))
+        before = session.evaluations
+        session.update(["a = 2"])
+        checks.append(self._check(session.evaluations == before, "Unchanged definition recomputes nothing"))
+        
+        _, rejected = session.update(["a = c", "n = n + 1"])
+        checks.append(self._check(
+            len(rejected) == 2 and all("Cycle" in reason for reason in rejected.values())
+            and session.snapshot(["a"]) == {"a": 2},
+            "Cycles (through other cells and onto itself) are rejected and leave the cells as they were"))
+        
+        updated, _ = session.update(remove=["b"])
+        checks.append(self._check(
+            sorted(updated) == ["b", "c"] and session.snapshot(["c"]) == {"c": {"error": "name 'b' is not defined"}},
+            "Removing b turns its dependent c into an error"))
+        session.update(["b = a * 3"])
+        checks.append(self._check(session.snapshot(["c"]) == {"c": 7}, "Defining b again recomputes c"))
+        
+        session.update(["z = 0 and 1/0", "w = 1 if a else log(0)"])
+        checks.append(self._check(session.snapshot(["z", "w"]) == {"z": 0, "w": 1}, "Skipped operands are not evaluated"))
+        
+        _, rejected = session.update(["a = 3"], remove=["b"], deadline=time.monotonic() - 1)
+        checks.append(self._check(
+            rejected == {"a = 3": calculation_session.TIME_BUDGET_ERROR}
+            and session.snapshot(["a", "c"]) == {"a": 2, "c": {"error": calculation_session.TIME_BUDGET_ERROR}},
+            "Past the deadline, statements are rejected and dependent cells get an error instead of being computed"))
+        
+        store = calculation_session.SessionStore(max_sessions=4, max_bytes=4 * 1024 * 1024, max_cells=10)
+        checks.append(self._check(store.get(session).max_bytes == 1024 * 1024, "Each session gets its share of the store's memory"))
+        
+        passed = all(checks)
+        print(f"{'✅' if passed else '❌'} Calculation session test completed")
+        return passed
+    
+    @staticmethod
+    def _check(passed: bool, label: str) -> bool:
+        """Print one behavior check and return whether it passed"""
+        print(f"{'✅' if passed else '❌'} {label}")
+        return passed
+    
+    async def test_behavior(self):
+        """Status codes, caching and notifications, checked against the app in this process"""
+        print("\n" + "="*60)
+        print("🔬 Behavior Test (FastMCP)")
+        print("="*60)
+        
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "data.txt"), "w") as file:
+                file.write("0123456789" * 10)
+            # Read when the server modules are imported
+            os.environ["MCP_RESOURCE_ROOT"] = root
+            try:
+                return await self._check_behavior()
+            except Exception as e:
+                print(f"❌ Behavior test failed: {e!r}")
+                return False
+    
+    async def _check_behavior(self) -> bool:
+        """Run every behavior check against the app with its lifespan started"""
+        # The server modules are only needed here; the other tests talk to a server process
+        import httpx
+        import sse_server
+        
+        server = sse_server.mcp._mcp_server
+        app = sse_server.create_starlette_app(server)
+        checks = []
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                for check in (
+                    self._check_ranges,
+                    self._check_admission,
+                    self._check_timeouts,
+                    self._check_resource_cache,
+                    self._check_subscriptions,
+                ):
+                    checks.extend(await check(server, http))
+        
+        passed = all(checks)
+        print(f"{'✅' if passed else '❌'} Behavior test completed")
+        return passed
+    
+    async def _check_ranges(self, server, http) -> List[bool]:
+        """Byte ranges of a streamed resource"""
+        response = await http.get("/resources/stream", params={"uri": "file:///data.txt"},
+                                  headers={"Range": "bytes=10-19"})
+        checks = [self._check(response.status_code == 206 and response.content == b"0123456789",
+                              "Byte range: 206 with 10 bytes")]
+        response = await http.get("/resources/stream", params={"uri": "file:///data.txt"},
+                                  headers={"Range": "bytes=500-"})
+        checks.append(self._check(response.status_code == 416, "Range past the end: 416"))
+        return checks
+    
+    async def _check_admission(self, server, http) -> List[bool]:
+        """Calls are shed with a JSON-RPC error, and messages with 503, when the server is full"""
+        from mcp import McpError
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import admission
+        
+        async with create_connected_server_and_client_session(server) as session:
+            # The only slot is taken and nothing may queue, so calls are shed
+            shared = admission.controller
+            admission.controller = admission.AdmissionController(limit=1, queue_size=0)
+            try:
+                async with admission.controller.admit():
+                    try:
+                        await session.call_tool("echo", {"message": "shed"})
+                        shed = False
+                    except McpError as e:
+                        shed = e.error.code == admission.OVERLOADED_ERROR_CODE
+                    response = await http.post("/messages/?session_id=0", json={
+                        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                        "params": {"name": "echo", "arguments": {"message": "shed"}}})
+            finally:
+                admission.controller = shared
+        return [self._check(shed, "Overloaded: JSON-RPC error with retry_after"),
+                self._check(response.status_code == 503 and "Retry-After" in response.headers,
+                            "Overloaded message endpoint: 503 with Retry-After")]
+    
+    async def _check_timeouts(self, server, http) -> List[bool]:
+        """Calls over their time budget fail, calls whose client left are cancelled"""
+        import anyio
+        from mcp import ClientSession
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import cancellation
+        
+        async with create_connected_server_and_client_session(server) as session:
+            cancellation.tracker.timeouts["calculate"] = 0
+            try:
+                result = await session.call_tool("calculate", {"expression": "1 + 1"})
+            finally:
+                del cancellation.tracker.timeouts["calculate"]
+        checks = [self._check(result.isError and "time budget" in result.content[0].text,
+                              "Over the time budget: error result")]
+        
+        # A session whose client goes away cancels its in-flight call
+        client_write, server_read = anyio.create_memory_object_stream(0)
+        server_write, client_read = anyio.create_memory_object_stream(0)
+        cancelled = cancellation.tracker.cancelled
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(cancellation.run_session, server, server_read, server_write)
+            async with ClientSession(client_read, client_write) as session:
+                await session.initialize()
+                call = asyncio.ensure_future(session.call_tool("calculate", {"expression": "factorial(50000)"}))
+                while not cancellation.tracker.in_flight:
+                    await asyncio.sleep(0)
+                await client_write.aclose()
+                with anyio.move_on_after(2):
+                    while cancellation.tracker.cancelled == cancelled:
+                        await asyncio.sleep(0.01)
+                call.cancel()
+        checks.append(self._check(cancellation.tracker.cancelled > cancelled,
+                                  "Client gone during the call: call cancelled"))
+        return checks
+    
+    async def _check_resource_cache(self, server, http) -> List[bool]:
+        """The cached rendering is dropped when the settings change"""
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import admin
+        import sse_server
+        
+        async with create_connected_server_and_client_session(server) as session:
+            await session.read_resource("config://settings")
+            sse_server.update_settings({"debug_mode": False})
+            try:
+                result = await session.read_resource("config://settings")
+            finally:
+                sse_server.update_settings({"debug_mode": True})
+        checks = [self._check(json.loads(result.contents[0].text)["debug_mode"] is False,
+                              "Settings change: next read renders again")]
+        
+        # Writes over HTTP are off unless MCP_ADMIN_TOKEN is set, and values keep their type
+        response = await http.post("/settings", json={"debug_mode": False})
+        checks.append(self._check(response.status_code == 404, "Write route off without an admin token: 404"))
+        checks.append(self._check(admin.invalid_changes({"debug_mode": "no"}, sse_server.settings) is not None, "A value of another type is refused"))
+        return checks
+    
+    async def _check_subscriptions(self, server, http) -> List[bool]:
+        """Changes within one window reach a subscriber as one notification"""
+        from mcp import types
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import sse_server
+        import subscriptions
+        
+        updates = asyncio.Queue()
+        
+        async def on_message(message):
+            if (isinstance(message, types.ServerNotification)
+                    and isinstance(message.root, types.ResourceUpdatedNotification)):
+                updates.put_nowait(str(message.root.params.uri))
+        
+        async with create_connected_server_and_client_session(server, message_handler=on_message) as session:
+            await session.subscribe_resource("config://settings")
+            sse_server.update_settings({"debug_mode": False})
+            sse_server.update_settings({"debug_mode": True})
+            uri = await asyncio.wait_for(updates.get(), 2)
+            # Both changes fall in one window
+            await asyncio.sleep(subscriptions.hub.window * 3)
+            checks = [self._check(uri == "config://settings" and updates.empty(),
+                                  "Subscription: two changes, one notification")]
+        checks.append(self._check(subscriptions.hub.stats()["sessions"] == 0,
+                                  "Session ended: its subscriptions are dropped"))
+        return checks
+    
     async def run_all_tests(self):
         """Run all tests"""
         print("🧪 FastMCP MCP Server Integrated Test Started")
@@ -168,11 +441,27 @@ class MCPTester:
         print("🔗 https://medium.com/@vkrishnan9074/mcp-clients-stdio-vs-sse-a53843d9aabb")
         
         results = {
+            "engine": False,
+            "cost": False,
+            "session": False,
+            "behavior": False,
             "stdio": False,
             "sse": False
         }
         
         try:
+            # Expression engine test (no server needed)
+            results["engine"] = await self.test_expression_engine()
+            
+            # Cost estimator test (no server needed)
+            results["cost"] = await self.test_cost_estimator()
+            
+            # Calculation session test (no server needed)
+            results["session"] = await self.test_calculation_session()
+            
+            # Behavior test (the app runs in this process)
+            results["behavior"] = await self.test_behavior()
+            
             # STDIO test (no server startup needed)
             results["stdio"] = await self.test_stdio_client()
             
@@ -196,6 +485,10 @@ class MCPTester:
         print("\n" + "="*60)
         print("📊 Test Result Summary")
         print("="*60)
+        print(f"Expression engine: {'✅ Success' if results['engine'] else '❌ Failed'}")
+        print(f"Cost estimator: {'✅ Success' if results['cost'] else '❌ Failed'}")
+        print(f"Calculation session: {'✅ Success' if results['session'] else '❌ Failed'}")
+        print(f"Behavior: {'✅ Success' if results['behavior'] else '❌ Failed'}")
         print(f"STDIO Client (FastMCP): {'✅ Success' if results['stdio'] else '❌ Failed'}")
         print(f"SSE Client (FastMCP): {'✅ Success' if results['sse'] else '❌ Failed'}")
         
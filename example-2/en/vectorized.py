@@ -0,0 +1,272 @@
+# vectorized.py
+"""
+Vectorized batch evaluation for the calculate tool
+Evaluates one compiled expression over whole NumPy arrays in a single pass
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from functools import reduce
+from typing import Any, Dict, List, Mapping, Optional
+
+import calculator
+import cost_estimator
+import expression_engine
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for calculate_batch
+    np = None
+
+
+# math functions whose NumPy ufunc has a different name
+RENAMED_UFUNCS = {
+    "acos": "arccos",
+    "asin": "arcsin",
+    "atan": "arctan",
+    "atan2": "arctan2",
+    "acosh": "arccosh",
+    "asinh": "arcsinh",
+    "atanh": "arctanh",
+    "pow": "power",
+}
+
+# math functions that take an iterable rather than scalars, so they have no elementwise form
+REDUCTIONS = {"fsum", "prod", "dist"}
+
+# math functions whose same-named NumPy function has different semantics
+DIFFERENT_SEMANTICS = {"remainder"}
+
+# math functions that only accept integers (variables always arrive as float arrays)
+INTEGER_ARGUMENTS = {"factorial", "comb", "perm", "isqrt", "gcd", "lcm"}
+
+# Upper bound on points per batch call
+MAX_POINTS = 1_000_000
+
+# Budget for a whole batch call: the per-point estimate times the number of points
+BATCH_COST_BUDGET = float(os.environ.get("CALCULATOR_BATCH_COST_BUDGET", "1e9"))
+
+# Largest argument factorial, comb and perm accept in a batch
+MAX_FACTORIAL_ARGUMENT = int(os.environ.get("CALCULATOR_BATCH_MAX_FACTORIAL", "100000"))
+
+# Wall-clock budget of a batch call, the same as a calculate call in the worker pool
+BATCH_TIMEOUT = float(os.environ.get("CALCULATOR_TIMEOUT", "2.0"))
+
+# Points evaluated per step; the time budget is checked between steps, so a batch that
+# runs out of time stops within one step instead of finishing in its thread after the caller gave up
+CHUNK_POINTS = 64 * 1024
+
+
+def _log(x, base=None):
+    """math.log(x[, base]) as a ufunc expression"""
+    if base is None:
+        return np.log(x)
+    return np.log(x) / np.log(base)
+
+
+def _integer_arguments(name, function, limit=None):
+    """Wrap a math function so integral float arguments are passed as int and arguments above limit are rejected"""
+    def call(*args):
+        # Results of other integer functions are already ints (and may overflow a float)
+        args = [arg if isinstance(arg, int) else int(arg) if float(arg).is_integer() else arg for arg in args]
+        if limit is not None and any(isinstance(arg, int) and abs(arg) > limit for arg in args):
+            raise ValueError(f"{name}() argument exceeds {limit} in a batch")
+        return function(*args)
+    return call
+
+
+def _build_namespace() -> Dict[str, Any]:
+    """Map the calculator whitelist onto NumPy ufuncs"""
+    namespace: Dict[str, Any] = {}
+    for name, value in calculator.ALLOWED_NAMES.items():
+        if not callable(value):
+            # Constants such as pi, e, inf and nan are used as they are
+            namespace[name] = value
+            continue
+        if name in REDUCTIONS:
+            continue
+        ufunc = getattr(np, RENAMED_UFUNCS.get(name, name), None)
+        if name in INTEGER_ARGUMENTS:
+            limit = MAX_FACTORIAL_ARGUMENT if name in cost_estimator.FACTORIAL_LIKE else None
+            # object results: exact ints of any size instead of the first point's int64
+            namespace[name] = np.vectorize(_integer_arguments(name, value, limit), otypes=[object])
+        elif ufunc is not None and name not in DIFFERENT_SEMANTICS:
+            namespace[name] = ufunc
+        else:
+            # No ufunc equivalent (erf, gamma, ...): elementwise loop over the math function
+            namespace[name] = np.vectorize(value)
+    namespace.update({
+        "log": _log,
+        "abs": np.abs,
+        "round": np.round,
+        "min": lambda *args: reduce(np.minimum, args),
+        "max": lambda *args: reduce(np.maximum, args),
+    })
+    return namespace
+
+
+NUMPY_NAMES: Dict[str, Any] = _build_namespace() if np is not None else {}
+
+
+def compile_numpy(expression: str) -> expression_engine.CompiledExpression:
+    """Compile an expression against the NumPy namespace, allowing free variables"""
+    return expression_engine.compile_expression(expression, NUMPY_NAMES, variables=())
+
+
+# Compiled batch expressions, separate from the scalar caches
+batch_cache = calculator.CompiledExpressionCache(compiler=compile_numpy)
+
+
+def _to_arrays(variables: Mapping[str, List[float]]) -> Dict[str, Any]:
+    """Convert variable lists to float arrays of one common length"""
+    # The namespace is resolved before variables, so a variable named e or pi would be silently ignored
+    reserved = sorted(name for name in variables if name in NUMPY_NAMES)
+    if reserved:
+        raise ValueError(f"Variable name '{reserved[0]}' is taken by the calculator namespace")
+    arrays = {name: np.asarray(values, dtype=float) for name, values in variables.items()}
+    lengths = {array.shape[0] for array in arrays.values() if array.ndim == 1}
+    if any(array.ndim != 1 for array in arrays.values()):
+        raise ValueError("Each variable must be a flat list of numbers")
+    if len(lengths) > 1:
+        raise ValueError(f"All variables must have the same length, got {sorted(lengths)}")
+    if lengths and lengths.pop() > MAX_POINTS:
+        raise ValueError(f"Too many points (max {MAX_POINTS})")
+    return arrays
+
+
+def _magnitudes(arrays: Mapping[str, Any]) -> Dict[str, Any]:
+    """Largest absolute value of each array, as an int when integral (what the integer functions get)"""
+    values: Dict[str, Any] = {}
+    for name, array in arrays.items():
+        if array.size:
+            largest = float(np.max(np.abs(array)))
+            values[name] = int(largest) if largest.is_integer() else largest
+    return values
+
+
+def _check_cost(expressions: List[str], arrays: Mapping[str, Any], count: int):
+    """Reject a batch whose per-point estimate times the point count exceeds BATCH_COST_BUDGET"""
+    values = _magnitudes(arrays)
+    total = 0.0
+    for expression in expressions:
+        # One point, estimated with the largest value of every variable, must fit the scalar budget
+        # (constant subexpressions are folded at compile time, in this process)
+        total += cost_estimator.check(expression, values=values).cost * count
+    if total > BATCH_COST_BUDGET:
+        raise cost_estimator.CostLimitExceeded(
+            f"batch rejected: estimated cost {total:.3g} for {count} points "
+            f"exceeds the budget of {BATCH_COST_BUDGET:.3g}"
+        )
+
+
+def _compile_one(expression: str, arrays: Mapping[str, Any]) -> expression_engine.CompiledExpression:
+    """Compile a single expression and check that its variables are given (cost already checked by _check_cost)"""
+    compiled = batch_cache.get(expression)
+    missing = [name for name in compiled.variables if name not in arrays]
+    if missing:
+        raise ValueError(f"name '{missing[0]}' is not defined")
+    return compiled
+
+
+def _compact(result: Any) -> Any:
+    """Convert a NumPy result into plain JSON-friendly values"""
+    if isinstance(result, np.ndarray):
+        values = result.tolist()
+        if result.dtype == object:
+            # Integer function results may be above the interpreter's int-to-str digit limit
+            return [_printable(value) for value in values] if result.ndim else _printable(values)
+        return values
+    if isinstance(result, np.generic):
+        return result.item()
+    return _printable(result)
+
+
+def _printable(value: Any) -> Any:
+    """An int as is, or a placeholder string when it is above the interpreter's int-to-str digit limit"""
+    if isinstance(value, int) and value.bit_length() > 64:
+        try:
+            str(value)
+        except ValueError:
+            return f"<{value.bit_length()}-bit integer>"
+    return value
+
+
+def _prepare(expression: Optional[str], variables: Optional[Mapping[str, List[float]]],
+             expressions: Optional[List[str]]):
+    """Validate a batch call and compile its expressions: (point count, arrays, {expression: compiled})"""
+    if np is None:
+        raise RuntimeError("NumPy is required for batch calculation (pip install numpy)")
+    if not expression and not expressions:
+        raise ValueError("Either expression or expressions is required")
+
+    arrays = _to_arrays(variables or {})
+    count = next(iter(arrays.values())).shape[0] if arrays else 1
+    _check_cost(expressions or [expression], arrays, count)
+    compiled = {expr: _compile_one(expr, arrays) for expr in expressions or [expression]}
+    return count, arrays, compiled
+
+
+def _evaluate(code: Any, arrays: Mapping[str, Any], count: int, deadline: float) -> Any:
+    """Evaluate compiled code over the arrays CHUNK_POINTS at a time, raising TimeoutError past the deadline"""
+    if count <= CHUNK_POINTS:
+        return code(arrays)
+    chunks = []
+    for start in range(0, count, CHUNK_POINTS):
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        result = code({name: array[start:start + CHUNK_POINTS] for name, array in arrays.items()})
+        if not isinstance(result, np.ndarray) or result.shape != (min(CHUNK_POINTS, count - start),):
+            # Does not depend on the points (a constant operand decided the result)
+            return result
+        chunks.append(result)
+    return np.concatenate(chunks)
+
+
+def _run(count: int, arrays: Mapping[str, Any], compiled: Mapping[str, Any], several: bool,
+         deadline: float = math.inf) -> Dict[str, Any]:
+    """Evaluate the expressions compiled by _prepare over the arrays"""
+    with np.errstate(all="ignore"):
+        # Out-of-domain points become nan/inf instead of failing the whole batch
+        results = {expr: _compact(_evaluate(code, arrays, count, deadline)) for expr, code in compiled.items()}
+    if several:
+        return {"count": count, "results": results}
+    return {"count": count, "result": next(iter(results.values()))}
+
+
+def evaluate_batch(expression: Optional[str] = None,
+                   variables: Optional[Mapping[str, List[float]]] = None,
+                   expressions: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Evaluate one expression (or several) over named variable arrays in one vectorized pass"""
+    return _run(*_prepare(expression, variables, expressions), several=bool(expressions))
+
+
+async def run_batch(expression: Optional[str] = None,
+                    variables: Optional[Mapping[str, List[float]]] = None,
+                    expressions: Optional[List[str]] = None,
+                    timeout: Optional[float] = None) -> str:
+    """evaluate_batch() and format_batch() in a thread within the time budget, as JSON
+
+    Validation, the cost check, compiling, evaluating and serializing all
+    run in the thread, so a large batch does not block the loop. The
+    evaluation checks the deadline between chunks of points, so a batch
+    that runs out of time also stops using the thread.
+    """
+    timeout = BATCH_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+
+    def job() -> str:
+        prepared = _prepare(expression, variables, expressions)
+        return format_batch(_run(*prepared, several=bool(expressions), deadline=deadline))
+
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(job), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"batch exceeded the {timeout:g}s time budget") from None
+
+
+def format_batch(result: Dict[str, Any]) -> str:
+    """Serialize a batch result as compact JSON"""
+    return json.dumps(result, separators=(",", ":"))
@@ -0,0 +1,190 @@
+# zerocopy.py
+"""
+Zero-copy file responses
+The http.response.zerocopysend ASGI extension, served with sendfile(2) on uvicorn's httptools protocol
+"""
+import asyncio
+import os
+from typing import AsyncIterator, BinaryIO, Mapping, Optional
+
+import anyio
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+try:
+    import uvicorn
+    from uvicorn.protocols.http.httptools_impl import HttpToolsProtocol as _HttpToolsProtocol
+    from uvicorn.protocols.http.httptools_impl import RequestResponseCycle as _RequestResponseCycle
+except ImportError:  # zero-copy sends need uvicorn's httptools protocol (pip install httptools)
+    _HttpToolsProtocol = None
+
+# uvicorn releases [min, max) whose httptools protocol internals (private classes and
+# attributes) the zero-copy protocol was checked against; other releases do not get the
+# extension and files are sent in chunks instead
+UVICORN_VERSIONS = ((0, 22), (0, 35))
+
+
+def _uvicorn_version() -> tuple:
+    try:
+        return tuple(int(part) for part in uvicorn.__version__.split(".")[:2])
+    except ValueError:
+        return ()
+
+
+if _HttpToolsProtocol is not None and not UVICORN_VERSIONS[0] <= _uvicorn_version() < UVICORN_VERSIONS[1]:
+    _HttpToolsProtocol = None
+
+
+# ASGI extension: the server sends a file's bytes to the socket itself (sendfile(2))
+EXTENSION = "http.response.zerocopysend"
+
+# Chunk size when the bytes have to pass through Python (no extension, or a body being compressed)
+CHUNK_SIZE = 256 * 1024
+
+
+async def read_chunks(file: BinaryIO, offset: int, count: int,
+                      chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """count bytes of file from offset, chunk_size at a time, read in a thread without moving the file position"""
+    fd = file.fileno()
+    end = offset + count
+    while offset < end:
+        chunk = await anyio.to_thread.run_sync(os.pread, fd, min(chunk_size, end - offset), offset)
+        if not chunk:
+            raise RuntimeError("File shorter than the Content-Length sent")
+        offset += len(chunk)
+        yield chunk
+
+
+def _writable(loop: asyncio.AbstractEventLoop, fd: int) -> asyncio.Future:
+    """Future done once fd can be written to"""
+    future = loop.create_future()
+    loop.add_writer(fd, lambda: future.done() or future.set_result(None))
+    future.add_done_callback(lambda _: loop.remove_writer(fd))
+    return future
+
+
+async def sendfile(transport: asyncio.Transport, file: BinaryIO, offset: int, count: int):
+    """count bytes of file from offset to the transport's socket with sendfile(2)
+
+    asyncio's loop.sendfile does this itself. uvloop has none, so sendfile(2)
+    runs on a duplicate of the socket: it waits for the socket to be writable
+    until the bytes already buffered on the transport are flushed, then
+    whenever the socket's send buffer is full.
+    """
+    loop = asyncio.get_running_loop()
+    if type(loop).sendfile is not asyncio.AbstractEventLoop.sendfile:
+        await loop.sendfile(transport, file, offset, count)
+        return
+    fd = os.dup(transport.get_extra_info("socket").fileno())
+    try:
+        # The bytes buffered on the transport (the headers) go first: the transport flushes
+        # its buffer whenever the socket is writable, so wait for writability until it is empty
+        while transport.get_write_buffer_size():
+            await _writable(loop, fd)
+        end = offset + count
+        while offset < end:
+            try:
+                sent = os.sendfile(fd, file.fileno(), offset, end - offset)
+            except BlockingIOError:
+                await _writable(loop, fd)
+                continue
+            if sent == 0:
+                raise RuntimeError("File shorter than the Content-Length sent")
+            offset += sent
+    finally:
+        os.close(fd)
+
+
+class FileSendResponse(Response):
+    """count bytes of an open file from offset, handed to the server to send with sendfile(2)
+
+    Servers that do not offer the zerocopysend extension (h11, Hypercorn) get
+    the bytes read in CHUNK_SIZE pieces instead. The file is closed once the
+    response is sent.
+    """
+
+    def __init__(self, file: BinaryIO, offset: int, count: int, status_code: int = 200,
+                 headers: Optional[Mapping[str, str]] = None, media_type: Optional[str] = None,
+                 background: Optional[BackgroundTask] = None):
+        self.file = file
+        self.offset = offset
+        self.count = count
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = background
+        self.init_headers(headers)
+        self.headers["content-length"] = str(count)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if scope["method"] == "HEAD" or not self.count:
+                await send({"type": "http.response.body", "body": b""})
+            elif EXTENSION in scope.get("extensions", {}):
+                await send({"type": EXTENSION, "file": self.file, "offset": self.offset, "count": self.count})
+            else:
+                chunks = read_chunks(self.file, self.offset, self.count)
+                chunk = await chunks.__anext__()
+                async for following in chunks:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    chunk = following
+                await send({"type": "http.response.body", "body": chunk})
+        finally:
+            self.file.close()
+        if self.background is not None:
+            await self.background()
+
+
+if _HttpToolsProtocol is not None:
+
+    class _SendfileCycle(_RequestResponseCycle):
+        """Request cycle that also accepts zerocopysend messages"""
+
+        async def send(self, message):
+            if message["type"] != EXTENSION:
+                return await super().send(message)
+            if not self.response_started or self.response_complete or self.chunked_encoding:
+                raise RuntimeError("zerocopysend needs a started response with a Content-Length")
+            file = message["file"]
+            offset = message.get("offset", 0)
+            count = message.get("count")
+            if count is None:
+                count = os.fstat(file.fileno()).st_size - offset
+            if count > self.expected_content_length:
+                raise RuntimeError("Response content longer than Content-Length")
+            if self.flow.write_paused and not self.disconnected:
+                await self.flow.drain()
+            if self.disconnected:
+                return
+            if self.scope["method"] != "HEAD" and count:
+                # Waits for the headers already written to flush, then the kernel copies file -> socket
+                await sendfile(self.transport, file, offset, count)
+            self.expected_content_length -= count
+            await super().send({"type": "http.response.body", "body": b"",
+                                "more_body": message.get("more_body", False)})
+
+    class HttpToolsProtocol(_HttpToolsProtocol):
+        """uvicorn's httptools protocol, advertising and serving the zerocopysend extension on non-TLS connections"""
+
+        def on_message_begin(self):
+            super().on_message_begin()
+            # Over TLS the bytes must pass through the SSL object, so sendfile(2) would bypass encryption
+            if self.scope["scheme"] == "https" or self.transport.get_extra_info("sslcontext") is not None:
+                return
+            self.scope["extensions"] = {EXTENSION: {}}
+
+        def on_headers_complete(self):
+            super().on_headers_complete()
+            # The request task is created but has not run yet, so its sends go through the subclass
+            if type(self.cycle) is _RequestResponseCycle:
+                self.cycle.__class__ = _SendfileCycle
+
+else:
+    HttpToolsProtocol = None
+
+
+def protocol(http: str):
+    """uvicorn `http` option for a resolved HTTP parser: the zero-copy protocol for httptools"""
+    if http == "httptools" and HttpToolsProtocol is not None:
+        return HttpToolsProtocol
+    return http
@@ -0,0 +1,47 @@
+# admin.py
+"""
+설정 쓰기 라우트의 관리자 토큰과 검증
+MCP_ADMIN_TOKEN이 설정되지 않으면 POST /settings는 꺼져 있음
+"""
+
+import hmac
+import os
+from typing import Any, Mapping, Optional
+
+# 이 값이 설정되어 있을 때만 설정 쓰기 라우트를 제공하며, 요청은 이를 bearer 토큰으로 보내야 함
+ADMIN_TOKEN = os.environ.get("MCP_ADMIN_TOKEN", "")
+
+# 설정 값으로 넣을 수 있는 문자열의 최대 길이와 정수의 범위
+MAX_STRING_LENGTH = 256
+MAX_INTEGER = 2 ** 31
+
+
+def authorized(headers: Mapping[str, str]) -> bool:
+    """요청 헤더에 관리자 토큰이 있는지 확인합니다 (상수 시간 비교)"""
+    if not ADMIN_TOKEN:
+        return False
+    given = headers.get("authorization", "").encode()
+    return hmac.compare_digest(given, f"Bearer {ADMIN_TOKEN}".encode())
+
+
+def invalid_changes(changes: Any, current: Mapping[str, Any]) -> Optional[str]:
+    """changes를 current에 적용할 수 없는 이유, 적용할 수 있으면 None
+
+    bool, int, 문자열을 담은 기존 키만 같은 타입의 값으로, 크기 제한 안에서
+    바꿀 수 있습니다. 그래서 요청으로 설정을 늘리거나 값을 큰 값으로 바꿀 수 없습니다.
+    """
+    if not isinstance(changes, dict):
+        return "Request body must be a JSON object of changed values"
+    for key, value in changes.items():
+        if key not in current:
+            return f"Unknown key: {key!r}"
+        old = current[key]
+        if type(old) not in (bool, int, str):
+            return f"{key!r} cannot be changed"
+        if type(value) is not type(old):
+            return f"{key!r} must be {type(old).__name__}"
+        if type(value) is str and len(value) > MAX_STRING_LENGTH:
+            return f"{key!r} is longer than {MAX_STRING_LENGTH} characters"
+        if type(value) is int and not -MAX_INTEGER < value < MAX_INTEGER:
+            return f"{key!r} is out of range"
+    return None
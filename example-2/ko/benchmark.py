@@ -0,0 +1,360 @@
+# benchmark.py
+"""
+FastMCP MCP 서버 벤치마크 도구
+예제 서버의 핫 패스를 프로세스 내와 HTTP로 측정
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import random
+import string
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import httpx
+from fastmcp import FastMCP
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+
+import calculator
+import prompt_engine
+import sse_server
+import runtime
+import vectorized
+
+
+# 에이전트가 반복해서 보내는 대표적인 표현식
+EXPRESSIONS = [
+    "2 + 3 * 4",
+    "sqrt(16)",
+    "10 + 5",
+    "20 * 3",
+    "sin(pi / 4) ** 2 + cos(pi / 4) ** 2",
+    "log(1024, 2)",
+    "factorial(10) / factorial(8)",
+    "abs(-42) + round(3.14159, 2)",
+    "max(3, 7) - min(1, 2)",
+]
+
+
+def legacy_evaluate(expression: str) -> Any:
+    """기존 계산기 경로: 호출마다 네임스페이스를 다시 만들고 표현식을 컴파일"""
+    allowed_names = {
+        k: v for k, v in math.__dict__.items() if not k.startswith("__")
+    }
+    allowed_names.update({"abs": abs, "round": round, "min": min, "max": max})
+    return eval(expression, {"__builtins__": {}}, allowed_names)
+
+
+def measure_per_call(func: Callable[[str], Any], expressions: List[str], rounds: int) -> float:
+    """호출당 평균 지연 시간을 마이크로초 단위로 반환"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for expression in expressions:
+            func(expression)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(expressions)) * 1_000_000
+
+
+def measure_latencies(func: Callable[[str], Any], expressions: List[str], rounds: int) -> List[int]:
+    """모든 개별 호출의 지연 시간을 나노초 단위로 반환"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for expression in expressions:
+            start = clock()
+            func(expression)
+            latencies.append(clock() - start)
+    return latencies
+
+
+def summarize(latencies: List[int]) -> Dict[str, float]:
+    """지연 시간 목록의 처리량과 백분위 지연 시간을 반환"""
+    ordered = sorted(latencies)
+    total_seconds = sum(ordered) / 1_000_000_000
+    return {
+        "throughput": len(ordered) / total_seconds if total_seconds else 0.0,
+        "p50_us": ordered[len(ordered) // 2] / 1000,
+        "p99_us": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] / 1000,
+    }
+
+
+def print_summary(label: str, summary: Dict[str, float]):
+    """벤치마크 결과 한 줄 출력"""
+    print(f"  {label:<34} {summary['throughput']:>12,.0f} calls/s"
+          f"   p50 {summary['p50_us']:8.2f} µs   p99 {summary['p99_us']:8.2f} µs")
+
+
+def benchmark_calculator(rounds: int = 5000):
+    """컴파일 캐시 적용 전후의 계산기 호출당 지연 시간 비교"""
+    print("\n" + "="*60)
+    print("🧮 계산기 벤치마크")
+    print("="*60)
+    print(f"표현식 {len(EXPRESSIONS)}개 x {rounds}회 반복")
+
+    before = measure_per_call(legacy_evaluate, EXPRESSIONS, rounds)
+
+    calculator.expression_cache.clear()
+    after = measure_per_call(lambda e: calculator.evaluate(e, "eval"), EXPRESSIONS, rounds)
+
+    print(f"  이전 (호출마다 네임스페이스 + 컴파일): {before:8.2f} µs/call")
+    print(f"  이후 (공유 네임스페이스 + LRU 캐시): {after:8.2f} µs/call")
+    print(f"  속도 향상: {before / after:.1f}x")
+    print(f"  캐시 통계: {calculator.expression_cache.stats()}")
+
+
+def benchmark_engine(rounds: int = 2000, unique: int = 5000):
+    """eval 경로와 AST 표현식 엔진의 처리량과 p99 비교"""
+    print("\n" + "="*60)
+    print("🧠 표현식 엔진 벤치마크")
+    print("="*60)
+
+    # 웜: 같은 표현식을 반복하며 각 모드의 캐시에서 제공
+    print(f"반복 표현식 ({len(EXPRESSIONS)}개 x {rounds}회)")
+    print_summary("eval, 캐시 없음 (이전 경로)", summarize(
+        measure_latencies(legacy_evaluate, EXPRESSIONS, rounds)))
+    calculator.expression_cache.clear()
+    print_summary("eval, 캐시", summarize(
+        measure_latencies(lambda e: calculator.evaluate(e, "eval"), EXPRESSIONS, rounds)))
+    calculator.ast_cache.clear()
+    print_summary("ast 엔진, 캐시", summarize(
+        measure_latencies(lambda e: calculator.evaluate(e, "ast"), EXPRESSIONS, rounds)))
+
+    # 콜드: 모든 표현식이 새것이라 호출마다 파싱/컴파일 비용 발생
+    fresh = [f"{i} * sqrt({i}) + {i} % 7 - log({i} + 1)" for i in range(unique)]
+    print(f"고유 표현식 ({unique}개, 호출마다 컴파일)")
+    print_summary("eval, 컴파일 + 실행", summarize(measure_latencies(
+        lambda e: eval(calculator.compile_eval(e), calculator.SAFE_GLOBALS, calculator.SAFE_LOCALS),
+        fresh, 1)))
+    print_summary("ast 엔진, 컴파일 + 실행", summarize(measure_latencies(
+        lambda e: calculator.compile_ast(e)(), fresh, 1)))
+
+
+def benchmark_batch(points: int = 10000):
+    """데이터 포인트마다 calculate를 호출하는 방식과 한 번의 벡터화 배치 계산 비교"""
+    print("\n" + "="*60)
+    print("📊 배치 계산 벤치마크")
+    print("="*60)
+
+    formula = "sqrt(x) * sin(x) + log(x + 1)"
+    xs = [i / 10 for i in range(points)]
+    print(f"{formula!r}, 포인트 {points}개 (프로세스 내, 전송 왕복 제외)")
+
+    # 이전 방식: 데이터 포인트마다 새로운 표현식 문자열 하나
+    calculator.ast_cache.clear()
+    start = time.perf_counter()
+    for x in xs:
+        calculator.evaluate(formula.replace("x", repr(x)))
+    per_point = time.perf_counter() - start
+
+    vectorized.batch_cache.clear()
+    start = time.perf_counter()
+    vectorized.evaluate_batch(formula, {"x": xs})
+    batch = time.perf_counter() - start
+
+    print(f"  포인트별 calculate: {per_point * 1000:10.2f} ms")
+    print(f"  calculate_batch:     {batch * 1000:10.2f} ms")
+    print(f"  속도 향상: {per_point / batch:.1f}x")
+
+
+def session_worker(base_url: str, seconds: float, concurrency: int) -> List[int]:
+    """클라이언트 프로세스 본체: SSE로 MCP 세션 하나를 열고 `seconds` 동안 echo 호출을 `concurrency`개씩 유지"""
+    async def run() -> List[int]:
+        latencies: List[int] = []
+        deadline = time.perf_counter() + seconds
+        async with sse_client(f"{base_url}/sse") as streams:
+            async with ClientSession(*streams) as session:
+                await session.initialize()
+
+                async def caller(i: int):
+                    while time.perf_counter() < deadline:
+                        start = time.perf_counter_ns()
+                        await session.call_tool("echo", {"message": str(i)})
+                        latencies.append(time.perf_counter_ns() - start)
+
+                await asyncio.gather(*(caller(i) for i in range(concurrency)))
+        return latencies
+
+    return asyncio.run(run())
+
+
+async def wait_until_ready(base_url: str):
+    """새로 시작한 서버가 응답할 때까지 /metrics 폴링"""
+    async with httpx.AsyncClient() as http:
+        for _ in range(300):
+            try:
+                if (await http.get(f"{base_url}/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+
+async def benchmark_runtime(seconds: float = 5.0, sessions: int = 4, concurrency: int = 8):
+    """이벤트 루프 / HTTP 파서 조합별 SSE 메시지 엔드포인트를 통한 도구 호출"""
+    print("\n" + "="*60)
+    print("🚀 이벤트 루프 / HTTP 파서 벤치마크")
+    print("="*60)
+    print(f"서버 프로세스 1개에 POST /messages/ + SSE로 echo 도구 호출, 클라이언트 세션 {sessions}개"
+          f" x 동시 호출 {concurrency}개, 행마다 {seconds:g}초")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(sessions, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for event_loop in runtime.LOOPS:
+            for http in runtime.HTTP_PARSERS:
+                label = f"{event_loop} + {http}"
+                missing = [name for name in (event_loop, http) if not runtime.available(name)]
+                if missing:
+                    print(f"  {label:<34} 건너뜀 ({', '.join(missing)} 미설치)")
+                    continue
+                process = subprocess.Popen(
+                    [sys.executable, "launcher.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "1",
+                     "--loop", event_loop, "--http", http, "--log-level", "warning"],
+                    cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL)
+                try:
+                    await wait_until_ready(base_url)
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(executor, session_worker, base_url, seconds, concurrency)
+                        for _ in range(sessions)))
+                    latencies = [latency for result in results for latency in result]
+                    summary = summarize(latencies)
+                    summary["throughput"] = len(latencies) / seconds
+                    print_summary(label, summary)
+                finally:
+                    process.send_signal(signal.SIGTERM)
+                    process.wait()
+
+
+def legacy_code_review_prompt(code: str, language: str = "python") -> str:
+    """이전 code_review 프롬프트: 요청마다 f-문자열을 다시 만듦"""
+    return f"""
+다음 {language} 코드를 리뷰해주세요:
+
+```{language}
+{code}
+```
+
+다음 항목들을 확인해주세요:
+1. 코드 스타일과 가독성
+2. 잠재적인 버그나 오류
+3. 성능 최적화 가능성
+4. 보안 취약점
+5. 개선 제안사항
+
+각 항목에 대해 구체적인 피드백을 제공해주세요.
+"""
+
+
+async def measure_prompts(handler: Callable[[types.GetPromptRequest], Any], codes: List[str],
+                          rounds: int) -> List[int]:
+    """code_review prompts/get 요청 각각의 지연 시간 (나노초)"""
+    latencies = []
+    clock = time.perf_counter_ns
+    for _ in range(rounds):
+        for code in codes:
+            # 요청마다 디코딩된 것처럼 새 문자열: 해시가 아직 계산되지 않음
+            request = types.GetPromptRequest(method="prompts/get", params=types.GetPromptRequestParams(
+                name="code_review", arguments={"code": code[:1] + code[1:], "language": "python"}))
+            start = clock()
+            await handler(request)
+            latencies.append(clock() - start)
+    return latencies
+
+
+async def benchmark_prompts(code_kb: int = 100, inputs: int = 20, rounds: int = 50):
+    """100 KB 코드의 code_review prompts/get: f-문자열 vs 컴파일된 템플릿 vs 프롬프트 캐시"""
+    print("\n" + "="*60)
+    print("📝 프롬프트 엔진 벤치마크")
+    print("="*60)
+    alphabet = string.ascii_letters + string.digits + " \n\""
+    codes = ["".join(random.choices(alphabet, k=code_kb * 1024)) for _ in range(inputs)]
+    print(f"FastMCP prompts/get 핸들러, 서로 다른 {code_kb} KB 입력 {inputs}개 x {rounds}회")
+
+    legacy = FastMCP("프롬프트 벤치마크")
+    legacy.prompt("code_review")(legacy_code_review_prompt)
+    print_summary("요청마다 f-문자열 (이전 경로)", summarize(await measure_prompts(
+        legacy._mcp_server.request_handlers[types.GetPromptRequest], codes, rounds)))
+
+    # 예제 서버 자체의 프롬프트; create_starlette_app을 호출하지 않으므로 핸들러를 감싸는 것이 없음
+    server = sse_server.mcp._mcp_server
+    handler = server.request_handlers[types.GetPromptRequest]
+    print_summary("컴파일된 템플릿", summarize(await measure_prompts(handler, codes, rounds)))
+
+    cache = prompt_engine.PromptCache()
+    prompt_engine.cache_prompts(server, cache)
+    cached = server.request_handlers[types.GetPromptRequest]
+    server.request_handlers[types.GetPromptRequest] = handler
+    fresh = ["".join(random.choices(alphabet, k=code_kb * 1024)) for _ in range(inputs * 5)]
+    print_summary("캐시 미스 (키 + 렌더링)", summarize(await measure_prompts(cached, fresh, 1)))
+    cache.clear()
+    hits = cache.hits
+    print_summary("캐시 적중 (같은 코드 재전송)", summarize(await measure_prompts(cached, codes, rounds)))
+    print(f"  적중률 {(cache.hits - hits) / (inputs * rounds):.1%}")
+    print(f"  캐시 통계: {cache.stats()}")
+
+
+def print_usage():
+    """사용법 출력"""
+    print("""
+⏱️ FastMCP MCP 서버 벤치마크 도구
+
+사용법:
+  python benchmark.py [옵션]
+
+옵션:
+  --calculator    계산기 호출당 지연 시간 (컴파일 캐시 전후)
+  --engine        eval 경로 vs AST 표현식 엔진 (처리량과 p99)
+  --batch         포인트별 calculate vs 벡터화 calculate_batch
+  --runtime       이벤트 루프 / HTTP 파서별 초당 요청 수와 p99 (uvloop, httptools)
+  --prompts       100 KB 코드의 code_review: f-문자열 vs 컴파일된 템플릿 vs 프롬프트 캐시
+  --help          이 도움말 표시
+
+예시:
+  python benchmark.py              # 모든 벤치마크 실행
+  python benchmark.py --calculator # 계산기만 실행
+  python benchmark.py --engine     # 표현식 엔진만 실행
+  python benchmark.py --batch      # 배치 계산만 실행
+  python benchmark.py --runtime    # 이벤트 루프 / HTTP 파서만 실행
+  python benchmark.py --prompts    # 프롬프트 엔진만 실행
+""")
+
+
+async def main():
+    """메인 함수"""
+    args = sys.argv[1:]
+
+    if "--help" in args or "-h" in args:
+        print_usage()
+        return
+
+    run_all = not any(arg.startswith("--") for arg in args)
+
+    if run_all or "--calculator" in args:
+        benchmark_calculator()
+
+    if run_all or "--engine" in args:
+        benchmark_engine()
+
+    if run_all or "--batch" in args:
+        benchmark_batch()
+
+    if run_all or "--runtime" in args:
+        await benchmark_runtime()
+
+    if run_all or "--prompts" in args:
+        await benchmark_prompts()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
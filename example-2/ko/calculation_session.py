@@ -0,0 +1,410 @@
+# calculation_session.py
+"""
+calculate_session 도구용 증분 계산 세션
+이름 있는 셀이 의존성 그래프를 이루므로 셀 하나를 바꾸면 그 셀에 의존하는 셀만 다시 계산
+"""
+
+import ast
+import asyncio
+import json
+import math
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import calculator
+import cost_estimator
+import expression_engine
+
+
+class CalculationSessionError(ValueError):
+    """셀 정의가 잘못되었을 때 발생"""
+
+
+# 값과 소스 크기 외에 셀마다 드는 대략적인 관리 오버헤드
+CELL_OVERHEAD = 256
+
+# 업데이트 한 번이 다시 계산할 수 있는 셀의 예상 비용 합계
+UPDATE_COST_BUDGET = float(os.environ.get("CALCULATOR_SESSION_COST_BUDGET", "2e7"))
+
+# calculate_session 호출의 시간 예산 (워커 풀의 calculate 호출과 같음)
+SESSION_TIMEOUT = float(os.environ.get("CALCULATOR_TIMEOUT", "2.0"))
+
+# 호출의 시간이 다 되어 계산하지 못한 셀의 오류 (문장이면 거부 이유)
+TIME_BUDGET_ERROR = "not computed: the call ran out of time"
+
+
+def compile_cell(expression: str) -> expression_engine.CompiledExpression:
+    """셀 표현식을 컴파일합니다. 자유 이름은 다른 셀을 가리킴"""
+    return expression_engine.compile_expression(expression, calculator.ALLOWED_NAMES, variables=())
+
+
+# 컴파일된 셀 표현식 (모든 세션이 공유)
+cell_cache = calculator.CompiledExpressionCache(compiler=compile_cell)
+
+
+def parse_statement(statement: str):
+    """'name = expression'을 이름과 표현식 텍스트로 나눕니다"""
+    try:
+        tree = ast.parse(statement.strip(), mode="exec")
+    except SyntaxError as e:
+        raise CalculationSessionError(f"Invalid statement: {e.msg}") from None
+    if (len(tree.body) != 1 or not isinstance(tree.body[0], ast.Assign)
+            or len(tree.body[0].targets) != 1 or not isinstance(tree.body[0].targets[0], ast.Name)):
+        raise CalculationSessionError(f"Expected 'name = expression', got {statement!r}")
+    assign = tree.body[0]
+    name = assign.targets[0].id
+    if name in calculator.ALLOWED_NAMES:
+        raise CalculationSessionError(f"'{name}' is a built-in name and cannot be redefined")
+    return name, ast.get_source_segment(statement.strip(), assign.value)
+
+
+class Cell:
+    """이름 있는 표현식, 그 의존성, 마지막으로 계산된 값"""
+
+    __slots__ = ("name", "source", "compiled", "value", "error")
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.compiled = cell_cache.get(source)
+        self.value: Any = None
+        self.error: Optional[str] = None
+
+    @property
+    def dependencies(self) -> tuple:
+        return self.compiled.variables
+
+    def memory_bytes(self) -> int:
+        """이 셀이 차지하는 대략적인 메모리"""
+        return CELL_OVERHEAD + len(self.source) + (sys.getsizeof(self.value) if self.error is None else 0)
+
+
+class CalculationSession:
+    """MCP 세션 하나의 셀들과 그 사이의 역방향 의존성 그래프"""
+
+    def __init__(self, max_cells: int = 1000, max_bytes: int = 16 * 1024 * 1024):
+        self.max_cells = max_cells
+        self.max_bytes = max_bytes
+        self.cells: Dict[str, Cell] = {}
+        # 이름 -> 그 이름을 사용하는 셀들 (이름이 아직 정의되지 않았을 수도 있음)
+        self.dependents: Dict[str, Set[str]] = {}
+        self.bytes_used = 0
+        self.evaluations = 0
+        # 업데이트를 실행하는 스레드가 잡고 있음 (run_session 참고)
+        self.lock = threading.Lock()
+
+    def _link(self, cell: Cell):
+        for dependency in cell.dependencies:
+            self.dependents.setdefault(dependency, set()).add(cell.name)
+
+    def _unlink(self, cell: Cell):
+        for dependency in cell.dependencies:
+            users = self.dependents.get(dependency)
+            if users is not None:
+                users.discard(cell.name)
+                if not users:
+                    del self.dependents[dependency]
+
+    def _creates_cycle(self, name: str, dependencies: Iterable[str]) -> bool:
+        """주어진 의존성을 통해 name이 자기 자신에 의존하게 되는지 여부"""
+        # name에서 하위로 순회: 아무도 의존하지 않는 셀(흔한 경우)은 비용이 없음
+        targets = set(dependencies)
+        stack, seen = [name], set()
+        while stack:
+            current = stack.pop()
+            if current in targets:
+                return True
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(self.dependents.get(current, ()))
+        return False
+
+    def _affected(self, changed: Iterable[str]) -> List[str]:
+        """변경된 셀과 그 하위의 모든 셀 (의존성 순서)"""
+        affected: Set[str] = set()
+        stack = list(changed)
+        while stack:
+            name = stack.pop()
+            if name in affected:
+                continue
+            affected.add(name)
+            stack.extend(self.dependents.get(name, ()))
+
+        # 영향받는 셀로 제한한 Kahn 위상 정렬
+        pending = {
+            name: sum(1 for dependency in set(self.cells[name].dependencies)
+                      if dependency in affected and dependency in self.cells)
+            for name in affected if name in self.cells
+        }
+        ready = sorted(name for name, count in pending.items() if count == 0)
+        order: List[str] = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for user in self.dependents.get(name, ()):
+                if user in pending:
+                    pending[user] -= 1
+                    if pending[user] == 0:
+                        ready.append(user)
+        return order
+
+    def _set(self, cell: Cell, value: Any, error: Optional[str] = None):
+        """셀 결과를 저장하고 메모리 합계를 갱신합니다"""
+        self.bytes_used -= cell.memory_bytes()
+        cell.value, cell.error = value, error
+        self.bytes_used += cell.memory_bytes()
+
+    def _evaluate(self, cell: Cell, budget: Optional[float] = None) -> float:
+        """의존하는 셀의 현재 값으로 셀 하나를 계산하고, 쓴 예상 비용을 반환합니다"""
+        values = {}
+        for dependency in cell.dependencies:
+            source = self.cells.get(dependency)
+            if source is None:
+                self._set(cell, None, f"name '{dependency}' is not defined")
+                return 0.0
+            if source.error is not None:
+                self._set(cell, None, f"depends on failed cell '{dependency}'")
+                return 0.0
+            values[dependency] = source.value
+        try:
+            # calculate와 같은 정적 예산, 입력의 실제 크기를 사용
+            estimate = cost_estimator.check(cell.source, values=values)
+            if budget is not None and estimate.cost > budget:
+                raise cost_estimator.CostLimitExceeded(
+                    f"cell rejected: estimated cost {estimate.cost:.3g} exceeds the {max(budget, 0):.3g} "
+                    f"left of this update's budget"
+                )
+            value = cell.compiled(values)
+        except Exception as e:
+            self._set(cell, None, str(e))
+            return 0.0
+        self.evaluations += 1
+        if self.bytes_used - cell.memory_bytes() + CELL_OVERHEAD + len(cell.source) + sys.getsizeof(value) > self.max_bytes:
+            self._set(cell, None, "value does not fit in the session memory cap")
+        else:
+            self._set(cell, value)
+        return estimate.cost
+
+    def clear(self):
+        """모든 셀을 제거합니다"""
+        self.cells.clear()
+        self.dependents.clear()
+        self.bytes_used = 0
+
+    def _define(self, statement: str) -> Optional[str]:
+        """셀 하나를 정의하거나 재정의합니다. 정의가 바뀌었으면 이름을 반환"""
+        name, source = parse_statement(statement)
+        old = self.cells.get(name)
+        if old is not None and old.source == source:
+            return None
+        if old is None and len(self.cells) >= self.max_cells:
+            raise CalculationSessionError(f"Too many cells (max {self.max_cells})")
+        # 상수 부분식은 컴파일 중에 미리 계산되므로 먼저 확인
+        cost_estimator.check(source)
+        cell = Cell(name, source)
+        if self._creates_cycle(name, cell.dependencies):
+            raise CalculationSessionError(f"Cycle detected: '{name}' depends on itself")
+        if old is not None:
+            self._unlink(old)
+            self.bytes_used -= old.memory_bytes()
+            cell.value, cell.error = old.value, old.error
+        self.cells[name] = cell
+        self.bytes_used += cell.memory_bytes()
+        self._link(cell)
+        return name
+
+    def update(self, statements: Iterable[str] = (), remove: Iterable[str] = (),
+               cost_budget: Optional[float] = None, deadline: float = math.inf):
+        """셀을 정의, 재정의 또는 제거하고 그에 의존하는 셀만 다시 계산합니다
+
+        다시 계산하는 셀의 예상 비용 합계는 cost_budget(기본 UPDATE_COST_BUDGET)을
+        넘을 수 없으며, 넘는 셀은 오류가 됩니다. deadline(time.monotonic())이
+        지나면 남은 문장은 거부되고 남은 셀은 오류가 되므로, 시간이 다 된 호출은
+        셀 사이에서 멈춥니다. 값이나 오류가 바뀐 셀의 이름과, 거부된 문장 및 그
+        이유를 반환합니다.
+        """
+        changed: List[str] = []
+        rejected: Dict[str, str] = {}
+        for name in remove:
+            cell = self.cells.pop(name, None)
+            if cell is not None:
+                self._unlink(cell)
+                self.bytes_used -= cell.memory_bytes()
+                changed.append(name)
+
+        for statement in statements:
+            if time.monotonic() > deadline:
+                rejected[statement] = TIME_BUDGET_ERROR
+                continue
+            try:
+                name = self._define(statement)
+            except Exception as e:
+                # 나머지 문장은 계속 적용
+                rejected[statement] = str(e)
+                continue
+            if name is not None:
+                changed.append(name)
+
+        # 입력 중 하나가 실제로 바뀐 경우에만 의존 셀을 다시 계산
+        dirty = set(changed)
+        updated: List[str] = []
+        remaining = UPDATE_COST_BUDGET if cost_budget is None else cost_budget
+        for name in self._affected(changed):
+            cell = self.cells.get(name)
+            if cell is None:
+                continue
+            if name not in dirty and not dirty.intersection(cell.dependencies):
+                continue
+            before = (cell.value, cell.error)
+            if time.monotonic() > deadline:
+                self._set(cell, None, TIME_BUDGET_ERROR)
+            else:
+                remaining -= self._evaluate(cell, remaining)
+            if name in changed or (cell.value, cell.error) != before or type(cell.value) is not type(before[0]):
+                dirty.add(name)
+                updated.append(name)
+        return updated + [name for name in changed if name not in self.cells], rejected
+
+    def snapshot(self, names: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """주어진 셀(또는 모든 셀)의 값이나 오류"""
+        names = self.cells if names is None else names
+        result = {}
+        for name in names:
+            cell = self.cells.get(name)
+            if cell is None:
+                result[name] = None
+            elif cell.error is not None:
+                result[name] = {"error": cell.error}
+            else:
+                result[name] = _plain(cell.value)
+        return result
+
+
+def _plain(value: Any) -> Any:
+    """JSON에 적합한 셀 값 형태"""
+    if isinstance(value, complex):
+        return str(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value.bit_length() > 64:
+        try:
+            return str(value)
+        except ValueError:  # 인터프리터의 정수-문자열 변환 자릿수 제한 초과
+            return f"<{value.bit_length()}-bit integer>"
+    return value
+
+
+class SessionStore:
+    """MCP 세션별 계산 세션 (개수와 메모리에 LRU 상한 적용)
+
+    각 세션은 max_bytes를 고르게 나눈 몫까지 쓸 수 있으며 (최소한 작은 셀
+    max_cells개가 들어갈 만큼), 세션 하나가 저장소 전체를 채울 수 없습니다.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 max_cells: int = 1000):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_cells = max_cells
+        # 세션 하나의 메모리 상한
+        self.session_bytes = max(max_bytes // max_sessions, max_cells * CELL_OVERHEAD)
+        self._sessions: "OrderedDict[int, CalculationSession]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, owner: Any) -> CalculationSession:
+        """MCP 세션 객체의 세션을 반환합니다 (필요하면 생성)"""
+        key = id(owner)
+        session = self._sessions.get(key)
+        if session is None:
+            session = CalculationSession(self.max_cells, self.session_bytes)
+            self._sessions[key] = session
+            # MCP 세션이 사라지면 바로 셀을 해제
+            weakref.finalize(owner, self._sessions.pop, key, None)
+        self._sessions.move_to_end(key)
+        return session
+
+    def enforce_limits(self):
+        """개수와 메모리가 상한 아래로 내려갈 때까지 가장 오래 사용되지 않은 세션을 제거합니다"""
+        total = sum(session.bytes_used for session in self._sessions.values())
+        # 가장 최근에 사용된 세션은 제거하지 않음
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or total > self.max_bytes):
+            _, session = self._sessions.popitem(last=False)
+            total -= session.bytes_used
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """세션 수, 메모리 사용량, 제거 횟수 메트릭을 반환합니다"""
+        return {
+            "sessions": len(self._sessions),
+            "cells": sum(len(session.cells) for session in self._sessions.values()),
+            "memory_bytes": sum(session.bytes_used for session in self._sessions.values()),
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "session_max_bytes": self.session_bytes,
+            "evictions": self.evictions
+        }
+
+
+def run(session: CalculationSession, statements: Optional[List[str]] = None,
+        remove: Optional[List[str]] = None, reset: bool = False,
+        deadline: float = math.inf) -> Dict[str, Any]:
+    """calculate_session 호출을 적용하고 바뀐 셀을 보고합니다"""
+    if reset:
+        session.clear()
+    before = session.evaluations
+    updated, rejected = session.update(statements or (), remove or (), deadline=deadline)
+    result: Dict[str, Any] = {
+        "updated": session.snapshot(updated),
+        "recomputed": session.evaluations - before,
+        "cells": len(session.cells)
+    }
+    if rejected:
+        result["rejected"] = rejected
+    if not statements and not remove:
+        result["values"] = session.snapshot()
+    return result
+
+
+async def run_session(session: CalculationSession, statements: Optional[List[str]] = None,
+                      remove: Optional[List[str]] = None, reset: bool = False,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+    """run()을 시간 예산 안에서 스레드로 실행합니다
+
+    다시 계산하는 동안 이벤트 루프가 막히지 않습니다. 같은 세션의 호출은
+    session.lock으로 차례대로 실행됩니다. 업데이트는 셀 사이마다 마감 시각을
+    확인하므로, 시간 예산을 넘은 호출은 스레드에서도 멈추고 도달하지 못한
+    셀은 오류가 됩니다.
+    """
+    timeout = SESSION_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+
+    def locked_run():
+        if not session.lock.acquire(timeout=max(deadline - time.monotonic(), 0)):
+            # 이 호출의 시간을 다 쓴 같은 세션의 이전 호출이 아직 잡고 있음
+            raise TimeoutError
+        try:
+            return run(session, statements, remove, reset, deadline)
+        finally:
+            session.lock.release()
+
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(locked_run), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"calculation exceeded the {timeout:g}s time budget") from None
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """세션 결과를 간결한 JSON으로 직렬화합니다"""
+    return json.dumps(result, separators=(",", ":"), default=str)
+
+
+# calculate_session 도구가 공유하는 저장소 (환경 변수로 설정)
+store = SessionStore(
+    max_sessions=int(os.environ.get("CALCULATOR_MAX_SESSIONS", "1000")),
+    max_bytes=int(os.environ.get("CALCULATOR_SESSION_MEMORY_MB", "64")) * 1024 * 1024,
+    max_cells=int(os.environ.get("CALCULATOR_MAX_CELLS", "1000"))
+)
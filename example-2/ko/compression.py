@@ -0,0 +1,249 @@
+# compression.py
+"""
+Starlette 앱의 협상 기반 응답 압축
+큰 응답은 zstd, br, gzip으로 압축하고 SSE 스트림은 그대로 통과
+"""
+import os
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli 패키지가 설치된 경우에만 br 제공
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard 패키지가 설치된 경우에만 zstd 제공
+    zstandard = None
+
+
+# 압축하지 않음: SSE는 프레임 단위로 클라이언트에 도달해야 하고, 나머지는 이미 압축된 형식
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "audio/", "video/",
+                          "application/gzip", "application/zip")
+
+# Content-Length가 이보다 큰 본문은 그대로 전송: 압축하면 이벤트 루프를 너무 오래
+# 붙잡게 되고, 큰 파일은 대신 sendfile로 전송됨
+MAXIMUM_SIZE = int(os.environ.get("MCP_COMPRESSION_MAX_SIZE", str(8 * 1024 * 1024)))
+
+# 제로 카피 파일 전송용 ASGI 확장; 압축할 본문은 대신 읽어서 처리
+ZEROCOPY = "http.response.zerocopysend"
+
+
+class _Encoder:
+    """스트리밍 인코더: compress(data, final)는 바로 보낼 수 있는 바이트를 반환"""
+
+    def __init__(self, process: Callable[[bytes], bytes], flush: Callable[[], bytes],
+                 finish: Callable[[], bytes]):
+        self._process = process
+        self._flush = flush
+        self._finish = finish
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # 청크마다 flush해야 스트리밍 응답이 계속 스트리밍됨
+        return self._process(data) + (self._finish() if final else self._flush())
+
+
+def _gzip(level: int) -> _Encoder:
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return _Encoder(z.compress, lambda: z.flush(zlib.Z_SYNC_FLUSH), z.flush)
+
+
+def _brotli(level: int) -> _Encoder:
+    c = brotli.Compressor(quality=level)
+    return _Encoder(c.process, c.flush, c.finish)
+
+
+def _zstd(level: int) -> _Encoder:
+    c = zstandard.ZstdCompressor(level=level).compressobj()
+    return _Encoder(c.compress, lambda: c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), c.flush)
+
+
+# 콘텐츠 코딩 -> (인코더 팩토리, 기본 레벨), 서버 선호 순서
+ENCODERS: Dict[str, tuple] = {
+    name: entry for name, entry, available in (
+        ("zstd", (_zstd, 3), zstandard is not None),
+        ("br", (_brotli, 4), brotli is not None),
+        ("gzip", (_gzip, 6), True),
+    ) if available
+}
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Accept-Encoding 헤더에 맞는 콘텐츠 코딩 선택, 압축하지 않으면 None"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    # q가 가장 높은 코딩 선택, 같으면 서버 선호 순서를 따름
+    for name in ENCODERS:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionStats:
+    """절약한 바이트와 압축에 쓴 시간, 모든 미들웨어 인스턴스가 공유"""
+
+    def __init__(self):
+        self.compressed = 0
+        self.too_small = 0
+        self.bypassed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.encodings: Dict[str, int] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """압축 횟수, 절약한 바이트, CPU 시간 반환"""
+        return {
+            "compressed": self.compressed,
+            "too_small": self.too_small,
+            "bypassed": self.bypassed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 1.0,
+            "cpu_ms": self.seconds * 1000,
+            "encodings": dict(self.encodings),
+            "available": list(ENCODERS)
+        }
+
+
+stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """최소 크기 임계값이 있는 협상 기반 zstd / br / gzip 응답 압축"""
+
+    def __init__(self, app, minimum_size: int = 1024, levels: Optional[Dict[str, int]] = None,
+                 maximum_size: int = MAXIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.maximum_size = maximum_size
+        self.levels = {name: level for name, (_, level) in ENCODERS.items()}
+        self.levels.update(levels or {})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        responder = _CompressionResponder(send, encoding, self.levels[encoding], self.minimum_size,
+                                          self.maximum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """본문을 보고 압축할 가치가 있는지 알 때까지 응답 시작을 보류"""
+
+    def __init__(self, send, encoding: str, level: int, minimum_size: int, maximum_size: int = MAXIMUM_SIZE):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.maximum_size = maximum_size
+        self.start: Optional[dict] = None
+        self.passthrough = False
+        self.encoder: Optional[_Encoder] = None
+        self.buffer = b""
+
+    def _compress(self, data: bytes, final: bool) -> bytes:
+        started = time.perf_counter()
+        out = self.encoder.compress(data, final)
+        stats.seconds += time.perf_counter() - started
+        stats.bytes_in += len(data)
+        stats.bytes_out += len(out)
+        return out
+
+    def _headers(self, compressed: bool) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if compressed:
+            headers["Content-Encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # 압축된 바이트는 원본 표현과 다름
+                headers["ETag"] = "W/" + etag
+        return headers
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            if ("content-encoding" in headers or status < 200 or status in (204, 206, 304)
+                    or headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES)
+                    or int(headers.get("content-length", 0)) > self.maximum_size):
+                # 그대로 즉시 전송: SSE 스트림은 절대 보류하지 않으며, 206 본문은
+                # Content-Range가 가리키는 바이트 그대로여야 함
+                self.passthrough = True
+                stats.bypassed += 1
+                return await self._send(message)
+            self.start = message
+            return
+
+        if message["type"] == ZEROCOPY and not self.passthrough:
+            return await self._send_file(message)
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            return await self._send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            message["body"] = self._compress(body, final=not more_body)
+            return await self._send(message)
+
+        self.buffer += body
+        if more_body and len(self.buffer) < self.minimum_size:
+            return
+        if not more_body and len(self.buffer) < self.minimum_size:
+            stats.too_small += 1
+            self._headers(compressed=False)
+            await self._send(self.start)
+            return await self._send({"type": "http.response.body", "body": self.buffer})
+
+        stats.compressed += 1
+        stats.encodings[self.encoding] = stats.encodings.get(self.encoding, 0) + 1
+        factory, _ = ENCODERS[self.encoding]
+        self.encoder = factory(self.level)
+        data = self._compress(self.buffer, final=not more_body)
+        self.buffer = b""
+        headers = self._headers(compressed=True)
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _send_file(self, message):
+        """제로 카피 파일 본문을 청크 단위로 읽어 인코더에 전달"""
+        fd = message["file"].fileno()
+        offset = message.get("offset", 0)
+        count = message.get("count")
+        end = os.fstat(fd).st_size if count is None else offset + count
+        more_body = message.get("more_body", False)
+        while True:
+            chunk = os.pread(fd, min(256 * 1024, end - offset), offset)
+            offset += len(chunk)
+            last = offset >= end or not chunk
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body or not last})
+            if last:
+                return
+
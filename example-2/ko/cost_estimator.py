@@ -0,0 +1,310 @@
+# cost_estimator.py
+"""
+계산기 표현식용 정적 비용 추정기
+예상 비용이나 결과 크기가 너무 큰 표현식을 계산 전에 거부
+"""
+
+import ast
+import math
+import os
+from typing import Any, Dict, Mapping, Optional
+
+import calculator
+import expression_engine
+
+
+class CostLimitExceeded(expression_engine.ExpressionError):
+    """표현식이 계산 예산을 넘을 것으로 예상될 때 발생"""
+
+
+# 예산: 추상 작업 단위 (대략 머신 워드 연산 1회) 및 결과 비트 수
+COST_BUDGET = float(os.environ.get("CALCULATOR_COST_BUDGET", "1e7"))
+MAX_RESULT_BITS = float(os.environ.get("CALCULATOR_MAX_RESULT_BITS", "1e7"))
+MAX_EXPRESSION_LENGTH = int(os.environ.get("CALCULATOR_MAX_LENGTH", "10000"))
+
+# 큰 정수 곱셈 비용의 지수 (Karatsuba)
+KARATSUBA = math.log2(3)
+
+# 유한한 float의 최대 크기 (비트)
+FLOAT_BITS = 1024.0
+
+# 이 비트 수 이하의 정수는 정확한 값을 추적해 지수와 인자를 정밀하게 유지
+EXACT_BITS = 64
+
+# 정수 인자의 크기에 따라 비용이 커지는 함수
+FACTORIAL_LIKE = {"factorial", "comb", "perm"}
+INTEGER_FUNCTIONS = {"gcd", "lcm", "isqrt"}
+SEQUENCE_FUNCTIONS = {"fsum", "prod", "max", "min"}
+
+
+def _words(bits: float) -> float:
+    """주어진 크기의 값에 필요한 64비트 머신 워드 수"""
+    return max(1.0, bits / 64)
+
+
+def _multiply_cost(left_bits: float, right_bits: float) -> float:
+    """주어진 크기의 두 정수를 곱하는 비용"""
+    small, large = sorted((_words(left_bits), _words(right_bits)))
+    return large * small ** (KARATSUBA - 1)
+
+
+class _Value:
+    """추상 값: 종류, log2 |값|의 상한, 그리고 저렴할 때의 정확한 값"""
+
+    __slots__ = ("kind", "bits", "exact", "length")
+
+    def __init__(self, kind: str, bits: float = 0.0, exact: Any = None, length: float = 0.0):
+        self.kind = kind  # "int", "float", "seq" or "other"
+        self.bits = bits
+        self.exact = exact
+        self.length = length
+
+    @classmethod
+    def of(cls, value: Any) -> "_Value":
+        """구체적인 Python 값의 추상 값"""
+        if isinstance(value, int):
+            bits = float(abs(int(value)).bit_length())
+            return cls("int", bits, value if bits <= EXACT_BITS else None)
+        if isinstance(value, (float, complex)):
+            return cls("float", FLOAT_BITS, value)
+        return cls("other")
+
+    @property
+    def max_int(self) -> float:
+        """정수 값의 상한 (표현하기에 너무 크면 inf)"""
+        if isinstance(self.exact, int):
+            return abs(self.exact)
+        return 2.0 ** self.bits if self.bits < 1024 else math.inf
+
+
+class CostEstimate:
+    """표현식 분석 결과"""
+
+    __slots__ = ("cost", "result_bits")
+
+    def __init__(self, cost: float, result_bits: float):
+        self.cost = cost
+        self.result_bits = result_bits
+
+    def __repr__(self) -> str:
+        return f"CostEstimate(cost={self.cost:.3g}, result_bits={self.result_bits:.3g})"
+
+
+class _Analyzer:
+    """표현식 AST를 순회하며 최악의 경우 비용 추정치를 누적"""
+
+    def __init__(self, namespace: Dict[str, Any]):
+        self.namespace = namespace
+        self.cost = 0.0
+        self.peak_bits = 0.0
+
+    def visit(self, node: ast.AST) -> _Value:
+        method = getattr(self, f"_visit_{type(node).__name__}", None)
+        if method is None:
+            # 표현식 엔진이 받지 않는 요소(컴프리헨션, 속성, 람다)는 제한 없는 작업을
+            # 숨길 수 있으므로 아예 추정하지 않음
+            raise CostLimitExceeded(f"expression rejected: {type(node).__name__} cannot be estimated")
+        value = method(node)
+        self.cost += 1
+        if value.kind == "int":
+            self.peak_bits = max(self.peak_bits, value.bits)
+        elif value.kind == "seq":
+            self.peak_bits = max(self.peak_bits, value.length * max(value.bits, 64))
+        return value
+
+    def _visit_Expression(self, node: ast.Expression) -> _Value:
+        return self.visit(node.body)
+
+    def _visit_Constant(self, node: ast.Constant) -> _Value:
+        return _Value.of(node.value)
+
+    def _visit_Name(self, node: ast.Name) -> _Value:
+        if node.id in self.namespace:
+            return _Value.of(self.namespace[node.id])
+        return _Value("other")
+
+    def _visit_UnaryOp(self, node: ast.UnaryOp) -> _Value:
+        operand = self.visit(node.operand)
+        if operand.kind == "int" and operand.exact is not None and isinstance(node.op, ast.USub):
+            return _Value("int", operand.bits, -operand.exact)
+        if operand.kind == "int" and operand.exact is not None and isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(node.op, ast.Not):
+            return _Value("int", 1.0)
+        return _Value(operand.kind, operand.bits, length=operand.length)
+
+    def _visit_BinOp(self, node: ast.BinOp) -> _Value:
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op = type(node.op)
+
+        # 시퀀스 반복: [x] * n은 n개 항목을 할당
+        if op is ast.Mult and (left.kind == "seq") != (right.kind == "seq"):
+            seq, count = (left, right) if left.kind == "seq" else (right, left)
+            length = seq.length * (count.max_int if count.kind == "int" else 0)
+            self.cost += length
+            return _Value("seq", seq.bits, length=length)
+        if op is ast.Add and left.kind == "seq" and right.kind == "seq":
+            length = left.length + right.length
+            self.cost += length
+            return _Value("seq", max(left.bits, right.bits), length=length)
+
+        if left.kind != "int" or right.kind != "int":
+            if op is ast.Pow and left.kind == "int" and right.kind == "float":
+                # float 지수: 결과는 float 또는 OverflowError이며 둘 다 저렴함
+                return _Value("float", FLOAT_BITS)
+            self.cost += _words(max(left.bits, right.bits))
+            return _Value("float" if "float" in (left.kind, right.kind) else "other", FLOAT_BITS)
+
+        if op is ast.Pow:
+            return self._int_power(left, right)
+        if op in (ast.Add, ast.Sub):
+            self.cost += _words(max(left.bits, right.bits))
+            return self._exact_or(left, right, op, max(left.bits, right.bits) + 1)
+        if op is ast.Mult:
+            self.cost += _multiply_cost(left.bits, right.bits)
+            return self._exact_or(left, right, op, left.bits + right.bits)
+        if op in (ast.FloorDiv, ast.Mod):
+            self.cost += _words(left.bits) * _words(right.bits)
+            return self._exact_or(left, right, op, left.bits)
+        if op is ast.Div:
+            self.cost += _words(max(left.bits, right.bits))
+            return _Value("float", FLOAT_BITS)
+        return _Value("other")
+
+    def _exact_or(self, left: _Value, right: _Value, op: type, bits: float) -> _Value:
+        """두 피연산자가 모두 작은 알려진 정수일 때 정확한 결과를 계산"""
+        if left.exact is not None and right.exact is not None and bits <= EXACT_BITS:
+            try:
+                return _Value.of(expression_engine.BINARY_OPERATORS[op](left.exact, right.exact))
+            except ArithmeticError:
+                pass
+        return _Value("int", bits)
+
+    def _int_power(self, base: _Value, exponent: _Value) -> _Value:
+        """정수 거듭제곱: 결과는 base_bits * exponent 비트"""
+        if isinstance(exponent.exact, int) and exponent.exact < 0:
+            return _Value("float", FLOAT_BITS)
+        if isinstance(base.exact, int) and abs(base.exact) <= 1:
+            return _Value("int", 1.0, base.exact if exponent.exact is not None else None)
+        bits = base.bits * exponent.max_int
+        if base.exact is not None and exponent.exact is not None and bits <= EXACT_BITS:
+            return _Value.of(base.exact ** exponent.exact)
+        # 반복 제곱: 비용은 마지막 곱셈이 지배
+        self.cost += _multiply_cost(bits, bits)
+        return _Value("int", bits)
+
+    def _visit_Compare(self, node: ast.Compare) -> _Value:
+        for child in [node.left, *node.comparators]:
+            self.visit(child)
+        return _Value("int", 1.0)
+
+    def _visit_BoolOp(self, node: ast.BoolOp) -> _Value:
+        values = [self.visit(child) for child in node.values]
+        return max(values, key=lambda value: value.bits)
+
+    def _visit_IfExp(self, node: ast.IfExp) -> _Value:
+        self.visit(node.test)
+        # 어느 분기든 실행될 수 있으므로 더 비싼 쪽을 가정
+        return max((self.visit(node.body), self.visit(node.orelse)), key=lambda value: value.bits)
+
+    def _visit_Tuple(self, node: ast.Tuple) -> _Value:
+        return self._sequence(node.elts)
+
+    def _visit_List(self, node: ast.List) -> _Value:
+        return self._sequence(node.elts)
+
+    def _sequence(self, elements) -> _Value:
+        values = [self.visit(child) for child in elements]
+        bits = max((value.bits for value in values), default=0.0)
+        return _Value("seq", bits, length=float(len(values)))
+
+    def _visit_Call(self, node: ast.Call) -> _Value:
+        args = [self.visit(arg) for arg in node.args]
+        for keyword in node.keywords:
+            self.visit(keyword.value)
+        if not isinstance(node.func, ast.Name) or node.func.id not in self.namespace:
+            raise CostLimitExceeded("expression rejected: only whitelisted functions can be called")
+        name = node.func.id
+
+        if name in FACTORIAL_LIKE and args and args[0].kind == "int":
+            n = args[0].max_int
+            if n == math.inf:
+                self.cost = math.inf
+                return _Value("int", math.inf)
+            log_n = max(1.0, math.log2(n + 1))
+            if name == "factorial":
+                # log2(n!) ~ n * log2(n), 균형 곱셈 트리로 계산됨
+                bits = n * log_n
+                self.cost += _words(bits) ** KARATSUBA + n
+                return _Value("int", bits)
+            k = args[1].max_int if len(args) > 1 and args[1].kind == "int" else n
+            # perm(n, k)는 ~k * log2(n) 비트, comb(n, k)는 2**n 미만이기도 함
+            bits = min(k, n) * log_n
+            if name == "comb":
+                bits = min(bits, float(n))
+            self.cost += _words(bits) ** KARATSUBA * max(1.0, math.log2(min(k, n) + 1))
+            return _Value("int", bits)
+        if name in INTEGER_FUNCTIONS and args:
+            bits = sum(arg.bits for arg in args) if name == "lcm" else max(arg.bits for arg in args)
+            self.cost += sum(_words(arg.bits) for arg in args) ** 2
+            return _Value("int", bits)
+        if name in SEQUENCE_FUNCTIONS and args:
+            length = sum(arg.length if arg.kind == "seq" else 1 for arg in args)
+            bits = max(arg.bits for arg in args)
+            self.cost += length * _words(bits)
+            if name == "prod":
+                # b 비트 항목 n개의 곱은 최대 n * b 비트
+                product_bits = sum(arg.length * arg.bits if arg.kind == "seq" else arg.bits for arg in args)
+                self.cost += _multiply_cost(product_bits, bits) * length
+                return _Value("int", product_bits)
+            if name == "fsum":
+                return _Value("float", FLOAT_BITS)
+            return _Value("int" if all(arg.kind == "int" for arg in args) else "float", bits)
+        if name in ("abs", "round") and args:
+            return _Value(args[0].kind, args[0].bits)
+
+        # math 모듈의 나머지 함수는 상수 시간에 float를 반환
+        self.cost += sum(_words(arg.bits) for arg in args)
+        return _Value("float", FLOAT_BITS)
+
+
+def analyze(expression: str, values: Optional[Mapping[str, Any]] = None) -> CostEstimate:
+    """AST로부터 표현식의 계산 비용을 추정합니다
+
+    values는 자유 변수의 현재 값으로, 그 크기를 알 수 있게 합니다.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        return CostEstimate(math.inf, 0.0)
+    namespace = {**calculator.ALLOWED_NAMES, **values} if values else calculator.ALLOWED_NAMES
+    analyzer = _Analyzer(namespace)
+    tree = expression_engine.parse(expression)
+    analyzer.visit(tree)
+    return CostEstimate(analyzer.cost, analyzer.peak_bits)
+
+
+# 추정치는 컴파일된 표현식처럼 캐시됨 (거부 포함)
+estimate_cache = calculator.CompiledExpressionCache(compiler=analyze)
+
+
+def check(expression: str, budget: Optional[float] = None,
+          max_result_bits: Optional[float] = None,
+          values: Optional[Mapping[str, Any]] = None) -> CostEstimate:
+    """추정 비용이나 결과 크기가 예산을 넘는 표현식을 거부합니다"""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CostLimitExceeded(f"expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    budget = COST_BUDGET if budget is None else budget
+    max_result_bits = MAX_RESULT_BITS if max_result_bits is None else max_result_bits
+
+    # 변수 값에 따라 달라지는 추정치는 캐시로 공유할 수 없음
+    estimate = analyze(expression, values) if values else estimate_cache.get(expression)
+    if estimate.cost > budget:
+        raise CostLimitExceeded(
+            f"expression rejected: estimated cost {estimate.cost:.3g} exceeds the budget of {budget:.3g}"
+        )
+    if estimate.result_bits > max_result_bits:
+        raise CostLimitExceeded(
+            f"expression rejected: estimated result size of {estimate.result_bits:.3g} bits "
+            f"exceeds the limit of {max_result_bits:.3g}"
+        )
+    return estimate
@@ -0,0 +1,156 @@
+# file_resources.py
+"""
+루트 디렉터리 아래의 파일을 file:/// 리소스로 제공
+resources/read에는 메모리 맵 조각, /resources/stream에는 sendfile(2)
+"""
+import mimetypes
+import mmap
+import os
+import re
+from typing import Optional, Tuple, Union
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+import anyio
+from starlette.responses import Response
+
+import zerocopy
+
+
+# 파일을 file:/// 리소스로 제공할 디렉터리; 설정하지 않으면 파일을 노출하지 않음
+ROOT = os.environ.get("MCP_RESOURCE_ROOT", "")
+
+# resources/read 한 번이 반환하는 최대 바이트; 더 큰 파일은 ?range=START-END 조각으로 읽음
+MAX_READ = int(os.environ.get("MCP_RESOURCE_MAX_READ", str(16 * 1024 * 1024)))
+
+# 파일 URI는 루트를 /로 보고 그 아래의 상대 경로를 가리킴
+URI_PREFIX = "file:///"
+
+# MCP 클라이언트에 텍스트로 반환; 나머지는 base64 blob으로 전송
+TEXT_TYPES = ("text/", "application/json", "application/xml", "application/x-ndjson")
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+mimetypes.add_type("text/plain", ".log")
+
+
+class FileNotFound(ValueError):
+    """루트 아래의 파일을 가리키지 않는 URI에 발생"""
+
+
+class RangeNotSatisfiable(Exception):
+    """범위가 파일 끝을 넘어서 시작할 때 발생"""
+
+    def __init__(self, size: int):
+        super().__init__(f"범위를 만족할 수 없음 (파일은 {size} 바이트)")
+        self.size = size
+
+
+def media_type(path: str) -> str:
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """단일 범위 `bytes=` 헤더의 첫 바이트와 마지막 바이트; 무시할 때는 None
+
+    RFC 9110이 허용하는 대로 다중 범위와 잘못된 헤더는 무시합니다(파일
+    전체를 전송).
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if size == 0:
+        raise RangeNotSatisfiable(size)
+    if first == "":
+        # 접미사 범위: 마지막 N 바이트
+        if int(last) == 0:
+            raise RangeNotSatisfiable(size)
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable(size)
+    if end < start:
+        return None
+    return start, end
+
+
+def mmap_slice(path: str, start: int, end: int) -> bytes:
+    """파일의 start..end(포함) 바이트를 읽기 전용 메모리 맵에서 복사
+
+    조각에 해당하는 페이지만 디스크에서 읽으므로, 큰 로그의 일부 구간은
+    파일 전체가 아니라 그 구간만큼의 비용이 듭니다.
+    """
+    with open(path, "rb") as file:
+        if start > end or os.fstat(file.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start:end + 1]
+
+
+class FileRoot:
+    """루트 디렉터리 아래의 파일을 file:/// 리소스로 제공
+
+    MCP 읽기 경로는 메모리 맵 조각을 반환합니다. max_read 바이트까지의 파일은
+    전체를, 더 큰 파일은 ?range=START-END 부분을 반환합니다. HTTP 경로는 열린
+    파일을 서버에 넘기고, 서버가 sendfile(2)로 전송합니다. 루트 밖으로
+    해석되는 경로(.., 심볼릭 링크)는 존재하지 않는 것으로 처리합니다.
+    """
+
+    def __init__(self, root: str, max_read: int = MAX_READ):
+        self.root = os.path.realpath(root)
+        self.max_read = max_read
+
+    def uri(self, path: str) -> str:
+        return URI_PREFIX + quote(os.path.relpath(path, self.root).replace(os.sep, "/"))
+
+    def contains(self, path: str) -> bool:
+        """심볼릭 링크를 해석한 path가 루트 아래에 있는지 여부"""
+        return os.path.commonpath([self.root, os.path.realpath(path)]) == self.root
+
+    def resolve(self, uri) -> Tuple[str, Optional[str]]:
+        """URI가 가리키는 파일과 ?range= 값; 그 외에는 FileNotFound 발생"""
+        parts = urlsplit(str(uri))
+        if not str(uri).startswith(URI_PREFIX):
+            raise FileNotFound(f"알 수 없는 리소스: {uri}")
+        path = os.path.join(self.root, unquote(parts.path).lstrip("/"))
+        if not self.contains(path) or not os.path.isfile(path):
+            raise FileNotFound(f"알 수 없는 리소스: {uri}")
+        return path, parse_qs(parts.query).get("range", [None])[0]
+
+    def read(self, uri) -> Union[str, bytes]:
+        """resources/read용 파일 전체 또는 ?range=START-END 바이트"""
+        path, query = self.resolve(uri)
+        size = os.path.getsize(path)
+        byte_range = parse_range(f"bytes={query}", size) if query else None
+        start, end = byte_range or (0, size - 1)
+        if end - start + 1 > self.max_read:
+            raise ValueError(f"{uri}는 {size} 바이트입니다. ?range=START-END로 한 번에 최대 "
+                             f"{self.max_read} 바이트씩 읽거나 /resources/stream으로 스트리밍하세요")
+        data = mmap_slice(path, start, end)
+        if media_type(path).startswith(TEXT_TYPES):
+            # 조각이 UTF-8 시퀀스 중간에서 잘릴 수 있음
+            return data.decode("utf-8", errors="replace")
+        return data
+
+    async def read_in_thread(self, uri) -> Union[str, bytes]:
+        """스레드에서 실행하는 read(): 맵에서 최대 max_read 바이트를 복사해도 이벤트 루프를 막지 않음"""
+        return await anyio.to_thread.run_sync(self.read, uri)
+
+    def response(self, uri, range_header: Optional[str] = None) -> Response:
+        """HTTP로 보내는 파일 바이트, sendfile(2)로 전송; 단일 바이트 Range는 206"""
+        path, _ = self.resolve(uri)
+        file = open(path, "rb")
+        try:
+            size = os.fstat(file.fileno()).st_size
+            byte_range = parse_range(range_header, size) if range_header else None
+        except BaseException:
+            file.close()
+            raise
+        headers = {"Accept-Ranges": "bytes"}
+        if byte_range is None:
+            return zerocopy.FileSendResponse(file, 0, size, headers=headers, media_type=media_type(path))
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return zerocopy.FileSendResponse(file, start, end - start + 1, status_code=206, headers=headers,
+                                         media_type=media_type(path))
@@ -0,0 +1,157 @@
+# http2.py
+"""
+Starlette 앱용 평문 HTTP/2 (h2c)
+Hypercorn으로 HTTP/1.1과 함께 h2c를 제공; Http2Pool은 클라이언트 전체를 공유 연결에 다중화
+"""
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+try:
+    from hypercorn.asyncio import serve as hypercorn_serve
+    from hypercorn.config import Config
+except ImportError:  # HTTP/2 서빙은 hypercorn 패키지가 설치된 경우에만 사용 가능
+    hypercorn_serve = None
+
+try:
+    import h2
+except ImportError:  # HTTP/2 클라이언트에는 h2 패키지가 필요 (pip install "httpx[http2]")
+    h2 = None
+
+
+# HTTP/2 연결 하나가 동시에 실을 수 있는 스트림 수; 열린 SSE 스트림마다 하나씩 차지
+MAX_STREAMS = int(os.environ.get("MCP_HTTP2_MAX_STREAMS", "4096"))
+
+
+async def serve(app, binds: List[str], max_streams: int = MAX_STREAMS, log_level: str = "info",
+                shutdown_trigger: Optional[Callable[[], Awaitable]] = None):
+    """Hypercorn으로 ASGI 앱 제공: 같은 소켓에서 HTTP/1.1과 평문 HTTP/2 (h2c)
+
+    binds는 "host:port", "unix:/path" 또는 "fd://N". h2c는 사전 지식 방식과
+    HTTP/1.1 Upgrade 방식 모두 받으므로 HTTP/1.1 클라이언트는 그대로
+    동작합니다. shutdown_trigger가 반환될 때까지, 없으면
+    SIGINT/SIGTERM까지 실행됩니다.
+    """
+    if hypercorn_serve is None:
+        raise RuntimeError("HTTP/2 serving needs the hypercorn package (pip install hypercorn)")
+    config = Config()
+    config.bind = binds
+    config.h2_max_concurrent_streams = max_streams
+    config.loglevel = log_level.upper()
+    await hypercorn_serve(app, config, shutdown_trigger=shutdown_trigger)
+
+
+# httpx는 HTTP/2 연결 하나에서 최대 100개의 스트림을 동시에 실행
+STREAMS_PER_CONNECTION = 100
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    """닫힐 때 스트림 슬롯을 반환하는 응답 본문"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _PooledTransport(httpx.AsyncBaseTransport):
+    """요청을 풀로 전달; 클라이언트를 닫아도 연결은 열린 채로 유지"""
+
+    def __init__(self, pool: "Http2Pool"):
+        self._pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool.handle_async_request(request)
+
+    async def aclose(self):
+        pass
+
+
+class Http2Pool:
+    """클라이언트의 모든 요청, SSE 스트림, MCP 세션이 공유하는 h2c 연결
+
+    HTTP/1.1을 끄면 httpx는 http:// URL에서 사전 지식 방식의 HTTP/2를 사용하고,
+    모든 요청은 열린 연결의 스트림이 됩니다.
+    열린 SSE 스트림은 세션이 살아 있는 동안 스트림을 차지하고,
+    httpx는 연결마다 최대 STREAMS_PER_CONNECTION개의 스트림만 실행하므로,
+    열린 연결이 모두 찼을 때만 새 연결을 엽니다. client_factory는
+    풀을 mcp의 sse_client와 streamablehttp_client에 연결합니다. uds를 지정하면
+    TCP 대신 서버의 Unix 도메인 소켓으로 연결합니다.
+    """
+
+    def __init__(self, streams_per_connection: int = STREAMS_PER_CONNECTION, uds: str = ""):
+        if h2 is None:
+            raise RuntimeError('HTTP/2 client mode needs the h2 package (pip install "httpx[http2]")')
+        self.streams_per_connection = streams_per_connection
+        self.uds = uds
+        self._transports: List[httpx.AsyncHTTPTransport] = []
+        self._active: List[int] = []  # 연결별 열린 스트림 수
+
+    def _acquire(self) -> int:
+        """빈 스트림이 있는 첫 연결의 인덱스, 모두 찼으면 새 연결을 엶"""
+        for index, active in enumerate(self._active):
+            if active < self.streams_per_connection:
+                break
+        else:
+            self._transports.append(httpx.AsyncHTTPTransport(
+                http1=False, http2=True, uds=self.uds or None, limits=httpx.Limits(max_connections=1, max_keepalive_connections=1)))
+            self._active.append(0)
+            index = len(self._active) - 1
+        self._active[index] += 1
+        return index
+
+    def _release(self, index: int):
+        if index < len(self._active):
+            self._active[index] -= 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        index = self._acquire()
+        try:
+            response = await self._transports[index].handle_async_request(request)
+        except BaseException:
+            self._release(index)
+            raise
+        return httpx.Response(response.status_code, headers=response.headers, extensions=response.extensions,
+                              stream=_CountedStream(response.stream, lambda: self._release(index)))
+
+    def client(self, **kwargs) -> httpx.AsyncClient:
+        """모든 요청이 풀의 연결로 가는 httpx 클라이언트"""
+        return httpx.AsyncClient(transport=_PooledTransport(self), **kwargs)
+
+    def client_factory(self, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None,
+                       auth: Optional[httpx.Auth] = None) -> httpx.AsyncClient:
+        """sse_client / streamablehttp_client용 httpx_client_factory (mcp 기본값과 동일)"""
+        return self.client(headers=headers, timeout=timeout or httpx.Timeout(30.0), auth=auth,
+                           follow_redirects=True)
+
+    def connections(self) -> int:
+        """지금까지 연 연결 수"""
+        return len(self._transports)
+
+    def streams(self) -> int:
+        """모든 연결에 걸쳐 열린 스트림 수"""
+        return sum(self._active)
+
+    async def aclose(self):
+        for transport in self._transports:
+            await transport.aclose()
+        self._transports.clear()
+        self._active.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
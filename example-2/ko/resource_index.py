@@ -0,0 +1,395 @@
+# resource_index.py
+"""
+resources/list를 위한 MCP_RESOURCE_ROOT 아래 파일의 인덱스
+한 번 만든 뒤 inotify 이벤트로 (또는 폴링으로) 최신 상태를 유지
+"""
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import stat
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from mcp import types
+from mcp.server import Server
+
+import file_resources
+
+
+# inotify를 쓸 수 없을 때(Linux가 아니거나 감시 한도 초과) 트리를 다시 스캔하는 간격(초)
+POLL_INTERVAL = float(os.environ.get("MCP_RESOURCE_POLL_INTERVAL", "2.0"))
+
+# inotify(7) 이벤트 비트
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+# 루트 아래 모든 디렉터리에 감시를 걸고, 디렉터리 자체의 삭제는 부모에서 확인
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_ONLYDIR | IN_DONT_FOLLOW)
+
+# struct inotify_event 헤더: wd, mask, cookie, len (뒤에 NUL로 채운 이름이 이어짐)
+EVENT = struct.Struct("iIII")
+
+# 경로 -> (크기, ns 단위 mtime)
+Scan = Dict[str, Tuple[int, int]]
+
+
+class Inotify:
+    """libc를 통해 호출하는 논블로킹 inotify(7) 인스턴스 (Linux 전용)"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # 여기서 AttributeError가 나면 inotify가 없는 libc (Linux가 아님)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        """path의 감시 디스크립터; fs.inotify.max_user_watches를 다 쓰면 OSError(ENOSPC)"""
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._rm_watch(self.fd, wd)
+
+    def read(self) -> List[Tuple[int, int, str]]:
+        """대기 중인 모든 이벤트의 (wd, mask, name)"""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 1024 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ResourceIndex:
+    """FileRoot 아래 파일의 목록, 한 번 만든 뒤 점진적으로 최신 상태를 유지
+
+    list_resources는 트리를 순회하지 않고 저장된 목록을 반환합니다.
+    모든 디렉터리를 inotify로 감시하며, 이벤트 묶음마다 그 이벤트가 가리키는
+    파일만 갱신합니다. inotify를 쓸 수 없으면(Linux가 아니거나
+    fs.inotify.max_user_watches를 다 쓴 경우) 대신 poll_interval초마다
+    스레드에서 트리를 다시 스캔하고, 크기나 mtime이 바뀐 파일만 갱신합니다.
+    심볼릭 링크 디렉터리는 따라가지 않으며 루트 밖으로 나가는 심볼릭
+    링크는 제외합니다.
+    """
+
+    def __init__(self, files: file_resources.FileRoot, poll_interval: float = POLL_INTERVAL):
+        self.files = files
+        self.poll_interval = poll_interval
+        # 경로 -> (크기, ns 단위 mtime, 목록에 들어갈 리소스)
+        self._entries: Dict[str, Tuple[int, int, types.Resource]] = {}
+        self._listing: Optional[List[types.Resource]] = None
+        self._built = False
+        self._listeners: List[Callable[[Set[str]], Any]] = []
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[int, str] = {}
+        # _watches 보호: 루프가 이벤트를 읽는 동안 스캔 스레드가 감시를 추가함
+        self._lock = threading.Lock()
+        self._poller: Optional[asyncio.Task] = None
+        self._resync: Optional[asyncio.Task] = None
+        self._scans: Set[asyncio.Task] = set()
+        # 스레드에서 스캔하는 동안 이벤트가 가리킨 경로 (_scan_and_merge)
+        self._seen: Set[str] = set()
+        self._scanning = 0
+        self.mode = "stopped"
+
+        # 메트릭
+        self.build_ms = 0.0
+        self.updates = 0
+        self.added = 0
+        self.removed = 0
+        self.rescans = 0
+        self.overflows = 0
+
+    def resources(self) -> List[types.Resource]:
+        """인덱스의 모든 파일, 파일 시스템을 건드리지 않음 (시작 전이면 처음 사용할 때 만듦)"""
+        if not self._built:
+            self.build()
+        if self._listing is None:
+            self._listing = [resource for _, _, resource in self._entries.values()]
+        return list(self._listing)
+
+    def on_change(self, listener: Callable[[Set[str]], Any]):
+        """갱신마다 추가, 변경, 삭제된 파일의 URI로 listener를 호출"""
+        self._listeners.append(listener)
+
+    def _entry(self, path: str, size: int, mtime: int) -> Tuple[int, int, types.Resource]:
+        return size, mtime, types.Resource(uri=self.files.uri(path), name=os.path.relpath(path, self.files.root),
+                                           mimeType=file_resources.media_type(path), size=size)
+
+    def _stat(self, path: str) -> Optional[Tuple[int, int]]:
+        """루트 아래 일반 파일의 (크기, mtime), 그 밖에는 None"""
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(info.st_mode) or (os.path.islink(path) and not self.files.contains(path)):
+            return None
+        return info.st_size, info.st_mtime_ns
+
+    def _scan(self, top: str, watch: bool) -> Scan:
+        """top 아래 모든 파일의 크기와 mtime; watch이면 각 디렉터리를 읽기 전에 감시를 검"""
+        inotify = self._inotify if watch else None
+        found: Scan = {}
+        pending = [top]
+        while pending:
+            directory = pending.pop()
+            if inotify is not None:
+                try:
+                    # 락 안에서 등록하므로 새 감시의 이벤트는 바로 그 디렉터리로 해석됨
+                    with self._lock:
+                        self._watches[inotify.add_watch(directory)] = directory
+                except (FileNotFoundError, NotADirectoryError):
+                    # 감시하기 전에 삭제됨; 다른 오류(ENOSPC)는 호출자에게 전달
+                    continue
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_symlink():
+                        found_stat = self._stat(entry.path)
+                        if found_stat is not None:
+                            found[entry.path] = found_stat
+                    elif entry.is_file(follow_symlinks=False):
+                        info = entry.stat(follow_symlinks=False)
+                        found[entry.path] = (info.st_size, info.st_mtime_ns)
+                except OSError:
+                    # 스캔 중에 삭제됨
+                    continue
+        return found
+
+    def build(self):
+        """트리 전체를 인덱싱 (start()가 inotify를 연 뒤라면 감시도 함)"""
+        started = time.perf_counter()
+        found = self._scan(self.files.root, watch=self._inotify is not None)
+        self._entries = {path: self._entry(path, *found[path]) for path in found}
+        self._listing = None
+        self._built = True
+        self.build_ms = (time.perf_counter() - started) * 1000
+
+    async def start(self):
+        """스레드에서 인덱스를 만든 뒤 inotify 이벤트를 따라감 (쓸 수 없으면 폴링)"""
+        try:
+            self._inotify = Inotify()
+        except (OSError, AttributeError):
+            self._inotify = None
+        try:
+            await asyncio.to_thread(self.build)
+        except OSError:
+            # 보통 ENOSPC: 디렉터리가 inotify 감시 한도보다 많음
+            self._close_inotify()
+            await asyncio.to_thread(self.build)
+        if self._inotify is not None:
+            asyncio.get_running_loop().add_reader(self._inotify.fd, self._read_events)
+            self.mode = "inotify"
+        else:
+            self._start_polling()
+
+    def stop(self):
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._close_inotify()
+        for task in (self._poller, self._resync, *self._scans):
+            if task is not None:
+                task.cancel()
+        self._poller = self._resync = None
+        self._scans.clear()
+        self.mode = "stopped"
+
+    def _close_inotify(self):
+        self._inotify.close()
+        self._inotify = None
+        with self._lock:
+            self._watches.clear()
+
+    def _start_polling(self):
+        self.mode = "polling"
+        self._poller = asyncio.create_task(self._poll())
+
+    def _fall_back_to_polling(self):
+        if self._inotify is None:
+            # 감시가 부족해진 다른 스캔이나 stop()이 이미 닫음
+            return
+        asyncio.get_running_loop().remove_reader(self._inotify.fd)
+        self._close_inotify()
+        self._start_polling()
+
+    def _set(self, path: str, found: Optional[Tuple[int, int]], changed: Set[str]):
+        """파일의 새 (크기, mtime)을 기록하고, found가 None이면 삭제를 기록"""
+        entry = self._entries.get(path)
+        if found is None:
+            if entry is not None:
+                del self._entries[path]
+                self.removed += 1
+                changed.add(str(entry[2].uri))
+        elif entry is None or entry[:2] != found:
+            if entry is None:
+                self.added += 1
+            entry = self._entry(path, *found)
+            self._entries[path] = entry
+            changed.add(str(entry[2].uri))
+
+    def _remove_tree(self, directory: str, changed: Set[str]):
+        """삭제되거나 다른 곳으로 옮겨진 디렉터리 아래의 모든 파일과 감시를 지움"""
+        prefix = directory + os.sep
+        for path in [path for path in self._entries if path.startswith(prefix)]:
+            self._set(path, None, changed)
+        with self._lock:
+            for wd, watched in list(self._watches.items()):
+                if watched == directory or watched.startswith(prefix):
+                    del self._watches[wd]
+                    if self._inotify is not None:
+                        self._inotify.rm_watch(wd)
+
+    def _recheck(self, path: str, top: str, found: Optional[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+        """found, 또는 스캔 중에 이벤트가 path나 그 위 디렉터리를 가리켰다면 새로 한 stat"""
+        parent = path
+        while self._seen and len(parent) >= len(top):
+            if parent in self._seen:
+                return self._stat(path)
+            parent = os.path.dirname(parent)
+        return found
+
+    def _apply(self, changed: Set[str]):
+        if not changed:
+            return
+        self._listing = None
+        self.updates += len(changed)
+        for listener in self._listeners:
+            listener(changed)
+
+    def _read_events(self):
+        changed: Set[str] = set()
+        touched: Set[str] = set()
+        with self._lock:
+            # 락 안에서 읽고 해석: 스캔 스레드가 감시를 추가하는 중일 수 있음
+            events = [(mask, name, self._watches.pop(wd, None) if mask & IN_IGNORED else self._watches.get(wd))
+                      for wd, mask, name in self._inotify.read()]
+        for mask, name, directory in events:
+            if mask & IN_Q_OVERFLOW:
+                # 이벤트가 유실됨: 대신 트리 전체를 한 번 비교
+                self.overflows += 1
+                if self._resync is None or self._resync.done():
+                    self._resync = asyncio.create_task(self._rescan(watch=True))
+                continue
+            if mask & IN_IGNORED or directory is None:
+                continue
+            path = os.path.join(directory, name)
+            if self._scanning:
+                self._seen.add(path)
+            if mask & IN_ISDIR:
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._remove_tree(path, changed)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    # 이미 파일이 들어 있을 수 있음: 스레드에서 감시를 걸면서 디렉터리와 하위 디렉터리를 스캔
+                    scan = asyncio.create_task(self._scan_and_merge(path, watch=True, complete=False))
+                    self._scans.add(scan)
+                    scan.add_done_callback(self._scans.discard)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                touched.discard(path)
+                self._set(path, None, changed)
+            else:
+                touched.add(path)
+        # 이 묶음에서 쓰기가 몇 번이든 파일마다 stat 한 번
+        for path in touched:
+            self._set(path, self._stat(path), changed)
+        self._apply(changed)
+
+    async def _scan_and_merge(self, top: str, watch: bool, complete: bool) -> bool:
+        """스레드에서 top을 스캔한 뒤 인덱스와의 차이를 루프에서 반영
+
+        스캔은 그동안 처리된 이벤트보다 오래된 것일 수 있으므로, 그 이벤트가
+        가리킨 경로는 대신 다시 stat합니다. complete이면 스캔에서 찾지 못한
+        인덱스의 파일을 지웁니다.
+        """
+        self._scanning += 1
+        try:
+            found = await asyncio.to_thread(self._scan, top, watch)
+            changed: Set[str] = set()
+            if complete:
+                for path in [path for path in self._entries if path not in found]:
+                    self._set(path, self._recheck(path, top, None), changed)
+            for path, entry in found.items():
+                self._set(path, self._recheck(path, top, entry), changed)
+            self._apply(changed)
+            return True
+        except OSError:
+            # 새 디렉터리에 걸 감시가 부족함
+            self._fall_back_to_polling()
+            return False
+        finally:
+            self._scanning -= 1
+            if not self._scanning:
+                self._seen.clear()
+
+    async def _rescan(self, watch: bool = False):
+        """트리를 새로 스캔(스레드에서 실행)해 인덱스와 비교하고 차이를 반영"""
+        if await self._scan_and_merge(self.files.root, watch, complete=True):
+            self.rescans += 1
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self._rescan()
+
+    def stats(self) -> Dict[str, Any]:
+        """인덱스 크기, 갱신 방식, 갱신 횟수를 반환"""
+        return {
+            "mode": self.mode,
+            "files": len(self._entries),
+            "watches": len(self._watches),
+            "build_ms": self.build_ms,
+            "updates": self.updates,
+            "added": self.added,
+            "removed": self.removed,
+            "rescans": self.rescans,
+            "overflows": self.overflows,
+            "poll_interval": self.poll_interval
+        }
+
+
+def list_resources_from(server: Server, index: ResourceIndex):
+    """서버의 resources/list 응답에 인덱스의 파일을 덧붙임 (서버 자체 리소스 뒤에)"""
+    handler = server.request_handlers[types.ListResourcesRequest]
+
+    async def listed(request: types.ListResourcesRequest):
+        result = await handler(request)
+        return types.ServerResult(types.ListResourcesResult(resources=result.root.resources + index.resources()))
+
+    server.request_handlers[types.ListResourcesRequest] = listed
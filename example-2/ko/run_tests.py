@@ -23,12 +23,20 @@ Medium 글 기반 구현: https://medium.com/@vkrishnan9074/mcp-clients-stdio-vs
 옵션:
   --stdio-only    STDIO 클라이언트만 테스트
   --sse-only      SSE 클라이언트만 테스트
+  --engine-only   표현식 엔진만 테스트 (eval과 같은 결과)
+  --cost-only     비용 추정기만 테스트 (공격적인 표현식)
+  --session-only  계산 세션만 테스트 (증분 재계산)
+  --behavior-only 상태 코드, 캐싱, 알림만 테스트 (프로세스 안에서)
   --help          이 도움말 표시
 
 예시:
   python run_tests.py              # 모든 테스트 실행
   python run_tests.py --stdio-only # STDIO만 테스트
   python run_tests.py --sse-only   # SSE만 테스트
+  python run_tests.py --engine-only # 표현식 엔진만 테스트
+  python run_tests.py --cost-only  # 비용 추정기만 테스트
+  python run_tests.py --session-only # 계산 세션만 테스트
+  python run_tests.py --behavior-only # 서버 동작만 테스트
 
 개별 실행:
   python stdio_server.py           # STDIO 서버 실행
@@ -48,7 +56,19 @@ async def main():
     
     tester = MCPTester()
     
-    if "--stdio-only" in args:
+    if "--cost-only" in args:
+        print("🛡️ 비용 추정기만 테스트합니다.")
+        await tester.test_cost_estimator()
+    elif "--engine-only" in args:
+        print("🧮 표현식 엔진만 테스트합니다.")
+        await tester.test_expression_engine()
+    elif "--session-only" in args:
+        print("🧩 계산 세션만 테스트합니다.")
+        await tester.test_calculation_session()
+    elif "--behavior-only" in args:
+        print("🔬 서버 동작만 테스트합니다.")
+        await tester.test_behavior()
+    elif "--stdio-only" in args:
         print("📱 STDIO 클라이언트만 테스트합니다.")
         await tester.test_stdio_client()
     elif "--sse-only" in args:
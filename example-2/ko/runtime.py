@@ -0,0 +1,148 @@
+# runtime.py
+"""
+uvicorn용 이벤트 루프와 HTTP 파서 선택
+설치되어 있으면 uvloop와 httptools, 아니면 asyncio와 h11 사용
+"""
+import asyncio
+import importlib.util
+import os
+import socket
+import stat
+import sys
+from typing import Any, Dict, List
+
+import uvicorn
+
+import http2
+import zerocopy
+
+
+# uvicorn이 사용할 수 있는 이벤트 루프와 HTTP 파서 구현 (빠른 순서);
+# 각각 마지막 구현은 항상 설치되어 있음
+LOOPS = ("uvloop", "asyncio")
+HTTP_PARSERS = ("httptools", "h11")
+
+# 요청된 구현 ("auto"는 설치된 것 중 가장 빠른 구현 선택)
+LOOP = os.environ.get("MCP_LOOP", "auto")
+HTTP = os.environ.get("MCP_HTTP", "auto")
+
+# uvicorn 대신 Hypercorn으로 HTTP/1.1과 평문 HTTP/2 제공
+HTTP2 = os.environ.get("MCP_HTTP2", "").lower() in ("1", "true", "yes")
+
+# 같은 호스트의 클라이언트를 위한 Unix 도메인 소켓, TCP와 함께 또는 TCP 대신 사용
+# (MCP_UDS_ONLY=1); MCP_UDS_MODE로 연결할 수 있는 사용자를 제한 (기본값: 소유자와 그룹)
+UDS = os.environ.get("MCP_UDS", "")
+UDS_ONLY = os.environ.get("MCP_UDS_ONLY", "").lower() in ("1", "true", "yes")
+UDS_MODE = int(os.environ.get("MCP_UDS_MODE", "660"), 8)
+
+# 서버가 실제로 시작된 구현 (/metrics용)
+selected: Dict[str, str] = {}
+
+
+def available(name: str) -> bool:
+    """구현 패키지가 설치되어 있는지 여부"""
+    return importlib.util.find_spec(name) is not None
+
+
+def pick(kind: str, choice: str, options: tuple) -> str:
+    """선택 하나를 결정; 설치되지 않은 빠른 구현은 이식성 있는 구현으로 대체"""
+    if choice == "auto":
+        return next(name for name in options if available(name))
+    if choice not in options:
+        raise ValueError(f"Unknown {kind} '{choice}' (choose from auto, {', '.join(options)})")
+    if not available(choice):
+        print(f"{choice}가 설치되어 있지 않아 {options[-1]}로 대체합니다", file=sys.stderr)
+        return options[-1]
+    return choice
+
+
+def configure(loop: str = LOOP, http: str = HTTP) -> Dict[str, Any]:
+    """이벤트 루프와 HTTP 파서를 결정하고 uvicorn 옵션으로 반환
+
+    httptools는 sendfile(2)로 파일도 전송하는 프로토콜로 실행됩니다.
+    """
+    selected["loop"] = pick("event loop", loop, LOOPS)
+    selected["http"] = pick("HTTP parser", http, HTTP_PARSERS)
+    return {"loop": selected["loop"], "http": zerocopy.protocol(selected["http"])}
+
+
+def configure_http2(loop: str = LOOP) -> bool:
+    """Hypercorn용 이벤트 루프를 결정하고 설치; hypercorn이 설치되어 있지 않으면 False"""
+    if http2.hypercorn_serve is None:
+        print("hypercorn이 설치되어 있지 않아 uvicorn으로 HTTP/1.1을 제공합니다", file=sys.stderr)
+        return False
+    selected["loop"] = pick("event loop", loop, LOOPS)
+    selected["http"] = "h11 + h2 (Hypercorn)"
+    if selected["loop"] == "uvloop":
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def describe() -> str:
+    """설정된 런타임의 한 줄 요약"""
+    return f"{selected.get('loop', 'default')} 이벤트 루프, {selected.get('http', 'default')} HTTP 파서"
+
+
+def bind_unix_socket(path: str, mode: int = UDS_MODE) -> socket.socket:
+    """path에 리슨하는 Unix 도메인 소켓, 이전 실행이 남긴 소켓 파일은 교체"""
+    if os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise FileExistsError(f"{path} exists and is not a socket")
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, mode)
+    sock.listen(2048)
+    return sock
+
+
+def unlink_unix_socket(path: str):
+    """서버가 멈춘 뒤 소켓 파일 삭제"""
+    if path and os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)
+
+
+def serve(app, host: str, port: int, loop: str = LOOP, http: str = HTTP, use_http2: bool = HTTP2,
+          uds: str = UDS, tcp: bool = not UDS_ONLY):
+    """앱을 uvicorn으로 실행하고, use_http2가 설정되면 HTTP/1.1과 h2c를 함께 제공하는 Hypercorn으로 실행
+
+    host:port, Unix 도메인 소켓 uds, 또는 둘 다에서 리슨합니다.
+    """
+    if not (tcp or uds):
+        raise ValueError("Nothing to listen on: TCP is off and no Unix socket path is set (MCP_UDS)")
+    sockets: List[socket.socket] = [bind_unix_socket(uds)] if uds else []
+    if uds:
+        print(f"리슨 중: unix:{uds}" + ("" if tcp else " (TCP 없음)"))
+    try:
+        if use_http2 and configure_http2(loop):
+            print(f"런타임: {describe()}")
+            binds = [f"{host}:{port}"] if tcp else []
+            asyncio.run(http2.serve(app, binds + [f"fd://{sock.fileno()}" for sock in sockets]))
+            return
+        options = configure(loop, http)
+        print(f"런타임: {describe()}")
+        if not sockets:
+            uvicorn.run(app, host=host, port=port, **options)
+            return
+        if tcp:
+            sockets.append(socket.create_server((host, port), backlog=2048))
+        # uvicorn은 스스로 주소 하나만 바인드하므로 두 리스너를 미리 만들어 넘김
+        config = uvicorn.Config(app, host=host, port=port, uds=None if tcp else uds, **options)
+        uvicorn.Server(config).run(sockets=sockets)
+    finally:
+        unlink_unix_socket(uds)
+
+
+def stats() -> Dict[str, Any]:
+    """설정된 구현과 실행 중인 구현 반환"""
+    try:
+        running = type(asyncio.get_running_loop()).__module__.split(".")[0]
+    except RuntimeError:
+        running = None
+    return {
+        "loop": selected.get("loop"),
+        "http": selected.get("http"),
+        "running_loop": running,
+        "available": [name for name in LOOPS + HTTP_PARSERS if available(name)]
+    }
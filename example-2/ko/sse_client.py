@@ -5,28 +5,53 @@ Medium 글의 예제를 기반으로 구현
 """
 
 import asyncio
-from mcp import ClientSession
+import os
+import sys
+import httpx
+from mcp import ClientSession, types
 from mcp.client.sse import sse_client
-from typing import List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional
+import http2
 
 
 class MCPSseClient:
     """SSE 방식 MCP 클라이언트"""
     
-    def __init__(self, server_url: str = "http://localhost:8080/sse"):
+    def __init__(self, server_url: str = "http://localhost:8080/sse", http2: bool = False, uds: str = ""):
         self.server_url = server_url
         self.session = None
+        # HTTP/2 모드: SSE 스트림과 모든 POST가 h2c 연결 하나를 공유 (MCP_HTTP2=1로 시작한 서버)
+        self.http2 = http2
+        # 같은 호스트에 있는 서버의 Unix 도메인 소켓 (MCP_UDS); 이때 server_url은 호스트 이름만 나타냄
+        self.uds = uds
+        self.connection = None
+        # 서버가 업데이트되었다고 알린 리소스 (resources/subscribe)
+        self.updates = ResourceUpdates()
+    
+    def httpx_client_factory(self, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None,
+                             auth: Optional[httpx.Auth] = None) -> httpx.AsyncClient:
+        """sse_client용 httpx 클라이언트, Unix 소켓이 지정되면 그 소켓으로 연결"""
+        transport = httpx.AsyncHTTPTransport(uds=self.uds) if self.uds else None
+        return httpx.AsyncClient(headers=headers, timeout=timeout or httpx.Timeout(30.0), auth=auth,
+                                 follow_redirects=True, transport=transport)
     
     async def connect(self) -> bool:
         """MCP 서버에 연결"""
         try:
-            print(f"🔌 SSE 서버에 연결 중: {self.server_url}")
+            print(f"🔌 SSE 서버에 연결 중: {self.server_url}" + (f" (unix:{self.uds})" if self.uds else ""))
             
             # SSE 전송을 통한 연결 생성
-            self.streams = await sse_client(url=self.server_url).__aenter__()
+            if self.http2:
+                self.connection = http2.Http2Pool(uds=self.uds)
+                self._streams_context = sse_client(
+                    url=self.server_url, httpx_client_factory=self.connection.client_factory)
+            else:
+                self._streams_context = sse_client(url=self.server_url, httpx_client_factory=self.httpx_client_factory)
+            self.streams = await self._streams_context.__aenter__()
             
             # 클라이언트 세션 생성
-            self.session = ClientSession(*self.streams)
+            self.session = ClientSession(*self.streams, message_handler=self._on_message)
             await self.session.__aenter__()
             
             # 세션 초기화
@@ -44,8 +69,10 @@ class MCPSseClient:
         try:
             if self.session:
                 await self.session.__aexit__(None, None, None)
-            if hasattr(self, 'streams'):
-                await self.streams.__aexit__(None, None, None)
+            if hasattr(self, '_streams_context'):
+                await self._streams_context.__aexit__(None, None, None)
+            if self.connection:
+                await self.connection.aclose()
             print("🔌 SSE 서버 연결이 해제되었습니다.")
         except Exception as e:
             print(f"⚠️ 연결 해제 중 오류: {e}")
@@ -102,6 +129,48 @@ class MCPSseClient:
             print(f"❌ 리소스 읽기 실패: {e}")
             return ""
     
+    async def _on_message(self, message):
+        """subscribe()를 위해 notifications/resources/updated를 큐에 넣음"""
+        if (isinstance(message, types.ServerNotification)
+                and isinstance(message.root, types.ResourceUpdatedNotification)):
+            self.updates.put(str(message.root.params.uri))
+    
+    @asynccontextmanager
+    async def subscribe(self, *uris: str) -> AsyncIterator["ResourceUpdates"]:
+        """리소스를 구독하고 변경된 URI의 비동기 이터레이터를 제공하며, 끝나면 구독을 해지
+
+        서버는 리소스의 연속된 변경을 업데이트 하나로 병합하므로, 루프에서
+        read_resource를 폴링하는 대신 이터레이터를 순회하면 됩니다.
+        """
+        for uri in uris:
+            await self.session.subscribe_resource(uri)
+        print(f"🔔 리소스 {len(uris)}개 구독: {', '.join(uris)}")
+        try:
+            yield self.updates
+        finally:
+            for uri in uris:
+                await self.session.unsubscribe_resource(uri)
+    
+    async def update_settings(self, changes: Dict[str, Any], token: Optional[str] = None) -> Optional[int]:
+        """관리자 토큰과 함께 POST /settings로 설정을 바꾸고 config://settings의 새 버전을 반환"""
+        token = token or os.environ.get("MCP_ADMIN_TOKEN")
+        if not token:
+            print("⚙️ POST /settings에는 서버와 이 클라이언트에 설정한 MCP_ADMIN_TOKEN이 필요합니다")
+            return None
+        try:
+            url = self.server_url.rsplit("/sse", 1)[0] + "/settings"
+            async with self.httpx_client_factory() as http:
+                response = await http.post(url, json=changes, headers={"Authorization": f"Bearer {token}"})
+            result = response.json()
+            if response.status_code == 200:
+                print(f"⚙️ 설정 변경, 버전: {result['version']}")
+                return result["version"]
+            print(f"❌ 설정 변경 실패: HTTP {response.status_code} - {result.get('error')}")
+            return None
+        except Exception as e:
+            print(f"❌ 설정 변경 실패: {e}")
+            return None
+    
     async def list_prompts(self) -> List[Dict[str, Any]]:
         """사용 가능한 프롬프트 목록 조회"""
         try:
@@ -129,12 +198,31 @@ class MCPSseClient:
             return ""
 
 
-async def test_sse_client():
+class ResourceUpdates:
+    """업데이트된 리소스 URI의 비동기 이터레이터, 병합된 변경마다 하나
+
+    기다리다 시간이 초과되어도(asyncio.wait_for) 순회는 끝나지 않습니다.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def put(self, uri: str):
+        self._queue.put_nowait(uri)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._queue.get()
+
+
+async def test_sse_client(http2: bool = False, uds: str = ""):
     """SSE 클라이언트 테스트"""
-    print("🚀 SSE MCP 클라이언트 테스트 시작")
+    print("🚀 SSE MCP 클라이언트 테스트 시작" + (" (HTTP/2)" if http2 else ""))
     print("=" * 60)
     
-    client = MCPSseClient()
+    client = MCPSseClient(http2=http2, uds=uds)
     
     try:
         # 서버 연결
@@ -191,6 +279,18 @@ async def test_sse_client():
                 "language": "python"
             })
         
+        print("\n7️⃣ 리소스 구독 테스트")
+        async with client.subscribe("config://settings") as updates:
+            # 설정 변경 두 번이 알림 하나로 합쳐짐
+            if await client.update_settings({"debug_mode": False}) is not None:
+                await client.update_settings({"debug_mode": True})
+                try:
+                    # 설정이 바뀌면 서버가 푸시; 그동안 아무것도 폴링하지 않음
+                    uri = await asyncio.wait_for(anext(updates), timeout=2)
+                    print(f"📨 리소스 업데이트: {uri}")
+                except asyncio.TimeoutError:
+                    print("🔕 2초 안에 업데이트 없음")
+        
         print("\n✅ 모든 SSE 테스트가 완료되었습니다!")
         
     except Exception as e:
@@ -200,4 +300,6 @@ async def test_sse_client():
 
 
 if __name__ == "__main__":
-    asyncio.run(test_sse_client())
+    # python sse_client.py --http2는 MCP_HTTP2=1로 시작한 서버와 h2c 연결 하나로 통신
+    # MCP_UDS=/path/to/socket이면 TCP 대신 서버의 Unix 도메인 소켓으로 연결
+    asyncio.run(test_sse_client("--http2" in sys.argv, os.environ.get("MCP_UDS", "")))
@@ -4,17 +4,32 @@ FastMCP를 사용한 SSE 방식 MCP 서버
 Medium 글의 예제를 기반으로 구현
 """
 
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 from mcp.server.sse import SseServerTransport
 from mcp.server import Server
 from starlette.applications import Starlette
 from starlette.requests import Request
+from starlette.responses import JSONResponse
 from starlette.routing import Mount, Route
 from starlette.middleware.cors import CORSMiddleware
-import uvicorn
-import math
+import contextlib
 import json
-from typing import Dict, Any, List
+import os
+import admin
+import admission
+import calculation_session
+import cancellation
+import compression
+import cost_estimator
+import evaluation_pool
+import file_resources
+import prompt_engine
+import resource_cache
+import resource_index
+import runtime
+import subscriptions
+import vectorized
+from typing import Dict, Any, List, Optional
 
 # MCP 서버 생성
 mcp = FastMCP("SSE Example Server")
@@ -36,20 +51,47 @@ def multiply(a: float, b: float) -> str:
     return f"The product of {a} and {b} is {result}"
 
 @mcp.tool()
-def calculate(expression: str) -> str:
+async def calculate(expression: str) -> str:
     """수학 표현식을 계산합니다 (안전한 계산)"""
     try:
-        # 안전한 계산을 위해 제한된 함수만 허용
-        allowed_names = {
-            k: v for k, v in math.__dict__.items() if not k.startswith("__")
-        }
-        allowed_names.update({"abs": abs, "round": round, "min": min, "max": max})
-        
-        result = eval(expression, {"__builtins__": {}}, allowed_names)
+        # 예상 비용이 예산을 넘으면 워커를 쓰지 않고 바로 거부
+        cost_estimator.check(expression)
+        # 폭주하는 표현식이 이벤트 루프를 막지 않도록 워커 프로세스에서 계산
+        result = await evaluation_pool.pool.evaluate(expression)
         return f"Calculation result: {result}"
     except Exception as e:
         return f"Calculation error: {str(e)}"
 
+@mcp.tool()
+async def calculate_batch(
+    expression: str = "",
+    variables: Optional[Dict[str, List[float]]] = None,
+    expressions: Optional[List[str]] = None
+) -> str:
+    """이름 있는 변수 배열에 대해 표현식을 한 번의 벡터화 연산으로 계산"""
+    try:
+        # 큰 배치가 이벤트 루프를 막지 않도록 스레드에서 계산
+        return await vectorized.run_batch(expression, variables, expressions)
+    except Exception as e:
+        return f"Calculation error: {str(e)}"
+
+@mcp.tool()
+async def calculate_session(
+    statements: Optional[List[str]] = None,
+    remove: Optional[List[str]] = None,
+    reset: bool = False,
+    ctx: Context = None
+) -> str:
+    """이 세션에 유지되는 이름 있는 셀 정의 ('x = 3', 'y = sqrt(x) * 2'); 의존하는 셀만 다시 계산"""
+    try:
+        session = calculation_session.store.get(ctx.session)
+        # 다시 계산하는 동안 이벤트 루프를 막지 않도록 스레드에서 실행
+        result = await calculation_session.run_session(session, statements, remove, reset)
+        calculation_session.store.enforce_limits()
+        return calculation_session.format_result(result)
+    except Exception as e:
+        return f"Calculation error: {str(e)}"
+
 @mcp.tool()
 def get_system_info() -> str:
     """시스템 정보를 반환합니다"""
@@ -81,25 +123,40 @@ def get_server_status() -> str:
         "uptime": time.time(),
         "cpu_percent": psutil.cpu_percent(),
         "memory_percent": psutil.virtual_memory().percent,
+        "evaluation_pool": evaluation_pool.pool.stats(),
+        "calculation_sessions": calculation_session.store.stats(),
         "status": "running"
     }
     
     return f"Server Status:\n{json.dumps(status, indent=2)}"
 
+# config://settings로 제공되는 서버 설정; update_settings로 변경
+# (또는 POST /settings: MCP_ADMIN_TOKEN이 설정되어 있을 때만 제공; admin.py 참고)
+settings = {
+    "server_name": "SSE Example Server",
+    "version": "1.0.0",
+    "features": ["tools", "resources", "prompts", "sse"],
+    "max_connections": 1000,
+    "debug_mode": True,
+    "sse_endpoint": "/sse"
+}
+
 @mcp.resource("config://settings")
+@resource_cache.cache.cached("config://settings")
 def get_config() -> str:
-    """설정 파일 리소스를 반환합니다"""
-    config = {
-        "server_name": "SSE Example Server",
-        "version": "1.0.0",
-        "features": ["tools", "resources", "prompts", "sse"],
-        "max_connections": 1000,
-        "debug_mode": True,
-        "sse_endpoint": "/sse"
-    }
-    return json.dumps(config, indent=2)
+    """설정 파일 리소스를 반환합니다 (버전마다 한 번만 렌더링)"""
+    return json.dumps(settings, indent=2)
+
+def update_settings(changes: Dict[str, Any]) -> int:
+    """설정에 변경 사항을 적용하고 리소스의 새 버전을 반환합니다"""
+    settings.update(changes)
+    return resource_cache.cache.invalidate("config://settings")
+
+# 리소스 구독자는 폴링하지 않고 변경될 때 (병합된) 알림을 받음
+resource_cache.cache.on_invalidate(subscriptions.hub.changed)
 
 @mcp.resource("file://readme")
+@resource_cache.cache.cached("file://readme")
 def get_readme() -> str:
     """README 리소스를 반환합니다"""
     return """
@@ -112,6 +169,8 @@ def get_readme() -> str:
 - add: 두 숫자 덧셈
 - multiply: 두 숫자 곱셈
 - calculate: 수학 표현식 계산
+- calculate_batch: 변수 배열에 대해 표현식 계산 (NumPy)
+- calculate_session: 이름 있는 셀로 증분 계산 (세션별)
 - get_system_info: 시스템 정보 조회
 - echo: 메시지 반환
 - get_server_status: 서버 상태 조회
@@ -129,10 +188,22 @@ def get_readme() -> str:
 - /messages/: 메시지 처리 엔드포인트
 """
 
-@mcp.prompt("code_review")
-def code_review_prompt(code: str, language: str = "python") -> str:
-    """코드 리뷰를 위한 프롬프트를 생성합니다"""
-    return f"""
+# MCP_RESOURCE_ROOT 아래의 파일을 file:///path 리소스로 제공; ?range=START-END로 큰 파일의 일부를 읽음
+files = file_resources.FileRoot(file_resources.ROOT) if file_resources.ROOT else None
+
+# inotify가 최신으로 유지하는 인덱스에서 목록을 제공: resources/list는 트리를 순회하지 않음
+index = resource_index.ResourceIndex(files) if files is not None else None
+if index is not None:
+    index.on_change(lambda changed: subscriptions.hub.changed(*changed))
+
+if files is not None:
+    @mcp.resource("file:///{path*}", name="file", description="리소스 루트 아래의 파일")
+    async def read_file(path: str) -> str | bytes:
+        """파일 또는 그 일부를 작업 스레드에서 메모리 맵으로부터 복사해 반환합니다"""
+        return await files.read_in_thread(file_resources.URI_PREFIX + path)
+
+# 프롬프트 템플릿, 한 번만 파싱; 렌더링은 코드를 프롬프트 텍스트에 바로 복사
+CODE_REVIEW = prompt_engine.PromptTemplate("""
 다음 {language} 코드를 리뷰해주세요:
 
 ```{language}
@@ -147,12 +218,9 @@ def code_review_prompt(code: str, language: str = "python") -> str:
 5. 개선 제안사항
 
 각 항목에 대해 구체적인 피드백을 제공해주세요.
-"""
+""")
 
-@mcp.prompt("explain_code")
-def explain_code_prompt(code: str, language: str = "python") -> str:
-    """코드 설명을 위한 프롬프트를 생성합니다"""
-    return f"""
+EXPLAIN_CODE = prompt_engine.PromptTemplate("""
 다음 {language} 코드가 무엇을 하는지 자세히 설명해주세요:
 
 ```{language}
@@ -165,11 +233,36 @@ def explain_code_prompt(code: str, language: str = "python") -> str:
 3. 사용된 알고리즘이나 패턴
 4. 입력과 출력
 5. 예시 사용법
-"""
+""")
+
+@mcp.prompt("code_review")
+def code_review_prompt(code: str, language: str = "python") -> str:
+    """코드 리뷰를 위한 프롬프트를 생성합니다"""
+    return CODE_REVIEW.render({"code": code, "language": language})
+
+@mcp.prompt("explain_code")
+def explain_code_prompt(code: str, language: str = "python") -> str:
+    """코드 설명을 위한 프롬프트를 생성합니다"""
+    return EXPLAIN_CODE.render({"code": code, "language": language})
+
+# 응답 압축: 이 크기보다 작은 본문은 압축하지 않고 전송
+COMPRESSION_MIN_SIZE = int(os.environ.get("MCP_COMPRESSION_MIN_SIZE", "1024"))
+
 
 def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
     """SSE를 통해 MCP 서버를 제공하는 Starlette 애플리케이션 생성"""
     sse = SseServerTransport("/messages/")
+    # 도구 호출은 도구별 시간 예산 안에서 실행 (승인 슬롯은 예산 밖에서 먼저 얻음)
+    cancellation.track_requests(mcp_server)
+    # 도구 호출과 프롬프트 렌더링은 허용된 슬롯에서 실행; 버스트는 무한정 쌓이지 않고 거부됨
+    admission.admit_requests(mcp_server)
+    # 반복되는 prompts/get 요청(같은 코드 재전송)은 슬롯을 차지하지 않고 프롬프트 캐시에서 응답
+    prompt_engine.cache_prompts(mcp_server)
+    # resources/subscribe, notifications/resources/updated로 응답
+    subscriptions.hub.attach(mcp_server)
+    if index is not None:
+        # 리소스 루트 아래 파일은 서버 자체 리소스 뒤에 인덱스에서 나열
+        resource_index.list_resources_from(mcp_server, index)
 
     async def handle_sse(request: Request) -> None:
         async with sse.connect_sse(
@@ -177,19 +270,77 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
                 request.receive,
                 request._send,
         ) as (read_stream, write_stream):
-            await mcp_server.run(
-                read_stream,
-                write_stream,
-                mcp_server.create_initialization_options(),
-            )
+            # SSE 연결이 끊기면 세션에서 진행 중인 도구 호출을 취소
+            await cancellation.run_session(mcp_server, read_stream, write_stream)
+
+    async def handle_metrics(request: Request) -> JSONResponse:
+        """서버 메트릭을 반환합니다"""
+        return JSONResponse({
+            "evaluation_pool": evaluation_pool.pool.stats(),
+            "admission": admission.controller.stats(),
+            "tool_calls": cancellation.tracker.stats(),
+            "calculation_sessions": calculation_session.store.stats(),
+            "compression": compression.stats.stats(),
+            "resource_cache": resource_cache.cache.stats(),
+            "resource_index": index.stats() if index is not None else None,
+            "subscriptions": subscriptions.hub.stats(),
+            "prompt_cache": prompt_engine.cache.stats(),
+            "runtime": runtime.stats()
+        })
+
+    async def handle_settings_update(request: Request) -> JSONResponse:
+        """설정 값을 변경합니다 (관리자 토큰 필요). config://settings 구독자에게 알림이 갑니다"""
+        if not admin.authorized(request.headers):
+            return JSONResponse({"error": "Unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        try:
+            changes = await request.json()
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        error = admin.invalid_changes(changes, settings)
+        if error:
+            return JSONResponse({"error": error}, status_code=400)
+        return JSONResponse({"version": update_settings(changes)})
+
+    async def handle_resource_stream(request: Request):
+        """파일 리소스의 원본 바이트를 sendfile로 전송; `Range: bytes=` 헤더가 있으면 그 부분만 206으로 응답"""
+        uri = request.query_params.get("uri")
+        if not uri:
+            return JSONResponse({"error": "URI is required"}, status_code=400)
+        if files is None:
+            return JSONResponse({"error": "No resource root is configured (MCP_RESOURCE_ROOT)"}, status_code=404)
+        try:
+            return files.response(uri, request.headers.get("range"))
+        except file_resources.FileNotFound as e:
+            return JSONResponse({"error": str(e)}, status_code=404)
+        except file_resources.RangeNotSatisfiable as e:
+            return JSONResponse({"error": str(e)}, status_code=416, headers={"Content-Range": f"bytes */{e.size}"})
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        """앱과 함께 계산기 워커 풀(과 파일 인덱스)을 시작하고 종료 시 정리합니다"""
+        evaluation_pool.pool.start()
+        if index is not None:
+            await index.start()
+        try:
+            yield
+        finally:
+            if index is not None:
+                index.stop()
+            evaluation_pool.pool.shutdown()
 
     # CORS 미들웨어 추가
     app = Starlette(
         debug=debug,
         routes=[
             Route("/sse", endpoint=handle_sse),
-            Mount("/messages/", app=sse.handle_post_message),
+            # 게이트: 컨트롤러가 부하를 덜어내는 동안 도구 호출과 프롬프트 렌더링은 503으로 거부
+            Mount("/messages/", app=admission.MessageGate(sse.handle_post_message)),
+            Route("/metrics", endpoint=handle_metrics),
+            Route("/resources/stream", endpoint=handle_resource_stream),
+            # 관리자 토큰이 설정되지 않으면 설정 쓰기는 꺼져 있음
+            *([Route("/settings", endpoint=handle_settings_update, methods=["POST"])] if admin.ADMIN_TOKEN else []),
         ],
+        lifespan=lifespan,
     )
     
     app.add_middleware(
@@ -199,9 +350,17 @@ def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlett
         allow_methods=["*"],
         allow_headers=["*"],
     )
+
+    # 큰 응답은 압축; MCP 메시지를 나르는 SSE 스트림은 그대로 통과
+    app.add_middleware(compression.CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
     
     return app
 
+
+def create_app() -> Starlette:
+    """launcher.py용 애플리케이션 팩토리 (python launcher.py sse_server:create_app)"""
+    return create_starlette_app(mcp._mcp_server)
+
 if __name__ == "__main__":
     # MCP 서버 인스턴스 가져오기
     mcp_server = mcp._mcp_server
@@ -212,9 +371,10 @@ if __name__ == "__main__":
     port = 8080
     print(f"Starting MCP server with SSE transport on port {port}...")
     print(f"SSE endpoint available at: http://localhost:{port}/sse")
-    print("Available tools: greet, add, multiply, calculate, get_system_info, echo, get_server_status")
+    print("Available tools: greet, add, multiply, calculate, calculate_batch, calculate_session, get_system_info, echo, get_server_status")
     print("Available resources: config://settings, file://readme")
     print("Available prompts: code_review, explain_code")
 
-    # uvicorn을 사용하여 서버 실행
-    uvicorn.run(starlette_app, host="0.0.0.0", port=port)
+    # uvicorn을 사용하여 서버 실행; 설치되어 있으면 uvloop / httptools 사용 (MCP_LOOP / MCP_HTTP로 변경 가능).
+    # MCP_HTTP2=1이면 HTTP/1.1과 함께 h2c를 제공하는 Hypercorn으로 실행
+    runtime.serve(starlette_app, "0.0.0.0", port)
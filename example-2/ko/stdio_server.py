@@ -4,10 +4,16 @@ FastMCP를 사용한 STDIO 방식 MCP 서버
 Medium 글의 예제를 기반으로 구현
 """
 
-from fastmcp import FastMCP
-import math
+from fastmcp import FastMCP, Context
 import json
-from typing import Dict, Any, List
+import calculation_session
+import cost_estimator
+import evaluation_pool
+import prompt_engine
+import resource_cache
+import subscriptions
+import vectorized
+from typing import Dict, Any, List, Optional
 
 # MCP 서버 생성
 mcp = FastMCP("STDIO Example Server")
@@ -29,20 +35,47 @@ def multiply(a: float, b: float) -> str:
     return f"The product of {a} and {b} is {result}"
 
 @mcp.tool()
-def calculate(expression: str) -> str:
+async def calculate(expression: str) -> str:
     """수학 표현식을 계산합니다 (안전한 계산)"""
     try:
-        # 안전한 계산을 위해 제한된 함수만 허용
-        allowed_names = {
-            k: v for k, v in math.__dict__.items() if not k.startswith("__")
-        }
-        allowed_names.update({"abs": abs, "round": round, "min": min, "max": max})
-        
-        result = eval(expression, {"__builtins__": {}}, allowed_names)
+        # 예상 비용이 예산을 넘으면 워커를 쓰지 않고 바로 거부
+        cost_estimator.check(expression)
+        # 폭주하는 표현식이 이벤트 루프를 막지 않도록 워커 프로세스에서 계산
+        result = await evaluation_pool.pool.evaluate(expression)
         return f"Calculation result: {result}"
     except Exception as e:
         return f"Calculation error: {str(e)}"
 
+@mcp.tool()
+async def calculate_batch(
+    expression: str = "",
+    variables: Optional[Dict[str, List[float]]] = None,
+    expressions: Optional[List[str]] = None
+) -> str:
+    """이름 있는 변수 배열에 대해 표현식을 한 번의 벡터화 연산으로 계산"""
+    try:
+        # 큰 배치가 이벤트 루프를 막지 않도록 스레드에서 계산
+        return await vectorized.run_batch(expression, variables, expressions)
+    except Exception as e:
+        return f"Calculation error: {str(e)}"
+
+@mcp.tool()
+async def calculate_session(
+    statements: Optional[List[str]] = None,
+    remove: Optional[List[str]] = None,
+    reset: bool = False,
+    ctx: Context = None
+) -> str:
+    """이 세션에 유지되는 이름 있는 셀 정의 ('x = 3', 'y = sqrt(x) * 2'); 의존하는 셀만 다시 계산"""
+    try:
+        session = calculation_session.store.get(ctx.session)
+        # 다시 계산하는 동안 이벤트 루프를 막지 않도록 스레드에서 실행
+        result = await calculation_session.run_session(session, statements, remove, reset)
+        calculation_session.store.enforce_limits()
+        return calculation_session.format_result(result)
+    except Exception as e:
+        return f"Calculation error: {str(e)}"
+
 @mcp.tool()
 def get_system_info() -> str:
     """시스템 정보를 반환합니다"""
@@ -63,19 +96,32 @@ def echo(message: str) -> str:
     """입력된 메시지를 그대로 반환합니다"""
     return f"Echo: {message}"
 
+# config://settings로 제공되는 서버 설정; update_settings로 변경
+settings = {
+    "server_name": "STDIO Example Server",
+    "version": "1.0.0",
+    "features": ["tools", "resources", "prompts"],
+    "max_connections": 100,
+    "debug_mode": True
+}
+
 @mcp.resource("config://settings")
+@resource_cache.cache.cached("config://settings")
 def get_config() -> str:
-    """설정 파일 리소스를 반환합니다"""
-    config = {
-        "server_name": "STDIO Example Server",
-        "version": "1.0.0",
-        "features": ["tools", "resources", "prompts"],
-        "max_connections": 100,
-        "debug_mode": True
-    }
-    return json.dumps(config, indent=2)
+    """설정 파일 리소스를 반환합니다 (버전마다 한 번만 렌더링)"""
+    return json.dumps(settings, indent=2)
+
+def update_settings(changes: Dict[str, Any]) -> int:
+    """설정에 변경 사항을 적용하고 리소스의 새 버전을 반환합니다"""
+    settings.update(changes)
+    return resource_cache.cache.invalidate("config://settings")
+
+# 리소스 구독자는 폴링 대신 리소스가 바뀔 때 (병합된) 알림을 받음
+resource_cache.cache.on_invalidate(subscriptions.hub.changed)
+subscriptions.hub.attach(mcp._mcp_server)
 
 @mcp.resource("file://readme")
+@resource_cache.cache.cached("file://readme")
 def get_readme() -> str:
     """README 리소스를 반환합니다"""
     return """
@@ -88,6 +134,8 @@ def get_readme() -> str:
 - add: 두 숫자 덧셈
 - multiply: 두 숫자 곱셈
 - calculate: 수학 표현식 계산
+- calculate_batch: 변수 배열에 대해 표현식 계산 (NumPy)
+- calculate_session: 이름 있는 셀로 증분 계산 (세션별)
 - get_system_info: 시스템 정보 조회
 - echo: 메시지 반환
 
@@ -96,10 +144,8 @@ def get_readme() -> str:
 - file://readme: 이 README 파일
 """
 
-@mcp.prompt("code_review")
-def code_review_prompt(code: str, language: str = "python") -> str:
-    """코드 리뷰를 위한 프롬프트를 생성합니다"""
-    return f"""
+# 프롬프트 템플릿, 한 번만 파싱; 렌더링은 코드를 프롬프트 텍스트에 바로 복사
+CODE_REVIEW = prompt_engine.PromptTemplate("""
 다음 {language} 코드를 리뷰해주세요:
 
 ```{language}
@@ -114,12 +160,9 @@ def code_review_prompt(code: str, language: str = "python") -> str:
 5. 개선 제안사항
 
 각 항목에 대해 구체적인 피드백을 제공해주세요.
-"""
+""")
 
-@mcp.prompt("explain_code")
-def explain_code_prompt(code: str, language: str = "python") -> str:
-    """코드 설명을 위한 프롬프트를 생성합니다"""
-    return f"""
+EXPLAIN_CODE = prompt_engine.PromptTemplate("""
 다음 {language} 코드가 무엇을 하는지 자세히 설명해주세요:
 
 ```{language}
@@ -132,13 +175,29 @@ def explain_code_prompt(code: str, language: str = "python") -> str:
 3. 사용된 알고리즘이나 패턴
 4. 입력과 출력
 5. 예시 사용법
-"""
+""")
+
+@mcp.prompt("code_review")
+def code_review_prompt(code: str, language: str = "python") -> str:
+    """코드 리뷰를 위한 프롬프트를 생성합니다"""
+    return CODE_REVIEW.render({"code": code, "language": language})
+
+@mcp.prompt("explain_code")
+def explain_code_prompt(code: str, language: str = "python") -> str:
+    """코드 설명을 위한 프롬프트를 생성합니다"""
+    return EXPLAIN_CODE.render({"code": code, "language": language})
+
+# 반복된 prompts/get 요청(같은 코드 재전송)은 프롬프트 캐시에서 응답
+prompt_engine.cache_prompts(mcp._mcp_server)
 
 if __name__ == "__main__":
     print("Starting MCP server with STDIO transport...")
-    print("Available tools: greet, add, multiply, calculate, get_system_info, echo")
+    print("Available tools: greet, add, multiply, calculate, calculate_batch, calculate_session, get_system_info, echo")
     print("Available resources: config://settings, file://readme")
     print("Available prompts: code_review, explain_code")
     
+    # 계산기 워커 프로세스를 미리 시작
+    evaluation_pool.pool.start()
+
     # run() 메서드는 기본적으로 stdio를 사용합니다
     mcp.run()
@@ -0,0 +1,180 @@
+# subscriptions.py
+"""
+병합된 notifications/resources/updated를 보내는 resources/subscribe
+리소스의 연속된 변경은 구독자마다 한 번의 푸시로 전달
+"""
+import asyncio
+import contextlib
+import contextvars
+import os
+import threading
+from typing import Any, Dict, Optional, Set
+
+from mcp import types
+from mcp.server import Server
+from mcp.server.session import ServerSession
+
+
+class SubscriptionHub:
+    """MCP 세션별 resources/subscribe와 병합된 notifications/resources/updated
+
+    changed(uri)는 구독된 리소스를 변경됨으로 표시만 합니다. 첫 변경이
+    `window`초의 창을 열고, 창이 닫히면 변경된 리소스를 구독한 모든
+    세션은 창 안에서 변경이 몇 번 있었든 그 리소스에 대한
+    notifications/resources/updated를 한 번 받습니다. send_timeout초 안에
+    알림을 받지 않는(또는 사라진) 세션과 server.run()이 끝난 세션은 구독을
+    잃습니다. changed()는 어느 스레드에서든 호출할 수 있습니다.
+    """
+
+    def __init__(self, window: float = 0.1, send_timeout: float = 5.0):
+        self.window = window
+        self.send_timeout = send_timeout
+        # 정규화된 URI -> {세션: 세션이 구독한 형태의 URI}
+        self._subscribers: Dict[str, Dict[ServerSession, Any]] = {}
+        self._pending: Set[str] = set()
+        self._flush: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        # 구독자가 있는 루프; 다른 스레드의 changed()는 이 루프에 전송을 맡김
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 현재 server.run() 안에서 구독한 세션 (session_scope 참고)
+        self._scope: contextvars.ContextVar[Set[ServerSession]] = contextvars.ContextVar("subscription_scope")
+
+        # 메트릭
+        self.changes = 0
+        self.notifications = 0
+        self.dropped = 0
+        self.ended = 0
+
+    @staticmethod
+    def _key(uri) -> str:
+        # MCP 세션에서는 URI가 정규화된 URL로 도착 (file://config.json/)
+        return str(uri).rstrip("/")
+
+    def subscribe(self, uri, session: ServerSession):
+        self._subscribers.setdefault(self._key(uri), {})[session] = uri
+
+    def unsubscribe(self, uri, session: ServerSession):
+        key = self._key(uri)
+        sessions = self._subscribers.get(key, {})
+        sessions.pop(session, None)
+        if not sessions:
+            self._subscribers.pop(key, None)
+
+    def drop(self, session: ServerSession):
+        """세션의 모든 구독을 지움"""
+        for key in list(self._subscribers):
+            if session in self._subscribers[key]:
+                self.unsubscribe(key, session)
+
+    def changed(self, *uris):
+        """리소스를 변경됨으로 표시; 구독자는 창이 닫힐 때 알림을 받음"""
+        with self._lock:
+            for uri in uris:
+                key = self._key(uri)
+                if key not in self._subscribers:
+                    continue
+                self.changes += 1
+                self._pending.add(key)
+            if not self._pending or self._loop is None:
+                return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._start_flush()
+        else:
+            # 동기 코드나 다른 스레드에서 호출됨: 전송은 구독자의 루프에서 시작
+            with contextlib.suppress(RuntimeError):  # 루프가 닫힘
+                self._loop.call_soon_threadsafe(self._start_flush)
+
+    def _start_flush(self):
+        if self._flush is None or self._flush.done():
+            self._flush = self._loop.create_task(self._send_after_window())
+
+    async def _send_after_window(self):
+        await asyncio.sleep(self.window)
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        sends = [(session, uri) for key in pending for session, uri in self._subscribers.get(key, {}).items()]
+        results = await asyncio.gather(*(self._notify(session, uri) for session, uri in sends))
+        for (session, _), sent in zip(sends, results):
+            if not sent:
+                self.dropped += 1
+                self.drop(session)
+
+    async def _notify(self, session: ServerSession, uri) -> bool:
+        try:
+            await asyncio.wait_for(session.send_resource_updated(uri), self.send_timeout)
+        except Exception:
+            return False
+        self.notifications += 1
+        return True
+
+    @contextlib.contextmanager
+    def session_scope(self):
+        """이 블록 안에서 실행된 세션의 구독을 블록이 끝날 때 지움"""
+        sessions: Set[ServerSession] = set()
+        token = self._scope.set(sessions)
+        try:
+            yield
+        finally:
+            self._scope.reset(token)
+            for session in sessions:
+                self.ended += 1
+                self.drop(session)
+
+    def attach(self, server: Server):
+        """서버에서 resources/subscribe와 resources/unsubscribe를 처리하고 이를 알림"""
+
+        @server.subscribe_resource()
+        async def subscribe_resource(uri):
+            session = server.request_context.session
+            self._loop = asyncio.get_running_loop()
+            # 요청 핸들러는 server.run()이 시작한 태스크에서 실행되어 그 컨텍스트를 물려받음
+            sessions = self._scope.get(None)
+            if sessions is not None:
+                sessions.add(session)
+            self.subscribe(uri, session)
+
+        @server.unsubscribe_resource()
+        async def unsubscribe_resource(uri):
+            self.unsubscribe(uri, server.request_context.session)
+
+        # Server.get_capabilities는 항상 subscribe=False를 보고함
+        get_capabilities = server.get_capabilities
+
+        def with_subscribe(*args, **kwargs) -> types.ServerCapabilities:
+            capabilities = get_capabilities(*args, **kwargs)
+            if capabilities.resources is not None:
+                capabilities.resources.subscribe = True
+            return capabilities
+
+        server.get_capabilities = with_subscribe
+
+        # 전송 방식과 관계없이 세션의 구독은 server.run()과 함께 끝남
+        run = server.run
+
+        async def run_in_scope(*args, **kwargs):
+            with self.session_scope():
+                return await run(*args, **kwargs)
+
+        server.run = run_in_scope
+
+    def stats(self) -> Dict[str, Any]:
+        """구독 수와 알림 하나에 합쳐진 변경 수를 반환"""
+        sessions = {session for subscribers in self._subscribers.values() for session in subscribers}
+        return {
+            "resources": len(self._subscribers),
+            "subscriptions": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "sessions": len(sessions),
+            "window_ms": self.window * 1000,
+            "changes": self.changes,
+            "notifications": self.notifications,
+            "dropped_sessions": self.dropped,
+            "ended_sessions": self.ended
+        }
+
+
+# 서버의 리소스 프로바이더가 공유하는 허브; MCP_SUBSCRIPTION_WINDOW초 동안의 변경은 한 번의 푸시가 됨
+hub = SubscriptionHub(window=float(os.environ.get("MCP_SUBSCRIPTION_WINDOW", "0.1")))
@@ -5,13 +5,31 @@ Medium 글의 예제를 기반으로 구현
 """
 
 import asyncio
+import json
+import tempfile
 import subprocess
 import time
 import signal
 import sys
 import os
+from typing import List
 from stdio_client import MCPStdioClient
 from sse_client import MCPSseClient
+import cost_estimator
+import cost_cases
+import calculator
+import engine_cases
+import calculation_session
+
+
+# cost_cases.run의 결과마다 출력하는 메시지
+COST_MESSAGES = {
+    "rejected": "✅ {ms:.2f} ms 만에 거부: {label} ({detail})",
+    "too_slow": "❌ 거부가 너무 느림 ({ms:.1f} ms): {label}",
+    "not_rejected": "❌ 거부되지 않음: {label}",
+    "accepted": "✅ 허용: {label}",
+    "wrongly_rejected": "❌ 잘못 거부됨: {label} ({detail})",
+}
 
 
 class MCPTester:
@@ -86,6 +104,8 @@ class MCPTester:
                 await self.stdio_client.call_tool("add", {"a": 15, "b": 25})
                 await self.stdio_client.call_tool("multiply", {"a": 3.14, "b": 2.0})
                 await self.stdio_client.call_tool("calculate", {"expression": "sqrt(144) + 2**3"})
+                await self.stdio_client.call_tool("calculate_session", {"statements": ["x = 3", "y = sqrt(x) * 2"]})
+                await self.stdio_client.call_tool("calculate_session", {"statements": ["x = 4"]})
                 await self.stdio_client.call_tool("echo", {"message": "STDIO FastMCP 테스트"})
             
             # 리소스 테스트
@@ -133,6 +153,8 @@ class MCPTester:
                 await self.sse_client.call_tool("add", {"a": 100, "b": 200})
                 await self.sse_client.call_tool("multiply", {"a": 7.5, "b": 4.0})
                 await self.sse_client.call_tool("calculate", {"expression": "log(100) + sin(pi/2)"})
+                await self.sse_client.call_tool("calculate_session", {"statements": ["x = 3", "y = sqrt(x) * 2"]})
+                await self.sse_client.call_tool("calculate_session", {"statements": ["x = 4"]})
                 await self.sse_client.call_tool("get_server_status", {})
                 await self.sse_client.call_tool("echo", {"message": "SSE FastMCP 테스트"})
             
@@ -160,6 +182,257 @@ class MCPTester:
             print(f"❌ SSE 클라이언트 테스트 실패: {e}")
             return False
     
+    async def test_expression_engine(self):
+        """표현식 엔진 테스트: eval()과 같은 결과"""
+        print("\n" + "="*60)
+        print("🧮 표현식 엔진 테스트")
+        print("="*60)
+        
+        passed = True
+        # 케이스는 engine_cases.py에 있음
+        for same, expression, engine, python in engine_cases.run(calculator):
+            if same:
+                print(f"✅ {expression} → {engine}")
+            else:
+                print(f"❌ {expression}: 엔진 {engine}, eval {python}")
+                passed = False
+        
+        print(f"{'✅' if passed else '❌'} 표현식 엔진 테스트 완료")
+        return passed
+    
+    async def test_cost_estimator(self):
+        """공격적인 표현식으로 비용 추정기 테스트"""
+        print("\n" + "="*60)
+        print("🛡️ 비용 추정기 테스트")
+        print("="*60)
+        
+        passed = True
+        # 케이스와 시간 확인은 cost_cases.py에 있음
+        for outcome, label, elapsed_ms, detail in cost_cases.run(cost_estimator):
+            print(COST_MESSAGES[outcome].format(label=label, ms=elapsed_ms, detail=detail))
+            if outcome not in cost_cases.PASSED:
+                passed = False
+        
+        print(f"{'✅' if passed else '❌'} 비용 추정기 테스트 완료")
+        return passed
+    
+    async def test_calculation_session(self):
+        """계산 세션 테스트: 증분 재계산, 순환, 삭제, 상한"""
+        print("\n" + "="*60)
+        print("🧩 계산 세션 테스트")
+        print("="*60)
+        
+        session = calculation_session.CalculationSession()
+        session.update(["a = 1", "b = a * 2", "c = b + 1", "d = 5", "p = a > 0", "q = p * 10"])
+        checks = [self._check(session.snapshot(["b", "c", "q"]) == {"b": 2, "c": 3, "q": 10}, "의존 순서대로 셀 계산")]
+        
+        before = session.evaluations
+        updated, _ = session.update(["a = 2"])
+        checks.append(self._check(
+            sorted(updated) == ["a", "b", "c"] and session.evaluations - before == 4 and session.snapshot(["c"]) == {"c": 5},
+            "a를 바꾸면 b와 c를 다시 계산; p가 바뀌지 않았으므로 q는 건너뜀"))
+        before = session.evaluations
+        session.update(["a = 2"])
+        checks.append(self._check(session.evaluations == before, "같은 정의는 아무것도 다시 계산하지 않음"))
+        
+        _, rejected = session.update(["a = c", "n = n + 1"])
+        checks.append(self._check(
+            len(rejected) == 2 and all("Cycle" in reason for reason in rejected.values())
+            and session.snapshot(["a"]) == {"a": 2},
+            "순환(다른 셀을 거치거나 자기 자신으로)은 거부되고 셀은 그대로 유지"))
+        
+        updated, _ = session.update(remove=["b"])
+        checks.append(self._check(
+            sorted(updated) == ["b", "c"] and session.snapshot(["c"]) == {"c": {"error": "name 'b' is not defined"}},
+            "b를 지우면 그에 의존하는 c가 오류가 됨"))
+        session.update(["b = a * 3"])
+        checks.append(self._check(session.snapshot(["c"]) == {"c": 7}, "b를 다시 정의하면 c를 다시 계산"))
+        
+        session.update(["z = 0 and 1/0", "w = 1 if a else log(0)"])
+        checks.append(self._check(session.snapshot(["z", "w"]) == {"z": 0, "w": 1}, "건너뛴 피연산자는 계산하지 않음"))
+        
+        _, rejected = session.update(["a = 3"], remove=["b"], deadline=time.monotonic() - 1)
+        checks.append(self._check(
+            rejected == {"a = 3": calculation_session.TIME_BUDGET_ERROR}
+            and session.snapshot(["a", "c"]) == {"a": 2, "c": {"error": calculation_session.TIME_BUDGET_ERROR}},
+            "마감 시각이 지나면 문장은 거부되고 의존하는 셀은 계산하지 않고 오류가 됨"))
+        
+        store = calculation_session.SessionStore(max_sessions=4, max_bytes=4 * 1024 * 1024, max_cells=10)
+        checks.append(self._check(store.get(session).max_bytes == 1024 * 1024, "세션마다 저장소 메모리의 몫을 받음"))
+        
+        passed = all(checks)
+        print(f"{'✅' if passed else '❌'} 계산 세션 테스트 완료")
+        return passed
+    
+    @staticmethod
+    def _check(passed: bool, label: str) -> bool:
+        """동작 확인 하나를 출력하고 통과 여부를 반환"""
+        print(f"{'✅' if passed else '❌'} {label}")
+        return passed
+    
+    async def test_behavior(self):
+        """상태 코드, 캐싱, 알림을 이 프로세스 안의 앱으로 확인"""
+        print("\n" + "="*60)
+        print("🔬 동작 테스트 (FastMCP)")
+        print("="*60)
+        
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "data.txt"), "w") as file:
+                file.write("0123456789" * 10)
+            # 서버 모듈을 임포트할 때 읽음
+            os.environ["MCP_RESOURCE_ROOT"] = root
+            try:
+                return await self._check_behavior()
+            except Exception as e:
+                print(f"❌ 동작 테스트 실패: {e!r}")
+                return False
+    
+    async def _check_behavior(self) -> bool:
+        """수명 주기를 시작한 앱으로 모든 동작 확인을 실행"""
+        # 서버 모듈은 여기서만 필요; 다른 테스트는 서버 프로세스와 통신
+        import httpx
+        import sse_server
+        
+        server = sse_server.mcp._mcp_server
+        app = sse_server.create_starlette_app(server)
+        checks = []
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                for check in (
+                    self._check_ranges,
+                    self._check_admission,
+                    self._check_timeouts,
+                    self._check_resource_cache,
+                    self._check_subscriptions,
+                ):
+                    checks.extend(await check(server, http))
+        
+        passed = all(checks)
+        print(f"{'✅' if passed else '❌'} 동작 테스트 완료")
+        return passed
+    
+    async def _check_ranges(self, server, http) -> List[bool]:
+        """스트리밍되는 리소스의 바이트 범위"""
+        response = await http.get("/resources/stream", params={"uri": "file:///data.txt"},
+                                  headers={"Range": "bytes=10-19"})
+        checks = [self._check(response.status_code == 206 and response.content == b"0123456789",
+                              "바이트 범위: 10바이트와 206")]
+        response = await http.get("/resources/stream", params={"uri": "file:///data.txt"},
+                                  headers={"Range": "bytes=500-"})
+        checks.append(self._check(response.status_code == 416, "끝을 넘는 범위: 416"))
+        return checks
+    
+    async def _check_admission(self, server, http) -> List[bool]:
+        """서버가 가득 차면 호출은 JSON-RPC 오류로, 메시지는 503으로 거부"""
+        from mcp import McpError
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import admission
+        
+        async with create_connected_server_and_client_session(server) as session:
+            # 유일한 슬롯이 차 있고 대기할 수 없으므로 호출이 거부됨
+            shared = admission.controller
+            admission.controller = admission.AdmissionController(limit=1, queue_size=0)
+            try:
+                async with admission.controller.admit():
+                    try:
+                        await session.call_tool("echo", {"message": "shed"})
+                        shed = False
+                    except McpError as e:
+                        shed = e.error.code == admission.OVERLOADED_ERROR_CODE
+                    response = await http.post("/messages/?session_id=0", json={
+                        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                        "params": {"name": "echo", "arguments": {"message": "shed"}}})
+            finally:
+                admission.controller = shared
+        return [self._check(shed, "과부하: retry_after가 담긴 JSON-RPC 오류"),
+                self._check(response.status_code == 503 and "Retry-After" in response.headers,
+                            "과부하인 메시지 엔드포인트: Retry-After와 503")]
+    
+    async def _check_timeouts(self, server, http) -> List[bool]:
+        """시간 예산을 넘은 호출은 실패하고, 클라이언트가 떠난 호출은 취소됨"""
+        import anyio
+        from mcp import ClientSession
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import cancellation
+        
+        async with create_connected_server_and_client_session(server) as session:
+            cancellation.tracker.timeouts["calculate"] = 0
+            try:
+                result = await session.call_tool("calculate", {"expression": "1 + 1"})
+            finally:
+                del cancellation.tracker.timeouts["calculate"]
+        checks = [self._check(result.isError and "time budget" in result.content[0].text,
+                              "시간 예산 초과: 오류 결과")]
+        
+        # 클라이언트가 떠난 세션은 진행 중인 호출을 취소
+        client_write, server_read = anyio.create_memory_object_stream(0)
+        server_write, client_read = anyio.create_memory_object_stream(0)
+        cancelled = cancellation.tracker.cancelled
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(cancellation.run_session, server, server_read, server_write)
+            async with ClientSession(client_read, client_write) as session:
+                await session.initialize()
+                call = asyncio.ensure_future(session.call_tool("calculate", {"expression": "factorial(50000)"}))
+                while not cancellation.tracker.in_flight:
+                    await asyncio.sleep(0)
+                await client_write.aclose()
+                with anyio.move_on_after(2):
+                    while cancellation.tracker.cancelled == cancelled:
+                        await asyncio.sleep(0.01)
+                call.cancel()
+        checks.append(self._check(cancellation.tracker.cancelled > cancelled,
+                                  "호출 중 클라이언트가 떠남: 호출 취소"))
+        return checks
+    
+    async def _check_resource_cache(self, server, http) -> List[bool]:
+        """설정이 바뀌면 캐시된 렌더링을 버림"""
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import admin
+        import sse_server
+        
+        async with create_connected_server_and_client_session(server) as session:
+            await session.read_resource("config://settings")
+            sse_server.update_settings({"debug_mode": False})
+            try:
+                result = await session.read_resource("config://settings")
+            finally:
+                sse_server.update_settings({"debug_mode": True})
+        checks = [self._check(json.loads(result.contents[0].text)["debug_mode"] is False,
+                              "설정 변경: 다음 읽기에서 다시 렌더링")]
+        
+        # MCP_ADMIN_TOKEN이 없으면 HTTP 쓰기는 꺼져 있고, 값은 타입을 유지해야 함
+        response = await http.post("/settings", json={"debug_mode": False})
+        checks.append(self._check(response.status_code == 404, "관리자 토큰이 없으면 쓰기 라우트 없음: 404"))
+        checks.append(self._check(admin.invalid_changes({"debug_mode": "no"}, sse_server.settings) is not None, "다른 타입의 값은 거부"))
+        return checks
+    
+    async def _check_subscriptions(self, server, http) -> List[bool]:
+        """한 창 안의 변경은 구독자에게 알림 하나로 전달됨"""
+        from mcp import types
+        from mcp.shared.memory import create_connected_server_and_client_session
+        import sse_server
+        import subscriptions
+        
+        updates = asyncio.Queue()
+        
+        async def on_message(message):
+            if (isinstance(message, types.ServerNotification)
+                    and isinstance(message.root, types.ResourceUpdatedNotification)):
+                updates.put_nowait(str(message.root.params.uri))
+        
+        async with create_connected_server_and_client_session(server, message_handler=on_message) as session:
+            await session.subscribe_resource("config://settings")
+            sse_server.update_settings({"debug_mode": False})
+            sse_server.update_settings({"debug_mode": True})
+            uri = await asyncio.wait_for(updates.get(), 2)
+            # 두 변경이 한 창 안에 들어옴
+            await asyncio.sleep(subscriptions.hub.window * 3)
+            checks = [self._check(uri == "config://settings" and updates.empty(),
+                                  "구독: 변경 두 번, 알림 한 번")]
+        checks.append(self._check(subscriptions.hub.stats()["sessions"] == 0,
+                                  "세션 종료: 그 구독을 지움"))
+        return checks
+    
     async def run_all_tests(self):
         """모든 테스트 실행"""
         print("🧪 FastMCP MCP 서버 통합 테스트 시작")
@@ -168,11 +441,27 @@ class MCPTester:
         print("🔗 https://medium.com/@vkrishnan9074/mcp-clients-stdio-vs-sse-a53843d9aabb")
         
         results = {
+            "engine": False,
+            "cost": False,
+            "session": False,
+            "behavior": False,
             "stdio": False,
             "sse": False
         }
         
         try:
+            # 표현식 엔진 테스트 (서버 불필요)
+            results["engine"] = await self.test_expression_engine()
+            
+            # 비용 추정기 테스트 (서버 불필요)
+            results["cost"] = await self.test_cost_estimator()
+            
+            # 계산 세션 테스트 (서버 불필요)
+            results["session"] = await self.test_calculation_session()
+            
+            # 동작 테스트 (앱이 이 프로세스 안에서 실행)
+            results["behavior"] = await self.test_behavior()
+            
             # STDIO 테스트 (서버 시작 불필요)
             results["stdio"] = await self.test_stdio_client()
             
@@ -196,6 +485,10 @@ class MCPTester:
         print("\n" + "="*60)
         print("📊 테스트 결과 요약")
         print("="*60)
+        print(f"표현식 엔진: {'✅ 성공' if results['engine'] else '❌ 실패'}")
+        print(f"비용 추정기: {'✅ 성공' if results['cost'] else '❌ 실패'}")
+        print(f"계산 세션: {'✅ 성공' if results['session'] else '❌ 실패'}")
+        print(f"동작: {'✅ 성공' if results['behavior'] else '❌ 실패'}")
         print(f"STDIO 클라이언트 (FastMCP): {'✅ 성공' if results['stdio'] else '❌ 실패'}")
         print(f"SSE 클라이언트 (FastMCP): {'✅ 성공' if results['sse'] else '❌ 실패'}")
         
@@ -0,0 +1,271 @@
+# vectorized.py
+"""
+calculate 도구용 벡터화 배치 계산
+컴파일된 표현식 하나를 NumPy 배열 전체에 대해 한 번에 계산
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from functools import reduce
+from typing import Any, Dict, List, Mapping, Optional
+
+import calculator
+import cost_estimator
+import expression_engine
+
+try:
+    import numpy as np
+except ImportError:  # NumPy는 calculate_batch에만 필요
+    np = None
+
+
+# NumPy ufunc 이름이 다른 math 함수
+RENAMED_UFUNCS = {
+    "acos": "arccos",
+    "asin": "arcsin",
+    "atan": "arctan",
+    "atan2": "arctan2",
+    "acosh": "arccosh",
+    "asinh": "arcsinh",
+    "atanh": "arctanh",
+    "pow": "power",
+}
+
+# 스칼라가 아닌 iterable을 받아 요소별 형태가 없는 math 함수
+REDUCTIONS = {"fsum", "prod", "dist"}
+
+# 같은 이름의 NumPy 함수와 의미가 다른 math 함수
+DIFFERENT_SEMANTICS = {"remainder"}
+
+# 정수만 받는 math 함수 (변수는 항상 float 배열로 들어옴)
+INTEGER_ARGUMENTS = {"factorial", "comb", "perm", "isqrt", "gcd", "lcm"}
+
+# 배치 호출당 최대 데이터 포인트 수
+MAX_POINTS = 1_000_000
+
+# 배치 호출 전체의 비용 예산 (포인트별 예상 비용 × 포인트 수)
+BATCH_COST_BUDGET = float(os.environ.get("CALCULATOR_BATCH_COST_BUDGET", "1e9"))
+
+# 배치에서 factorial, comb, perm이 받는 인자의 상한
+MAX_FACTORIAL_ARGUMENT = int(os.environ.get("CALCULATOR_BATCH_MAX_FACTORIAL", "100000"))
+
+# 배치 호출의 시간 예산 (워커 풀의 calculate 호출과 같음)
+BATCH_TIMEOUT = float(os.environ.get("CALCULATOR_TIMEOUT", "2.0"))
+
+# 한 단계에 계산하는 포인트 수; 단계 사이마다 시간 예산을 확인하므로, 시간이 다 된 배치는
+# 호출자가 포기한 뒤에도 스레드에서 끝까지 돌지 않고 한 단계 안에 멈춤
+CHUNK_POINTS = 64 * 1024
+
+
+def _log(x, base=None):
+    """ufunc 표현식으로 구현한 math.log(x[, base])"""
+    if base is None:
+        return np.log(x)
+    return np.log(x) / np.log(base)
+
+
+def _integer_arguments(name, function, limit=None):
+    """정수 값인 float 인자를 int로 넘기고, limit보다 큰 인자는 거부하도록 math 함수를 감쌉니다"""
+    def call(*args):
+        # 다른 정수 함수의 결과는 이미 int (float로 바꾸면 넘칠 수 있음)
+        args = [arg if isinstance(arg, int) else int(arg) if float(arg).is_integer() else arg for arg in args]
+        if limit is not None and any(isinstance(arg, int) and abs(arg) > limit for arg in args):
+            raise ValueError(f"{name}() argument exceeds {limit} in a batch")
+        return function(*args)
+    return call
+
+
+def _build_namespace() -> Dict[str, Any]:
+    """계산기 화이트리스트를 NumPy ufunc에 매핑합니다"""
+    namespace: Dict[str, Any] = {}
+    for name, value in calculator.ALLOWED_NAMES.items():
+        if not callable(value):
+            # pi, e, inf, nan 같은 상수는 그대로 사용
+            namespace[name] = value
+            continue
+        if name in REDUCTIONS:
+            continue
+        ufunc = getattr(np, RENAMED_UFUNCS.get(name, name), None)
+        if name in INTEGER_ARGUMENTS:
+            limit = MAX_FACTORIAL_ARGUMENT if name in cost_estimator.FACTORIAL_LIKE else None
+            # object results: exact ints of any size instead of the first point's int64
+            namespace[name] = np.vectorize(_integer_arguments(name, value, limit), otypes=[object])
+        elif ufunc is not None and name not in DIFFERENT_SEMANTICS:
+            namespace[name] = ufunc
+        else:
+            # ufunc가 없는 함수 (erf, gamma, ...): math 함수를 요소별로 반복 호출
+            namespace[name] = np.vectorize(value)
+    namespace.update({
+        "log": _log,
+        "abs": np.abs,
+        "round": np.round,
+        "min": lambda *args: reduce(np.minimum, args),
+        "max": lambda *args: reduce(np.maximum, args),
+    })
+    return namespace
+
+
+NUMPY_NAMES: Dict[str, Any] = _build_namespace() if np is not None else {}
+
+
+def compile_numpy(expression: str) -> expression_engine.CompiledExpression:
+    """자유 변수를 허용하여 NumPy 네임스페이스로 표현식을 컴파일합니다"""
+    return expression_engine.compile_expression(expression, NUMPY_NAMES, variables=())
+
+
+# 스칼라 캐시와 분리된 배치 표현식 캐시
+batch_cache = calculator.CompiledExpressionCache(compiler=compile_numpy)
+
+
+def _to_arrays(variables: Mapping[str, List[float]]) -> Dict[str, Any]:
+    """변수 리스트를 같은 길이의 float 배열로 변환합니다"""
+    # 네임스페이스가 변수보다 먼저 해석되므로 e나 pi라는 이름의 변수는 조용히 무시됨
+    reserved = sorted(name for name in variables if name in NUMPY_NAMES)
+    if reserved:
+        raise ValueError(f"Variable name '{reserved[0]}' is taken by the calculator namespace")
+    arrays = {name: np.asarray(values, dtype=float) for name, values in variables.items()}
+    lengths = {array.shape[0] for array in arrays.values() if array.ndim == 1}
+    if any(array.ndim != 1 for array in arrays.values()):
+        raise ValueError("Each variable must be a flat list of numbers")
+    if len(lengths) > 1:
+        raise ValueError(f"All variables must have the same length, got {sorted(lengths)}")
+    if lengths and lengths.pop() > MAX_POINTS:
+        raise ValueError(f"Too many points (max {MAX_POINTS})")
+    return arrays
+
+
+def _magnitudes(arrays: Mapping[str, Any]) -> Dict[str, Any]:
+    """각 배열의 최대 절댓값 (정수 값이면 정수 함수가 받는 형태인 int로)"""
+    values: Dict[str, Any] = {}
+    for name, array in arrays.items():
+        if array.size:
+            largest = float(np.max(np.abs(array)))
+            values[name] = int(largest) if largest.is_integer() else largest
+    return values
+
+
+def _check_cost(expressions: List[str], arrays: Mapping[str, Any], count: int):
+    """포인트별 예상 비용에 포인트 수를 곱한 합이 BATCH_COST_BUDGET을 넘는 배치를 거부합니다"""
+    values = _magnitudes(arrays)
+    total = 0.0
+    for expression in expressions:
+        # 각 변수의 가장 큰 값으로 추정한 포인트 하나가 스칼라 예산 안에 들어야 함
+        # (상수 부분식은 이 프로세스에서 컴파일 시점에 미리 계산됨)
+        total += cost_estimator.check(expression, values=values).cost * count
+    if total > BATCH_COST_BUDGET:
+        raise cost_estimator.CostLimitExceeded(
+            f"batch rejected: estimated cost {total:.3g} for {count} points "
+            f"exceeds the budget of {BATCH_COST_BUDGET:.3g}"
+        )
+
+
+def _compile_one(expression: str, arrays: Mapping[str, Any]) -> expression_engine.CompiledExpression:
+    """표현식 하나를 컴파일하고 변수가 모두 주어졌는지 확인합니다 (비용은 _check_cost로 먼저 검사)"""
+    compiled = batch_cache.get(expression)
+    missing = [name for name in compiled.variables if name not in arrays]
+    if missing:
+        raise ValueError(f"name '{missing[0]}' is not defined")
+    return compiled
+
+
+def _compact(result: Any) -> Any:
+    """NumPy 결과를 JSON으로 바꿀 수 있는 기본 값으로 변환합니다"""
+    if isinstance(result, np.ndarray):
+        values = result.tolist()
+        if result.dtype == object:
+            # 정수 함수의 결과는 인터프리터의 int→str 자릿수 한도를 넘을 수 있음
+            return [_printable(value) for value in values] if result.ndim else _printable(values)
+        return values
+    if isinstance(result, np.generic):
+        return result.item()
+    return _printable(result)
+
+
+def _printable(value: Any) -> Any:
+    """int는 그대로, 인터프리터의 int→str 자릿수 한도를 넘으면 자리표시 문자열로"""
+    if isinstance(value, int) and value.bit_length() > 64:
+        try:
+            str(value)
+        except ValueError:
+            return f"<{value.bit_length()}-bit integer>"
+    return value
+
+
+def _prepare(expression: Optional[str], variables: Optional[Mapping[str, List[float]]],
+             expressions: Optional[List[str]]):
+    """배치 호출을 검증하고 표현식을 컴파일합니다: (포인트 수, 배열, {표현식: 컴파일 결과})"""
+    if np is None:
+        raise RuntimeError("NumPy is required for batch calculation (pip install numpy)")
+    if not expression and not expressions:
+        raise ValueError("Either expression or expressions is required")
+
+    arrays = _to_arrays(variables or {})
+    count = next(iter(arrays.values())).shape[0] if arrays else 1
+    _check_cost(expressions or [expression], arrays, count)
+    compiled = {expr: _compile_one(expr, arrays) for expr in expressions or [expression]}
+    return count, arrays, compiled
+
+
+def _evaluate(code: Any, arrays: Mapping[str, Any], count: int, deadline: float) -> Any:
+    """컴파일된 코드를 배열에 대해 CHUNK_POINTS개씩 계산하고, 마감 시각이 지나면 TimeoutError를 일으킵니다"""
+    if count <= CHUNK_POINTS:
+        return code(arrays)
+    chunks = []
+    for start in range(0, count, CHUNK_POINTS):
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        result = code({name: array[start:start + CHUNK_POINTS] for name, array in arrays.items()})
+        if not isinstance(result, np.ndarray) or result.shape != (min(CHUNK_POINTS, count - start),):
+            # 포인트와 무관함 (상수 피연산자가 결과를 결정함)
+            return result
+        chunks.append(result)
+    return np.concatenate(chunks)
+
+
+def _run(count: int, arrays: Mapping[str, Any], compiled: Mapping[str, Any], several: bool,
+         deadline: float = math.inf) -> Dict[str, Any]:
+    """_prepare가 컴파일한 표현식을 배열에 대해 계산합니다"""
+    with np.errstate(all="ignore"):
+        # 정의역을 벗어난 포인트는 배치 전체를 실패시키지 않고 nan/inf가 됨
+        results = {expr: _compact(_evaluate(code, arrays, count, deadline)) for expr, code in compiled.items()}
+    if several:
+        return {"count": count, "results": results}
+    return {"count": count, "result": next(iter(results.values()))}
+
+
+def evaluate_batch(expression: Optional[str] = None,
+                   variables: Optional[Mapping[str, List[float]]] = None,
+                   expressions: Optional[List[str]] = None) -> Dict[str, Any]:
+    """이름 있는 변수 배열에 대해 표현식 하나(또는 여러 개)를 한 번의 벡터화 연산으로 계산합니다"""
+    return _run(*_prepare(expression, variables, expressions), several=bool(expressions))
+
+
+async def run_batch(expression: Optional[str] = None,
+                    variables: Optional[Mapping[str, List[float]]] = None,
+                    expressions: Optional[List[str]] = None,
+                    timeout: Optional[float] = None) -> str:
+    """evaluate_batch()와 format_batch()를 시간 예산 안에서 스레드로 실행해 JSON을 반환합니다
+
+    검증, 비용 검사, 컴파일, 계산, 직렬화가 모두 스레드에서 실행되므로 큰
+    배치도 루프를 막지 않습니다. 계산은 포인트 묶음 사이마다 마감 시각을
+    확인하므로, 시간이 다 된 배치는 스레드 사용도 멈춥니다.
+    """
+    timeout = BATCH_TIMEOUT if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+
+    def job() -> str:
+        prepared = _prepare(expression, variables, expressions)
+        return format_batch(_run(*prepared, several=bool(expressions), deadline=deadline))
+
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(job), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"batch exceeded the {timeout:g}s time budget") from None
+
+
+def format_batch(result: Dict[str, Any]) -> str:
+    """배치 결과를 간결한 JSON으로 직렬화합니다"""
+    return json.dumps(result, separators=(",", ":"))
@@ -0,0 +1,246 @@
+"""Negotiated zstd / br / gzip response compression for the Streamable HTTP app."""
+
+import os
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # br is offered only when the brotli package is installed
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstd is offered only when the zstandard package is installed
+    zstandard = None
+
+
+# Never compressed: SSE must reach the client frame by frame, the rest is already compressed
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "audio/", "video/",
+                          "application/gzip", "application/zip")
+
+# Bodies with a larger Content-Length are sent as is: compressing them would hold the
+# event loop for too long, and large files go out with sendfile instead
+MAXIMUM_SIZE = int(os.environ.get("MCP_COMPRESSION_MAX_SIZE", str(8 * 1024 * 1024)))
+
+# ASGI extension for zero-copy file sends; a body that gets compressed is read instead
+ZEROCOPY = "http.response.zerocopysend"
+
+
+class _Encoder:
+    """Streaming encoder: compress(data, final) returns the bytes ready to send"""
+
+    def __init__(self, process: Callable[[bytes], bytes], flush: Callable[[], bytes],
+                 finish: Callable[[], bytes]):
+        self._process = process
+        self._flush = flush
+        self._finish = finish
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # A flush per chunk keeps streamed responses streaming
+        return self._process(data) + (self._finish() if final else self._flush())
+
+
+def _gzip(level: int) -> _Encoder:
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return _Encoder(z.compress, lambda: z.flush(zlib.Z_SYNC_FLUSH), z.flush)
+
+
+def _brotli(level: int) -> _Encoder:
+    c = brotli.Compressor(quality=level)
+    return _Encoder(c.process, c.flush, c.finish)
+
+
+def _zstd(level: int) -> _Encoder:
+    c = zstandard.ZstdCompressor(level=level).compressobj()
+    return _Encoder(c.compress, lambda: c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), c.flush)
+
+
+# Content coding -> (encoder factory, default level), in server preference order
+ENCODERS: Dict[str, tuple] = {
+    name: entry for name, entry, available in (
+        ("zstd", (_zstd, 3), zstandard is not None),
+        ("br", (_brotli, 4), brotli is not None),
+        ("gzip", (_gzip, 6), True),
+    ) if available
+}
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the content coding for an Accept-Encoding header, or None for identity"""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    # Highest q wins; ties go to the server's preference order
+    for name in ENCODERS:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionStats:
+    """Bytes saved and time spent compressing, shared by every middleware instance"""
+
+    def __init__(self):
+        self.compressed = 0
+        self.too_small = 0
+        self.bypassed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.encodings: Dict[str, int] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return compression counts, bytes saved and CPU time"""
+        return {
+            "compressed": self.compressed,
+            "too_small": self.too_small,
+            "bypassed": self.bypassed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 1.0,
+            "cpu_ms": self.seconds * 1000,
+            "encodings": dict(self.encodings),
+            "available": list(ENCODERS)
+        }
+
+
+stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """Negotiated zstd / br / gzip response compression with a minimum-size threshold"""
+
+    def __init__(self, app, minimum_size: int = 1024, levels: Optional[Dict[str, int]] = None,
+                 maximum_size: int = MAXIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.maximum_size = maximum_size
+        self.levels = {name: level for name, (_, level) in ENCODERS.items()}
+        self.levels.update(levels or {})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        responder = _CompressionResponder(send, encoding, self.levels[encoding], self.minimum_size,
+                                          self.maximum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Holds back the response start until the body shows whether compressing pays off"""
+
+    def __init__(self, send, encoding: str, level: int, minimum_size: int, maximum_size: int = MAXIMUM_SIZE):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.maximum_size = maximum_size
+        self.start: Optional[dict] = None
+        self.passthrough = False
+        self.encoder: Optional[_Encoder] = None
+        self.buffer = b""
+
+    def _compress(self, data: bytes, final: bool) -> bytes:
+        started = time.perf_counter()
+        out = self.encoder.compress(data, final)
+        stats.seconds += time.perf_counter() - started
+        stats.bytes_in += len(data)
+        stats.bytes_out += len(out)
+        return out
+
+    def _headers(self, compressed: bool) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if compressed:
+            headers["Content-Encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The compressed bytes differ from the identity representation
+                headers["ETag"] = "W/" + etag
+        return headers
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            status = message["status"]
+            if ("content-encoding" in headers or status < 200 or status in (204, 206, 304)
+                    or headers.get("content-type", "").startswith(EXCLUDED_CONTENT_TYPES)
+                    or int(headers.get("content-length", 0)) > self.maximum_size):
+                # Sent as is, right away: SSE streams are never held back, and a 206 body
+                # must stay the exact bytes its Content-Range names
+                self.passthrough = True
+                stats.bypassed += 1
+                return await self._send(message)
+            self.start = message
+            return
+
+        if message["type"] == ZEROCOPY and not self.passthrough:
+            return await self._send_file(message)
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            return await self._send(message)
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is not None:
+            message["body"] = self._compress(body, final=not more_body)
+            return await self._send(message)
+
+        self.buffer += body
+        if more_body and len(self.buffer) < self.minimum_size:
+            return
+        if not more_body and len(self.buffer) < self.minimum_size:
+            stats.too_small += 1
+            self._headers(compressed=False)
+            await self._send(self.start)
+            return await self._send({"type": "http.response.body", "body": self.buffer})
+
+        stats.compressed += 1
+        stats.encodings[self.encoding] = stats.encodings.get(self.encoding, 0) + 1
+        factory, _ = ENCODERS[self.encoding]
+        self.encoder = factory(self.level)
+        data = self._compress(self.buffer, final=not more_body)
+        self.buffer = b""
+        headers = self._headers(compressed=True)
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _send_file(self, message):
+        """Feed a zero-copy file body through the encoder, read chunk by chunk"""
+        fd = message["file"].fileno()
+        offset = message.get("offset", 0)
+        count = message.get("count")
+        end = os.fstat(fd).st_size if count is None else offset + count
+        more_body = message.get("more_body", False)
+        while True:
+            chunk = os.pread(fd, min(256 * 1024, end - offset), offset)
+            offset += len(chunk)
+            last = offset >= end or not chunk
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body or not last})
+            if last:
+                return
+
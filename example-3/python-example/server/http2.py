@@ -0,0 +1,154 @@
+"""HTTP/2 cleartext (h2c) serving with Hypercorn and a client sharing one HTTP/2 connection."""
+
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+try:
+    from hypercorn.asyncio import serve as hypercorn_serve
+    from hypercorn.config import Config
+except ImportError:  # HTTP/2 serving is available only when the hypercorn package is installed
+    hypercorn_serve = None
+
+try:
+    import h2
+except ImportError:  # the HTTP/2 client needs the h2 package (pip install "httpx[http2]")
+    h2 = None
+
+
+# Streams one HTTP/2 connection may carry at once; every open SSE stream holds one
+MAX_STREAMS = int(os.environ.get("MCP_HTTP2_MAX_STREAMS", "4096"))
+
+
+async def serve(app, binds: List[str], max_streams: int = MAX_STREAMS, log_level: str = "info",
+                shutdown_trigger: Optional[Callable[[], Awaitable]] = None):
+    """Serve an ASGI app with Hypercorn: HTTP/1.1 and cleartext HTTP/2 (h2c) on the same sockets
+
+    binds are "host:port", "unix:/path" or "fd://N". h2c is accepted both with
+    prior knowledge and through an HTTP/1.1 Upgrade, so HTTP/1.1 clients keep
+    working unchanged. Runs until shutdown_trigger returns, or until
+    SIGINT/SIGTERM when none is given.
+    """
+    if hypercorn_serve is None:
+        raise RuntimeError("HTTP/2 serving needs the hypercorn package (pip install hypercorn)")
+    config = Config()
+    config.bind = binds
+    config.h2_max_concurrent_streams = max_streams
+    config.loglevel = log_level.upper()
+    await hypercorn_serve(app, config, shutdown_trigger=shutdown_trigger)
+
+
+# httpx runs at most 100 concurrent streams on one HTTP/2 connection
+STREAMS_PER_CONNECTION = 100
+
+
+class _CountedStream(httpx.AsyncByteStream):
+    """Response body that frees its stream slot when closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._release is not None:
+                self._release()
+                self._release = None
+
+
+class _PooledTransport(httpx.AsyncBaseTransport):
+    """Passes requests to the pool; closing a client leaves the connections open"""
+
+    def __init__(self, pool: "Http2Pool"):
+        self._pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool.handle_async_request(request)
+
+    async def aclose(self):
+        pass
+
+
+class Http2Pool:
+    """h2c connections shared by every request, SSE stream and MCP session of a client
+
+    With HTTP/1.1 turned off httpx speaks HTTP/2 with prior knowledge on
+    http:// URLs, and every request becomes a stream on an open connection.
+    An open SSE stream holds its stream for as long as the session lives, and
+    httpx runs at most STREAMS_PER_CONNECTION streams per connection, so a new
+    connection is opened only when every open one is full. client_factory
+    plugs the pool into mcp's sse_client and streamablehttp_client. With uds
+    set the connections go to a server's Unix domain socket instead of TCP.
+    """
+
+    def __init__(self, streams_per_connection: int = STREAMS_PER_CONNECTION, uds: str = ""):
+        if h2 is None:
+            raise RuntimeError('HTTP/2 client mode needs the h2 package (pip install "httpx[http2]")')
+        self.streams_per_connection = streams_per_connection
+        self.uds = uds
+        self._transports: List[httpx.AsyncHTTPTransport] = []
+        self._active: List[int] = []  # open streams per connection
+
+    def _acquire(self) -> int:
+        """Index of the first connection with a free stream, opening one when all are full"""
+        for index, active in enumerate(self._active):
+            if active < self.streams_per_connection:
+                break
+        else:
+            self._transports.append(httpx.AsyncHTTPTransport(
+                http1=False, http2=True, uds=self.uds or None, limits=httpx.Limits(max_connections=1, max_keepalive_connections=1)))
+            self._active.append(0)
+            index = len(self._active) - 1
+        self._active[index] += 1
+        return index
+
+    def _release(self, index: int):
+        if index < len(self._active):
+            self._active[index] -= 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        index = self._acquire()
+        try:
+            response = await self._transports[index].handle_async_request(request)
+        except BaseException:
+            self._release(index)
+            raise
+        return httpx.Response(response.status_code, headers=response.headers, extensions=response.extensions,
+                              stream=_CountedStream(response.stream, lambda: self._release(index)))
+
+    def client(self, **kwargs) -> httpx.AsyncClient:
+        """httpx client whose requests all go over the pool's connections"""
+        return httpx.AsyncClient(transport=_PooledTransport(self), **kwargs)
+
+    def client_factory(self, headers: Optional[Dict[str, str]] = None, timeout: Optional[httpx.Timeout] = None,
+                       auth: Optional[httpx.Auth] = None) -> httpx.AsyncClient:
+        """httpx_client_factory for sse_client / streamablehttp_client (same defaults as mcp's own)"""
+        return self.client(headers=headers, timeout=timeout or httpx.Timeout(30.0), auth=auth,
+                           follow_redirects=True)
+
+    def connections(self) -> int:
+        """Connections opened so far"""
+        return len(self._transports)
+
+    def streams(self) -> int:
+        """Streams open across all connections"""
+        return sum(self._active)
+
+    async def aclose(self):
+        for transport in self._transports:
+            await transport.aclose()
+        self._transports.clear()
+        self._active.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
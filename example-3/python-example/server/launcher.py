@@ -0,0 +1,277 @@
+"""Multi-process launcher for the Streamable HTTP server with session affinity."""
+
+import argparse
+import asyncio
+import importlib
+import os
+import re
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+import http2
+import runtime
+
+
+# Hop-by-hop headers are not forwarded between workers
+HOP_BY_HOP = {b"connection", b"keep-alive", b"transfer-encoding", b"upgrade"}
+
+# Header carrying the Streamable HTTP session ID (example-3)
+SESSION_HEADER = b"mcp-session-id"
+
+ENDPOINT_SESSION = re.compile(rb"(session_id=[0-9a-fA-F]+)")
+
+
+def load_app(spec: str, factory: bool = False):
+    """Import "module:attribute" (called when factory is set)"""
+    module_name, _, attribute = spec.partition(":")
+    app = importlib.import_module(module_name)
+    for name in (attribute or "app").split("."):
+        app = getattr(app, name)
+    return app() if factory else app
+
+
+def bind_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    """Listening TCP socket; with reuse_port every worker binds its own and the kernel spreads connections"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class SessionAffinityMiddleware:
+    """Routes every request of a stateful MCP session to the worker that owns it
+
+    SSE sessions: the endpoint announced in the first event gets `&worker=N`,
+    so the client's POST /messages/ requests name their worker. Streamable
+    HTTP sessions: the mcp-session-id header is prefixed with `wN-`. A worker
+    that receives a request for another worker's session forwards it over that
+    worker's Unix socket and streams the response back.
+    """
+
+    def __init__(self, app, index: int, socket_dir: str):
+        self.app = app
+        self.index = index
+        self.prefix = f"w{index}-".encode()
+        self.socket_dir = socket_dir
+        self._clients: Dict[int, httpx.AsyncClient] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        owner = self._owner(scope)
+        if owner is not None and owner != self.index:
+            return await self._forward(scope, receive, send, owner)
+
+        if owner == self.index:
+            # The application only knows the session ID without the worker prefix
+            scope = dict(scope)
+            scope["headers"] = [(k, v[len(self.prefix):] if k == SESSION_HEADER else v)
+                                for k, v in scope["headers"]]
+
+        tagged = False
+
+        async def tagging_send(message):
+            nonlocal tagged
+            if message["type"] == "http.response.start":
+                message["headers"] = [(k, self.prefix + v if k == SESSION_HEADER else v)
+                                      for k, v in message["headers"]]
+            elif message["type"] == "http.response.body" and not tagged and b"event: endpoint" in message.get("body", b""):
+                tagged = True
+                message["body"] = ENDPOINT_SESSION.sub(rb"\1&worker=" + str(self.index).encode(), message["body"], count=1)
+            await send(message)
+
+        await self.app(scope, receive, tagging_send)
+
+    def _owner(self, scope) -> Optional[int]:
+        """Worker index named by the request, if any"""
+        match = re.search(rb"(?:^|&)worker=(\d+)", scope.get("query_string", b""))
+        if match:
+            return int(match.group(1))
+        session = Headers(scope=scope).get("mcp-session-id", "")
+        match = re.match(r"w(\d+)-", session)
+        return int(match.group(1)) if match else None
+
+    def _client(self, index: int) -> httpx.AsyncClient:
+        if index not in self._clients:
+            transport = httpx.AsyncHTTPTransport(uds=os.path.join(self.socket_dir, f"worker-{index}.sock"))
+            self._clients[index] = httpx.AsyncClient(transport=transport, base_url="http://worker", timeout=None)
+        return self._clients[index]
+
+    async def _forward(self, scope, receive, send, owner: int):
+        """Proxy the request to the owning worker, streaming the response back"""
+        body = await Request(scope, receive).body()
+        headers = [(k, v) for k, v in scope["headers"] if k not in HOP_BY_HOP]
+        url = scope["path"] + ("?" + scope["query_string"].decode() if scope.get("query_string") else "")
+        try:
+            async with self._client(owner).stream(scope["method"], url, headers=headers, content=body) as response:
+                await send({
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [(k, v) for k, v in response.headers.raw if k.lower() not in HOP_BY_HOP]
+                })
+                async for chunk in response.aiter_raw():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b""})
+        except httpx.TransportError:
+            # The owning worker is gone, and its sessions with it
+            await JSONResponse({"error": "Unknown session"}, status_code=404)(scope, receive, send)
+
+
+def run_worker(app, index: int, sockets: List[socket.socket], socket_dir: str, log_level: str,
+               runtime_options: Dict[str, str], use_http2: bool = False):
+    """Worker process body: serve the preloaded app on the shared and private sockets"""
+    os.environ["MCP_WORKER_INDEX"] = str(index)
+    # Private socket for requests forwarded by the other workers
+    private = runtime.bind_unix_socket(os.path.join(socket_dir, f"worker-{index}.sock"), 0o600)
+    app = SessionAffinityMiddleware(app, index, socket_dir)
+    if use_http2:
+        # The event loop policy was installed before forking
+        asyncio.run(http2.serve(app, [f"fd://{sock.fileno()}" for sock in sockets + [private]], log_level=log_level))
+        return
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level, **runtime_options))
+    # run() installs the selected event loop before serving
+    server.run(sockets=sockets + [private])
+
+
+class Supervisor:
+    """Forks N workers from a preloaded app, restarts the ones that die, stops them all on SIGTERM/SIGINT"""
+
+    def __init__(self, app, host: str, port: int, workers: int, reuse_port: bool = True,
+                 log_level: str = "info", runtime_options: Optional[Dict[str, str]] = None,
+                 use_http2: bool = False, uds: str = "", tcp: bool = True):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.reuse_port = reuse_port and hasattr(socket, "SO_REUSEPORT")
+        self.log_level = log_level
+        self.runtime_options = runtime_options or {}
+        self.use_http2 = use_http2
+        self.uds = uds
+        self.tcp = tcp
+        self.socket_dir = tempfile.mkdtemp(prefix="mcp-workers-")
+        self.shared: Optional[socket.socket] = None
+        self.unix: Optional[socket.socket] = None
+        self.pids: Dict[int, int] = {}  # pid -> worker index
+        self.started: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, index: int):
+        """Fork one worker"""
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                sockets = [self.unix] if self.unix else []
+                if self.tcp:
+                    sockets.append(self.shared or bind_socket(self.host, self.port, True))
+                run_worker(self.app, index, sockets, self.socket_dir, self.log_level, self.runtime_options,
+                           self.use_http2)
+            except BaseException as e:
+                print(f"Worker {index} failed: {e}", file=sys.stderr)
+                code = 1
+            finally:
+                os._exit(code)
+        self.pids[pid] = index
+        self.started[index] = time.monotonic()
+
+    def stop(self, signum=None, frame=None):
+        """Ask every worker to finish its open requests and exit"""
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        """Start the workers and supervise them until stopped"""
+        if self.tcp and not self.reuse_port:
+            # One socket bound here and inherited by every worker
+            self.shared = bind_socket(self.host, self.port, False)
+        if self.uds:
+            # Unix sockets have no SO_REUSEPORT: all workers accept on the one bound here
+            self.unix = runtime.bind_unix_socket(self.uds)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        mode = "SO_REUSEPORT" if self.reuse_port else "shared socket"
+        listeners = ([f"{self.host}:{self.port} ({mode})"] if self.tcp else []) + ([f"unix:{self.uds}"] if self.uds else [])
+        print(f"Starting {self.workers} workers on {', '.join(listeners)} (pid {os.getpid()})")
+        for index in range(self.workers):
+            self.spawn(index)
+        try:
+            while self.pids:
+                try:
+                    pid, status = os.wait()
+                except ChildProcessError:
+                    break
+                index = self.pids.pop(pid, None)
+                if index is None or self.stopping:
+                    continue
+                print(f"Worker {index} (pid {pid}) exited with status {status}; restarting", file=sys.stderr)
+                if time.monotonic() - self.started[index] < 1.0:
+                    # Crashing on startup: do not spin
+                    time.sleep(1.0)
+                self.spawn(index)
+        finally:
+            shutil.rmtree(self.socket_dir, ignore_errors=True)
+            runtime.unlink_unix_socket(self.uds)
+
+
+def main():
+    """Parse arguments, preload the app and supervise the workers"""
+    parser = argparse.ArgumentParser(description="Run an MCP server app in several worker processes")
+    parser.add_argument("app", nargs="?", default="weather:create_app", help="Application as module:attribute")
+    parser.add_argument("--factory", action=argparse.BooleanOptionalAction, default=True,
+                        help="Treat the application as a factory to call")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shared-socket", action="store_true",
+                        help="Bind once and share the socket instead of SO_REUSEPORT")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--loop", choices=("auto",) + runtime.LOOPS, default=runtime.LOOP,
+                        help="Event loop (auto: uvloop when installed)")
+    parser.add_argument("--http", choices=("auto",) + runtime.HTTP_PARSERS, default=runtime.HTTP,
+                        help="HTTP parser (auto: httptools when installed)")
+    parser.add_argument("--http2", action="store_true", default=runtime.HTTP2,
+                        help="Serve HTTP/1.1 and cleartext HTTP/2 (h2c) with Hypercorn")
+    parser.add_argument("--uds", default=runtime.UDS, help="Also listen on this Unix domain socket path")
+    parser.add_argument("--uds-only", action="store_true", default=runtime.UDS_ONLY,
+                        help="Listen on the Unix domain socket only, without TCP")
+    args = parser.parse_args()
+    if args.uds_only and not args.uds:
+        parser.error("--uds-only needs --uds PATH")
+
+    # Imported once here, before forking, so workers share the loaded code
+    sys.path.insert(0, os.getcwd())
+    app = load_app(args.app, args.factory)
+    use_http2 = args.http2 and runtime.configure_http2(args.loop)
+    options = {} if use_http2 else runtime.configure(args.loop, args.http)
+    print(f"Runtime: {runtime.describe()}")
+    Supervisor(app, args.host, args.port, args.workers, reuse_port=not args.shared_socket,
+               log_level=args.log_level, runtime_options=options, use_http2=use_http2,
+               uds=args.uds, tcp=not args.uds_only).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,12 @@ import argparse
 from typing import Any
 
 import httpx
-import uvicorn
 
 from mcp.server.fastmcp import FastMCP
 
+import runtime
+from compression import CompressionMiddleware
+
 
 # Initialize FastMCP server for Weather tools.
 # If json_response is set to True, the server will use JSON responses instead of SSE streams
@@ -100,10 +102,32 @@ Forecast: {period['detailedForecast']}
     return "\n---\n".join(forecasts)
 
 
+def create_app(json_response: bool = False, compress_min_size: int = 1024):
+    """Build the Streamable HTTP app with response compression (also used by launcher.py)."""
+    mcp.settings.json_response = json_response
+    return CompressionMiddleware(mcp.streamable_http_app(), minimum_size=compress_min_size)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run MCP Streamable HTTP based server")
     parser.add_argument("--port", type=int, default=8123, help="Localhost port to listen on")
+    parser.add_argument("--json-response", action="store_true",
+                        help="Answer POSTs with plain JSON instead of an SSE stream, so large results can be compressed")
+    parser.add_argument("--compress-min-size", type=int, default=1024,
+                        help="Smallest response body, in bytes, that gets compressed")
+    parser.add_argument("--loop", choices=("auto",) + runtime.LOOPS, default=runtime.LOOP,
+                        help="Event loop (auto: uvloop when installed)")
+    parser.add_argument("--http", choices=("auto",) + runtime.HTTP_PARSERS, default=runtime.HTTP,
+                        help="HTTP parser (auto: httptools when installed)")
+    parser.add_argument("--http2", action="store_true", default=runtime.HTTP2,
+                        help="Serve HTTP/1.1 and cleartext HTTP/2 (h2c) with Hypercorn")
+    parser.add_argument("--uds", default=runtime.UDS, help="Also listen on this Unix domain socket path")
+    parser.add_argument("--uds-only", action="store_true", default=runtime.UDS_ONLY,
+                        help="Listen on the Unix domain socket only, without TCP")
     args = parser.parse_args()
+    if args.uds_only and not args.uds:
+        parser.error("--uds-only needs --uds PATH")
 
-    # Start the server with Streamable HTTP transport
-    uvicorn.run(mcp.streamable_http_app, host="localhost", port=args.port)
+    # Start the server with Streamable HTTP transport; SSE streams pass through the compression untouched
+    app = create_app(args.json_response, args.compress_min_size)
+    runtime.serve(app, "localhost", args.port, args.loop, args.http, args.http2, args.uds, not args.uds_only)